@@ -6,6 +6,7 @@ Used by monitoring systems (App Runner, ECS, load balancers) to verify service h
 
 from fastapi import APIRouter
 from app.core.config import settings
+from app.services.bedrock import bedrock_client
 
 router = APIRouter()
 
@@ -15,7 +16,9 @@ async def health_check():
     """
     Health check endpoint.
 
-    Returns service status and version information.
+    Returns service status and version information, plus the Bedrock circuit
+    breaker states. An open breaker does not fail the check: reviews are still
+    served (by the pattern-matching fallback).
     Used by AWS App Runner health checks, ECS health checks, and monitoring systems.
 
     Returns:
@@ -25,4 +28,8 @@ async def health_check():
         "status": "ok",
         "version": settings.app_version,
         "service": settings.app_name,
+        "bedrock_circuit": {
+            "text": bedrock_client.text_breaker.state,
+            "vision": bedrock_client.vision_breaker.state,
+        },
     }
@@ -20,6 +20,18 @@ from app.models.analytics import (
 )
 from app.graph.neo4j_client import neo4j_client
 from app.services.analytics_service import AnalyticsService
+from app.services.response_parser import review_parse_stats
+from app.services.review_cache import review_cache
+from app.services.vision_cache import vision_cache
+from app.services.rag import review_batcher, single_flight
+from app.services.admission import admission_controller
+from app.services.knowledge_base import knowledge_base
+from app.services.model_router import route_stats
+from app.services.pending_reviews import pending_reviews
+from app.services.bedrock import bedrock_client
+from app.services.bedrock_governor import bedrock_governor
+from app.services.image_processing import image_pool
+from app.utils.token_counter import token_drift
 from app.middleware.rate_limiter import get_limiter, metrics_rate_limit
 
 router = APIRouter(prefix="/api/metrics", tags=["metrics"])
@@ -135,6 +147,60 @@ async def clear_metrics_cache(request: Request):
     return {"message": "Metrics cache cleared successfully", "status": "ok"}
 
 
+@router.get("/runtime")
+@limiter.limit(metrics_rate_limit())
+async def get_runtime_metrics(request: Request):
+    """
+    In-process review pipeline counters (this worker only, reset on restart).
+
+    Returns:
+        Dict keyed by subsystem:
+        - review_cache: hit/miss/store/eviction counters for the review result cache
+        - vision_cache: exact and perceptual-hash hits, misses and cached rejections served
+        - single_flight: identical concurrent reviews coalesced into one Bedrock call
+        - review_batching: micro-batches, sizes, fallbacks and amortized tokens per review
+        - bedrock_governor: AIMD concurrency window, throttles, retries, quota waits
+        - bedrock_routing: per-endpoint latency/error stats, failovers and hedges
+          (plus routers for models picked by the model cascade)
+        - model_routing: requests, average Bedrock latency and cost per route
+        - bedrock_circuit: breaker state, windowed failure/slow-call rates,
+          fast-failed calls and recent state transitions (text and vision)
+        - admission: concurrency gate, queue depth, rejections and drain rate
+        - response_parser: how Bedrock output was parsed (clean, salvaged, failed)
+          and max_tokens continuations
+        - knowledge_base: mapped index generation, chunk count, searches, reloads
+        - pending_reviews: provisional answers served and background completions
+        - token_estimates: local token count vs. Bedrock-reported input tokens
+          (mean and last drift, calibration ratio used for pre-flight budgets)
+        - image_pool: image decode workers, in-flight and waiting uploads, failures
+    """
+    return {
+        "review_cache": review_cache.stats(),
+        "vision_cache": vision_cache.stats(),
+        "single_flight": single_flight.stats(),
+        "review_batching": review_batcher.stats(),
+        "bedrock_governor": bedrock_governor.stats(),
+        "bedrock_routing": {
+            "text": bedrock_client.text_router.stats(),
+            "vision": bedrock_client.vision_router.stats(),
+            "models": {
+                model_id: router.stats() for model_id, (router, _) in bedrock_client.model_routes.items()
+            },
+        },
+        "model_routing": route_stats.stats(),
+        "bedrock_circuit": {
+            "text": bedrock_client.text_breaker.stats(),
+            "vision": bedrock_client.vision_breaker.stats(),
+        },
+        "admission": admission_controller.stats(),
+        "response_parser": review_parse_stats.stats(),
+        "knowledge_base": knowledge_base.stats(),
+        "pending_reviews": pending_reviews.stats(),
+        "token_estimates": token_drift.stats(),
+        "image_pool": image_pool.stats(),
+    }
+
+
 @router.get("/enhanced", response_model=EnhancedMetricsResponse)
 @limiter.limit(metrics_rate_limit())
 async def get_enhanced_metrics(request: Request):
@@ -4,20 +4,34 @@ Architecture review endpoint.
 Main API for analyzing AWS architectures and returning structured feedback.
 """
 
-from fastapi import APIRouter, HTTPException, File, UploadFile, Form, Request
+from fastapi import APIRouter, HTTPException, File, UploadFile, Form, Request, Response
 from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
 from pydantic import ValidationError
 from typing import Optional
 import logging
 import asyncio
+import json
 import time
 
 from app.models.request import ReviewRequest
 from app.models.response import ReviewResponse
-from app.services.rag import analyze_design, analyze_design_from_image
-from app.utils.exceptions import ImageProcessingException
+from app.services.rag import analyze_design_with_deadline, analyze_design_from_image, stream_analysis
+from app.services.pending_reviews import PENDING, pending_reviews
+from app.services.admission import set_admission_client
+from app.utils.exceptions import (
+    AdmissionRejectedException,
+    ImageProcessingException,
+    ImageTooLargeException,
+    InputTooLargeException,
+)
 from app.graph.neo4j_client import neo4j_client
-from app.middleware.rate_limiter import get_limiter, review_rate_limit
+from app.middleware.rate_limiter import (
+    get_limiter,
+    get_rate_limit_key,
+    metrics_rate_limit,
+    review_rate_limit,
+)
 from app.core.config import settings
 
 router = APIRouter()
@@ -25,6 +39,20 @@ logger = logging.getLogger(__name__)
 limiter = get_limiter()
 
 
+def identify_admission_client(request: Request):
+    """Tag this request for admission fair queuing (API key if sent, else client IP)."""
+    set_admission_client(get_rate_limit_key(request), request.headers.get("X-API-Key"))
+
+
+def overloaded_exception(error: AdmissionRejectedException) -> HTTPException:
+    """503 telling the client when the Bedrock queue should have room again."""
+    return HTTPException(
+        status_code=503,
+        detail=f"{error}. Retry in {error.retry_after}s.",
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
 async def write_to_graph_background(review_response: ReviewResponse):
     """
     Background task to write review to Neo4j knowledge graph.
@@ -55,6 +83,7 @@ async def review_architecture(
     format: str = Form("text"),
     tone: str = Form("standard"),
     provider: str = Form("aws"),
+    latency_budget_ms: Optional[int] = Form(None),
     # Image input (new)
     file: Optional[UploadFile] = File(None),
 ):
@@ -67,15 +96,24 @@ async def review_architecture(
 
     Both cannot be provided simultaneously.
 
+    Text reviews accept latency_budget_ms (default REVIEW_LATENCY_BUDGET_MS).
+    If the AI review takes longer, the rule-based review is returned with
+    metadata.provisional = true, and the AI review replaces it at
+    GET /review/{review_id} once done.
+
     Returns:
         ReviewResponse with risks, score, summary, and metadata
 
     Raises:
         HTTPException 400: Invalid request (missing input, both provided, or validation failed)
+        HTTPException 413: Upload over max_image_size_mb, or design doesn't
+            fit the model's context window (oversized_input_policy "reject")
         HTTPException 500: Analysis failed
+        HTTPException 503: Bedrock admission queue full (with Retry-After)
     """
     # Start processing time tracking
     start_time = time.time()
+    identify_admission_client(request)
 
     if design_text and file:
         raise HTTPException(
@@ -105,7 +143,11 @@ async def review_architecture(
         if design_text:
             try:
                 review_request = ReviewRequest(
-                    design_text=design_text, format=format, tone=tone, provider=provider
+                    design_text=design_text,
+                    format=format,
+                    tone=tone,
+                    provider=provider,
+                    latency_budget_ms=latency_budget_ms,
                 )
             except ValidationError as exc:
                 raise RequestValidationError(exc.errors()) from exc
@@ -125,7 +167,9 @@ async def review_architecture(
             except ValidationError as exc:
                 raise RequestValidationError(exc.errors()) from exc
 
-        review = await analyze_design(review_request)
+        review = await analyze_design_with_deadline(
+            review_request, on_complete=write_to_graph_background
+        )
 
         # Calculate processing time and add to metadata
         processing_time_ms = int((time.time() - start_time) * 1000)
@@ -134,14 +178,23 @@ async def review_architecture(
         review.metadata["processing_time_ms"] = processing_time_ms
         logger.info(f"Text review completed in {processing_time_ms}ms")
 
-        # Write to knowledge graph in background (don't block response)
-        asyncio.create_task(write_to_graph_background(review))
+        # Write to knowledge graph in background (don't block response); a
+        # provisional review is written once its final version is ready
+        if not review.metadata.get("provisional"):
+            asyncio.create_task(write_to_graph_background(review))
 
         return review
 
+    except ImageTooLargeException as e:
+        logger.warning(f"Image upload rejected: {str(e)}")
+        raise HTTPException(status_code=413, detail=str(e))
     except ImageProcessingException as e:
         logger.error(f"Image processing failed: {str(e)}", exc_info=True)
         raise HTTPException(status_code=400, detail=str(e))
+    except AdmissionRejectedException as e:
+        raise overloaded_exception(e)
+    except InputTooLargeException as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except RequestValidationError:
         raise
     except HTTPException:
@@ -151,3 +204,92 @@ async def review_architecture(
         # Include actual error in response for debugging (only in development)
         error_detail = f"Architecture review failed: {str(e)}" if settings.log_level == "DEBUG" else "Architecture review failed"
         raise HTTPException(status_code=500, detail=error_detail)
+
+
+@router.get("/review/{review_id}", response_model=ReviewResponse)
+@limiter.limit(metrics_rate_limit())
+async def get_review(request: Request, response: Response, review_id: str):
+    """
+    Fetch a review that was answered provisionally (latency budget expired).
+
+    Returns:
+        200 with the final AI review once it is done (or the provisional review
+        with metadata.final_status = "failed" if the AI review failed);
+        202 with the provisional review while the AI review is still running
+
+    Raises:
+        HTTPException 404: Unknown review_id, expired, or served by another worker
+    """
+    entry = pending_reviews.get(review_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"No pending review {review_id}")
+
+    status, review = entry
+    if status == PENDING:
+        response.status_code = 202
+        response.headers["Retry-After"] = "1"
+    return review
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Encode one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/review/stream")
+@limiter.limit(review_rate_limit())
+async def review_architecture_stream(request: Request, review_request: ReviewRequest):
+    """
+    Analyze AWS architecture from text and stream results as Server-Sent Events.
+
+    Events (in order):
+    - risk: one RiskItem, emitted as soon as the model finishes writing it
+    - summary: {"summary", "architecture_score"}
+    - topology: ArchitectureTopology (if extracted)
+    - review: the complete ReviewResponse (same shape as POST /review)
+    - error: {"detail"} if the stream is interrupted after risks were sent
+
+    The final review's metadata includes time_to_first_token_ms and
+    time_to_first_risk_ms to track perceived latency.
+
+    Raises:
+        HTTPException 413: Design doesn't fit the model's context window
+        HTTPException 503: Bedrock admission queue full (with Retry-After)
+    """
+    start_time = time.time()
+    identify_admission_client(request)
+    events = stream_analysis(review_request)
+
+    # Pull the first event before committing to a 200 so an admission
+    # rejection can still be returned as a proper 503
+    try:
+        first_event = await events.__anext__()
+    except AdmissionRejectedException as e:
+        raise overloaded_exception(e)
+    except InputTooLargeException as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    async def all_events():
+        yield first_event
+        async for item in events:
+            yield item
+
+    async def event_stream():
+        async for event, payload in all_events():
+            if event == "review":
+                processing_time_ms = int((time.time() - start_time) * 1000)
+                payload["metadata"] = payload.get("metadata") or {}
+                payload["metadata"]["processing_time_ms"] = processing_time_ms
+                logger.info(f"Streamed review completed in {processing_time_ms}ms")
+
+                # Write to knowledge graph in background (don't block response)
+                asyncio.create_task(
+                    write_to_graph_background(ReviewResponse.model_validate(payload))
+                )
+            yield format_sse(event, payload)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -32,6 +32,158 @@ class Settings(BaseSettings):
     bedrock_model_id: str = "anthropic.claude-3-5-haiku-20241022-v1:0"
     disable_bedrock: bool = False
 
+    # Override the bedrock-runtime endpoint, e.g. http://127.0.0.1:8010 for the
+    # local stand-in (python -m app.devtools.fake_bedrock)
+    bedrock_endpoint_url: str | None = None
+
+    # Bedrock transport: boto3 calls run on a dedicated thread pool of this size
+    # (also sizes the botocore connection pool)
+    bedrock_max_workers: int = 16
+
+    # Follow-up requests (assistant prefill) when a review stops at max_tokens
+    bedrock_max_continuations: int = 1
+
+    # Pre-flight token budget: prompts are counted locally before the call and
+    # max_tokens is capped at what is left of the model's context window.
+    # An input that doesn't leave room for the minimum output is truncated
+    # ("truncate") or refused with 413 ("reject") without calling Bedrock.
+    bedrock_context_window_tokens: int = 200000
+    bedrock_min_output_tokens: int = 1024
+    oversized_input_policy: str = "truncate"
+
+    # Mark the static per-tone system prompt as a Bedrock prompt-cache segment
+    bedrock_prompt_caching: bool = True
+
+    # Retrieve only the Well-Architected context chunks relevant to each design
+    # (local hashed TF-IDF) instead of inlining the whole context. Off by default:
+    # with prompt caching the full context is read from cache at 10% of the
+    # input price; compare with scripts/benchmark_context_retrieval.py
+    context_retrieval_enabled: bool = False
+    context_retrieval_token_budget: int = 1500  # Estimated tokens of context per prompt
+    context_retrieval_top_k: int = 8  # Max retrieved chunks (framing + severity always included)
+
+    # "full": the model writes every RiskItem field. "compact": the model returns
+    # rule codes + short findings and the server expands them from
+    # app/services/rule_library.py (far fewer output tokens)
+    review_output_mode: str = "full"
+
+    # Default /review latency budget in ms (None = wait for Bedrock). When it
+    # expires the rule-based review is returned marked provisional and the AI
+    # review finishes in the background, fetchable via GET /review/{review_id}
+    review_latency_budget_ms: int | None = None
+    pending_review_max_entries: int = 1024
+    pending_review_ttl_seconds: float = 3600
+
+    # Fan each review out into concurrent per-pillar-group Bedrock calls with
+    # trimmed context, then merge and de-duplicate the findings. Groups are
+    # separated by ";", pillars within a group by ","
+    review_fanout_enabled: bool = False
+    review_fanout_groups: str = (
+        "security;reliability;performance_efficiency,cost_optimization;"
+        "operational_excellence,sustainability"
+    )
+    review_fanout_dedup_threshold: float = 0.8  # difflib ratio at which two findings are duplicates
+
+    # Ingested AWS documentation index (scripts/ingest_knowledge_base.py); when
+    # set, the most relevant passages are added to each review prompt
+    knowledge_base_index_dir: str | None = None
+    knowledge_base_token_budget: int = 1000
+    knowledge_base_top_k: int = 4
+
+    # Bedrock rate governor (shared by text and vision calls). Size the buckets
+    # to the account's on-demand quota for the model
+    bedrock_requests_per_minute: int = 50
+    bedrock_tokens_per_minute: int = 200000
+    bedrock_max_concurrency: int = 8  # AIMD window ceiling
+    bedrock_min_concurrency: int = 1  # AIMD window floor
+    bedrock_max_retries: int = 3  # Retries after ThrottlingException
+    bedrock_backoff_base_seconds: float = 0.5
+    bedrock_backoff_max_seconds: float = 8.0
+
+    # Review result cache (content-addressed: design text + tone + model + prompt version)
+    review_cache_enabled: bool = True
+    review_cache_max_entries: int = 512
+    review_cache_ttl_seconds: int = 86400  # 24 hours
+    review_cache_path: str | None = None  # SQLite file for the disk tier, e.g. /data/reviews.db
+    review_cache_disk_max_entries: int = 10000
+
+    # Vision result cache: SHA-256 of the processed image, plus a perceptual
+    # (dHash) near-match index for re-exported copies. Rejections are cached too
+    vision_cache_enabled: bool = True
+    vision_cache_max_entries: int = 1000
+    vision_cache_ttl_seconds: int = 86400  # 24 hours
+    vision_cache_hamming_threshold: int = 10  # Of 256 dHash bits; -1 = exact matches only
+
+    # Coalesce identical concurrent reviews into one in-flight Bedrock call
+    single_flight_enabled: bool = True
+
+    # Bedrock endpoint routing: comma-separated region=model pairs in preference
+    # order, e.g. "us-east-2=us.anthropic.claude-3-5-haiku-20241022-v1:0,us-west-2=...".
+    # A bare region uses the default model. Empty = aws_region + bedrock_model_id only
+    bedrock_endpoints: str | None = None
+    bedrock_vision_endpoints: str | None = None  # Same format; defaults to bedrock_vision_model_id
+    bedrock_endpoint_stats_window: int = 50  # Rolling window of calls per endpoint
+    bedrock_endpoint_cooldown_seconds: float = 30.0  # Sideline time per consecutive failure
+    # Hedged requests: fire a second request at the next endpoint once the first
+    # exceeds its observed p95 latency (or the delay below until p95 is known)
+    bedrock_hedging_enabled: bool = False
+    bedrock_hedge_delay_seconds: float = 5.0
+
+    # Model cascade for single-call text reviews: designs scoring at most the
+    # simple threshold (length, AWS services named, topology hints) go to the
+    # fast model with a lower output ceiling, designs scoring at least the
+    # complex threshold escalate. Unset model IDs fall back to bedrock_model_id
+    model_routing_enabled: bool = False
+    model_routing_simple_max_score: float = 4.0
+    model_routing_complex_min_score: float = 14.0
+    model_routing_fast_max_tokens: int = 2048
+    model_routing_complex_max_tokens: int = 8192
+    bedrock_fast_model_id: str | None = None  # e.g. "anthropic.claude-3-haiku-20240307-v1:0"
+    bedrock_complex_model_id: str | None = None  # e.g. "us.anthropic.claude-3-5-sonnet-20241022-v2:0"
+    # USD per million tokens, used for cost_usd when the routed model ID is set
+    bedrock_fast_model_input_cost_per_mtok: float = 0.25
+    bedrock_fast_model_output_cost_per_mtok: float = 1.25
+    bedrock_complex_model_input_cost_per_mtok: float = 3.0
+    bedrock_complex_model_output_cost_per_mtok: float = 15.0
+
+    # Micro-batching: small designs (same tone) arriving within the window are
+    # reviewed together in one Bedrock call, sharing one copy of the system prompt
+    review_batching_enabled: bool = False
+    review_batch_window_ms: int = 50
+    review_batch_max_size: int = 4
+    review_batch_max_design_tokens: int = 500
+
+    # Long-document mode: designs estimated over the token threshold (0 = off)
+    # are split into sections reviewed concurrently, then merged; findings in
+    # the same pillar naming the same services are de-duplicated once their
+    # titles are at least the service threshold similar
+    long_document_token_threshold: int = 3000
+    long_document_section_tokens: int = 2000
+    long_document_max_concurrency: int = 4
+    long_document_service_dedup_threshold: float = 0.5
+
+    # Circuit breaker per router (text, vision): opens when the failure rate or
+    # the share of calls slower than the slow-call threshold crosses its limit
+    # over the rolling window; while open, reviews skip Bedrock and use the
+    # pattern-matching fallback until half-open probe calls succeed
+    bedrock_circuit_enabled: bool = True
+    bedrock_circuit_window: int = 20
+    bedrock_circuit_min_calls: int = 5
+    bedrock_circuit_failure_rate: float = 0.5
+    bedrock_circuit_slow_call_seconds: float = 30.0
+    bedrock_circuit_slow_call_rate: float = 0.8
+    bedrock_circuit_open_seconds: float = 30.0
+    bedrock_circuit_half_open_calls: int = 2
+
+    # Admission control in front of Bedrock: reviews beyond the concurrency gate
+    # queue by priority lane (lower number first), round-robin across clients
+    # within a lane; a full queue or a long wait returns 503 with Retry-After
+    admission_max_concurrency: int = 8
+    admission_max_queue_depth: int = 32
+    admission_queue_timeout_seconds: float = 30.0
+    admission_lane_priorities: str = "text=0,image=1"
+    admission_client_priorities: str | None = None  # X-API-Key overrides, e.g. "partner-key=0"
+
     # Bedrock Vision Model (Claude 3.5 Sonnet v2 - cross-region inference profile)
     # Must use inference profile (us. prefix) for on-demand throughput, not direct model ID
     bedrock_vision_model_id: str = "us.anthropic.claude-3-5-sonnet-20241022-v2:0"
@@ -48,6 +200,27 @@ class Settings(BaseSettings):
         "application/pdf",
     ]
 
+    # Image decode/resize/re-encode runs in a process pool off the event loop
+    # (0 workers = a worker thread instead). At most image_max_concurrent_decodes
+    # uploads are decoded at once, capping peak memory; the rest wait their turn
+    image_process_workers: int = 2
+    image_max_concurrent_decodes: int = 4
+
+    # Decompression-bomb guard: images whose header claims more pixels than
+    # this are refused before decoding (40 MP is e.g. 8000 x 5000)
+    image_max_pixels: int = 40_000_000
+
+    # Vision image preparation: uniform borders are trimmed, then the content is
+    # resized to the largest size costing at most vision_token_budget input
+    # tokens (~width * height / 750) and no longer than vision_max_dimension
+    # (the model downscales anything larger itself). 1400 is what the old
+    # 1024 x 1024 resize cost, so no image gets fewer pixels than before.
+    # The smallest encoding among vision_image_formats is sent
+    vision_token_budget: int = 1400
+    vision_max_dimension: int = 1568
+    image_trim_borders: bool = True
+    vision_image_formats: list[str] = ["png", "webp", "jpeg"]
+
     # Vision API Cost Tracking (Claude 3 Sonnet pricing)
     vision_input_cost_per_1k: float = 0.003   # $3 per MTok
     vision_output_cost_per_1k: float = 0.015  # $15 per MTok
@@ -0,0 +1 @@
+"""Local development tools (offline Bedrock stand-in)."""
@@ -0,0 +1,344 @@
+"""
+Local stand-in for the Bedrock runtime API.
+
+Speaks the same HTTP contract boto3 uses for InvokeModel and
+InvokeModelWithResponseStream, so the real BedrockClient can be pointed at it
+with BEDROCK_ENDPOINT_URL and measured offline:
+- Responses come from a fixture directory (recorded bodies or templates) or a
+  built-in review
+- Latency follows a configurable distribution (fixed, uniform, lognormal)
+- A configurable fraction of calls fail with ThrottlingException or return
+  malformed (truncated) JSON
+
+Run:
+    python -m app.devtools.fake_bedrock --port 8010 --fixtures tests/fixtures/bedrock
+    BEDROCK_ENDPOINT_URL=http://127.0.0.1:8010 AWS_ACCESS_KEY_ID=fake \\
+        AWS_SECRET_ACCESS_KEY=fake uvicorn app.main:app
+
+Fault settings can be changed while running via POST /_fake/config.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import random
+import struct
+import uuid
+import zlib
+from pathlib import Path
+from string import Template
+from typing import Literal
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REVIEW = {
+    "review_id": "$review_id",
+    "architecture_score": 70,
+    "risks": [
+        {
+            "id": "REL-001",
+            "title": "Single Availability Zone Deployment",
+            "severity": "HIGH",
+            "pillar": "reliability",
+            "impact": "Full outage if the Availability Zone fails",
+            "likelihood": "MEDIUM",
+            "finding": "All compute and data resources run in one AZ",
+            "remediation": "Deploy across at least two Availability Zones",
+            "references": [],
+        }
+    ],
+    "summary": "Canned review from the local Bedrock stand-in.",
+    "tone": "standard",
+}
+
+
+class FakeBedrockConfig(BaseModel):
+    """Latency and fault-injection knobs (all adjustable at runtime)."""
+
+    latency_distribution: Literal["fixed", "uniform", "lognormal"] = "fixed"
+    latency_ms: float = 0.0  # Fixed value, uniform centre, or lognormal median
+    latency_spread: float = 0.0  # Uniform: +/- ms; lognormal: sigma
+    throttle_rate: float = 0.0  # Fraction of calls answered with ThrottlingException
+    malformed_rate: float = 0.0  # Fraction of calls whose model text is truncated JSON
+    stream_chunk_chars: int = 32  # Text per content_block_delta when streaming
+    stream_chunk_delay_ms: float = 0.0
+    seed: int | None = None
+
+
+class FixtureStore:
+    """
+    Canned responses loaded from ``*.json`` files in a directory.
+
+    Each file holds one fixture:
+        {"match": ["single az"], "model": "haiku", "response": {...}}
+        {"match": [], "content": {...} | "text", "usage": {...}}
+
+    ``response`` is a recorded InvokeModel body returned verbatim. ``content``
+    is a template for the model text (objects are JSON-encoded); $review_id
+    and $model_id are substituted. ``match`` terms must all appear in the
+    request (case-insensitive) and ``model`` in the model ID. The first match
+    in file-name order wins; a file named ``default.json`` is the fallback.
+    """
+
+    def __init__(self, directory: str | Path | None = None):
+        self.fixtures: list[dict] = []
+        self.default: dict = {"content": DEFAULT_REVIEW}
+        if directory:
+            for path in sorted(Path(directory).glob("*.json")):
+                fixture = json.loads(path.read_text())
+                fixture["name"] = path.stem
+                if path.stem == "default":
+                    self.default = fixture
+                else:
+                    self.fixtures.append(fixture)
+            logger.info(f"Loaded {len(self.fixtures)} Bedrock fixtures from {directory}")
+
+    def find(self, model_id: str, request_text: str) -> dict:
+        text = request_text.lower()
+        for fixture in self.fixtures:
+            if fixture.get("model") and fixture["model"] not in model_id:
+                continue
+            if all(term.lower() in text for term in fixture.get("match", [])):
+                return fixture
+        return self.default
+
+    @staticmethod
+    def render(fixture: dict, model_id: str, request_body: dict) -> dict:
+        """Build an Anthropic Messages response body from a fixture."""
+        if "response" in fixture:
+            return fixture["response"]
+
+        content = fixture.get("content", "")
+        if not isinstance(content, str):
+            content = json.dumps(content)
+        text = Template(content).safe_substitute(
+            review_id=f"review-{uuid.uuid4()}", model_id=model_id
+        )
+        usage = fixture.get("usage") or {
+            "input_tokens": len(json.dumps(request_body)) // 4,
+            "output_tokens": len(text) // 4,
+        }
+        return {
+            "id": f"msg-{uuid.uuid4().hex[:12]}",
+            "type": "message",
+            "role": "assistant",
+            "model": model_id,
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "usage": usage,
+        }
+
+
+def _request_text(body: dict) -> str:
+    """All text in system + messages (what fixtures match against)."""
+    parts = []
+    system = body.get("system")
+    if isinstance(system, str):
+        parts.append(system)
+    elif isinstance(system, list):
+        parts.extend(block.get("text", "") for block in system)
+    for message in body.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            parts.extend(block.get("text", "") for block in content if block.get("type") == "text")
+    return "\n".join(parts)
+
+
+def encode_event_message(headers: dict[str, str], payload: bytes) -> bytes:
+    """
+    Encode one application/vnd.amazon.eventstream message (string headers only).
+
+    Layout: total length, headers length, prelude CRC, headers, payload, message CRC.
+    """
+    encoded_headers = b""
+    for name, value in headers.items():
+        name_bytes, value_bytes = name.encode(), value.encode()
+        encoded_headers += (
+            struct.pack("!B", len(name_bytes)) + name_bytes
+            + struct.pack("!BH", 7, len(value_bytes)) + value_bytes
+        )
+    total_length = 12 + len(encoded_headers) + len(payload) + 4
+    prelude = struct.pack("!II", total_length, len(encoded_headers))
+    message = prelude + struct.pack("!I", zlib.crc32(prelude)) + encoded_headers + payload
+    return message + struct.pack("!I", zlib.crc32(message))
+
+
+def encode_chunk(event: dict) -> bytes:
+    """Wrap one Anthropic stream event as a Bedrock ``chunk`` event."""
+    payload = json.dumps({"bytes": base64.b64encode(json.dumps(event).encode()).decode()})
+    return encode_event_message(
+        {":event-type": "chunk", ":content-type": "application/json", ":message-type": "event"},
+        payload.encode(),
+    )
+
+
+def stream_events(response_body: dict, chunk_chars: int) -> list[dict]:
+    """Split a Messages response into the Anthropic streaming event sequence."""
+    text = "".join(b.get("text", "") for b in response_body.get("content", []))
+    usage = response_body.get("usage", {})
+    events = [
+        {
+            "type": "message_start",
+            "message": {
+                "id": response_body.get("id"),
+                "model": response_body.get("model"),
+                "usage": {k: v for k, v in usage.items() if k != "output_tokens"},
+            },
+        },
+        {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+    ]
+    for i in range(0, len(text), max(chunk_chars, 1)):
+        events.append(
+            {
+                "type": "content_block_delta",
+                "index": 0,
+                "delta": {"type": "text_delta", "text": text[i : i + chunk_chars]},
+            }
+        )
+    events += [
+        {"type": "content_block_stop", "index": 0},
+        {
+            "type": "message_delta",
+            "delta": {"stop_reason": response_body.get("stop_reason")},
+            "usage": {"output_tokens": usage.get("output_tokens", 0)},
+        },
+        {"type": "message_stop"},
+    ]
+    return events
+
+
+def create_fake_bedrock_app(
+    config: FakeBedrockConfig | None = None, fixtures_dir: str | Path | None = None
+) -> FastAPI:
+    """
+    Build the fake Bedrock runtime ASGI app.
+
+    Args:
+        config: Initial latency/fault settings
+        fixtures_dir: Directory of fixture JSON files (None = built-in review)
+
+    Returns:
+        FastAPI app; state.config, state.fixtures and state.stats are live
+    """
+    fake = FastAPI(title="Fake Bedrock Runtime", docs_url=None, redoc_url=None)
+    fake.state.config = config or FakeBedrockConfig()
+    fake.state.fixtures = FixtureStore(fixtures_dir)
+    fake.state.stats = {"calls": 0, "streams": 0, "throttled": 0, "malformed": 0}
+    fake.state.rng = random.Random(fake.state.config.seed)
+
+    def latency_seconds() -> float:
+        cfg: FakeBedrockConfig = fake.state.config
+        rng: random.Random = fake.state.rng
+        if cfg.latency_distribution == "uniform":
+            ms = rng.uniform(cfg.latency_ms - cfg.latency_spread, cfg.latency_ms + cfg.latency_spread)
+        elif cfg.latency_distribution == "lognormal" and cfg.latency_ms > 0:
+            ms = rng.lognormvariate(0, cfg.latency_spread) * cfg.latency_ms
+        else:
+            ms = cfg.latency_ms
+        return max(ms, 0.0) / 1000
+
+    async def prepare(model_id: str, request: Request) -> dict | Response:
+        """Shared path: latency, throttling, fixture lookup, malformed injection."""
+        cfg: FakeBedrockConfig = fake.state.config
+        body = json.loads(await request.body() or b"{}")
+        fake.state.stats["calls"] += 1
+
+        await asyncio.sleep(latency_seconds())
+
+        if fake.state.rng.random() < cfg.throttle_rate:
+            fake.state.stats["throttled"] += 1
+            return JSONResponse(
+                status_code=429,
+                content={"message": "Too many requests, please wait before trying again."},
+                headers={"x-amzn-ErrorType": "ThrottlingException"},
+            )
+
+        fixture = fake.state.fixtures.find(model_id, _request_text(body))
+        response_body = json.loads(json.dumps(FixtureStore.render(fixture, model_id, body)))
+
+        if fake.state.rng.random() < cfg.malformed_rate:
+            fake.state.stats["malformed"] += 1
+            for block in response_body.get("content", []):
+                if block.get("type") == "text":
+                    block["text"] = block["text"][: len(block["text"]) // 2]
+        return response_body
+
+    @fake.post("/model/{model_id:path}/invoke-with-response-stream")
+    async def invoke_model_with_response_stream(model_id: str, request: Request):
+        result = await prepare(model_id, request)
+        if isinstance(result, Response):
+            return result
+        fake.state.stats["streams"] += 1
+        cfg: FakeBedrockConfig = fake.state.config
+
+        async def frames():
+            for event in stream_events(result, cfg.stream_chunk_chars):
+                if cfg.stream_chunk_delay_ms and event["type"] == "content_block_delta":
+                    await asyncio.sleep(cfg.stream_chunk_delay_ms / 1000)
+                yield encode_chunk(event)
+
+        return StreamingResponse(frames(), media_type="application/vnd.amazon.eventstream")
+
+    @fake.post("/model/{model_id:path}/invoke")
+    async def invoke_model(model_id: str, request: Request):
+        result = await prepare(model_id, request)
+        if isinstance(result, Response):
+            return result
+        return JSONResponse(result)
+
+    @fake.get("/_fake/config")
+    async def get_config():
+        return fake.state.config
+
+    @fake.post("/_fake/config")
+    async def update_config(update: dict):
+        fake.state.config = fake.state.config.model_copy(update=update)
+        if "seed" in update:
+            fake.state.rng = random.Random(update["seed"])
+        return fake.state.config
+
+    @fake.get("/_fake/stats")
+    async def get_stats():
+        return fake.state.stats
+
+    return fake
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a local fake Bedrock runtime")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--fixtures", help="Directory of fixture JSON files")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument(
+        "--latency-distribution", choices=["fixed", "uniform", "lognormal"], default="fixed"
+    )
+    parser.add_argument("--latency-spread", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    config = FakeBedrockConfig(
+        latency_distribution=args.latency_distribution,
+        latency_ms=args.latency_ms,
+        latency_spread=args.latency_spread,
+        throttle_rate=args.throttle_rate,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed,
+    )
+    uvicorn.run(create_fake_bedrock_app(config, args.fixtures), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
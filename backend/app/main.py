@@ -10,10 +10,13 @@ from contextlib import asynccontextmanager
 import logging
 from app.core.config import settings
 from app.api import health, review, graph, metrics
+from app.services.bedrock import bedrock_client
+from app.services.image_processing import image_pool
 from app.middleware.rate_limiter import (
     get_limiter,
     rate_limit_exceeded_handler,
 )
+from app.middleware.upload_limit import MULTIPART_OVERHEAD_BYTES, UploadSizeLimitMiddleware
 from slowapi.errors import RateLimitExceeded
 
 logger = logging.getLogger(__name__)
@@ -36,6 +39,8 @@ async def lifespan(_: FastAPI):
     )
     yield
     logger.info("%s shutting down", settings.app_name)
+    bedrock_client.shutdown()
+    image_pool.shutdown()
 
 
 # Create FastAPI app
@@ -54,6 +59,13 @@ limiter = get_limiter()
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
 
+# Refuse oversized uploads while they stream in, not after the form is parsed
+# (added before CORS so the 413 still carries CORS headers)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=settings.max_image_size_mb * 1024 * 1024 + MULTIPART_OVERHEAD_BYTES,
+)
+
 # CORS middleware (allow frontend to call backend)
 app.add_middleware(
     CORSMiddleware,
@@ -0,0 +1,100 @@
+"""
+Request body size limit for multipart uploads.
+
+Starlette parses a multipart form (spooling file parts to memory or a temp
+file) before the endpoint runs, so a size check in the endpoint only happens
+after the whole upload has been received. This middleware enforces the limit
+while the body streams in:
+- A Content-Length over the limit is refused with 413 before reading anything
+- Otherwise body chunks are counted as they arrive, and the request is cut
+  off with 413 as soon as the count crosses the limit (chunked uploads too)
+"""
+
+import json
+import logging
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Boundaries, part headers and the small form fields sent alongside the file
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """Raised from receive() once a streamed multipart body crosses the limit."""
+
+
+class UploadSizeLimitMiddleware:
+    """Refuse multipart request bodies over max_bytes as early as possible."""
+
+    def __init__(self, app: ASGIApp, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self._is_multipart(scope):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = self._header(scope, b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            logger.warning(f"Rejected upload: Content-Length {content_length} over {self.max_bytes} bytes")
+            await self._send_too_large(send)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise UploadTooLargeError(f"Upload body over {self.max_bytes} bytes")
+            return message
+
+        async def guarded_send(message: Message):
+            nonlocal response_started
+            if exceeded:
+                return  # Whatever error the app made of the cut-off body; ours is sent below
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except UploadTooLargeError:
+            pass
+        if exceeded and not response_started:
+            logger.warning(f"Rejected upload after {received} bytes (limit {self.max_bytes})")
+            await self._send_too_large(send)
+
+    @staticmethod
+    def _header(scope: Scope, name: bytes) -> str | None:
+        for key, value in scope.get("headers", []):
+            if key == name:
+                return value.decode("latin-1")
+        return None
+
+    def _is_multipart(self, scope: Scope) -> bool:
+        content_type = self._header(scope, b"content-type") or ""
+        return content_type.lower().startswith("multipart/form-data")
+
+    async def _send_too_large(self, send: Send):
+        limit_mb = (self.max_bytes - MULTIPART_OVERHEAD_BYTES) / (1024 * 1024)
+        body = json.dumps({"detail": f"Upload exceeds maximum {limit_mb:g} MB"}).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                    (b"connection", b"close"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
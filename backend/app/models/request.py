@@ -5,7 +5,7 @@ Pydantic models for validating incoming requests.
 """
 
 from pydantic import BaseModel, Field, field_validator, ConfigDict
-from typing import Literal
+from typing import Literal, Optional
 
 
 class ReviewRequest(BaseModel):
@@ -15,7 +15,8 @@ class ReviewRequest(BaseModel):
         ...,
         description="Architecture description in text or markdown format",
         min_length=50,
-        max_length=10000,
+        # Long documents are reviewed section by section (see long_document_token_threshold)
+        max_length=100000,
         examples=[
             "Single AZ deployment with EC2 instances behind an ALB. "
             "RDS MySQL database in the same AZ. No backups configured."
@@ -37,6 +38,15 @@ class ReviewRequest(BaseModel):
         description="Cloud provider (only 'aws' supported in v1.0)",
     )
 
+    latency_budget_ms: Optional[int] = Field(
+        default=None,
+        ge=100,
+        le=120000,
+        description="Return a provisional rule-based review if the AI review takes longer "
+        "than this (ms); the final review is then available from GET /review/{review_id}",
+        examples=[3000],
+    )
+
     @field_validator("provider")
     @classmethod
     def validate_provider(cls, v: str) -> str:
@@ -0,0 +1,247 @@
+"""
+Admission control in front of Bedrock.
+
+Bounds how many reviews hold Bedrock at once, independent of the AWS quota
+the governor shapes to:
+- Concurrency gate: at most max_concurrency reviews in Bedrock at a time
+- Bounded waiting queue with a per-request wait timeout
+- Priority lanes (text ahead of image by default, overridable per API key)
+- Round-robin between clients within a lane, so one client's burst can't
+  starve everyone else queued behind it
+
+A full queue (or a wait that times out) raises AdmissionRejectedException
+carrying a Retry-After derived from the observed drain rate.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator
+
+from app.core.config import settings
+from app.utils.exceptions import AdmissionRejectedException
+
+logger = logging.getLogger(__name__)
+
+# Who the current request belongs to: (client_id, api_key). Set by the API layer
+# and inherited by tasks the request spawns (e.g. single-flight leaders)
+admission_client: ContextVar[tuple[str, str | None]] = ContextVar(
+    "admission_client", default=("anonymous", None)
+)
+
+# True while the current request already holds a slot, so nested Bedrock work
+# (an image review's text analysis) doesn't queue behind itself
+_admitted: ContextVar[bool] = ContextVar("admission_admitted", default=False)
+
+DEFAULT_LANE_PRIORITY = 0
+RETRY_AFTER_MIN_SECONDS = 1
+RETRY_AFTER_MAX_SECONDS = 300
+
+
+def parse_priorities(spec: str | None) -> dict[str, int]:
+    """Parse ``name=priority,...`` into a dict (lower priority number is served first)."""
+    priorities = {}
+    for entry in (spec or "").split(","):
+        name, sep, value = entry.partition("=")
+        if not sep or not name.strip():
+            continue
+        try:
+            priorities[name.strip()] = int(value)
+        except ValueError:
+            logger.warning(f"Ignoring invalid admission priority entry: {entry!r}")
+    return priorities
+
+
+def set_admission_client(client_id: str, api_key: str | None = None):
+    """Tag the current request context with its client identity."""
+    admission_client.set((api_key or client_id, api_key))
+
+
+class AdmissionController:
+    """
+    Concurrency gate with a bounded, priority-laned, per-client fair queue.
+
+    Waiters are plain futures; a finishing request hands its slot directly to
+    the next waiter, so in_flight never dips and a new arrival can't jump the
+    queue.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue_depth: int,
+        queue_timeout_seconds: float,
+        lane_priorities: dict[str, int] | None = None,
+        client_priorities: dict[str, int] | None = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.lane_priorities = lane_priorities or {}
+        self.client_priorities = client_priorities or {}
+
+        self.in_flight = 0
+        self.queued = 0
+        # priority -> client_id -> that client's waiters (FIFO)
+        self._queues: dict[int, OrderedDict[str, deque[asyncio.Future]]] = {}
+        self._completions: deque[float] = deque(maxlen=100)
+
+        self.admitted = 0
+        self.queued_total = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+
+    def priority_for(self, lane: str, api_key: str | None) -> int:
+        """API-key override if configured, else the lane's priority."""
+        if api_key and api_key in self.client_priorities:
+            return self.client_priorities[api_key]
+        return self.lane_priorities.get(lane, DEFAULT_LANE_PRIORITY)
+
+    def drain_rate(self) -> float | None:
+        """Completions per second over the recent window, or None if unknown."""
+        if len(self._completions) < 2:
+            return None
+        span = self._completions[-1] - self._completions[0]
+        if span <= 0:
+            return None
+        return (len(self._completions) - 1) / span
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue is expected to drain."""
+        rate = self.drain_rate()
+        if rate is None:
+            seconds = self.queue_timeout_seconds
+        else:
+            seconds = (self.queued + 1) / rate
+        return int(min(RETRY_AFTER_MAX_SECONDS, max(RETRY_AFTER_MIN_SECONDS, math.ceil(seconds))))
+
+    async def acquire(self, lane: str = "text"):
+        """
+        Take a slot, queueing if the gate is full.
+
+        Args:
+            lane: Priority lane name ("text", "image", ...)
+
+        Raises:
+            AdmissionRejectedException: Queue full, or no slot within the wait timeout
+        """
+        if self.in_flight < self.max_concurrency and self.queued == 0:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+
+        if self.queued >= self.max_queue_depth:
+            self.rejected_full += 1
+            retry_after = self.retry_after()
+            logger.warning(f"Admission queue full ({self.queued}); retry after {retry_after}s")
+            raise AdmissionRejectedException("Review queue is full", retry_after=retry_after)
+
+        client_id, api_key = admission_client.get()
+        priority = self.priority_for(lane, api_key)
+        waiter = asyncio.get_running_loop().create_future()
+        lane_queue = self._queues.setdefault(priority, OrderedDict())
+        lane_queue.setdefault(client_id, deque()).append(waiter)
+        self.queued += 1
+        self.queued_total += 1
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.queue_timeout_seconds)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed over as we gave up: pass it on
+                self.release(completed=False)
+            else:
+                waiter.cancel()
+                self._discard(priority, client_id, waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected_timeout += 1
+                raise AdmissionRejectedException(
+                    "Timed out waiting for review capacity", retry_after=self.retry_after()
+                ) from None
+            raise
+
+        self.admitted += 1
+
+    def _discard(self, priority: int, client_id: str, waiter: asyncio.Future):
+        """Remove an abandoned waiter from its client queue."""
+        lane_queue = self._queues.get(priority, {})
+        waiters = lane_queue.get(client_id)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            self.queued -= 1
+            if not waiters:
+                del lane_queue[client_id]
+
+    def _next_waiter(self) -> asyncio.Future | None:
+        """Pop the next waiter: best lane first, then round-robin across its clients."""
+        for priority in sorted(self._queues):
+            lane_queue = self._queues[priority]
+            while lane_queue:
+                client_id, waiters = next(iter(lane_queue.items()))
+                waiter = waiters.popleft()
+                self.queued -= 1
+                del lane_queue[client_id]
+                if waiters:
+                    lane_queue[client_id] = waiters  # Back of the rotation
+                if not waiter.done():
+                    return waiter
+        return None
+
+    def release(self, completed: bool = True):
+        """Give the slot to the next waiter, or free it."""
+        if completed:
+            self._completions.append(time.monotonic())
+        waiter = self._next_waiter()
+        if waiter is not None:
+            waiter.set_result(None)  # Slot transfers; in_flight unchanged
+        else:
+            self.in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self, lane: str = "text") -> AsyncIterator[None]:
+        """
+        Hold a slot for the duration of the block (re-entrant per request).
+
+        Args:
+            lane: Priority lane name ("text", "image", ...)
+        """
+        if _admitted.get():
+            yield
+            return
+
+        await self.acquire(lane)
+        token = _admitted.set(True)
+        try:
+            yield
+        finally:
+            _admitted.reset(token)
+            self.release()
+
+    def stats(self) -> dict:
+        """Gate and queue state for the metrics endpoint."""
+        rate = self.drain_rate()
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queue_depth": self.max_queue_depth,
+            "admitted": self.admitted,
+            "queued_total": self.queued_total,
+            "rejected_full": self.rejected_full,
+            "rejected_timeout": self.rejected_timeout,
+            "drain_rate_per_second": round(rate, 3) if rate is not None else None,
+        }
+
+
+# Singleton instance
+admission_controller = AdmissionController(
+    max_concurrency=settings.admission_max_concurrency,
+    max_queue_depth=settings.admission_max_queue_depth,
+    queue_timeout_seconds=settings.admission_queue_timeout_seconds,
+    lane_priorities=parse_priorities(settings.admission_lane_priorities),
+    client_priorities=parse_priorities(settings.admission_client_priorities),
+)
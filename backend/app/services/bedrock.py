@@ -4,23 +4,93 @@ Amazon Bedrock client wrapper.
 Phase 1: Real Bedrock integration with Claude 3.5 Haiku via boto3
 """
 
+import asyncio
 import json
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator
+
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 from app.core.config import settings
+from app.services.bedrock_governor import bedrock_governor, is_throttling_error
+from app.services.bedrock_routing import (
+    BedrockEndpoint,
+    EndpointRouter,
+    is_failover_error,
+    parse_endpoints,
+)
+from app.services.circuit_breaker import CircuitBreaker, create_breaker
+from app.utils.token_counter import estimate_tokens
 from app.utils.exceptions import (
+    BedrockException,
     BedrockThrottlingException,
     BedrockAccessDeniedException,
     BedrockModelNotFoundException,
     BedrockValidationException,
     BedrockServiceException,
+    BedrockCircuitOpenException,
 )
 
 logger = logging.getLogger(__name__)
 
 
+def vision_request_tokens(body: dict, image_tokens: int | None = None) -> int:
+    """
+    Tokens to reserve with the governor for a vision request.
+
+    Args:
+        body: Anthropic Messages request body (string system prompt, one user turn)
+        image_tokens: Estimated tokens of the attached image (image_processing's
+            estimated_vision_tokens); defaults to settings.vision_token_budget
+
+    Returns:
+        Image + prompt text + max_tokens estimate
+    """
+    text = body["system"] + "".join(part.get("text", "") for part in body["messages"][0]["content"])
+    return (image_tokens or settings.vision_token_budget) + estimate_tokens(text) + body["max_tokens"]
+
+
+def usage_tokens(response_body: dict) -> int:
+    """Total tokens billed for a response (input, cached input and output)."""
+    usage = response_body.get("usage", {})
+    return (
+        usage.get("input_tokens", 0)
+        + usage.get("output_tokens", 0)
+        + (usage.get("cache_read_input_tokens") or 0)
+        + (usage.get("cache_creation_input_tokens") or 0)
+    )
+
+
+def map_client_error(error: ClientError) -> BedrockException:
+    """
+    Map a botocore ClientError to the matching Bedrock exception.
+
+    Args:
+        error: ClientError raised by the bedrock-runtime client
+
+    Returns:
+        BedrockException subclass instance (caller raises it)
+    """
+    error_code = error.response["Error"]["Code"]
+    error_message = error.response["Error"]["Message"]
+
+    if error_code == "ThrottlingException":
+        return BedrockThrottlingException(f"Rate limit hit: {error_message}")
+    elif error_code == "AccessDeniedException":
+        return BedrockAccessDeniedException(f"IAM permissions insufficient: {error_message}")
+    elif error_code == "ResourceNotFoundException":
+        return BedrockModelNotFoundException(f"Model not found: {error_message}")
+    elif error_code == "ValidationException":
+        return BedrockValidationException(f"Request validation failed: {error_message}")
+    else:
+        return BedrockServiceException(f"Bedrock service error: {error_message}")
+
+
 class BedrockClient:
     """
     Wrapper for Amazon Bedrock API calls.
@@ -40,37 +110,232 @@ class BedrockClient:
             if not self.region or self.region.strip() == "":
                 raise ValueError("AWS_REGION cannot be empty. Set AWS_REGION environment variable or use default 'us-east-2'")
 
-            self.client = boto3.client(
-                "bedrock-runtime",
-                region_name=self.region,
-                aws_access_key_id=settings.aws_access_key_id,
-                aws_secret_access_key=settings.aws_secret_access_key,
-            )
+            self.client = self._create_client(self.region)
         except Exception as e:
             logger.error(f"Failed to initialize Bedrock client: {e}")
             raise
 
+        # Clients for secondary regions, created on first use
+        self._regional_clients: dict[str, object] = {}
+
+        # Text and vision calls each route across their own endpoint list
+        self.text_router = EndpointRouter(
+            parse_endpoints(settings.bedrock_endpoints, self.region, self.model_id)
+        )
+        self.vision_router = EndpointRouter(
+            parse_endpoints(
+                settings.bedrock_vision_endpoints, self.region, settings.bedrock_vision_model_id
+            )
+        )
+
+        # One circuit breaker per router: a vision outage should not stop text reviews
+        self.text_breaker = create_breaker("text")
+        self.vision_breaker = create_breaker("vision")
+
+        # Routers (and breakers) for text calls pinned to another model by the
+        # model cascade, created on first use
+        self.model_routes: dict[str, tuple[EndpointRouter, CircuitBreaker]] = {}
+
+        # boto3 is synchronous: run InvokeModel on a bounded, dedicated pool so a
+        # 2-8s model call never blocks the event loop (health, metrics, graph reads)
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.bedrock_max_workers,
+            thread_name_prefix="bedrock",
+        )
+
+    @staticmethod
+    def _create_client(region: str):
+        """Create a bedrock-runtime client for one region."""
+        return boto3.client(
+            "bedrock-runtime",
+            region_name=region,
+            endpoint_url=settings.bedrock_endpoint_url,
+            aws_access_key_id=settings.aws_access_key_id,
+            aws_secret_access_key=settings.aws_secret_access_key,
+            # Connection pool sized to the executor so no worker waits on a socket.
+            # Retries belong to the governor and router, not botocore: a hidden
+            # in-SDK retry would delay failover to another region
+            config=Config(
+                max_pool_connections=settings.bedrock_max_workers,
+                retries={"total_max_attempts": 1},
+            ),
+        )
+
+    def _client_for(self, region: str):
+        """bedrock-runtime client for ``region`` (the primary client for the home region)."""
+        if region == self.region:
+            return self.client
+        if region not in self._regional_clients:
+            logger.info(f"Initializing Bedrock client in secondary region {region}")
+            self._regional_clients[region] = self._create_client(region)
+        return self._regional_clients[region]
+
+    def _invoke_model_sync(self, endpoint: BedrockEndpoint, body: str) -> dict:
+        """
+        Blocking InvokeModel call plus response body read.
+
+        Runs on the Bedrock executor thread, never on the event loop.
+
+        Returns:
+            Parsed JSON response body
+        """
+        response = self._client_for(endpoint.region).invoke_model(
+            modelId=endpoint.model_id,
+            body=body,
+            contentType="application/json",
+            accept="application/json",
+        )
+        return json.loads(response["body"].read())
+
+    def _text_route(self, model_id: str | None) -> tuple[EndpointRouter, CircuitBreaker]:
+        """
+        Router and breaker for a text call.
+
+        The default model uses the configured text endpoints. Another model
+        (model cascade) gets the same regions with that model ID, and its own
+        breaker so a misconfigured routed model can't trip the default one.
+        """
+        if not model_id or model_id == self.model_id:
+            return self.text_router, self.text_breaker
+        if model_id not in self.model_routes:
+            regions = ",".join(endpoint.region for endpoint in self.text_router.endpoints)
+            self.model_routes[model_id] = (
+                EndpointRouter(parse_endpoints(regions, self.region, model_id)),
+                create_breaker(model_id),
+            )
+        return self.model_routes[model_id]
+
+    @staticmethod
+    def _check_circuit(breaker: CircuitBreaker):
+        """Fail fast while ``breaker`` refuses calls (counts as an allowed call otherwise)."""
+        if settings.bedrock_circuit_enabled and not breaker.allow():
+            raise BedrockCircuitOpenException(
+                f"Bedrock {breaker.name} circuit is {breaker.state}; skipping call",
+                retry_after=breaker.retry_after_seconds(),
+            )
+
+    @staticmethod
+    def _record_circuit(breaker: CircuitBreaker, latency_seconds: float | None, error: BaseException | None):
+        """Feed one allowed call's outcome to ``breaker``."""
+        if not settings.bedrock_circuit_enabled:
+            return
+        if isinstance(error, asyncio.CancelledError):
+            breaker.release()
+            return
+        # Request errors (ValidationException, bad JSON) say nothing about Bedrock health
+        failed = error is not None and is_failover_error(error)
+        breaker.record(latency_seconds, ok=not failed)
+
+    async def _invoke_model(
+        self,
+        router: EndpointRouter,
+        breaker: CircuitBreaker,
+        body: str,
+        estimated_tokens: int,
+    ) -> tuple[dict, BedrockEndpoint, bool]:
+        """
+        Non-blocking InvokeModel: awaits the call on the dedicated Bedrock executor.
+
+        The circuit breaker refuses the call outright while open. Otherwise the
+        router picks the healthiest endpoint and fails over (or hedges) to
+        the next one; every attempt passes through the shared rate governor,
+        which shapes load to the quota and retries throttled attempts with
+        jittered backoff on the last endpoint in line.
+
+        Args:
+            router: Endpoint router (text or vision)
+            breaker: Circuit breaker for that router
+            body: JSON-encoded request body
+            estimated_tokens: Expected input + output tokens (for the token bucket)
+
+        Returns:
+            (parsed JSON response body, endpoint that answered, hedged)
+
+        Raises:
+            BedrockCircuitOpenException: Breaker open; Bedrock was not called
+            ClientError, json.JSONDecodeError: Propagated for callers to map
+        """
+        self._check_circuit(breaker)
+        loop = asyncio.get_running_loop()
+
+        async def invoke(endpoint: BedrockEndpoint, max_retries: int | None) -> dict:
+            return await bedrock_governor.call(
+                lambda: loop.run_in_executor(
+                    self._executor, self._invoke_model_sync, endpoint, body
+                ),
+                estimated_tokens=estimated_tokens,
+                actual_tokens=usage_tokens,
+                max_retries=max_retries,
+            )
+
+        start = time.perf_counter()
+        try:
+            result = await router.call(invoke)
+        except BaseException as e:
+            self._record_circuit(breaker, time.perf_counter() - start, e)
+            raise
+        self._record_circuit(breaker, time.perf_counter() - start, None)
+        return result
+
+    @staticmethod
+    def _system_blocks(system_prompt: str) -> str | list[dict]:
+        """
+        Mark the static system prompt as a cacheable prompt segment.
+
+        The system prompt only varies by tone (design text lives in the user
+        message), so Bedrock prompt caching can serve it from cache on every
+        request after the first per tone.
+        """
+        if not settings.bedrock_prompt_caching:
+            return system_prompt
+        return [
+            {
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+
+    @staticmethod
+    def _messages(user_message: str, assistant_prefill: str | None = None) -> list[dict]:
+        """User turn, plus a partial assistant turn for the model to continue."""
+        messages = [{"role": "user", "content": user_message}]
+        if assistant_prefill:
+            # Bedrock rejects a final assistant turn ending in whitespace
+            messages.append({"role": "assistant", "content": assistant_prefill.rstrip()})
+        return messages
+
+    def shutdown(self):
+        """Release executor threads (called from the app lifespan on shutdown)."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
     async def generate(
         self,
         system_prompt: str,
         user_message: str,
         max_tokens: int = 4096,
         temperature: float = 0.3,
+        assistant_prefill: str | None = None,
+        model_id: str | None = None,
     ) -> dict:
         """
-        Call Bedrock InvokeModel with Claude 3.5 Haiku.
+        Call Bedrock InvokeModel with Claude 3.5 Haiku (or the model given).
 
         Args:
             system_prompt: System instructions with AWS Well-Architected context
             user_message: User's architecture description and analysis request
             max_tokens: Maximum tokens in response (default: 4096)
             temperature: Randomness (0.0-1.0, default: 0.3 for deterministic)
+            assistant_prefill: Text the assistant turn already contains (used to
+                continue a response cut off at max_tokens); content is only the new text
+            model_id: Model to call instead of bedrock_model_id (model cascade)
 
         Returns:
             dict with keys:
                 - content (str): Generated text (JSON string)
-                - usage (dict): {input_tokens: int, output_tokens: int}
-                - metadata (dict): {model_id: str, stop_reason: str}
+                - usage (dict): {input_tokens, output_tokens, cache_read_input_tokens,
+                  cache_creation_input_tokens} (cache fields present when caching applies)
+                - metadata (dict): {model_id: str, region: str, hedged: bool, stop_reason: str}
 
         Raises:
             BedrockThrottlingException: Rate limit hit
@@ -84,31 +349,34 @@ class BedrockClient:
             "anthropic_version": "bedrock-2023-05-31",
             "max_tokens": max_tokens,
             "temperature": temperature,
-            "system": system_prompt,
-            "messages": [{"role": "user", "content": user_message}],
+            "system": self._system_blocks(system_prompt),
+            "messages": self._messages(user_message, assistant_prefill),
         })
 
         try:
-            logger.info(f"Calling Bedrock InvokeModel with model {self.model_id}")
-
-            # Call Bedrock InvokeModel
-            response = self.client.invoke_model(
-                modelId=self.model_id,
-                body=body,
-                contentType="application/json",
-                accept="application/json",
+            logger.info("Calling Bedrock InvokeModel")
+
+            # Call Bedrock InvokeModel (off the event loop)
+            router, breaker = self._text_route(model_id)
+            response_body, endpoint, hedged = await self._invoke_model(
+                router,
+                breaker,
+                body,
+                estimated_tokens=estimate_tokens(
+                    system_prompt + user_message + (assistant_prefill or "")
+                ) + max_tokens,
             )
 
-            # Parse response
-            response_body = json.loads(response["body"].read())
-
             logger.info(
                 "Bedrock call successful",
                 extra={
-                    "model_id": self.model_id,
+                    "model_id": endpoint.model_id,
+                    "region": endpoint.region,
                     "stop_reason": response_body.get("stop_reason"),
                     "input_tokens": response_body.get("usage", {}).get("input_tokens", 0),
                     "output_tokens": response_body.get("usage", {}).get("output_tokens", 0),
+                    "cache_read_input_tokens": response_body.get("usage", {}).get("cache_read_input_tokens", 0),
+                    "cache_creation_input_tokens": response_body.get("usage", {}).get("cache_creation_input_tokens", 0),
                 },
             )
 
@@ -116,7 +384,9 @@ class BedrockClient:
                 "content": response_body["content"][0]["text"],
                 "usage": response_body.get("usage", {}),
                 "metadata": {
-                    "model_id": self.model_id,
+                    "model_id": endpoint.model_id,
+                    "region": endpoint.region,
+                    "hedged": hedged,
                     "stop_reason": response_body.get("stop_reason"),
                 },
             }
@@ -127,31 +397,191 @@ class BedrockClient:
 
             logger.error(
                 f"Bedrock API error: {error_code} - {error_message}",
-                extra={"error_code": error_code, "model_id": self.model_id},
+                extra={"error_code": error_code, "model_id": model_id or self.model_id},
             )
 
             # Map AWS error codes to custom exceptions
-            if error_code == "ThrottlingException":
-                raise BedrockThrottlingException(f"Rate limit hit: {error_message}")
-            elif error_code == "AccessDeniedException":
-                raise BedrockAccessDeniedException(f"IAM permissions insufficient: {error_message}")
-            elif error_code == "ResourceNotFoundException":
-                raise BedrockModelNotFoundException(f"Model not found: {error_message}")
-            elif error_code == "ValidationException":
-                raise BedrockValidationException(f"Request validation failed: {error_message}")
-            else:
-                raise BedrockServiceException(f"Bedrock service error: {error_message}")
+            raise map_client_error(e)
 
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse Bedrock response body: {e}")
             raise BedrockServiceException(f"Invalid JSON in Bedrock response: {e}")
 
+        except BedrockCircuitOpenException:
+            raise
+
         except Exception as e:
             logger.error(f"Unexpected error calling Bedrock: {e}")
             raise BedrockServiceException(f"Unexpected error: {e}")
 
+    def _stream_model_sync(
+        self, endpoint: BedrockEndpoint, body: str, emit, stop: threading.Event
+    ) -> None:
+        """
+        Blocking InvokeModelWithResponseStream loop.
+
+        Runs on the Bedrock executor thread and hands every decoded Anthropic
+        stream event to ``emit`` (thread-safe callback into the event loop).
+        Stops early once ``stop`` is set (consumer went away).
+        """
+        response = self._client_for(endpoint.region).invoke_model_with_response_stream(
+            modelId=endpoint.model_id,
+            body=body,
+            contentType="application/json",
+            accept="application/json",
+        )
+        for event in response["body"]:
+            if stop.is_set():
+                break
+            chunk = event.get("chunk")
+            if chunk:
+                emit(json.loads(chunk["bytes"]))
+
+    async def generate_stream(
+        self,
+        system_prompt: str,
+        user_message: str,
+        max_tokens: int = 4096,
+        temperature: float = 0.3,
+    ) -> AsyncIterator[dict]:
+        """
+        Call Bedrock InvokeModelWithResponseStream and yield text as it arrives.
+
+        Same request body as generate(); the blocking event-stream read runs on
+        the Bedrock executor and events are bridged to the caller via a queue.
+        Goes to the healthiest text endpoint; streams are neither hedged nor
+        failed over (text may already be on the wire), but failures still count
+        against the endpoint's health.
+
+        Yields:
+            dict events:
+                - {"type": "text", "text": str}: Next text delta
+                - {"type": "done", "usage": dict, "metadata": dict}: Final usage
+
+        Raises:
+            BedrockException subclasses: Same error mapping as generate()
+        """
+        body = json.dumps({
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "system": self._system_blocks(system_prompt),
+            "messages": [{"role": "user", "content": user_message}],
+        })
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        end_of_stream = object()
+        stop = threading.Event()
+
+        def emit(event):
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+        def run():
+            try:
+                self._stream_model_sync(endpoint, body, emit, stop)
+            except Exception as e:  # Surface thread errors to the consumer
+                emit(e)
+            finally:
+                emit(end_of_stream)
+
+        self._check_circuit(self.text_breaker)
+        endpoint = self.text_router.ordered()[0]
+        estimated_tokens = estimate_tokens(system_prompt + user_message) + max_tokens
+        try:
+            await bedrock_governor.acquire(estimated_tokens)
+        except BaseException:
+            self.text_breaker.release()
+            raise
+        outcome = "error"
+        stream_error: BaseException | None = None
+
+        logger.info(
+            f"Calling Bedrock InvokeModelWithResponseStream with {endpoint.name}"
+        )
+        stream_start = time.perf_counter()
+        loop.run_in_executor(self._executor, run)
+
+        usage = {
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cache_read_input_tokens": 0,
+            "cache_creation_input_tokens": 0,
+        }
+        stop_reason = None
+
+        try:
+            while True:
+                event = await queue.get()
+                if event is end_of_stream:
+                    break
+                if isinstance(event, Exception):
+                    endpoint.record(time.perf_counter() - stream_start, ok=False)
+                    stream_error = event
+                if isinstance(event, ClientError):
+                    logger.error(f"Bedrock stream error: {event}")
+                    if is_throttling_error(event):
+                        outcome = "throttled"
+                    raise map_client_error(event)
+                if isinstance(event, Exception):
+                    logger.error(f"Unexpected error streaming from Bedrock: {event}")
+                    raise BedrockServiceException(f"Unexpected stream error: {event}")
+
+                event_type = event.get("type")
+                if event_type == "message_start":
+                    message_usage = event.get("message", {}).get("usage", {})
+                    for key in usage:
+                        usage[key] = message_usage.get(key, usage[key])
+                elif event_type == "content_block_delta":
+                    delta = event.get("delta", {})
+                    if delta.get("type") == "text_delta":
+                        yield {"type": "text", "text": delta.get("text", "")}
+                elif event_type == "message_delta":
+                    stop_reason = event.get("delta", {}).get("stop_reason")
+                    usage["output_tokens"] = event.get("usage", {}).get("output_tokens", 0)
+            outcome = "success"
+            # Successes reset the endpoint's failure streak, as for generate()
+            endpoint.record(time.perf_counter() - stream_start, ok=True)
+        finally:
+            stop.set()
+            # Streams are not retried (text may already be on the wire); the
+            # outcome still feeds the shared AIMD window
+            bedrock_governor.release(
+                outcome,
+                estimated_tokens,
+                usage_tokens({"usage": usage}) if outcome == "success" else None,
+            )
+            # Stream duration tracks output length, not health: never counted as slow
+            if outcome == "success" or stream_error is not None:
+                self._record_circuit(self.text_breaker, None, stream_error)
+            else:
+                self.text_breaker.release()  # Consumer went away mid-stream
+
+        logger.info(
+            "Bedrock stream complete",
+            extra={
+                "model_id": endpoint.model_id,
+                "region": endpoint.region,
+                "stop_reason": stop_reason,
+                "input_tokens": usage["input_tokens"],
+                "output_tokens": usage["output_tokens"],
+                "cache_read_input_tokens": usage["cache_read_input_tokens"],
+                "cache_creation_input_tokens": usage["cache_creation_input_tokens"],
+            },
+        )
+
+        yield {
+            "type": "done",
+            "usage": usage,
+            "metadata": {
+                "model_id": endpoint.model_id,
+                "region": endpoint.region,
+                "stop_reason": stop_reason,
+            },
+        }
+
     async def extract_architecture_from_image(
-        self, image_data: str, image_format: str
+        self, image_data: str, image_format: str, image_tokens: int | None = None
     ) -> dict:
         """
         Extract AWS architecture description from diagram using Bedrock vision.
@@ -162,6 +592,8 @@ class BedrockClient:
         Args:
             image_data: Base64-encoded image data
             image_format: "png" | "jpeg" | "pdf"
+            image_tokens: Estimated image input tokens, reserved with the rate
+                governor (default settings.vision_token_budget)
 
         Returns:
             dict with:
@@ -205,16 +637,13 @@ class BedrockClient:
 
         try:
             # Call Bedrock with vision model
-            response = self.client.invoke_model(
-                modelId=settings.bedrock_vision_model_id,
-                body=json.dumps(body),
-                contentType="application/json",
-                accept="application/json",
+            response_body, endpoint, _ = await self._invoke_model(
+                self.vision_router,
+                self.vision_breaker,
+                json.dumps(body),
+                estimated_tokens=vision_request_tokens(body, image_tokens),
             )
 
-            # Parse response
-            response_body = json.loads(response["body"].read())
-
             # Extract content from response
             content = ""
             if "content" in response_body:
@@ -235,7 +664,8 @@ class BedrockClient:
                 "content": content,
                 "usage": response_body.get("usage", {}),
                 "metadata": {
-                    "model_id": settings.bedrock_vision_model_id,
+                    "model_id": endpoint.model_id,
+                    "region": endpoint.region,
                     "stop_reason": response_body.get("stop_reason"),
                 },
             }
@@ -264,12 +694,15 @@ class BedrockClient:
             logger.error(f"Failed to parse Bedrock vision response: {e}")
             raise BedrockServiceException(f"Invalid JSON in vision response: {e}")
 
+        except BedrockCircuitOpenException:
+            raise
+
         except Exception as e:
             logger.error(f"Unexpected error calling Bedrock vision: {e}")
             raise BedrockServiceException(f"Unexpected vision error: {e}")
 
     async def extract_and_validate_architecture(
-        self, image_data: str, image_format: str
+        self, image_data: str, image_format: str, image_tokens: int | None = None
     ) -> dict:
         """
         OPTIMIZED: Combined validation + extraction in single Bedrock call.
@@ -280,6 +713,8 @@ class BedrockClient:
         Args:
             image_data: Base64-encoded image data
             image_format: "png" | "jpeg" | "pdf"
+            image_tokens: Estimated image input tokens, reserved with the rate
+                governor (default settings.vision_token_budget)
 
         Returns:
             dict with:
@@ -329,16 +764,13 @@ class BedrockClient:
 
         try:
             # Call Bedrock with vision model (single call!)
-            response = self.client.invoke_model(
-                modelId=settings.bedrock_vision_model_id,
-                body=json.dumps(body),
-                contentType="application/json",
-                accept="application/json",
+            response_body, endpoint, _ = await self._invoke_model(
+                self.vision_router,
+                self.vision_breaker,
+                json.dumps(body),
+                estimated_tokens=vision_request_tokens(body, image_tokens),
             )
 
-            # Parse response
-            response_body = json.loads(response["body"].read())
-
             # Extract content
             content = ""
             if "content" in response_body:
@@ -364,7 +796,8 @@ class BedrockClient:
             # Add usage and metadata
             result["usage"] = response_body.get("usage", {})
             result["metadata"] = {
-                "model_id": settings.bedrock_vision_model_id,
+                "model_id": endpoint.model_id,
+                "region": endpoint.region,
                 "stop_reason": response_body.get("stop_reason"),
                 "optimization": "combined_validation_extraction",
             }
@@ -397,6 +830,9 @@ class BedrockClient:
             else:
                 raise BedrockServiceException(f"Combined API error: {error_message}")
 
+        except BedrockCircuitOpenException:
+            raise
+
         except Exception as e:
             logger.error(f"Unexpected error during combined validation+extraction: {e}")
             # Fallback: assume valid if unexpected error
@@ -412,7 +848,7 @@ class BedrockClient:
             }
 
     async def validate_architecture_diagram(
-        self, image_data: str, image_format: str
+        self, image_data: str, image_format: str, image_tokens: int | None = None
     ) -> dict:
         """
         Validate if an image is a valid architecture diagram before extraction.
@@ -423,6 +859,8 @@ class BedrockClient:
         Args:
             image_data: Base64-encoded image data
             image_format: "png" | "jpeg" | "pdf"
+            image_tokens: Estimated image input tokens, reserved with the rate
+                governor (default settings.vision_token_budget)
 
         Returns:
             dict with:
@@ -467,16 +905,13 @@ class BedrockClient:
 
         try:
             # Call Bedrock with vision model
-            response = self.client.invoke_model(
-                modelId=settings.bedrock_vision_model_id,
-                body=json.dumps(body),
-                contentType="application/json",
-                accept="application/json",
+            response_body, endpoint, _ = await self._invoke_model(
+                self.vision_router,
+                self.vision_breaker,
+                json.dumps(body),
+                estimated_tokens=vision_request_tokens(body, image_tokens),
             )
 
-            # Parse response
-            response_body = json.loads(response["body"].read())
-
             # Extract content
             content = ""
             if "content" in response_body:
@@ -520,6 +955,9 @@ class BedrockClient:
             else:
                 raise BedrockServiceException(f"Bedrock validation error: {error_message}")
 
+        except BedrockCircuitOpenException:
+            raise
+
         except Exception as e:
             logger.error(f"Unexpected error during validation: {e}")
             # Fallback: assume valid if unexpected error
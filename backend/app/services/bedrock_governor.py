@@ -0,0 +1,266 @@
+"""
+Client-side Bedrock rate governor.
+
+Shared by every BedrockClient call (text and vision) so bursts are shaped
+before they reach AWS instead of after a ThrottlingException:
+- Request and token buckets sized to the account's per-minute quota
+- AIMD concurrency window: grows by one slot per window of successes,
+  shrinks multiplicatively on throttling
+- Full-jitter exponential backoff between retries, so throttled callers
+  don't retry in lockstep
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, TypeVar
+
+from botocore.exceptions import ClientError
+
+from app.core.config import settings
+from app.utils.exceptions import BedrockThrottlingException
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    """True for Bedrock throttling, whether raw ClientError or already mapped."""
+    if isinstance(error, BedrockThrottlingException):
+        return True
+    if isinstance(error, ClientError):
+        return error.response.get("Error", {}).get("Code") == "ThrottlingException"
+    return False
+
+
+class TokenBucket:
+    """Continuous-refill token bucket (capacity = one minute of quota)."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0  # tokens per second
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` tokens are available (0 if available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)  # Oversized requests wait for a full bucket
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float):
+        """Credit (positive) or debit (negative) tokens after the real cost is known."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + delta)
+
+
+class BedrockRateGovernor:
+    """
+    Admission gate for Bedrock calls: quota buckets + AIMD window + retries.
+
+    Waiters are plain futures on the running loop (no asyncio primitives held
+    across loops), so the singleton is safe under multiple event loops in tests.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        decrease_factor: float = 0.5,
+        max_retries: int = 3,
+        backoff_base_seconds: float = 0.5,
+        backoff_max_seconds: float = 8.0,
+    ):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.decrease_factor = decrease_factor
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+
+        self.window = float(max_concurrency)
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+        self.successes = 0
+        self.throttles = 0
+        self.retries = 0
+        self.quota_wait_seconds = 0.0
+
+    @property
+    def concurrency_limit(self) -> int:
+        return max(self.min_concurrency, int(self.window))
+
+    async def acquire(self, estimated_tokens: int):
+        """
+        Wait for a concurrency slot, then for request/token quota.
+
+        Args:
+            estimated_tokens: Expected input + output tokens for the call
+        """
+        while self.in_flight >= self.concurrency_limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._wake_waiters()  # Pass the wake-up on to the next waiter
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+
+        try:
+            while True:
+                wait = max(
+                    self.request_bucket.wait_time(1),
+                    self.token_bucket.wait_time(estimated_tokens),
+                )
+                if wait <= 0:
+                    break
+                self.quota_wait_seconds += wait
+                await asyncio.sleep(wait)
+        except BaseException:
+            self._release_slot()
+            raise
+
+        self.request_bucket.consume(1)
+        self.token_bucket.consume(estimated_tokens)
+
+    def release(self, outcome: str, estimated_tokens: int = 0, actual_tokens: int | None = None):
+        """
+        Return the slot and feed the outcome into the AIMD window.
+
+        Args:
+            outcome: "success", "throttled" or "error" (error leaves the window alone)
+            estimated_tokens: Tokens debited in acquire()
+            actual_tokens: Real input + output tokens, if known, to correct the bucket
+        """
+        if outcome == "success":
+            self.successes += 1
+            # Additive increase: one extra slot per window's worth of successes
+            self.window = min(self.max_concurrency, self.window + 1.0 / max(self.window, 1.0))
+        elif outcome == "throttled":
+            self.throttles += 1
+            self.window = max(self.min_concurrency, self.window * self.decrease_factor)
+            logger.warning(f"Bedrock throttled; concurrency window now {self.concurrency_limit}")
+
+        if actual_tokens is not None:
+            self.token_bucket.adjust(estimated_tokens - actual_tokens)
+
+        self._release_slot()
+
+    def _release_slot(self):
+        self.in_flight -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        free = self.concurrency_limit - self.in_flight
+        for waiter in list(self._waiters)[: max(free, 0)]:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for retry ``attempt`` (0-based)."""
+        ceiling = min(self.backoff_max_seconds, self.backoff_base_seconds * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        estimated_tokens: int,
+        actual_tokens: Callable[[T], int | None] = lambda _: None,
+        max_retries: int | None = None,
+    ) -> T:
+        """
+        Run fn() under the governor, retrying throttled attempts with jittered backoff.
+
+        Args:
+            fn: Zero-argument coroutine factory performing one Bedrock call
+            estimated_tokens: Expected input + output tokens for the call
+            actual_tokens: Extracts real token usage from fn's result
+            max_retries: Override the configured retry count (e.g. 0 when the
+                caller can fail over to another endpoint instead)
+
+        Returns:
+            fn's result
+
+        Raises:
+            The last throttling error once retries are exhausted, or any other error at once
+        """
+        retry_limit = self.max_retries if max_retries is None else max_retries
+
+        for attempt in range(retry_limit + 1):
+            await self.acquire(estimated_tokens)
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                self.release("error")  # e.g. the losing side of a hedged request
+                raise
+            except Exception as e:
+                if not is_throttling_error(e):
+                    self.release("error")
+                    raise
+                self.release("throttled")
+                if attempt >= retry_limit:
+                    logger.error("Throttled and max retries exceeded")
+                    raise
+                delay = self.backoff_delay(attempt)
+                self.retries += 1
+                logger.warning(
+                    f"Throttled, retrying in {delay:.2f}s "
+                    f"(attempt {attempt + 1}/{retry_limit + 1})"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            self.release("success", estimated_tokens, actual_tokens(result))
+            return result
+
+        raise AssertionError("unreachable")  # Loop always returns or raises
+
+    def stats(self) -> dict:
+        """Governor state for the metrics endpoint."""
+        return {
+            "concurrency_limit": self.concurrency_limit,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "successes": self.successes,
+            "throttles": self.throttles,
+            "retries": self.retries,
+            "quota_wait_seconds": round(self.quota_wait_seconds, 3),
+            "request_tokens_available": int(self.request_bucket.tokens),
+            "token_budget_available": int(self.token_bucket.tokens),
+        }
+
+
+# Singleton instance shared by text and vision calls
+bedrock_governor = BedrockRateGovernor(
+    requests_per_minute=settings.bedrock_requests_per_minute,
+    tokens_per_minute=settings.bedrock_tokens_per_minute,
+    max_concurrency=settings.bedrock_max_concurrency,
+    min_concurrency=settings.bedrock_min_concurrency,
+    max_retries=settings.bedrock_max_retries,
+    backoff_base_seconds=settings.bedrock_backoff_base_seconds,
+    backoff_max_seconds=settings.bedrock_backoff_max_seconds,
+)
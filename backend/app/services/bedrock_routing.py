@@ -0,0 +1,273 @@
+"""
+Latency-aware routing across Bedrock endpoints (region + model/inference profile).
+
+Each endpoint keeps rolling latency and error stats. Calls go to the healthiest
+endpoint first and fail over down the list on regional errors. Optional
+hedging fires a backup request at a second endpoint when the first has not
+answered within its observed p95, and takes whichever answer lands first.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, TypeVar
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Errors that say "this request is wrong", not "this endpoint is unhealthy":
+# another region would reject it the same way
+NON_FAILOVER_ERROR_CODES = {"ValidationException"}
+
+MIN_SAMPLES_FOR_P95 = 5
+
+
+class BedrockEndpoint:
+    """One (region, model) target with rolling health stats."""
+
+    def __init__(self, region: str, model_id: str, index: int, window: int = 50):
+        self.region = region
+        self.model_id = model_id
+        self.index = index  # Position in the configured list (preference tie-breaker)
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.hedges_won = 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.region}/{self.model_id}"
+
+    def record(self, latency_seconds: float, ok: bool):
+        """Add one call outcome to the rolling window."""
+        self.requests += 1
+        self._outcomes.append(ok)
+        if ok:
+            self._latencies.append(latency_seconds)
+            self.consecutive_failures = 0
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+            # Back off an endpoint that keeps failing (capped at 5x the base cooldown)
+            self.cooldown_until = time.monotonic() + settings.bedrock_endpoint_cooldown_seconds * min(
+                self.consecutive_failures, 5
+            )
+
+    def percentile(self, pct: float) -> float | None:
+        """Latency percentile over successful calls in the window, or None if too few."""
+        if len(self._latencies) < MIN_SAMPLES_FOR_P95:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(pct * len(ordered)))]
+
+    @property
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return 1 - sum(self._outcomes) / len(self._outcomes)
+
+    @property
+    def in_cooldown(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+    def score(self) -> float:
+        """Lower is healthier: median latency inflated by recent error rate."""
+        p50 = self.percentile(0.5) or 0.0
+        return p50 * (1 + 4 * self.error_rate)
+
+    def stats(self) -> dict:
+        p50 = self.percentile(0.5)
+        p95 = self.percentile(0.95)
+        return {
+            "region": self.region,
+            "model_id": self.model_id,
+            "requests": self.requests,
+            "failures": self.failures,
+            "error_rate": round(self.error_rate, 4),
+            "p50_ms": int(p50 * 1000) if p50 is not None else None,
+            "p95_ms": int(p95 * 1000) if p95 is not None else None,
+            "in_cooldown": self.in_cooldown,
+            "hedges_won": self.hedges_won,
+        }
+
+
+def parse_endpoints(spec: str | None, default_region: str, default_model_id: str) -> list[BedrockEndpoint]:
+    """
+    Parse an endpoint list like ``us-east-2=model-a,us-west-2=us.model-b``.
+
+    Entries without ``=`` are a region using the default model. An empty spec
+    yields the single default endpoint.
+    """
+    pairs = []
+    for entry in (spec or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        region, _, model_id = entry.partition("=")
+        pairs.append((region.strip(), model_id.strip() or default_model_id))
+
+    if not pairs:
+        pairs = [(default_region, default_model_id)]
+
+    return [
+        BedrockEndpoint(region, model_id, index, window=settings.bedrock_endpoint_stats_window)
+        for index, (region, model_id) in enumerate(pairs)
+    ]
+
+
+def is_failover_error(error: BaseException) -> bool:
+    """True if another endpoint might succeed where this one failed."""
+    if isinstance(error, ClientError):
+        return error.response.get("Error", {}).get("Code") not in NON_FAILOVER_ERROR_CODES
+    return isinstance(error, (BotoCoreError, ConnectionError, TimeoutError))
+
+
+class EndpointRouter:
+    """Orders endpoints by health and runs calls with failover and optional hedging."""
+
+    def __init__(self, endpoints: list[BedrockEndpoint]):
+        self.endpoints = endpoints
+        self.hedged_requests = 0
+        self.failovers = 0
+
+    def ordered(self) -> list[BedrockEndpoint]:
+        """
+        Healthiest first.
+
+        Endpoints in cooldown go last. The configured primary is preferred until
+        measured; unmeasured secondaries rank behind measured healthy ones.
+        """
+        def key(endpoint: BedrockEndpoint):
+            unmeasured = endpoint.percentile(0.5) is None
+            return (
+                endpoint.in_cooldown,
+                unmeasured and endpoint.index > 0,
+                endpoint.score(),
+                endpoint.index,
+            )
+
+        return sorted(self.endpoints, key=key)
+
+    async def _timed(
+        self, endpoint: BedrockEndpoint, invoke: Callable[[BedrockEndpoint, int | None], Awaitable[T]], retries: int | None
+    ) -> T:
+        start = time.perf_counter()
+        try:
+            result = await invoke(endpoint, retries)
+        except asyncio.CancelledError:
+            raise  # Lost a hedge race: says nothing about endpoint health
+        except Exception:
+            endpoint.record(time.perf_counter() - start, ok=False)
+            raise
+        endpoint.record(time.perf_counter() - start, ok=True)
+        return result
+
+    async def call(
+        self, invoke: Callable[[BedrockEndpoint, int | None], Awaitable[T]]
+    ) -> tuple[T, BedrockEndpoint, bool]:
+        """
+        Run invoke(endpoint, max_retries) against the best endpoint, failing over on regional errors.
+
+        Non-final endpoints get max_retries=0 so a throttled region hands over
+        immediately instead of backing off in place.
+
+        Returns:
+            (result, endpoint that answered, hedged)
+
+        Raises:
+            The last endpoint's error if every endpoint failed
+        """
+        candidates = self.ordered()
+        last_error: BaseException | None = None
+
+        position = 0
+        while position < len(candidates):
+            endpoint = candidates[position]
+            is_last = position == len(candidates) - 1
+            retries = None if is_last else 0
+
+            tried = [endpoint]
+            try:
+                if settings.bedrock_hedging_enabled and not is_last:
+                    result, winner, hedged = await self._hedged(
+                        endpoint, candidates[position + 1], invoke, tried
+                    )
+                    return result, winner, hedged
+                return await self._timed(endpoint, invoke, retries), endpoint, False
+            except Exception as e:
+                if not is_failover_error(e) or is_last:
+                    raise
+                last_error = e
+                self.failovers += 1
+                failed = " and ".join(tried_endpoint.name for tried_endpoint in tried)
+                logger.warning(f"Bedrock endpoint {failed} failed ({e}); failing over")
+                # A hedge that fired already tried the backup too
+                position += len(tried)
+
+        # Only reached when a hedge on the last two endpoints failed on both
+        raise last_error
+
+    async def _hedged(
+        self,
+        primary: BedrockEndpoint,
+        backup: BedrockEndpoint,
+        invoke: Callable[[BedrockEndpoint, int | None], Awaitable[T]],
+        tried: list[BedrockEndpoint],
+    ) -> tuple[T, BedrockEndpoint, bool]:
+        """
+        Start on primary; if it is still running after its p95, also start backup.
+
+        First successful answer wins and the other request is cancelled. If the
+        primary fails before the hedge fires, the error propagates so call()
+        fails over as usual. backup is appended to tried once it has been
+        started, so call() skips it after a failed hedge. Requests still in
+        flight are cancelled if the caller is (deadline, client disconnect).
+        """
+        delay = primary.percentile(0.95) or settings.bedrock_hedge_delay_seconds
+        primary_task = asyncio.create_task(self._timed(primary, invoke, 0))
+        pending = {primary_task}
+        error: BaseException | None = None
+
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary_task.result(), primary, False
+
+            self.hedged_requests += 1
+            logger.info(f"Hedging: {primary.name} exceeded {delay:.2f}s, also trying {backup.name}")
+            backup_task = asyncio.create_task(self._timed(backup, invoke, 0))
+            tried.append(backup)
+            tasks = {primary_task: primary, backup_task: backup}
+            pending = set(tasks)
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = tasks[task]
+                        if winner is backup:
+                            backup.hedges_won += 1
+                        return task.result(), winner, True
+                    error = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise error
+
+    def stats(self) -> dict:
+        return {
+            "hedging_enabled": settings.bedrock_hedging_enabled,
+            "hedged_requests": self.hedged_requests,
+            "failovers": self.failovers,
+            "endpoints": [endpoint.stats() for endpoint in self.endpoints],
+        }
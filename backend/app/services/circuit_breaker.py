@@ -0,0 +1,191 @@
+"""
+Circuit breaker in front of Bedrock.
+
+During a regional outage every review would otherwise wait for Bedrock to
+fail (plus throttling retries and failover) before falling back to pattern
+matching. The breaker watches a rolling window of call outcomes and opens when
+too many calls fail or run slow. While open, calls are refused at once so
+reviews go straight to the fallback. After a cool-off it lets a few probe
+calls through (half-open) and closes again once they succeed.
+
+States: closed -> open (error or slow-call rate over threshold) -> half_open
+(after open_seconds) -> closed (probes succeed) or back to open (a probe fails).
+"""
+
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker driven by error and slow-call rates."""
+
+    def __init__(
+        self,
+        name: str,
+        window: int,
+        min_calls: int,
+        failure_rate_threshold: float,
+        slow_call_seconds: float,
+        slow_call_rate_threshold: float,
+        open_seconds: float,
+        half_open_max_calls: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+
+        # (failed, slow) per call, closed state only
+        self._outcomes: deque[tuple[bool, bool]] = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
+        self.rejected = 0
+        self.transitions: deque[dict] = deque(maxlen=20)
+
+    @property
+    def state(self) -> str:
+        """Current state (an open breaker turns half-open once open_seconds pass)."""
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN, f"open for {self.open_seconds:g}s")
+        return self._state
+
+    def _transition(self, state: str, reason: str):
+        logger.warning(f"Bedrock circuit '{self.name}' {self._state} -> {state}: {reason}")
+        self.transitions.append(
+            {
+                "from": self._state,
+                "to": state,
+                "reason": reason,
+                "at": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+        self._state = state
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        if state == OPEN:
+            self._opened_at = self._clock()
+        elif state == CLOSED:
+            self._outcomes.clear()
+
+    def allow(self) -> bool:
+        """
+        Ask to make a call.
+
+        Returns:
+            True if the call may proceed (closed, or a free half-open probe
+            slot); False if it should fail fast. Every allowed call must be
+            followed by record() or release().
+        """
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and self._probes_in_flight < self.half_open_max_calls:
+            self._probes_in_flight += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def release(self):
+        """Return an allowed call's slot without an outcome (e.g. the caller was cancelled)."""
+        if self._state == HALF_OPEN and self._probes_in_flight:
+            self._probes_in_flight -= 1
+
+    def record(self, latency_seconds: float | None, ok: bool):
+        """
+        Record an allowed call's outcome.
+
+        Args:
+            latency_seconds: Call duration, or None if it should not count
+                towards the slow-call rate (e.g. a long streamed generation)
+            ok: False if the call failed in a way another request would hit too
+        """
+        slow = latency_seconds is not None and latency_seconds >= self.slow_call_seconds
+
+        if self._state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if not ok or slow:
+                self._transition(OPEN, "probe call failed" if not ok else "probe call slow")
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_max_calls:
+                self._transition(CLOSED, f"{self._probe_successes} probe calls succeeded")
+            return
+
+        if self._state == OPEN:
+            return  # A call that started before the breaker opened
+
+        self._outcomes.append((not ok, slow))
+        if len(self._outcomes) < self.min_calls:
+            return
+        failure_rate = self.failure_rate
+        slow_rate = self.slow_call_rate
+        if failure_rate >= self.failure_rate_threshold:
+            self._transition(OPEN, f"failure rate {failure_rate:.0%} over {len(self._outcomes)} calls")
+        elif slow_rate >= self.slow_call_rate_threshold:
+            self._transition(
+                OPEN,
+                f"{slow_rate:.0%} of {len(self._outcomes)} calls slower than {self.slow_call_seconds:g}s",
+            )
+
+    @property
+    def failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(failed for failed, _ in self._outcomes) / len(self._outcomes)
+
+    @property
+    def slow_call_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(slow for _, slow in self._outcomes) / len(self._outcomes)
+
+    def retry_after_seconds(self) -> int:
+        """Seconds until an open breaker starts probing again (0 if not open)."""
+        if self.state != OPEN:
+            return 0
+        return max(1, int(self.open_seconds - (self._clock() - self._opened_at)) + 1)
+
+    def stats(self) -> dict:
+        """Breaker state for the health and metrics endpoints."""
+        return {
+            "state": self.state,
+            "failure_rate": round(self.failure_rate, 4),
+            "slow_call_rate": round(self.slow_call_rate, 4),
+            "window_calls": len(self._outcomes),
+            "rejected": self.rejected,
+            "retry_after_seconds": self.retry_after_seconds(),
+            "transitions": list(self.transitions),
+        }
+
+
+def create_breaker(name: str) -> CircuitBreaker:
+    """Breaker configured from settings (one per Bedrock router)."""
+    return CircuitBreaker(
+        name,
+        window=settings.bedrock_circuit_window,
+        min_calls=settings.bedrock_circuit_min_calls,
+        failure_rate_threshold=settings.bedrock_circuit_failure_rate,
+        slow_call_seconds=settings.bedrock_circuit_slow_call_seconds,
+        slow_call_rate_threshold=settings.bedrock_circuit_slow_call_rate,
+        open_seconds=settings.bedrock_circuit_open_seconds,
+        half_open_max_calls=settings.bedrock_circuit_half_open_calls,
+    )
@@ -1,32 +1,168 @@
 """
 Image processing utilities for architecture diagram uploads.
 
-Validates, resizes, and encodes images for Bedrock vision API.
+Validates, resizes, and encodes images for Bedrock vision API. The CPU-bound
+decode/resize/re-encode stage runs in a bounded process pool (image_pool).
 """
 
+import asyncio
 import base64
+import hashlib
 import io
+import logging
+import math
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, TypeVar
+
 from fastapi import UploadFile
-from PIL import Image
+from PIL import Image, ImageChops
 
 from app.core.config import settings
+from app.utils.token_counter import VISION_PIXELS_PER_TOKEN, estimate_vision_tokens
 from app.utils.exceptions import (
+    ImageProcessingException,
     ImageTooLargeException,
     UnsupportedImageFormatException,
     ImageCorruptedException,
 )
 
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+# Longest side used by decode_for_size (vision images are sized by
+# prepare_for_vision from the token budget instead)
+MAX_DIMENSION = 1024
+# Cheap reductions (JPEG draft, reduce()) stop at this multiple of the target
+# so the final LANCZOS resample still has pixels to work with
+REDUCING_GAP = 2
+
+# Leading bytes of each allowed format (WebP is RIFF....WEBP, see sniff_content_type)
+MAGIC_BYTES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+    (b"%PDF-", "application/pdf"),
+]
+
+# Border trimming: margins are found on a preview about this size, pixels within
+# TRIM_TOLERANCE of the border colour count as empty, and TRIM_PADDING (of the
+# content's longest side) is kept around the content
+TRIM_PREVIEW_DIMENSION = 512
+TRIM_TOLERANCE = 24
+TRIM_PADDING = 0.02
+
+# Encoder settings per candidate format for the vision payload
+ENCODER_OPTIONS = {
+    "jpeg": {"quality": 75, "optimize": True, "progressive": True},
+    "webp": {"quality": 85, "method": 3},
+    "png": {"optimize": False, "compress_level": 6},
+}
+# Lossless PNG is kept if it is under LOSSLESS_PREFERRED_BYTES (a payload that
+# small adds nothing noticeable to the vision call) or within
+# LOSSLESS_PREFERENCE of the smallest lossy encoding
+LOSSLESS_PREFERRED_BYTES = 200 * 1024
+LOSSLESS_PREFERENCE = 1.25
+
+# 16 x 16 = 256-bit dHash: diagrams are mostly white space with thin lines, so
+# the common 64-bit hash puts unrelated diagrams too close together
+DHASH_SIZE = 16
+
+
+def sniff_content_type(head: bytes) -> str | None:
+    """
+    Identify an upload by its leading (magic) bytes.
+
+    Args:
+        head: First bytes of the file (at least 12 for WebP)
+
+    Returns:
+        MIME type, or None if the format isn't one we know
+    """
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    for magic, content_type in MAGIC_BYTES:
+        if head.startswith(magic):
+            return content_type
+    return None
+
+
+async def read_upload(file: UploadFile, max_bytes: int) -> tuple[bytes, str]:
+    """
+    Read an upload in chunks, type-checking the first chunk and stopping at the size limit.
+
+    At most max_bytes plus one chunk is ever held: an upload whose size is
+    already known to be too large is refused before reading, one of
+    unrecognized type after its first chunk, and one that turns out too
+    large as soon as it crosses the limit.
+
+    Args:
+        file: FastAPI UploadFile from multipart form
+        max_bytes: Size limit
+
+    Returns:
+        Tuple of (file bytes, content type detected from the magic bytes)
+
+    Raises:
+        ImageTooLargeException: Upload exceeds max_bytes
+        UnsupportedImageFormatException: Magic bytes don't match an allowed format
+        ImageCorruptedException: Upload could not be read
+    """
+    limit_mb = max_bytes / (1024 * 1024)
+    if file.size is not None and file.size > max_bytes:
+        raise ImageTooLargeException(
+            f"File size {file.size / (1024 * 1024):.2f} MB exceeds maximum {limit_mb:g} MB"
+        )
+
+    chunks: list[bytes] = []
+    size = 0
+    content_type = None
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+            if content_type is None:
+                content_type = sniff_content_type(chunk)
+                if content_type not in settings.allowed_image_formats:
+                    raise UnsupportedImageFormatException(
+                        f"File type {content_type or file.content_type} not supported. "
+                        f"Allowed: {', '.join(settings.allowed_image_formats)}"
+                    )
+            size += len(chunk)
+            if size > max_bytes:
+                raise ImageTooLargeException(f"File size exceeds maximum {limit_mb:g} MB")
+            chunks.append(chunk)
+    except ImageProcessingException:
+        raise
+    except Exception as e:
+        raise ImageCorruptedException(f"Failed to read uploaded file: {str(e)}")
+
+    if content_type is None:
+        raise ImageCorruptedException("Uploaded file is empty")
+    if content_type != file.content_type:
+        logger.info(f"Upload declared {file.content_type} but its contents are {content_type}")
+    return b"".join(chunks), content_type
+
 
 async def validate_and_process_image(file: UploadFile) -> dict:
     """
     Validate image file and prepare for Bedrock vision API.
 
     Steps:
-    1. Validate file size (< max_image_size_mb)
-    2. Validate MIME type (must be in allowed_image_formats)
-    3. Read image bytes
-    4. For images (not PDFs): Resize if > 2048px (Claude vision limit)
-    5. Convert to base64
+    1. Read the upload in chunks (read_upload): the type is checked by magic
+       bytes on the first chunk (must be in allowed_image_formats) and the
+       read stops as soon as it exceeds max_image_size_mb
+    2. For images (not PDFs): trim empty borders, resize to the vision token
+       budget, re-encode in the smallest format and convert to base64 in an
+       image_pool worker process
 
     Args:
         file: FastAPI UploadFile from multipart form
@@ -34,34 +170,21 @@ async def validate_and_process_image(file: UploadFile) -> dict:
     Returns:
         dict with:
             - image_data: base64-encoded string
-            - format: "png" | "jpeg" | "pdf"
+            - format: "png" | "jpeg" | "webp" | "pdf"
             - size_kb: original file size in KB
             - dimensions: (width, height) for images, None for PDFs
+            - optimized_dimensions: (width, height) sent to Bedrock (images only)
+            - crop_box: trimmed region in original coordinates, or None (images only)
+            - estimated_vision_tokens: width * height / 750 of the image sent (images only)
+            - sha256: hex digest of the bytes sent to Bedrock
+            - dhash: perceptual hash (hex) for images, None for PDFs
 
     Raises:
         ImageTooLargeException: File size exceeds max_image_size_mb
-        UnsupportedImageFormatException: MIME type not in allowed_image_formats
+        UnsupportedImageFormatException: Contents are not an allowed format
         ImageCorruptedException: Unable to read/process image
     """
-    # Read file bytes
-    try:
-        file_bytes = await file.read()
-    except Exception as e:
-        raise ImageCorruptedException(f"Failed to read uploaded file: {str(e)}")
-
-    # Validate file size
-    size_mb = len(file_bytes) / (1024 * 1024)
-    if size_mb > settings.max_image_size_mb:
-        raise ImageTooLargeException(
-            f"File size {size_mb:.2f} MB exceeds maximum {settings.max_image_size_mb} MB"
-        )
-
-    # Validate MIME type
-    if file.content_type not in settings.allowed_image_formats:
-        raise UnsupportedImageFormatException(
-            f"File type {file.content_type} not supported. "
-            f"Allowed: {', '.join(settings.allowed_image_formats)}"
-        )
+    file_bytes, content_type = await read_upload(file, settings.max_image_size_mb * 1024 * 1024)
 
     # Determine format
     format_map = {
@@ -73,65 +196,489 @@ async def validate_and_process_image(file: UploadFile) -> dict:
         "image/tiff": "tiff",
         "application/pdf": "pdf",
     }
-    image_format = format_map.get(file.content_type, "jpeg")
+    image_format = format_map.get(content_type, "jpeg")
 
     # For PDFs, skip image processing (Bedrock handles directly)
-    if file.content_type == "application/pdf":
+    if content_type == "application/pdf":
         base64_data = base64.b64encode(file_bytes).decode("utf-8")
         return {
             "image_data": base64_data,
             "format": image_format,
             "size_kb": int(len(file_bytes) / 1024),
             "dimensions": None,
+            "sha256": hashlib.sha256(file_bytes).hexdigest(),
+            "dhash": None,  # No perceptual hash for PDFs: exact matches only
         }
 
-    # For images: Open with PIL and apply aggressive optimization
-    try:
-        image = Image.open(io.BytesIO(file_bytes))
-        original_dimensions = image.size  # (width, height)
+    # For images: decode, resize and re-encode off the event loop
+    return await image_pool.run(process_image_bytes, file_bytes)
+
+
+def process_image_bytes(file_bytes: bytes) -> dict:
+    """
+    CPU-bound stage of validate_and_process_image: decode, trim, resize, re-encode, base64.
+
+    Runs in an image_pool worker process, so it must stay a module-level
+    function with picklable arguments and results.
+
+    Args:
+        file_bytes: Uploaded image bytes (already size- and type-checked)
+
+    Returns:
+        Same dict as validate_and_process_image for images
 
-        # OPTIMIZED: More aggressive resizing (1024px max instead of 2048px)
-        # Phase 1 optimization: Smaller images = faster upload + processing
-        # Trade-off: Slightly lower quality, but acceptable for diagram analysis
-        max_dimension = 1024  # Down from 2048px
-        if image.width > max_dimension or image.height > max_dimension:
-            # Preserve aspect ratio with high-quality resampling
-            image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+    Raises:
+        ImageTooLargeException: Header dimensions exceed settings.image_max_pixels
+        ImageCorruptedException: Unable to read/process image
+    """
+    try:
+        # Vision tokens scale with pixel area: trim empty margins, then size
+        # the remaining content to the token budget (see prepare_for_vision)
+        image, original_dimensions, crop_box = prepare_for_vision(
+            file_bytes,
+            token_budget=settings.vision_token_budget,
+            max_dimension=settings.vision_max_dimension,
+            trim=settings.image_trim_borders,
+        )
 
         # Convert to RGB if necessary (handles RGBA, grayscale, etc.)
         if image.mode not in ("RGB", "L"):
             image = image.convert("RGB")
 
-        # OPTIMIZED: Always convert to JPEG for smaller payloads
-        # PNG images can be 3-5x larger than JPEG for diagrams
-        # Force JPEG format for all images (except PDFs)
-        optimized_format = "jpeg"
-
-        # Encode to bytes with compression
-        output_buffer = io.BytesIO()
-        # OPTIMIZED: Use JPEG quality=75 and optimize=True for smaller files
-        # Quality 75 is good balance: ~30% smaller, minimal visual degradation
-        image.save(
-            output_buffer,
-            format="JPEG",
-            quality=75,
-            optimize=True,
-            progressive=True  # Progressive JPEG for better loading
-        )
-        processed_bytes = output_buffer.getvalue()
+        # Tokens depend only on pixels, so the format just needs the smallest payload
+        optimized_format, processed_bytes = encode_smallest(image, settings.vision_image_formats)
 
         # Base64 encode
         base64_data = base64.b64encode(processed_bytes).decode("utf-8")
 
         return {
             "image_data": base64_data,
-            "format": optimized_format,  # Always "jpeg" after optimization
+            "format": optimized_format,
             "size_kb": int(len(file_bytes) / 1024),  # Original size
             "processed_size_kb": int(len(processed_bytes) / 1024),  # Optimized size
             "dimensions": original_dimensions,
-            "optimized_dimensions": image.size,  # After resizing
+            "optimized_dimensions": image.size,  # After trimming and resizing
+            "crop_box": crop_box,
+            "estimated_vision_tokens": estimate_vision_tokens(*image.size),
             "optimization_applied": True,
+            "sha256": hashlib.sha256(processed_bytes).hexdigest(),
+            "dhash": difference_hash(image),
         }
 
+    except ImageProcessingException:
+        raise
     except Exception as e:
         raise ImageCorruptedException(f"Failed to process image: {str(e)}")
+
+
+def fitted_size(width: int, height: int, max_dimension: int) -> tuple[int, int]:
+    """Size that fits within max_dimension on both sides, keeping the aspect ratio (never upscales)."""
+    scale = min(1.0, max_dimension / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def vision_target_size(width: int, height: int, token_budget: int, max_dimension: int) -> tuple[int, int]:
+    """
+    Largest size (never upscaled, aspect ratio kept) that costs at most token_budget vision tokens.
+
+    Args:
+        width: Width of the content to send
+        height: Height of the content to send
+        token_budget: Vision input tokens allowed for the image
+        max_dimension: Longest side the model accepts without downscaling
+
+    Returns:
+        (width, height) with estimate_vision_tokens(width, height) <= token_budget
+    """
+    scale = min(
+        1.0,
+        max_dimension / max(width, height),
+        math.sqrt(token_budget * VISION_PIXELS_PER_TOKEN / (width * height)),
+    )
+    return max(1, math.floor(width * scale)), max(1, math.floor(height * scale))
+
+
+def open_image(file_bytes: bytes) -> Image.Image:
+    """
+    Open an image without decoding its pixels, refusing pixel bombs.
+
+    Args:
+        file_bytes: Encoded image
+
+    Returns:
+        Lazily-decoded PIL image (only the header has been read)
+
+    Raises:
+        ImageTooLargeException: Header dimensions exceed settings.image_max_pixels
+    """
+    try:
+        image = Image.open(io.BytesIO(file_bytes))
+    except Image.DecompressionBombError as e:
+        raise ImageTooLargeException(f"Image refused as a decompression bomb: {e}")
+
+    width, height = image.size
+    if width * height > settings.image_max_pixels:
+        raise ImageTooLargeException(
+            f"Image is {width}x{height} ({width * height / 1e6:.1f} MP); "
+            f"maximum is {settings.image_max_pixels / 1e6:g} MP"
+        )
+    return image
+
+
+def decode_region(
+    image: Image.Image, box: tuple[int, int, int, int], target: tuple[int, int]
+) -> Image.Image:
+    """
+    Decode the box region of an opened image, resampled to target.
+
+    JPEGs are decoded straight at 1/2, 1/4 or 1/8 scale (libjpeg DCT scaling
+    via draft()) when the region still covers target at that scale, other
+    formats are shrunk by an integer factor with reduce(), and only the last
+    step uses LANCZOS, on an image at most ~REDUCING_GAP times the target.
+
+    Args:
+        image: Image from open_image (pixels not yet decoded)
+        box: (left, top, right, bottom) in original pixel coordinates
+        target: Size of the result
+
+    Returns:
+        Decoded image of size target
+    """
+    width, height = image.size
+    box_width, box_height = box[2] - box[0], box[3] - box[1]
+    if box == (0, 0, width, height) and target == (width, height):
+        return image
+
+    if image.format == "JPEG":
+        # Whole-image size at which the region is still at least target
+        image.draft(
+            None,
+            (math.ceil(width * target[0] / box_width), math.ceil(height * target[1] / box_height)),
+        )  # Picks the smallest DCT scale still >= that size
+    if image.mode in ("1", "P"):
+        # Palette images would otherwise be resampled with NEAREST
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    # Map the box onto the (possibly drafted) decoded image
+    scale_x, scale_y = image.width / width, image.height / height
+    region = (
+        round(box[0] * scale_x),
+        round(box[1] * scale_y),
+        round(box[2] * scale_x),
+        round(box[3] * scale_y),
+    )
+    factor = min(
+        (region[2] - region[0]) // (target[0] * REDUCING_GAP),
+        (region[3] - region[1]) // (target[1] * REDUCING_GAP),
+    )
+    if factor >= 2:
+        image = image.reduce(factor, box=region)
+        region = (0, 0, image.width, image.height)
+    if region == (0, 0, image.width, image.height) and image.size == target:
+        return image
+    return image.resize(target, Image.Resampling.LANCZOS, box=region)
+
+
+def decode_for_size(file_bytes: bytes, max_dimension: int) -> tuple[Image.Image, tuple[int, int]]:
+    """
+    Decode an image at no more resolution than a max_dimension result needs.
+
+    The dimensions come from the header, so pixel bombs are refused before
+    any decoding (open_image); decoding then goes through decode_region.
+
+    Args:
+        file_bytes: Encoded image
+        max_dimension: Longest side of the result
+
+    Returns:
+        Tuple of (decoded image no larger than max_dimension, original (width, height))
+
+    Raises:
+        ImageTooLargeException: Header dimensions exceed settings.image_max_pixels
+    """
+    image = open_image(file_bytes)
+    width, height = image.size
+    return decode_region(image, (0, 0, width, height), fitted_size(width, height, max_dimension)), (width, height)
+
+
+def content_box(image: Image.Image, tolerance: int = TRIM_TOLERANCE) -> tuple[int, int, int, int] | None:
+    """
+    Bounding box of everything that isn't the uniform border colour.
+
+    The border colour is taken from the top-left pixel; it only counts as a
+    border if the other three corners match it too, so a photo or a diagram
+    drawn to the edge is left alone.
+
+    Args:
+        image: Decoded image (a small preview is enough)
+        tolerance: Largest per-channel difference still treated as background
+            (absorbs JPEG noise around flat colour)
+
+    Returns:
+        (left, top, right, bottom) in image coordinates, or None if there is
+        no uniform border or nothing but border
+    """
+    image = image.convert("RGB")
+    width, height = image.size
+    background = image.getpixel((0, 0))
+    for corner in ((width - 1, 0), (0, height - 1), (width - 1, height - 1)):
+        if max(abs(a - b) for a, b in zip(image.getpixel(corner), background)) > tolerance:
+            return None
+
+    difference = ImageChops.difference(image, Image.new("RGB", image.size, background))
+    mask = difference.convert("L").point(lambda value: 255 if value > tolerance else 0)
+    box = mask.getbbox()
+    if box is None or box == (0, 0, width, height):
+        return None
+    return box
+
+
+def _trim_box(file_bytes: bytes, image: Image.Image) -> tuple[int, int, int, int] | None:
+    """content_box of an opened image, in original coordinates, with TRIM_PADDING added back."""
+    width, height = image.size
+    if image.format == "JPEG":
+        # A 1/8-scale draft decode is enough to find the margins
+        preview = open_image(file_bytes)
+        preview.draft(None, fitted_size(width, height, TRIM_PREVIEW_DIMENSION))
+    else:
+        preview = image  # Decoded in full here; decode_region reuses the pixels
+        factor = max(width, height) // TRIM_PREVIEW_DIMENSION
+        if factor >= 2:
+            preview = preview.reduce(factor)
+
+    box = content_box(preview)
+    if box is None:
+        return None
+
+    # Back to original coordinates, rounding outwards by a preview pixel
+    scale_x, scale_y = width / preview.width, height / preview.height
+    left, top = math.floor((box[0] - 1) * scale_x), math.floor((box[1] - 1) * scale_y)
+    right, bottom = math.ceil((box[2] + 1) * scale_x), math.ceil((box[3] + 1) * scale_y)
+    # Keep a little margin so edge shapes and labels aren't flush with the border
+    padding = round(TRIM_PADDING * max(right - left, bottom - top))
+    box = (
+        max(0, left - padding),
+        max(0, top - padding),
+        min(width, right + padding),
+        min(height, bottom + padding),
+    )
+    return None if box == (0, 0, width, height) else box
+
+
+def prepare_for_vision(
+    file_bytes: bytes, token_budget: int, max_dimension: int, trim: bool = True
+) -> tuple[Image.Image, tuple[int, int], tuple[int, int, int, int] | None]:
+    """
+    Decode an image for the vision model at the resolution a token budget allows.
+
+    Uniform borders are found on a cheap preview and cropped off, then only
+    the content region is decoded and resampled to the largest size whose
+    estimated vision tokens (width * height / 750) fit token_budget. Small
+    images are never upscaled, and trimming lets the budget go to the
+    diagram rather than to white space.
+
+    Args:
+        file_bytes: Encoded image
+        token_budget: Vision input tokens allowed for the image
+        max_dimension: Longest side of the result
+        trim: Crop uniform borders first
+
+    Returns:
+        Tuple of (decoded image, original (width, height), crop box in
+        original coordinates or None if nothing was trimmed)
+
+    Raises:
+        ImageTooLargeException: Header dimensions exceed settings.image_max_pixels
+    """
+    image = open_image(file_bytes)
+    width, height = image.size
+    if image.mode in ("1", "P"):
+        # Convert once up front (palette images can't be reduced or resampled well)
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    crop_box = _trim_box(file_bytes, image) if trim else None
+    box = crop_box or (0, 0, width, height)
+    target = vision_target_size(box[2] - box[0], box[3] - box[1], token_budget, max_dimension)
+    return decode_region(image, box, target), (width, height), crop_box
+
+
+def encode_smallest(image: Image.Image, formats: list[str]) -> tuple[str, bytes]:
+    """
+    Encode an image in each candidate format and keep the smallest payload.
+
+    PNG is lossless, so it wins unless it is large and a lossy format is
+    clearly smaller (LOSSLESS_PREFERRED_BYTES, LOSSLESS_PREFERENCE): lossless
+    keeps small labels crisp, and most flat-colour diagrams are small as
+    PNG anyway. Screenshots and photos go lossy.
+
+    Args:
+        image: RGB or L image
+        formats: Candidates from "png", "jpeg", "webp"
+
+    Returns:
+        Tuple of (format, encoded bytes)
+    """
+    encoded = {}
+    if "png" in formats:
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG", **ENCODER_OPTIONS["png"])
+        if len(buffer.getvalue()) <= LOSSLESS_PREFERRED_BYTES:
+            return "png", buffer.getvalue()
+        encoded["png"] = buffer.getvalue()
+
+    for format in formats:
+        if format in encoded:
+            continue
+        buffer = io.BytesIO()
+        image.save(buffer, format=format.upper(), **ENCODER_OPTIONS[format])
+        encoded[format] = buffer.getvalue()
+
+    best = min(encoded, key=lambda format: len(encoded[format]))
+    if "png" in encoded and len(encoded["png"]) <= LOSSLESS_PREFERENCE * len(encoded[best]):
+        best = "png"
+    return best, encoded[best]
+
+
+def difference_hash(image: Image.Image, hash_size: int = DHASH_SIZE) -> str:
+    """
+    Perceptual difference hash (dHash) of an image, as hex.
+
+    The image is reduced to (hash_size + 1) x hash_size grayscale and each bit
+    records whether a pixel is brighter than its right-hand neighbour. Re-exports
+    of the same diagram (other encoder, quality or scale) land a few bits apart.
+
+    Args:
+        image: Decoded image
+        hash_size: Bits per side (hash_size ** 2 bits in total)
+
+    Returns:
+        Hex string of hash_size ** 2 bits
+    """
+    pixels = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BOX).tobytes()
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f"{bits:0{hash_size * hash_size // 4}x}"
+
+
+class ImageProcessPool:
+    """
+    Bounded process pool for image decoding and re-encoding.
+
+    PIL decoding, LANCZOS resizing and optimized JPEG encoding hold the GIL
+    for hundreds of milliseconds on a large diagram; run inline they stall
+    every other request on the event loop. Here they run in worker
+    processes, and at most max_concurrent images are in flight (each holds
+    the upload and its decoded pixels in memory) while the rest wait in
+    arrival order.
+    """
+
+    def __init__(self, workers: int, max_concurrent: int):
+        self.workers = workers
+        self.max_concurrent = max(1, max_concurrent)
+        self._executor: ProcessPoolExecutor | None = None
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+        self.processed = 0
+        self.failed = 0
+        self.peak_in_flight = 0
+        self.peak_waiting = 0
+        self.pool_restarts = 0
+        self.total_ms = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, not fork: the parent runs botocore and executor threads,
+            # and forking a threaded process can deadlock the child
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def _acquire(self):
+        if self._in_flight < self.max_concurrent and not self._waiters:
+            self._in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.peak_waiting = max(self.peak_waiting, len(self._waiters))
+        try:
+            await waiter  # The releasing call hands its slot over
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()  # Got the slot just as we were cancelled: pass it on
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def _release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        """
+        Run ``fn(*args)`` in a worker process (a thread if workers is 0).
+
+        Raises:
+            Whatever fn raised; ImageProcessingException if the worker died
+        """
+        await self._acquire()
+        self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+        start = time.perf_counter()
+        try:
+            if self.workers <= 0:
+                result = await asyncio.to_thread(fn, *args)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._get_executor(), fn, *args)
+        except BrokenProcessPool as e:
+            # A worker died (e.g. killed for memory): start a fresh pool next time
+            self.failed += 1
+            self.pool_restarts += 1
+            self._executor = None
+            logger.error(f"Image worker process died: {e}")
+            raise ImageProcessingException("Image processing worker failed; please retry")
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.total_ms += (time.perf_counter() - start) * 1000
+            self._release()
+        self.processed += 1
+        return result
+
+    def shutdown(self):
+        """Stop worker processes (called from the app lifespan; a later run() starts a new pool)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        """Pool counters for the metrics endpoint."""
+        completed = self.processed + self.failed
+        return {
+            "workers": self.workers,
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self._in_flight,
+            "waiting": len(self._waiters),
+            "peak_in_flight": self.peak_in_flight,
+            "peak_waiting": self.peak_waiting,
+            "processed": self.processed,
+            "failed": self.failed,
+            "pool_restarts": self.pool_restarts,
+            "avg_ms": int(self.total_ms / completed) if completed else None,
+        }
+
+
+# Singleton instance
+image_pool = ImageProcessPool(
+    workers=settings.image_process_workers,
+    max_concurrent=settings.image_max_concurrent_decodes,
+)
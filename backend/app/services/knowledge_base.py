@@ -0,0 +1,335 @@
+"""
+On-disk knowledge base of AWS documentation for prompt retrieval.
+
+``ingest_knowledge_base`` chunks a directory of markdown files and writes an
+index directory:
+
+- ``vectors-<generation>.npy``: float32 matrix, one embedding row per chunk
+- ``chunks-<generation>.txt``: UTF-8 chunk texts, addressed by byte offset
+- ``index.json``: metadata sidecar (sources, headings, content hashes,
+  offsets) pointing at the current generation
+
+Re-runs are incremental: chunks whose content hash is unchanged reuse their
+existing vector. A new generation is only written when the chunk set changes,
+and ``index.json`` is swapped in last, so readers never see a half-written
+index.
+
+``KnowledgeBase`` memory-maps the vectors and texts instead of reading them,
+so every uvicorn worker shares one page-cache copy and startup stays cheap.
+It picks up a re-ingested index on the next search.
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.retrieval import EMBEDDING_DIM, embed_text
+from app.utils.token_counter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+METADATA_FILE = "index.json"
+EMBEDDING_METHOD = f"signed-hash-{EMBEDDING_DIM}"
+
+_HEADING_RE = re.compile(r"^(#{1,3})\s+(.+?)\s*$")
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 of chunk text (also covers the heading, which is part of it)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_markdown(text: str, source: str, max_tokens: int = 400) -> list[dict]:
+    """
+    Split a markdown document into heading-scoped chunks.
+
+    Sections are split at ``#``/``##``/``###`` headings (outside code fences);
+    sections longer than ``max_tokens`` are packed paragraph by paragraph.
+    Each chunk's text starts with its heading breadcrumb so it stands alone in
+    a prompt.
+
+    Args:
+        text: Markdown document
+        source: Path of the document relative to the docs root
+        max_tokens: Target maximum estimated tokens per chunk
+
+    Returns:
+        List of dicts with id, source, heading and text
+    """
+    sections: list[tuple[str, list[str]]] = []
+    breadcrumb: list[str] = []
+    lines: list[str] = []
+
+    def flush():
+        if any(line.strip() for line in lines):
+            sections.append((" > ".join(breadcrumb), list(lines)))
+        lines.clear()
+
+    in_fence = False
+    for line in text.splitlines():
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING_RE.match(line)
+        if match:
+            flush()
+            level = len(match.group(1))
+            breadcrumb[:] = breadcrumb[: level - 1] + [match.group(2)]
+        else:
+            lines.append(line)
+    flush()
+
+    chunks = []
+    for heading, body in sections:
+        paragraphs = [p.strip() for p in "\n".join(body).split("\n\n") if p.strip()]
+        prefix = f"{heading}\n\n" if heading else ""
+        current: list[str] = []
+        for paragraph in paragraphs:
+            candidate = "\n\n".join(current + [paragraph])
+            if current and estimate_tokens(prefix + candidate) > max_tokens:
+                chunks.append((heading, prefix + "\n\n".join(current)))
+                current = [paragraph]
+            else:
+                current.append(paragraph)
+        if current:
+            chunks.append((heading, prefix + "\n\n".join(current)))
+
+    return [
+        {"id": f"{source}#{i}", "source": source, "heading": heading, "text": chunk_text}
+        for i, (heading, chunk_text) in enumerate(chunks)
+    ]
+
+
+def read_metadata(index_dir: Path) -> dict | None:
+    """Load ``index.json`` from an index directory (None if absent)."""
+    path = index_dir / METADATA_FILE
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def ingest_knowledge_base(docs_dir: str | Path, index_dir: str | Path, max_tokens: int = 400) -> dict:
+    """
+    Build or incrementally update the knowledge-base index.
+
+    Args:
+        docs_dir: Directory walked recursively for ``*.md`` files
+        index_dir: Output directory (created if missing)
+        max_tokens: Target maximum estimated tokens per chunk
+
+    Returns:
+        Summary dict: files, chunks, embedded, reused, removed, generation, changed
+    """
+    docs_dir, index_dir = Path(docs_dir), Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+
+    chunks = []
+    files = sorted(docs_dir.rglob("*.md"))
+    for path in files:
+        source = path.relative_to(docs_dir).as_posix()
+        chunks.extend(chunk_markdown(path.read_text(encoding="utf-8"), source, max_tokens))
+
+    # Vectors from the previous build, keyed by content hash
+    previous = read_metadata(index_dir)
+    previous_vectors: dict[str, np.ndarray] = {}
+    if previous and previous.get("embedding") == EMBEDDING_METHOD and previous["chunks"]:
+        matrix = np.load(index_dir / previous["vectors_file"], mmap_mode="r")
+        for row, entry in enumerate(previous["chunks"]):
+            previous_vectors[entry["hash"]] = matrix[row]
+
+    vectors = np.zeros((len(chunks), EMBEDDING_DIM), dtype=np.float32)
+    embedded = 0
+    for row, chunk in enumerate(chunks):
+        chunk["hash"] = content_hash(chunk["text"])
+        if chunk["hash"] in previous_vectors:
+            vectors[row] = previous_vectors[chunk["hash"]]
+        else:
+            vectors[row] = embed_text(chunk["text"])
+            embedded += 1
+
+    generation = hashlib.sha256(
+        "".join(chunk["id"] + chunk["hash"] for chunk in chunks).encode()
+    ).hexdigest()[:16]
+    summary = {
+        "files": len(files),
+        "chunks": len(chunks),
+        "embedded": embedded,
+        "reused": len(chunks) - embedded,
+        "removed": len(set(previous_vectors) - {chunk["hash"] for chunk in chunks}),
+        "generation": generation,
+        "changed": not previous or previous.get("generation") != generation,
+    }
+    if not summary["changed"]:
+        return summary
+
+    vectors_file, texts_file = f"vectors-{generation}.npy", f"chunks-{generation}.txt"
+    offset = 0
+    entries = []
+    with open(index_dir / texts_file, "wb") as texts:
+        for chunk in chunks:
+            data = chunk["text"].encode("utf-8")
+            texts.write(data)
+            entries.append(
+                {
+                    "id": chunk["id"],
+                    "source": chunk["source"],
+                    "heading": chunk["heading"],
+                    "hash": chunk["hash"],
+                    "offset": offset,
+                    "length": len(data),
+                    "tokens": estimate_tokens(chunk["text"]),
+                }
+            )
+            offset += len(data)
+    np.save(index_dir / vectors_file, vectors)
+
+    metadata = {
+        "version": INDEX_VERSION,
+        "embedding": EMBEDDING_METHOD,
+        "dim": EMBEDDING_DIM,
+        "generation": generation,
+        "vectors_file": vectors_file,
+        "texts_file": texts_file,
+        "chunks": entries,
+    }
+    tmp_path = index_dir / f"{METADATA_FILE}.tmp"
+    tmp_path.write_text(json.dumps(metadata))
+    os.replace(tmp_path, index_dir / METADATA_FILE)
+
+    # Old generations stay valid for processes that still have them mapped
+    for stale in [*index_dir.glob("vectors-*.npy"), *index_dir.glob("chunks-*.txt")]:
+        if stale.name not in (vectors_file, texts_file):
+            stale.unlink()
+
+    return summary
+
+
+class KnowledgeBase:
+    """Memory-mapped, read-only view of an ingested index, reloaded on change."""
+
+    def __init__(self, index_dir: str | None):
+        self.index_dir = Path(index_dir) if index_dir else None
+        self._lock = threading.Lock()
+        self._mtime: float | None = None
+        self._metadata: dict | None = None
+        self._vectors: np.ndarray | None = None
+        self._texts: mmap.mmap | None = None
+        self.searches = 0
+        self.reloads = 0
+
+    @property
+    def generation(self) -> str | None:
+        """Generation of the loaded index (None when no index is configured)."""
+        self._refresh()
+        return self._metadata["generation"] if self._metadata else None
+
+    def _refresh(self):
+        """(Re)map the index if ``index.json`` appeared or changed since last load."""
+        if self.index_dir is None:
+            return
+        try:
+            mtime = (self.index_dir / METADATA_FILE).stat().st_mtime
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            metadata = read_metadata(self.index_dir)
+            if metadata.get("embedding") != EMBEDDING_METHOD:
+                logger.warning(
+                    f"Knowledge base at {self.index_dir} uses {metadata.get('embedding')}, "
+                    f"expected {EMBEDDING_METHOD}; re-run ingestion"
+                )
+                self._mtime = mtime
+                return
+
+            vectors = texts = None
+            try:
+                if metadata["chunks"]:
+                    vectors = np.load(self.index_dir / metadata["vectors_file"], mmap_mode="r")
+                    with open(self.index_dir / metadata["texts_file"], "rb") as f:
+                        texts = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except FileNotFoundError:
+                # Superseded by a concurrent ingestion; the next call maps the new one
+                return
+
+            self._metadata, self._vectors, self._texts = metadata, vectors, texts
+            self._mtime = mtime
+            self.reloads += 1
+            logger.info(
+                f"Knowledge base generation {metadata['generation']} mapped "
+                f"({len(metadata['chunks'])} chunks)"
+            )
+
+    def _text(self, entry: dict) -> str:
+        return self._texts[entry["offset"] : entry["offset"] + entry["length"]].decode("utf-8")
+
+    def search(self, text: str, token_budget: int, top_k: int) -> list[dict]:
+        """
+        Find the chunks most similar to ``text`` within a token budget.
+
+        Args:
+            text: Query (architecture description)
+            token_budget: Maximum estimated tokens across returned chunks
+            top_k: Maximum number of chunks
+
+        Returns:
+            Chunk dicts (source, heading, text, score), best first; empty if no index
+        """
+        self._refresh()
+        metadata, vectors = self._metadata, self._vectors
+        if vectors is None:
+            return []
+
+        self.searches += 1
+        scores = vectors @ embed_text(text)
+        results, used = [], 0
+        for row in np.argsort(-scores, kind="stable"):
+            if len(results) >= top_k or scores[row] <= 0:
+                break
+            entry = metadata["chunks"][row]
+            if used + entry["tokens"] > token_budget:
+                continue
+            used += entry["tokens"]
+            results.append(
+                {
+                    "source": entry["source"],
+                    "heading": entry["heading"],
+                    "text": self._text(entry),
+                    "score": float(scores[row]),
+                }
+            )
+        return results
+
+    def render(self, text: str, token_budget: int, top_k: int) -> str:
+        """Search results as prompt text, each passage labelled with its source."""
+        return "\n\n".join(
+            f"[{result['source']}]\n{result['text']}"
+            for result in self.search(text, token_budget, top_k)
+        )
+
+    def stats(self) -> dict:
+        """Loaded index generation and usage counters."""
+        self._refresh()
+        return {
+            "index_dir": str(self.index_dir) if self.index_dir else None,
+            "generation": self._metadata["generation"] if self._metadata else None,
+            "chunks": len(self._metadata["chunks"]) if self._metadata else 0,
+            "searches": self.searches,
+            "reloads": self.reloads,
+        }
+
+
+# Singleton instance
+knowledge_base = KnowledgeBase(settings.knowledge_base_index_dir)
@@ -0,0 +1,119 @@
+"""
+Helpers for long-document (map-reduce) analysis.
+
+A design document whose estimated size is over
+settings.long_document_token_threshold is split into heading-scoped sections.
+Each section is reviewed by its own concurrent Bedrock call, and the results
+are merged here: topologies are unioned, and findings that name the same AWS
+services under the same pillar are de-duplicated.
+"""
+
+import re
+
+from app.services.knowledge_base import chunk_markdown
+from app.utils.token_counter import estimate_tokens, truncate_to_tokens
+
+
+def is_long_document(design_text: str, threshold: int) -> bool:
+    """True if ``design_text`` should be reviewed section by section (threshold 0 disables)."""
+    return threshold > 0 and estimate_tokens(design_text) > threshold
+
+
+def _split_oversized(text: str, max_tokens: int) -> list[str]:
+    """Hard-split text with no usable paragraph breaks at whitespace near max_tokens."""
+    pieces = []
+    while True:
+        head = truncate_to_tokens(text, max_tokens)
+        if head == text:
+            break
+        cut = head.rfind(" ")
+        if cut <= 0:
+            cut = len(head) or max_tokens  # No whitespace (or one huge token run): cut mid-text
+        pieces.append(text[:cut].strip())
+        text = text[cut:]
+    if text.strip():
+        pieces.append(text.strip())
+    return pieces
+
+
+def split_sections(design_text: str, max_tokens: int) -> list[dict]:
+    """
+    Split a design document into sections of at most ~max_tokens.
+
+    Markdown headings start new chunks (each keeps its heading breadcrumb);
+    consecutive small chunks are then packed together so a document with many
+    short headings doesn't turn into many tiny calls.
+
+    Args:
+        design_text: Architecture document (markdown or plain text)
+        max_tokens: Target maximum estimated tokens per section
+
+    Returns:
+        List of dicts with heading (first heading in the section, may be "")
+        and text
+    """
+    chunks = []
+    for chunk in chunk_markdown(design_text, "design", max_tokens=max_tokens):
+        for piece in _split_oversized(chunk["text"], max_tokens):
+            chunks.append({"heading": chunk["heading"], "text": piece})
+
+    sections: list[dict] = []
+    for chunk in chunks:
+        if sections and estimate_tokens(sections[-1]["text"] + "\n\n" + chunk["text"]) <= max_tokens:
+            sections[-1]["text"] += "\n\n" + chunk["text"]
+        else:
+            sections.append(dict(chunk))
+    return sections
+
+
+def merge_topologies(topologies: list[dict | None]) -> dict | None:
+    """
+    Union section topologies.
+
+    Services keep first-seen order (case-insensitive de-duplication),
+    connections are de-duplicated by (source, target, relationship), and the
+    most common architecture pattern wins.
+
+    Returns:
+        Merged topology dict, or None if no section produced one
+    """
+    services: dict[str, str] = {}
+    connections: dict[tuple, dict] = {}
+    patterns: dict[str, int] = {}
+
+    for topology in topologies:
+        if not isinstance(topology, dict):
+            continue
+        for service in topology.get("services") or []:
+            if isinstance(service, str):
+                services.setdefault(service.lower(), service)
+        for connection in topology.get("connections") or []:
+            if not isinstance(connection, dict):
+                continue
+            key = (
+                str(connection.get("source_service", "")).lower(),
+                str(connection.get("target_service", "")).lower(),
+                str(connection.get("relationship_type", "")).lower(),
+            )
+            connections.setdefault(key, connection)
+        pattern = topology.get("architecture_pattern")
+        if pattern:
+            patterns[pattern] = patterns.get(pattern, 0) + 1
+
+    if not services and not connections:
+        return None
+    return {
+        "services": list(services.values()),
+        "connections": list(connections.values()),
+        "architecture_pattern": max(patterns, key=patterns.get) if patterns else None,
+    }
+
+
+def mentioned_services(text: str, services: list[str]) -> frozenset[str]:
+    """Topology services named in ``text`` (case-insensitive, whole words)."""
+    lowered = text.lower()
+    return frozenset(
+        service.lower()
+        for service in services
+        if re.search(rf"(?<!\w){re.escape(service.lower())}(?!\w)", lowered)
+    )
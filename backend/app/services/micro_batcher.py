@@ -0,0 +1,107 @@
+"""
+Micro-batching: collect small requests that arrive close together and run them as one call.
+
+The first request for a key opens a window; requests with the same key that
+arrive before it closes (or until the batch is full) join it. The batch
+function gets every item at once and returns one result (or exception) per
+item, which is handed back to each waiting caller.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """Window-based batcher keyed so only compatible items share a batch."""
+
+    def __init__(
+        self,
+        run_batch: Callable[[list[T]], Awaitable[list[R | BaseException]]],
+        window_seconds: float,
+        max_batch_size: int,
+    ):
+        self.run_batch = run_batch
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self._pending: dict[Hashable, list[tuple[T, asyncio.Future]]] = {}
+        self._timers: dict[Hashable, asyncio.Task] = {}
+
+        self.batches = 0
+        self.batched_items = 0
+        self.largest_batch = 0
+        self.fallback_items = 0
+        self.billed_tokens = 0  # Tokens of every batch call, for the amortized figure
+
+    async def submit(self, key: Hashable, item: T) -> R:
+        """
+        Add ``item`` to the open batch for ``key`` and wait for its result.
+
+        Raises:
+            Whatever the batch function returned or raised for this item
+        """
+        future = asyncio.get_running_loop().create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((item, future))
+
+        if len(batch) >= self.max_batch_size:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = asyncio.create_task(self._flush_after_window(key))
+        return await future
+
+    async def _flush_after_window(self, key: Hashable):
+        await asyncio.sleep(self.window_seconds)
+        self._timers.pop(key, None)
+        self._flush(key)
+
+    def _flush(self, key: Hashable):
+        timer = self._timers.pop(key, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        batch = self._pending.pop(key, [])
+        # Callers that gave up (cancelled) don't need a slot in the prompt
+        batch = [(item, future) for item, future in batch if not future.done()]
+        if batch:
+            asyncio.create_task(self._run(batch))
+
+    async def _run(self, batch: list[tuple[T, asyncio.Future]]):
+        self.batches += 1
+        self.batched_items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        try:
+            results = await self.run_batch([item for item, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def record_tokens(self, tokens: int):
+        """Count the tokens billed for one batch call."""
+        self.billed_tokens += tokens
+
+    def stats(self) -> dict:
+        """Batch counters for the metrics endpoint."""
+        reviews_in_batches = self.batched_items - self.fallback_items
+        return {
+            "batches": self.batches,
+            "batched_items": self.batched_items,
+            "avg_batch_size": round(self.batched_items / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "fallback_items": self.fallback_items,
+            "amortized_tokens_per_review": (
+                int(self.billed_tokens / reviews_in_batches) if reviews_in_batches else None
+            ),
+            "pending": sum(len(batch) for batch in self._pending.values()),
+        }
@@ -0,0 +1,178 @@
+"""
+Complexity-based model routing (model cascade) for text reviews.
+
+Scores a design by length, the number of AWS services it names
+(service_parser.extract_aws_services) and topology hints (multi-region,
+event-driven, peering, ...). Simple designs go to a smaller, faster model
+with a lower output ceiling; complex ones escalate to a larger model with
+more room. Everything in between keeps the default model.
+
+The chosen route is recorded in review metadata, and per-route latency and
+cost are counted here for the metrics endpoint.
+"""
+
+import re
+from dataclasses import asdict, dataclass
+
+from app.core.config import settings
+from app.graph.service_parser import extract_aws_services
+from app.utils.token_counter import INPUT_COST_PER_MTOK, OUTPUT_COST_PER_MTOK, estimate_tokens
+
+FAST = "fast"
+STANDARD = "standard"
+COMPLEX = "complex"
+
+# Phrases that signal a non-trivial topology (each counts once)
+TOPOLOGY_HINTS = [
+    r"multi[- ]region",
+    r"cross[- ]region",
+    r"multi[- ]account",
+    r"active[- ]active",
+    r"active[- ]passive",
+    r"fail[- ]?over",
+    r"disaster recovery",
+    r"read replicas?",
+    r"vpc peering",
+    r"transit gateway",
+    r"private ?link",
+    r"direct connect",
+    r"hybrid",
+    r"on[- ]prem(ises)?",
+    r"micro[- ]?services?",
+    r"event[- ]driven",
+    r"fan[- ]out",
+    r"service mesh",
+    r"sharding|sharded",
+    r"\bkafka\b|\bkinesis\b",
+    r"->|→",
+]
+_HINT_PATTERNS = [re.compile(hint, re.IGNORECASE) for hint in TOPOLOGY_HINTS]
+
+# Score weights: one point per 250 estimated tokens, per service, and two per hint
+TOKENS_PER_POINT = 250
+HINT_WEIGHT = 2
+
+
+@dataclass
+class Route:
+    """Where a review goes and why."""
+
+    name: str
+    model_id: str
+    max_tokens: int
+    input_cost_per_mtok: float
+    output_cost_per_mtok: float
+    score: float
+    tokens: int
+    services: int
+    topology_hints: int
+
+
+def score_complexity(design_text: str) -> dict:
+    """
+    Score how complex a design description is.
+
+    Returns:
+        Dict with tokens (estimated), services (distinct AWS services named),
+        topology_hints (distinct hint phrases found) and score
+    """
+    tokens = estimate_tokens(design_text)
+    services = len(extract_aws_services(design_text))
+    hints = sum(1 for pattern in _HINT_PATTERNS if pattern.search(design_text))
+    score = tokens / TOKENS_PER_POINT + services + HINT_WEIGHT * hints
+    return {
+        "tokens": tokens,
+        "services": services,
+        "topology_hints": hints,
+        "score": round(score, 2),
+    }
+
+
+def route_review(design_text: str) -> Route:
+    """
+    Pick the model and output ceiling for a text review.
+
+    With model routing disabled every design takes the standard route
+    (bedrock_model_id, 4096 max tokens).
+
+    Args:
+        design_text: Architecture description
+
+    Returns:
+        Route (name, model_id, max_tokens, prices and the complexity inputs)
+    """
+    complexity = score_complexity(design_text)
+    name = STANDARD
+    if settings.model_routing_enabled:
+        if complexity["score"] <= settings.model_routing_simple_max_score:
+            name = FAST
+        elif complexity["score"] >= settings.model_routing_complex_min_score:
+            name = COMPLEX
+
+    model_id, max_tokens = settings.bedrock_model_id, 4096
+    prices = (INPUT_COST_PER_MTOK, OUTPUT_COST_PER_MTOK)
+    if name == FAST:
+        max_tokens = settings.model_routing_fast_max_tokens
+        if settings.bedrock_fast_model_id:
+            model_id = settings.bedrock_fast_model_id
+            prices = (
+                settings.bedrock_fast_model_input_cost_per_mtok,
+                settings.bedrock_fast_model_output_cost_per_mtok,
+            )
+    elif name == COMPLEX:
+        max_tokens = settings.model_routing_complex_max_tokens
+        if settings.bedrock_complex_model_id:
+            model_id = settings.bedrock_complex_model_id
+            prices = (
+                settings.bedrock_complex_model_input_cost_per_mtok,
+                settings.bedrock_complex_model_output_cost_per_mtok,
+            )
+
+    return Route(
+        name=name,
+        model_id=model_id,
+        max_tokens=max_tokens,
+        input_cost_per_mtok=prices[0],
+        output_cost_per_mtok=prices[1],
+        **complexity,
+    )
+
+
+class RouteStats:
+    """Per-route request, latency and cost totals (this worker only)."""
+
+    def __init__(self):
+        self._routes: dict[str, dict] = {}
+
+    def record(self, route: Route, latency_ms: int, cost_usd: float):
+        totals = self._routes.setdefault(
+            route.name, {"model_id": route.model_id, "requests": 0, "latency_ms": 0, "cost_usd": 0.0}
+        )
+        totals["model_id"] = route.model_id
+        totals["requests"] += 1
+        totals["latency_ms"] += latency_ms
+        totals["cost_usd"] += cost_usd
+
+    def stats(self) -> dict:
+        """Counters for the metrics endpoint (averages per route)."""
+        return {
+            "enabled": settings.model_routing_enabled,
+            "routes": {
+                name: {
+                    "model_id": totals["model_id"],
+                    "requests": totals["requests"],
+                    "avg_latency_ms": int(totals["latency_ms"] / totals["requests"]),
+                    "avg_cost_usd": round(totals["cost_usd"] / totals["requests"], 6),
+                }
+                for name, totals in self._routes.items()
+            },
+        }
+
+
+def route_metadata(route: Route) -> dict:
+    """Route details for review metadata."""
+    return asdict(route)
+
+
+# Singleton instance
+route_stats = RouteStats()
@@ -0,0 +1,112 @@
+"""
+Store for reviews answered provisionally while their AI analysis finishes.
+
+When a /review latency budget expires, the caller gets the rule-based review
+marked provisional and the Bedrock analysis keeps running. Its result is kept
+here under the provisional review_id, for GET /review/{review_id}.
+
+Entries live in this worker's memory only (bounded LRU with TTL).
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from app.core.config import settings
+from app.models.response import ReviewResponse
+from app.services.review_cache import LRUTTLCache
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+COMPLETE = "complete"
+FAILED = "failed"
+
+# analysis_method of the rule-based review analyze_design falls back to
+FALLBACK_METHOD = "pattern_matching_fallback"
+
+
+class PendingReviewStore:
+    """Provisional reviews and the background analyses that will replace them."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._entries = LRUTTLCache(max_entries, ttl_seconds)
+        self.provisional_served = 0
+        self.completed = 0
+        self.failed = 0
+
+    def track(
+        self,
+        provisional: ReviewResponse,
+        task: asyncio.Task,
+        on_complete: Callable[[ReviewResponse], Awaitable[None]] | None = None,
+    ):
+        """
+        Register a provisional review and the task computing the final one.
+
+        Args:
+            provisional: Review returned to the caller (its review_id is the lookup key)
+            task: Background analysis producing the final ReviewResponse
+            on_complete: Coroutine function run with the final review (or the
+                provisional one if the analysis failed), e.g. the graph write
+        """
+        self._entries.set(provisional.review_id, {"status": PENDING, "review": provisional, "task": task})
+        self.provisional_served += 1
+        task.add_done_callback(lambda done: self._finish(provisional, done, on_complete))
+
+    def _finish(self, provisional: ReviewResponse, task: asyncio.Task, on_complete):
+        if task.cancelled():
+            error = "cancelled"
+        elif task.exception() is not None:
+            error = type(task.exception()).__name__
+        elif (task.result().metadata or {}).get("analysis_method") == FALLBACK_METHOD:
+            # analyze_design swallowed a Bedrock failure; the rule-based review is what we already served
+            error = "fallback"
+        else:
+            error = None
+
+        if error is not None:
+            logger.warning(f"Background analysis for {provisional.review_id} failed: {error}")
+            review = provisional.model_copy(deep=True)
+            review.metadata = {**(review.metadata or {}), "final_status": FAILED, "error": error}
+            status = FAILED
+            self.failed += 1
+        else:
+            # The final review takes over the provisional review's identity
+            review = task.result().model_copy(update={"review_id": provisional.review_id}, deep=True)
+            review.metadata = {**(review.metadata or {}), "provisional": False, "replaced_provisional": True}
+            status = COMPLETE
+            self.completed += 1
+
+        self._entries.set(provisional.review_id, {"status": status, "review": review})
+        if on_complete is not None:
+            asyncio.ensure_future(on_complete(review))
+
+    def get(self, review_id: str) -> tuple[str, ReviewResponse] | None:
+        """
+        Look up a review answered provisionally.
+
+        Returns:
+            (status, review) where status is "pending" (review is the
+            provisional one), "complete" or "failed"; None if unknown or expired
+        """
+        entry = self._entries.get(review_id)
+        if entry is None:
+            return None
+        return entry["status"], entry["review"]
+
+    def stats(self) -> dict:
+        """Counters for the metrics endpoint."""
+        return {
+            "entries": len(self._entries),
+            "provisional_served": self.provisional_served,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+# Singleton instance
+pending_reviews = PendingReviewStore(
+    max_entries=settings.pending_review_max_entries,
+    ttl_seconds=settings.pending_review_ttl_seconds,
+)
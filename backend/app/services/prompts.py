@@ -7,6 +7,17 @@ Contains:
 - Prompt builder for Bedrock API calls
 """
 
+from functools import lru_cache
+
+from app.core.config import settings
+from app.services.knowledge_base import knowledge_base
+from app.services.retrieval import ContextRetriever, chunk_context, format_chunks
+from app.services.rule_library import rule_catalog
+
+# Bump whenever prompt text or schema changes: part of the review cache key,
+# so cached reviews produced by an older prompt are never served
+PROMPT_VERSION = "2026-10-17"
+
 # AWS Well-Architected Framework Context (~6,000 tokens)
 AWS_WELL_ARCHITECTED_CONTEXT = """
 # AWS Well-Architected Framework - Architecture Analysis Context
@@ -443,20 +454,51 @@ If no clear architecture topology is described, return an empty connections arra
 """
 
 
-def build_analysis_prompt(design_text: str, tone: str) -> tuple[str, str]:
-    """
-    Build system prompt and user message for Bedrock API call.
+COMPACT_TOPOLOGY_INSTRUCTIONS = (
+    'Connections are [source, target, relationship] triples of AWS service names, e.g. ["ALB", "EC2", '
+    '"routes_to"], ["EC2", "RDS", "reads_from"], ["CloudWatch", "EC2", "monitors"]. List ALL AWS services '
+    "mentioned. If no clear topology is described, return an empty connections array."
+)
 
-    Args:
-        design_text: User's AWS architecture description
-        tone: "standard" (professional) or "roast" (humorous)
+# Compact output (review_output_mode="compact"): the model names library rules
+# and writes short findings; the server expands codes into full RiskItems and
+# computes review_id and architecture_score itself
+COMPACT_JSON_SCHEMA = f"""
+# Output Format
 
-    Returns:
-        Tuple of (system_prompt, user_message)
-    """
-    # Build tone instruction - PUT THIS FIRST for roast mode
+You must return ONLY a valid JSON object (no markdown, no code blocks, no explanations) with this exact structure:
+
+{{
+  "risks": [
+    {{"code": "<RULE_CODE>", "severity": "<CRITICAL|HIGH|MEDIUM|LOW>", "finding": "<one sentence, max 25 words, specific to this architecture>"}}
+  ],
+  "summary": "<2 sentence summary of key findings>",
+  "tone": "<standard|roast>",
+  "topology": {{
+    "services": ["<service1>", "<service2>"],
+    "connections": [["<source service>", "<target service>", "<routes_to|reads_from|writes_to|monitors|authorizes|backs_up|replicates_to>"]],
+    "architecture_pattern": "<3-tier|serverless|microservices|event-driven|monolith|custom>"
+  }}
+}}
+
+Rule codes (CODE | pillar | title). Pick the code that matches each risk; the server adds title, impact, remediation and references:
+{rule_catalog()}
+
+Only if no code fits, use "code": "CUSTOM" and also give "title", "pillar" (operational_excellence|security|reliability|performance_efficiency|cost_optimization|sustainability) and a one-sentence "remediation".
+
+Identify 3-10 risks based on the architecture description. Do NOT write review IDs, risk IDs, scores, impact text or reference URLs.
+
+{COMPACT_TOPOLOGY_INSTRUCTIONS}
+"""
+
+# Index over the context above for per-design retrieval (context_retrieval_enabled)
+context_retriever = ContextRetriever(chunk_context(AWS_WELL_ARCHITECTED_CONTEXT))
+
+
+def _tone_instruction(tone: str) -> str:
+    """Tone block that opens every system prompt (roast instructions go first)."""
     if tone == "roast":
-        tone_instruction = """CRITICAL INSTRUCTION - READ THIS FIRST BEFORE ANYTHING ELSE:
+        return """CRITICAL INSTRUCTION - READ THIS FIRST BEFORE ANYTHING ELSE:
 
 You are writing as a FURIOUS, sleep-deprived senior AWS architect who has ZERO patience left. You've been paged at 3 AM for the 5th time this week because of amateur mistakes exactly like the ones in this architecture.
 
@@ -481,31 +523,302 @@ DO NOT revert to professional language. DO NOT soften your words. BE AS HARSH AS
 
 {ROAST_TONE}
 """
-    else:
-        tone_instruction = STANDARD_TONE
+    return STANDARD_TONE
+
+
+def build_system_prompt(tone: str, include_context: bool = True, compact: bool = False) -> str:
+    """
+    Build the static system prompt for a tone.
+
+    Everything here (tone block, Well-Architected context, JSON schema) is
+    identical across requests, so it is built once per tone and reused
+    verbatim. Bedrock prompt caching keys on the exact prefix bytes, which
+    gives one cache entry per tone.
+
+    Args:
+        tone: "standard" (professional) or "roast" (humorous)
+        include_context: Inline the full Well-Architected context (False when
+            relevant chunks are retrieved into the user message instead)
+        compact: Ask for the compact rule-code schema instead of full RiskItems
+
+    Returns:
+        System prompt string (the same object for the same arguments)
+    """
+    # Positional call so keyword and default spellings share one cache entry
+    return _build_system_prompt(tone, include_context, compact)
+
+
+@lru_cache(maxsize=None)
+def _build_system_prompt(tone: str, include_context: bool, compact: bool) -> str:
+    # Build tone instruction - PUT THIS FIRST for roast mode
+    tone_instruction = _tone_instruction(tone)
+
+    context = AWS_WELL_ARCHITECTED_CONTEXT if include_context else ""
+    schema = COMPACT_JSON_SCHEMA if compact else JSON_SCHEMA
 
     # Build system prompt with tone FIRST for roast mode
-    system_prompt = f"""{tone_instruction}
+    return f"""{tone_instruction}
 
 You are an AWS architecture reviewer specializing in the AWS Well-Architected Framework. You analyze AWS cloud architectures and provide structured feedback on security, reliability, performance, cost, operational excellence, and sustainability.
 
-{AWS_WELL_ARCHITECTED_CONTEXT}
+{context}
 
-{JSON_SCHEMA}
+{schema}
 """
 
+
+def build_analysis_prompt(design_text: str, tone: str) -> tuple[str, str]:
+    """
+    Build system prompt and user message for Bedrock API call.
+
+    Args:
+        design_text: User's AWS architecture description
+        tone: "standard" (professional) or "roast" (humorous)
+
+    With context retrieval enabled, the system prompt drops the full
+    Well-Architected context (it stays static and cacheable) and the chunks
+    relevant to this design are prepended to the user message. Passages from
+    the ingested knowledge base, if configured, are prepended the same way.
+    In compact output mode the system prompt asks for the rule-code schema.
+
+    Returns:
+        Tuple of (system_prompt, user_message)
+    """
+    guidance = ""
+    compact = settings.review_output_mode == "compact"
+    if settings.context_retrieval_enabled:
+        system_prompt = build_system_prompt(tone, include_context=False, compact=compact)
+        context = context_retriever.render(
+            design_text,
+            token_budget=settings.context_retrieval_token_budget,
+            top_k=settings.context_retrieval_top_k,
+        )
+        guidance = f"Relevant AWS Well-Architected guidance for this design:\n\n{context}\n\n"
+    else:
+        system_prompt = build_system_prompt(tone, compact=compact)
+
+    passages = knowledge_base.render(
+        design_text,
+        token_budget=settings.knowledge_base_token_budget,
+        top_k=settings.knowledge_base_top_k,
+    )
+    if passages:
+        guidance += f"Relevant AWS documentation excerpts:\n\n{passages}\n\n"
+
     # Build user message with tone reminder
-    user_message = f"""Analyze this AWS architecture description and identify risks, anti-patterns, and areas for improvement:
+    user_message = f"""{guidance}Analyze this AWS architecture description and identify risks, anti-patterns, and areas for improvement:
 
 {design_text}
 
-Return ONLY valid JSON (no markdown code blocks, no explanations). Include specific AWS service recommendations in remediation steps.
+Return ONLY valid JSON (no markdown code blocks, no explanations). {"Keep each finding to one short sentence." if compact else "Include specific AWS service recommendations in remediation steps."}
+
+IMPORTANT: Remember to use {tone} tone throughout ALL findings and remediations."""
+
+    return system_prompt, user_message
+
+
+def build_batch_prompt(designs: list[str], tone: str) -> tuple[str, str]:
+    """
+    Build system prompt and user message reviewing several small designs in one call.
+
+    The system prompt is the same cacheable one as build_analysis_prompt's
+    (full Well-Architected context, no per-design retrieval); the user
+    message lists the designs and asks for one review per design.
+
+    Args:
+        designs: Architecture descriptions, in batch order
+        tone: "standard" or "roast" (shared by the whole batch)
+
+    Returns:
+        Tuple of (system_prompt, user_message)
+    """
+    compact = settings.review_output_mode == "compact"
+    system_prompt = build_system_prompt(tone, compact=compact)
+    listed = "\n\n".join(
+        f'<design number="{number}">\n{design}\n</design>' for number, design in enumerate(designs, 1)
+    )
+    user_message = f"""Analyze each of the following {len(designs)} AWS architecture descriptions independently and identify risks, anti-patterns, and areas for improvement. Findings for one design must not refer to another.
+
+{listed}
+
+Return ONLY a valid JSON object (no markdown code blocks, no explanations) of the form {{"reviews": [...]}} with exactly {len(designs)} entries in design order. Each entry has a "design" field with the design number plus the fields of the output format in your instructions. {"Keep each finding to one short sentence." if compact else "Include specific AWS service recommendations in remediation steps."}
 
 IMPORTANT: Remember to use {tone} tone throughout ALL findings and remediations."""
 
     return system_prompt, user_message
 
 
+def build_section_prompt(
+    section_text: str, tone: str, index: int, total: int, heading: str = ""
+) -> tuple[str, str]:
+    """
+    Build system prompt and user message for one section of a long document.
+
+    The system prompt is the same as build_analysis_prompt's (so it stays
+    cacheable across sections); the user message says which part of the
+    document the model is looking at.
+
+    Args:
+        section_text: One section of the design document
+        tone: "standard" or "roast"
+        index: Zero-based section number
+        total: Number of sections in the document
+        heading: The section's heading breadcrumb, if any
+
+    Returns:
+        Tuple of (system_prompt, user_message)
+    """
+    system_prompt, user_message = build_analysis_prompt(section_text, tone)
+    where = f' ("{heading}")' if heading else ""
+    preamble = (
+        f"This is section {index + 1} of {total}{where} of a longer architecture document; "
+        "the other sections are reviewed separately. Report only risks evidenced in this "
+        "section, and list the services and connections it describes in the topology.\n\n"
+    )
+    return system_prompt, preamble + user_message
+
+
+# Fan-out mode (review_fanout_enabled): one smaller call per pillar group with
+# only that group's context and a risks-only schema; the server merges shards
+SHARD_RISK_SCHEMA = """
+# Output Format
+
+You must return ONLY a valid JSON object (no markdown, no code blocks, no explanations) with this exact structure:
+
+{
+  "risks": [
+    {
+      "id": "<PILLAR>-<number>",
+      "title": "<concise title>",
+      "severity": "<CRITICAL|HIGH|MEDIUM|LOW>",
+      "pillar": "<one of your assigned pillars>",
+      "impact": "<what happens if not fixed>",
+      "likelihood": "<CRITICAL|HIGH|MEDIUM|LOW>",
+      "finding": "<what you found in the architecture>",
+      "remediation": "<how to fix with specific AWS services>",
+      "references": ["<AWS doc URL>"]
+    }
+  ]TOPOLOGY_FIELD
+}
+
+Identify 0-5 risks, ONLY for your assigned pillars (an empty risks array is fine). Do not write a summary or score.
+"""
+
+TOPOLOGY_INSTRUCTIONS = JSON_SCHEMA[JSON_SCHEMA.index("## Architecture Topology Extraction") :]
+
+# Compact counterpart of SHARD_RISK_SCHEMA: rule codes of the assigned pillars only
+COMPACT_SHARD_RISK_SCHEMA = """
+# Output Format
+
+You must return ONLY a valid JSON object (no markdown, no code blocks, no explanations) with this exact structure:
+
+{
+  "risks": [
+    {"code": "<RULE_CODE>", "severity": "<CRITICAL|HIGH|MEDIUM|LOW>", "finding": "<one sentence, max 25 words, specific to this architecture>"}
+  ]TOPOLOGY_FIELD
+}
+
+Rule codes for your pillars (CODE | pillar | title). Pick the code that matches each risk; the server adds title, impact, remediation and references:
+RULE_CATALOG
+
+Only if no code fits, use "code": "CUSTOM" and also give "title", "pillar" (PILLAR_NAMES) and a one-sentence "remediation".
+
+Identify 0-5 risks, ONLY for your assigned pillars (an empty risks array is fine). Do not write a summary, score, review IDs, risk IDs, impact text or reference URLs.
+"""
+
+
+def pillar_heading(pillar: str) -> str:
+    """Context section heading for a pillar key (e.g. "## Cost Optimization Pillar")."""
+    return f"## {pillar.replace('_', ' ').title()} Pillar"
+
+
+@lru_cache(maxsize=None)
+def build_shard_system_prompt(
+    tone: str, pillars: tuple[str, ...], with_topology: bool, compact: bool = False
+) -> str:
+    """
+    Static system prompt for one fan-out shard.
+
+    Carries only the framing, the assigned pillars' context and the severity
+    rubric. One shard per review also extracts the topology.
+
+    Args:
+        tone: "standard" or "roast"
+        pillars: Pillar keys this shard reports on
+        with_topology: Whether this shard also extracts the topology
+        compact: Use the compact rule-code schema
+
+    Returns:
+        System prompt string
+    """
+    headings = {pillar_heading(pillar) for pillar in pillars}
+    context = format_chunks(
+        [c for c in context_retriever.chunks if c.always_include or c.section in headings]
+    )
+    if compact:
+        topology_field = (
+            ',\n  "topology": {"services": ["<service1>", "<service2>"], '
+            '"connections": [["<source service>", "<target service>", "<routes_to|reads_from|writes_to|monitors|authorizes|backs_up|replicates_to>"]], '
+            '"architecture_pattern": "<3-tier|serverless|microservices|event-driven|monolith|custom>"}'
+            if with_topology
+            else ""
+        )
+        schema = (
+            COMPACT_SHARD_RISK_SCHEMA.replace("TOPOLOGY_FIELD", topology_field)
+            .replace("RULE_CATALOG", rule_catalog(pillars))
+            .replace("PILLAR_NAMES", "|".join(pillars))
+        )
+        if with_topology:
+            schema += f"\n{COMPACT_TOPOLOGY_INSTRUCTIONS}\n"
+    else:
+        topology_field = (
+            ',\n  "topology": {"services": [...], "connections": [...], "architecture_pattern": "..."}'
+            if with_topology
+            else ""
+        )
+        schema = SHARD_RISK_SCHEMA.replace("TOPOLOGY_FIELD", topology_field)
+        if with_topology:
+            schema += f"\n{TOPOLOGY_INSTRUCTIONS}"
+
+    names = ", ".join(pillar.replace("_", " ") for pillar in pillars)
+    return f"""{_tone_instruction(tone)}
+
+You are an AWS architecture reviewer specializing in the {names} pillar(s) of the AWS Well-Architected Framework. Other reviewers cover the remaining pillars; report only findings for yours.
+
+{context}
+
+{schema}
+"""
+
+
+def build_shard_prompt(
+    design_text: str, tone: str, pillars: tuple[str, ...], with_topology: bool
+) -> tuple[str, str]:
+    """
+    Build system prompt and user message for one fan-out shard.
+
+    Args:
+        design_text: User's AWS architecture description
+        tone: "standard" or "roast"
+        pillars: Pillar keys this shard reports on
+        with_topology: Whether this shard also extracts the topology
+
+    Returns:
+        Tuple of (system_prompt, user_message)
+    """
+    compact = settings.review_output_mode == "compact"
+    system_prompt = build_shard_system_prompt(tone, pillars, with_topology, compact)
+    topology_note = "" if with_topology else " Leave topology out (another reviewer extracts it)."
+    user_message = f"""Review this AWS architecture ONLY for the {", ".join(pillars)} pillar(s):
+
+{design_text}
+
+Return ONLY valid JSON (no markdown code blocks, no explanations).{topology_note}
+
+IMPORTANT: Remember to use {tone} tone throughout ALL findings and remediations."""
+
+    return system_prompt, user_message
+
 # ====================================================================
 # OPTIMIZED: Combined Validation + Extraction (Phase 1 Optimization)
 # ====================================================================
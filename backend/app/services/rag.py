@@ -4,31 +4,67 @@ RAG (Retrieval-Augmented Generation) service for architecture analysis.
 Phase 1: Real Bedrock integration with fallback to pattern matching
 """
 
-import json
 import uuid
 import logging
 import asyncio
+import math
+import time
 from datetime import datetime, timezone
+from difflib import SequenceMatcher
+from functools import reduce
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
 from fastapi import UploadFile
+from pydantic import ValidationError
 
 from app.models.request import ReviewRequest
 from app.models.response import ReviewResponse, RiskItem
 from app.core.config import settings
-from app.services.bedrock import bedrock_client
-from app.services.prompts import build_analysis_prompt
+from app.services.admission import admission_controller
+from app.services.bedrock import bedrock_client, usage_tokens
+from app.services.circuit_breaker import OPEN
+from app.services.long_document import is_long_document, merge_topologies, mentioned_services, split_sections
+from app.services.micro_batcher import MicroBatcher
+from app.services.model_router import route_metadata, route_review, route_stats
+from app.services.pending_reviews import pending_reviews
+from app.services.prompts import (
+    VISION_COMBINED_PROMPT,
+    VISION_SYSTEM_PROMPT,
+    build_analysis_prompt,
+    build_batch_prompt,
+    build_section_prompt,
+    build_shard_prompt,
+)
+from app.services.response_parser import (
+    ReviewParseError,
+    StreamingRiskParser,
+    parse_review_json,
+    review_parse_stats,
+)
+from app.services.review_cache import review_cache, review_cache_key, fresh_review_copy
+from app.services.rule_library import PILLAR_PREFIXES, CompactReviewExpander, build_risk
+from app.services.vision_cache import vision_cache
 from app.utils.token_counter import (
+    count_prompt_tokens,
     estimate_request_cost,
+    estimate_tokens,
     log_token_usage,
     calculate_actual_cost,
+    merge_usage,
+    token_drift,
+    truncate_to_tokens,
 )
 from app.utils.exceptions import (
-    BedrockThrottlingException,
+    AdmissionRejectedException,
+    BedrockCircuitOpenException,
     BedrockException,
     ImageProcessingException,
+    InputTooLargeException,
 )
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 def calculate_score(risks: list[RiskItem]) -> int:
     """
@@ -57,6 +93,59 @@ def calculate_score(risks: list[RiskItem]) -> int:
     return max(0, score)  # Floor at 0
 
 
+def summarize_risks(risks: list[RiskItem], tone: str) -> str:
+    """
+    Server-side review summary from a list of risks.
+
+    Used by the pattern-matching fallback and by fan-out reviews, where no
+    single model call sees every finding.
+
+    Args:
+        risks: Final list of risks
+        tone: "standard" or "roast"
+
+    Returns:
+        1-2 sentence summary
+    """
+    num_risks = len(risks)
+    pillars_affected = len(set(risk.pillar for risk in risks))
+    critical_high = sum(1 for r in risks if r.severity in ["CRITICAL", "HIGH"])
+
+    if critical_high > 0:
+        summary = (
+            f"Found {num_risks} issue{'s' if num_risks != 1 else ''} across {pillars_affected} "
+            f"Well-Architected pillar{'s' if pillars_affected != 1 else ''}, including {critical_high} "
+            f"critical/high severity finding{'s' if critical_high != 1 else ''}. "
+            f"Primary concerns: {', '.join(r.title for r in risks[:3])}."
+        )
+    else:
+        summary = (
+            f"Found {num_risks} low/medium severity issue{'s' if num_risks != 1 else ''} "
+            f"across {pillars_affected} pillar{'s' if pillars_affected != 1 else ''}. "
+            f"Architecture is generally well-aligned with AWS best practices."
+        )
+
+    # Adjust tone for "roast" mode
+    if tone == "roast" and risks:
+        # Add some spice to the summary (keep it professional but direct)
+        summary = summary.replace("Found", "Oof, found").replace(
+            "Primary concerns:", "Let's talk about:"
+        )
+    return summary
+
+
+def text_circuit_open() -> bool:
+    """True while the text circuit breaker refuses Bedrock calls."""
+    return settings.bedrock_circuit_enabled and bedrock_client.text_breaker.state == OPEN
+
+
+async def circuit_open_fallback(request: ReviewRequest) -> ReviewResponse:
+    """Pattern-matching review served without calling Bedrock (circuit open)."""
+    review = await analyze_design_stub(request)
+    review.metadata["circuit_breaker"] = OPEN
+    return review
+
+
 async def analyze_design(request: ReviewRequest) -> ReviewResponse:
     """
     Main entry point: Try Bedrock first, fall back to pattern matching on error.
@@ -71,8 +160,33 @@ async def analyze_design(request: ReviewRequest) -> ReviewResponse:
         logger.info("Bedrock disabled; using fallback analysis")
         return await analyze_design_stub(request)
 
+    cache_key = review_cache_key(request.design_text, request.tone)
+    if settings.review_cache_enabled:
+        cached = await review_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Review cache hit ({cached.metadata.get('cache_tier')})")
+            return cached
+
+    if text_circuit_open():
+        logger.info("Bedrock circuit open; using fallback analysis")
+        return await circuit_open_fallback(request)
+
     try:
-        return await analyze_with_bedrock(request)
+        if settings.single_flight_enabled:
+            review, shared = await single_flight.do(
+                cache_key, lambda: _analyze_and_cache(request, cache_key)
+            )
+            if shared:
+                # Same result, but each caller gets its own identity
+                return fresh_review_copy(review, coalesced=True, cost_usd=0.0)
+            # Leader gets a private copy too: callers mutate metadata afterwards
+            return review.model_copy(deep=True)
+        return await _analyze_and_cache(request, cache_key)
+    except (AdmissionRejectedException, InputTooLargeException):
+        raise  # Overloaded or oversized: the client has to act, a fallback won't help
+    except BedrockCircuitOpenException as e:
+        logger.info(f"{e}; using fallback analysis")
+        return await circuit_open_fallback(request)
     except Exception as e:
         logger.exception(
             f"Bedrock analysis failed, using fallback pattern matching: {e}",
@@ -81,70 +195,842 @@ async def analyze_design(request: ReviewRequest) -> ReviewResponse:
         return await analyze_design_stub(request)
 
 
-async def analyze_with_bedrock(request: ReviewRequest) -> ReviewResponse:
+async def analyze_design_with_deadline(
+    request: ReviewRequest,
+    on_complete: Callable[[ReviewResponse], Awaitable[None]] | None = None,
+) -> ReviewResponse:
+    """
+    analyze_design bounded by a latency budget.
+
+    The rule-based review is computed up front. If the AI review is not done
+    when the budget (request.latency_budget_ms, else
+    settings.review_latency_budget_ms) expires, the rule-based review is
+    returned marked provisional; the AI review keeps running and is stored in
+    pending_reviews under the provisional review_id. Without a budget this is
+    plain analyze_design.
+
+    Args:
+        request: ReviewRequest (optionally with latency_budget_ms)
+        on_complete: Coroutine function run with the final review of a
+            provisional answer (e.g. the graph write)
+
+    Returns:
+        The AI review if it finished in time, else the provisional review
+    """
+    budget_ms = request.latency_budget_ms or settings.review_latency_budget_ms
+    if not budget_ms or settings.disable_bedrock:
+        return await analyze_design(request)
+
+    provisional = await analyze_design_stub(request)
+    task = asyncio.create_task(analyze_design(request))
+    try:
+        done, _ = await asyncio.wait({task}, timeout=budget_ms / 1000)
+    except asyncio.CancelledError:
+        # Nobody is left to read the review; don't leave the analysis running unowned
+        task.cancel()
+        raise
+    if task in done:
+        return task.result()
+
+    logger.info(f"Latency budget of {budget_ms}ms expired; returning provisional review")
+    provisional.metadata.update(
+        {
+            "provisional": True,
+            "latency_budget_ms": budget_ms,
+            "final_review_url": f"/review/{provisional.review_id}",
+        }
+    )
+    pending_reviews.track(provisional, task, on_complete)
+    return provisional
+
+
+def is_repaired_review(review: ReviewResponse) -> bool:
+    """Whether any model output behind a review was salvaged from a truncated or broken response."""
+    metadata = review.metadata or {}
+    parts = (
+        [metadata]
+        + metadata.get("fanout", {}).get("shards", [])
+        + metadata.get("long_document", {}).get("sections", [])
+    )
+    return any(part.get("parse_outcome") == "repaired" for part in parts)
+
+
+async def _analyze_and_cache(request: ReviewRequest, cache_key: str) -> ReviewResponse:
+    """
+    Run the Bedrock analysis and store the result.
+
+    Only complete AI reviews are cached: never fallbacks (they raise out of
+    analyze_with_bedrock) and never reviews repaired from truncated output,
+    which may be missing findings.
+    """
+    async with admission_controller.slot("text"):
+        review = await analyze_with_bedrock(request)
+    if settings.review_cache_enabled:
+        if is_repaired_review(review):
+            logger.info("Not caching review repaired from truncated model output")
+        else:
+            await review_cache.set(cache_key, review)
+    return review
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one in-flight call.
+
+    The first caller (leader) starts the work as its own task; callers arriving
+    while it runs await the same task instead of starting another Bedrock
+    call. The task is shielded, so a leader whose client disconnects does not
+    cancel the work for everyone else.
+    """
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """
+        Run fn() once per key at a time.
+
+        Args:
+            key: Content key identifying identical work
+            fn: Zero-argument coroutine factory
+
+        Returns:
+            (result, shared) where shared is True if this caller joined an
+            existing flight rather than starting it
+
+        Raises:
+            Whatever fn() raised (every waiter sees the same exception)
+        """
+        task = self._inflight.get(key)
+        shared = task is not None
+
+        if shared:
+            self.coalesced += 1
+            logger.info(f"Coalesced review into in-flight call ({self.coalesced} total)")
+        else:
+            self.leaders += 1
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+
+        return await asyncio.shield(task), shared
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved even if every waiter went away
+
+    def stats(self) -> dict:
+        """Counters for the metrics endpoint."""
+        return {
+            "enabled": settings.single_flight_enabled,
+            "leader_calls": self.leaders,
+            "coalesced_calls": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
+
+
+# Singleton instance
+single_flight = SingleFlight()
+
+
+def fit_prompt_to_context(request: ReviewRequest, max_output_tokens: int) -> tuple[str, str, int, dict]:
+    """
+    Build the analysis prompt and fit it into the model's context window.
+
+    The prompt is counted locally (corrected by the observed estimate drift).
+    If it leaves less than settings.bedrock_min_output_tokens of the window,
+    the design text is cut to fit (oversized_input_policy "truncate") or the
+    request is refused ("reject"); either way Bedrock is never called with a
+    prompt it would reject.
+
+    Args:
+        request: ReviewRequest with design_text and tone
+        max_output_tokens: Output ceiling of the chosen route
+
+    Returns:
+        Tuple of (system_prompt, user_message, max_tokens, budget) where
+        max_tokens is the route ceiling capped at the remaining context and
+        budget holds budgeted_input_tokens (calibrated estimate) and
+        truncated_design_tokens
+
+    Raises:
+        InputTooLargeException: Input doesn't fit and can't be truncated to fit
+    """
+    max_input = settings.bedrock_context_window_tokens - settings.bedrock_min_output_tokens
+    design_text = request.design_text
+    while True:
+        system_prompt, user_message = build_analysis_prompt(design_text=design_text, tone=request.tone)
+        input_tokens = token_drift.calibrate(count_prompt_tokens(system_prompt, user_message)["input_tokens"])
+        if input_tokens <= max_input:
+            break
+
+        design_tokens = estimate_tokens(design_text)
+        keep = design_tokens - math.ceil((input_tokens - max_input) / token_drift.ratio)
+        if settings.oversized_input_policy == "reject" or keep <= 0:
+            raise InputTooLargeException(
+                f"Design needs ~{input_tokens} input tokens; the model accepts {max_input}",
+                input_tokens=input_tokens,
+                max_input_tokens=max_input,
+            )
+        design_text = truncate_to_tokens(design_text, keep)
+
+    truncated_tokens = estimate_tokens(request.design_text) - estimate_tokens(design_text)
+    if truncated_tokens:
+        logger.warning(f"Design text truncated by ~{truncated_tokens} tokens to fit the context window")
+
+    max_tokens = min(max_output_tokens, settings.bedrock_context_window_tokens - input_tokens)
+    return system_prompt, user_message, max_tokens, {
+        "budgeted_input_tokens": input_tokens,
+        "truncated_design_tokens": truncated_tokens,
+    }
+
+
+async def analyze_with_bedrock(request: ReviewRequest, allow_batching: bool = True) -> ReviewResponse:
     """
     Real Bedrock-based AWS architecture analysis.
 
     Args:
         request: ReviewRequest with design_text, format, tone, provider
+        allow_batching: Let a small design join a micro-batch (when enabled)
 
     Returns:
         ReviewResponse with AI-generated risks and metadata
 
     Raises:
+        InputTooLargeException: Prompt doesn't fit the context window
         Various exceptions that trigger fallback to pattern matching
     """
-    # 1. Estimate cost (pre-request)
-    cost_estimate = estimate_request_cost(request.design_text)
+    if is_long_document(request.design_text, settings.long_document_token_threshold):
+        return await analyze_long_document(request)
+
+    if settings.review_fanout_enabled:
+        return await analyze_with_fanout(request)
+
+    if allow_batching and is_batchable(request):
+        return await review_batcher.submit((request.tone, settings.review_output_mode), request)
+
+    # 1. Model cascade: simple designs take the fast model and a lower
+    #    output ceiling, complex ones escalate (standard route when disabled)
+    route = route_review(request.design_text)
+
+    # 2. Build prompt (AWS-focused), counted and fitted into the context
+    #    window before any network call
+    system_prompt, user_message, max_tokens, budget = fit_prompt_to_context(request, route.max_tokens)
+    cost_estimate = estimate_request_cost(system_prompt, user_message)
     logger.info(
         f"Estimated cost: ${cost_estimate['total_cost_estimate']:.4f}",
         extra=cost_estimate
     )
+    start = time.perf_counter()
 
-    # 2. Build prompt (AWS-focused)
-    system_prompt, user_message = build_analysis_prompt(
-        design_text=request.design_text,
-        tone=request.tone,
+    # 3. Call Bedrock (throttling retries with jittered backoff happen in the
+    #    shared rate governor inside BedrockClient)
+    # Use higher temperature for roast mode to allow more creative/brutal language
+    temperature = 0.7 if request.tone == "roast" else 0.3
+
+    response = await bedrock_client.generate(
+        system_prompt=system_prompt,
+        user_message=user_message,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        model_id=route.model_id,
     )
+    content = response["content"]
+    usage = response["usage"]
+    first_usage = usage
+
+    # 3a. Cut off at max_tokens: ask the model to continue where it stopped
+    #     (the prefill is input too, so the output room shrinks each time)
+    continuations = 0
+    while (
+        response["metadata"].get("stop_reason") == "max_tokens"
+        and continuations < settings.bedrock_max_continuations
+    ):
+        remaining = (
+            settings.bedrock_context_window_tokens
+            - budget["budgeted_input_tokens"]
+            - token_drift.calibrate(estimate_tokens(content))
+        )
+        if remaining < settings.bedrock_min_output_tokens:
+            logger.warning("No context left for a continuation; parsing the truncated response")
+            break
+        continuations += 1
+        review_parse_stats.continuations += 1
+        logger.warning(f"Bedrock response hit max_tokens; requesting continuation {continuations}")
+        response = await bedrock_client.generate(
+            system_prompt=system_prompt,
+            user_message=user_message,
+            max_tokens=min(route.max_tokens, remaining),
+            temperature=temperature,
+            assistant_prefill=content,
+            model_id=route.model_id,
+        )
+        content = content.rstrip() + response["content"]
+        usage = merge_usage(usage, response["usage"])
 
-    # 3. Call Bedrock (with retry for throttling)
-    max_retries = 1
-    retry_delay = 2  # seconds
+    # 4. Parse JSON response (tolerates fences, prose and truncation)
+    analysis_json, parse_outcome = parse_model_review(content, request)
 
-    # Use higher temperature for roast mode to allow more creative/brutal language
+    # 5. Log actual token usage and how far the local estimate was off
+    review_id = analysis_json.get("review_id", f"review-{uuid.uuid4()}")
+    log_token_usage(usage, review_id)
+    drift = token_drift.record(cost_estimate["input_tokens"], first_usage, review_id)
+
+    # 6-7. Convert to ReviewResponse, validate topology, attach metadata
+    review_response = build_bedrock_review(analysis_json, request, usage)
+    review_response.metadata["bedrock_region"] = response["metadata"].get("region")
+    review_response.metadata["hedged"] = response["metadata"].get("hedged", False)
+    review_response.metadata["parse_outcome"] = parse_outcome
+    review_response.metadata["continuations"] = continuations
+    review_response.metadata["token_budget"] = {**budget, "max_tokens": max_tokens, **drift}
+
+    # 8. Record the route with its latency and cost (priced for the routed model)
+    bedrock_latency_ms = int((time.perf_counter() - start) * 1000)
+    cost_usd = calculate_actual_cost(usage, route.input_cost_per_mtok, route.output_cost_per_mtok)
+    review_response.metadata["cost_usd"] = cost_usd
+    review_response.metadata["model_id"] = route.model_id
+    review_response.metadata["route"] = {**route_metadata(route), "bedrock_latency_ms": bedrock_latency_ms}
+    route_stats.record(route, bedrock_latency_ms, cost_usd)
+
+    logger.info(
+        "Bedrock analysis completed successfully",
+        extra={
+            "review_id": review_id,
+            "num_risks": len(review_response.risks),
+            "score": review_response.architecture_score,
+            "route": route.name,
+        }
+    )
+
+    return review_response
+
+
+SEVERITY_RANK = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3}
+
+
+def parse_fanout_groups(spec: str) -> list[tuple[str, ...]]:
+    """Parse "security;reliability;cost_optimization,sustainability" into pillar groups."""
+    groups = []
+    for group in spec.split(";"):
+        pillars = tuple(pillar.strip() for pillar in group.split(",") if pillar.strip())
+        if pillars:
+            groups.append(pillars)
+    return groups
+
+
+def _finding_text(risk: RiskItem) -> str:
+    return " ".join(f"{risk.title} {risk.finding}".lower().split())
+
+
+def merge_risks(
+    risk_lists: list[list[RiskItem]],
+    threshold: float,
+    services: list[str] | None = None,
+    service_threshold: float = 1.0,
+) -> tuple[list[RiskItem], int]:
+    """
+    Merge shard risk lists, dropping near-duplicate findings.
+
+    Two risks are duplicates when their title + finding text is at least
+    ``threshold`` similar (difflib ratio), across pillars too: cost and
+    performance shards often both flag missing auto-scaling. With
+    ``services`` (long-document sections), two risks under the same pillar
+    that name a common topology service are also duplicates once their
+    titles share ``service_threshold`` of their words (Jaccard): sections
+    describe the same problem in different words and word order. The more severe of the two is kept, in the
+    position of the first. IDs are renumbered per pillar so shards can't collide.
+
+    Args:
+        risk_lists: Risks from each shard, in shard order
+        threshold: Similarity ratio (0-1) at which findings are duplicates
+        services: Topology services to match risks on (optional)
+        service_threshold: Title word overlap (0-1) for same pillar + services
+
+    Returns:
+        (merged risks, number of duplicates removed)
+    """
+    merged: list[RiskItem] = []
+    texts: list[str] = []
+    keys: list[tuple | None] = []
+    removed = 0
+
+    def service_key(risk: RiskItem) -> tuple | None:
+        if not services:
+            return None
+        named = mentioned_services(f"{risk.title} {risk.finding}", services)
+        return (risk.pillar, named) if named else None
+
+    def duplicate(text: str, key: tuple | None, words: set[str], i: int) -> bool:
+        if SequenceMatcher(None, text, texts[i]).ratio() >= threshold:
+            return True
+        kept_key = keys[i]
+        if key is None or kept_key is None or key[0] != kept_key[0] or not key[1] & kept_key[1]:
+            return False
+        kept_words = set(merged[i].title.lower().split())
+        return len(words & kept_words) / len(words | kept_words) >= service_threshold
+
+    for risks in risk_lists:
+        for risk in risks:
+            text, key, words = _finding_text(risk), service_key(risk), set(risk.title.lower().split())
+            for i in range(len(merged)):
+                if duplicate(text, key, words, i):
+                    if SEVERITY_RANK[risk.severity] < SEVERITY_RANK[merged[i].severity]:
+                        merged[i], texts[i], keys[i] = risk, text, key
+                    removed += 1
+                    break
+            else:
+                merged.append(risk)
+                texts.append(text)
+                keys.append(key)
+
+    counters: dict[str, int] = {}
+    renumbered = []
+    for risk in merged:
+        prefix = PILLAR_PREFIXES[risk.pillar]
+        counters[prefix] = counters.get(prefix, 0) + 1
+        renumbered.append(risk.model_copy(update={"id": f"{prefix}-{counters[prefix]:03d}"}))
+    return renumbered, removed
+
+
+async def analyze_with_fanout(request: ReviewRequest) -> ReviewResponse:
+    """
+    Pillar-sharded Bedrock analysis (review_fanout_enabled).
+
+    One concurrent call per pillar group, each with only that group's
+    context and a risks-only schema (the first shard also extracts the
+    topology). Risks a shard reports for another shard's pillars are
+    dropped, the rest are merged and de-duplicated, and the score and
+    summary are computed server-side. A failed shard is reported in metadata
+    and the review is built from the rest; if every shard fails the first
+    error is raised so the caller can fall back.
+
+    Args:
+        request: ReviewRequest with design_text, format, tone, provider
+
+    Returns:
+        ReviewResponse with per-shard latency and token usage in metadata["fanout"]
+    """
+    groups = parse_fanout_groups(settings.review_fanout_groups)
     temperature = 0.7 if request.tone == "roast" else 0.3
+    start = time.perf_counter()
 
-    for attempt in range(max_retries + 1):
-        try:
+    async def run_shard(index: int, pillars: tuple[str, ...]) -> dict:
+        system_prompt, user_message = build_shard_prompt(
+            request.design_text, request.tone, pillars, with_topology=index == 0
+        )
+        shard_start = time.perf_counter()
+        response = await bedrock_client.generate(
+            system_prompt=system_prompt,
+            user_message=user_message,
+            max_tokens=2048,
+            temperature=temperature,
+        )
+        latency_ms = int((time.perf_counter() - shard_start) * 1000)
+        token_drift.record(count_prompt_tokens(system_prompt, user_message)["input_tokens"], response["usage"])
+        analysis_json, parse_outcome = parse_model_review(response["content"], request)
+
+        risks, off_pillar = [], 0
+        for raw_risk in analysis_json.get("risks", []):
+            try:
+                shard_risk = RiskItem(**raw_risk)
+            except (TypeError, ValidationError):
+                continue
+            if shard_risk.pillar not in pillars:
+                off_pillar += 1  # Another shard owns that pillar
+                continue
+            risks.append(shard_risk)
+        return {
+            "pillars": list(pillars),
+            "latency_ms": latency_ms,
+            "token_usage": response["usage"],
+            "risks": risks,
+            "off_pillar_dropped": off_pillar,
+            "topology": analysis_json.get("topology"),
+            "parse_outcome": parse_outcome,
+        }
+
+    results = await asyncio.gather(
+        *[run_shard(i, pillars) for i, pillars in enumerate(groups)], return_exceptions=True
+    )
+
+    shards, shard_metadata = [], []
+    for pillars, result in zip(groups, results):
+        if isinstance(result, BaseException):
+            logger.warning(f"Fan-out shard {list(pillars)} failed: {result}")
+            shard_metadata.append({"pillars": list(pillars), "error": type(result).__name__})
+            continue
+        shards.append(result)
+        shard_metadata.append(
+            {
+                "pillars": result["pillars"],
+                "latency_ms": result["latency_ms"],
+                "token_usage": result["token_usage"],
+                "risks": len(result["risks"]),
+                "off_pillar_dropped": result["off_pillar_dropped"],
+                "parse_outcome": result["parse_outcome"],
+            }
+        )
+    if not shards:
+        raise next(result for result in results if isinstance(result, BaseException))
+
+    risks, duplicates = merge_risks([shard["risks"] for shard in shards], settings.review_fanout_dedup_threshold)
+    usage = reduce(merge_usage, [shard["token_usage"] for shard in shards])
+    topology = next((shard["topology"] for shard in shards if shard["topology"]), None)
+
+    analysis_json = {
+        "review_id": f"review-{uuid.uuid4()}",
+        "architecture_score": calculate_score(risks),
+        "risks": [risk.model_dump() for risk in risks],
+        "summary": summarize_risks(risks, request.tone),
+        "tone": request.tone,
+        "topology": topology,
+    }
+    log_token_usage(usage, analysis_json["review_id"])
+
+    review_response = build_bedrock_review(analysis_json, request, usage)
+    review_response.metadata["fanout"] = {
+        "shards": shard_metadata,
+        "failed_shards": len(groups) - len(shards),
+        "duplicates_removed": duplicates,
+        "wall_clock_ms": int((time.perf_counter() - start) * 1000),
+    }
+
+    logger.info(
+        "Fan-out analysis completed",
+        extra={
+            "review_id": review_response.review_id,
+            "shards": len(groups),
+            "num_risks": len(risks),
+            "duplicates_removed": duplicates,
+        },
+    )
+    return review_response
+
+
+async def analyze_long_document(request: ReviewRequest) -> ReviewResponse:
+    """
+    Map-reduce Bedrock analysis for design documents over the token threshold.
+
+    Map: the document is split into heading-scoped sections, each reviewed by
+    its own call (at most long_document_max_concurrency at once), with the
+    same cacheable system prompt. Reduce: section topologies are unioned and
+    findings are merged, dropping duplicates by text similarity or by pillar +
+    services named; the score and summary are computed server-side. A failed
+    section is reported in metadata; if every section fails the first error
+    is raised so the caller can fall back.
+
+    Args:
+        request: ReviewRequest with a long design_text
+
+    Returns:
+        ReviewResponse with per-section latency and token usage in metadata["long_document"]
+    """
+    sections = split_sections(request.design_text, settings.long_document_section_tokens)
+    temperature = 0.7 if request.tone == "roast" else 0.3
+    semaphore = asyncio.Semaphore(settings.long_document_max_concurrency)
+    start = time.perf_counter()
+    logger.info(f"Long document: reviewing {len(sections)} sections")
+
+    async def run_section(index: int, section: dict) -> dict:
+        system_prompt, user_message = build_section_prompt(
+            section["text"], request.tone, index, len(sections), section["heading"]
+        )
+        async with semaphore:
+            section_start = time.perf_counter()
             response = await bedrock_client.generate(
                 system_prompt=system_prompt,
                 user_message=user_message,
                 max_tokens=4096,
                 temperature=temperature,
             )
-            break  # Success, exit retry loop
-        except BedrockThrottlingException as e:
-            if attempt < max_retries:
-                logger.warning(f"Throttled, retrying in {retry_delay}s (attempt {attempt + 1}/{max_retries + 1})")
-                await asyncio.sleep(retry_delay)
-            else:
-                logger.error("Throttled and max retries exceeded, falling back")
-                raise
+            latency_ms = int((time.perf_counter() - section_start) * 1000)
+        token_drift.record(count_prompt_tokens(system_prompt, user_message)["input_tokens"], response["usage"])
+        analysis_json, parse_outcome = parse_model_review(response["content"], request)
+
+        risks = []
+        for raw_risk in analysis_json.get("risks", []):
+            try:
+                risks.append(RiskItem(**raw_risk))
+            except (TypeError, ValidationError):
+                continue
+        return {
+            "latency_ms": latency_ms,
+            "token_usage": response["usage"],
+            "risks": risks,
+            "topology": analysis_json.get("topology"),
+            "parse_outcome": parse_outcome,
+        }
 
-    # 4. Parse JSON response
+    results = await asyncio.gather(
+        *[run_section(i, section) for i, section in enumerate(sections)], return_exceptions=True
+    )
+
+    completed, section_metadata = [], []
+    for section, result in zip(sections, results):
+        if isinstance(result, BaseException):
+            logger.warning(f"Long-document section '{section['heading']}' failed: {result}")
+            section_metadata.append({"heading": section["heading"], "error": type(result).__name__})
+            continue
+        completed.append(result)
+        section_metadata.append(
+            {
+                "heading": section["heading"],
+                "latency_ms": result["latency_ms"],
+                "token_usage": result["token_usage"],
+                "risks": len(result["risks"]),
+                "parse_outcome": result["parse_outcome"],
+            }
+        )
+    if not completed:
+        raise next(result for result in results if isinstance(result, BaseException))
+
+    topology = merge_topologies([result["topology"] for result in completed])
+    risks, duplicates = merge_risks(
+        [result["risks"] for result in completed],
+        settings.review_fanout_dedup_threshold,
+        services=topology["services"] if topology else None,
+        service_threshold=settings.long_document_service_dedup_threshold,
+    )
+    usage = reduce(merge_usage, [result["token_usage"] for result in completed])
+
+    analysis_json = {
+        "review_id": f"review-{uuid.uuid4()}",
+        "architecture_score": calculate_score(risks),
+        "risks": [risk.model_dump() for risk in risks],
+        "summary": summarize_risks(risks, request.tone),
+        "tone": request.tone,
+        "topology": topology,
+    }
+    log_token_usage(usage, analysis_json["review_id"])
+
+    review_response = build_bedrock_review(analysis_json, request, usage)
+    review_response.metadata["long_document"] = {
+        "sections": section_metadata,
+        "failed_sections": len(sections) - len(completed),
+        "duplicates_removed": duplicates,
+        "wall_clock_ms": int((time.perf_counter() - start) * 1000),
+    }
+
+    logger.info(
+        "Long-document analysis completed",
+        extra={
+            "review_id": review_response.review_id,
+            "sections": len(sections),
+            "num_risks": len(risks),
+            "duplicates_removed": duplicates,
+        },
+    )
+    return review_response
+
+
+def is_batchable(request: ReviewRequest) -> bool:
+    """True if micro-batching is on and the design is small enough to share a call."""
+    return (
+        settings.review_batching_enabled
+        and estimate_tokens(request.design_text) <= settings.review_batch_max_design_tokens
+    )
+
+
+async def analyze_batch(requests: list[ReviewRequest]) -> list[ReviewResponse | BaseException]:
+    """
+    Review several small designs (same tone) in one Bedrock call.
+
+    The designs share one copy of the cacheable system prompt and come back
+    as {"reviews": [...]}, which is split into one ReviewResponse per
+    request. Each review is billed an equal share of the call's token usage.
+    Reviews missing from the output, or an output that doesn't parse, fall
+    back to individual calls.
+
+    Args:
+        requests: Requests collected by the micro-batcher (same tone)
+
+    Returns:
+        One ReviewResponse (or the exception its fallback call raised) per request
+    """
+    if len(requests) == 1:
+        review = await analyze_with_bedrock(requests[0], allow_batching=False)
+        review_batcher.record_tokens(usage_tokens({"usage": review.metadata["token_usage"]}))
+        return [review]
+
+    count = len(requests)
+    tone = requests[0].tone
+    system_prompt, user_message = build_batch_prompt([r.design_text for r in requests], tone)
+    response = await bedrock_client.generate(
+        system_prompt=system_prompt,
+        user_message=user_message,
+        max_tokens=min(8192, 2048 * count),
+        temperature=0.7 if tone == "roast" else 0.3,
+    )
+    usage = response["usage"]
+    batch_tokens = usage_tokens({"usage": usage})
+    token_drift.record(count_prompt_tokens(system_prompt, user_message)["input_tokens"], usage)
+    review_batcher.record_tokens(batch_tokens)
+    share = {key: round(value / count) for key, value in usage.items() if isinstance(value, (int, float))}
+
+    raw_reviews: list = []
+    repaired = False
+    try:
+        batch_json, outcome = parse_review_json(response["content"])
+        raw_reviews = batch_json.get("reviews") or []
+        repaired = outcome == "repaired"
+        review_parse_stats.record(outcome)
+    except ReviewParseError as e:
+        review_parse_stats.record("failed")
+        logger.warning(f"Batch of {count} reviews did not parse ({e}); falling back to individual calls")
+
+    # Match entries to designs by their "design" number, else by position
+    by_number = {}
+    for position, raw in enumerate(raw_reviews):
+        if isinstance(raw, dict):
+            number = raw.pop("design", None)
+            by_number[number if isinstance(number, int) else position + 1] = raw
+
+    results: list[ReviewResponse | BaseException | None] = []
+    for number, request in enumerate(requests, 1):
+        raw = by_number.get(number)
+        review = None
+        if raw is not None:
+            raw.pop("review_id", None)  # IDs and scores are ours: the model's may collide
+            raw.pop("architecture_score", None)
+            try:
+                review = build_bedrock_review(
+                    complete_review_json(raw, request, rebuild=True, repaired=repaired), request, share
+                )
+            except (TypeError, ValidationError) as e:
+                logger.warning(f"Batched review {number} is invalid ({e}); falling back to an individual call")
+        if review is not None:
+            review.metadata["bedrock_region"] = response["metadata"].get("region")
+            review.metadata["batch"] = {
+                "size": count,
+                "position": number,
+                "batch_tokens": batch_tokens,
+                "amortized_tokens": round(batch_tokens / count),
+            }
+        results.append(review)
+
+    missing = [i for i, review in enumerate(results) if review is None]
+    if missing:
+        review_batcher.fallback_items += len(missing)
+        fallbacks = await asyncio.gather(
+            *[analyze_with_bedrock(requests[i], allow_batching=False) for i in missing],
+            return_exceptions=True,
+        )
+        for i, review in zip(missing, fallbacks):
+            if not isinstance(review, BaseException):
+                review.metadata["batch"] = {"size": count, "position": i + 1, "fallback": True}
+            results[i] = review
+
+    logger.info(f"Batch of {count} reviews completed ({len(missing)} fell back to individual calls)")
+    return results
+
+
+# Singleton instance
+review_batcher = MicroBatcher(
+    analyze_batch,
+    window_seconds=settings.review_batch_window_ms / 1000,
+    max_batch_size=settings.review_batch_max_size,
+)
+
+
+def parse_model_review(content: str, request: ReviewRequest) -> tuple[dict, str]:
+    """
+    Tolerantly parse model output and fill in anything truncation cut off.
+
+    In compact output mode the rule codes are expanded here, and the review
+    ID and score are always generated server-side.
+
+    Args:
+        content: Raw model text
+        request: Originating ReviewRequest (for tone)
+
+    Returns:
+        (review JSON ready for build_bedrock_review, parse outcome)
+
+    Raises:
+        ReviewParseError: Nothing usable in the output (counted as "failed")
+    """
     try:
-        analysis_json = json.loads(response["content"])
-    except json.JSONDecodeError as e:
+        analysis_json, outcome = parse_review_json(content)
+    except ReviewParseError as e:
+        review_parse_stats.record("failed")
         logger.error(
             "Invalid JSON from Bedrock",
-            extra={"raw_content": response["content"][:500], "error": str(e)}
+            extra={"raw_content": content[:500], "error": str(e)}
         )
         raise
+    review_parse_stats.record(outcome)
+    repaired = outcome == "repaired"
+    return complete_review_json(analysis_json, request, rebuild=repaired, repaired=repaired), outcome
+
+
+def complete_review_json(
+    analysis_json: dict, request: ReviewRequest, rebuild: bool = False, repaired: bool = False
+) -> dict:
+    """
+    Expand compact output and fill in what the model left out.
+
+    Args:
+        analysis_json: One review object from the model
+        request: Originating ReviewRequest (for tone)
+        rebuild: Validate risks one by one and fill in missing ID, score,
+            tone and summary (always done in compact mode)
+        repaired: The output was salvaged from a truncated response; a
+            missing summary then says the review may be incomplete
+
+    Returns:
+        Review JSON ready for build_bedrock_review
+    """
+    compact = settings.review_output_mode == "compact"
+    if compact:
+        # Rule codes -> full RiskItems from the local library; ID and score are ours
+        analysis_json = CompactReviewExpander().expand_review(analysis_json)
+        analysis_json.pop("review_id", None)
+        analysis_json.pop("architecture_score", None)
+
+    if compact or rebuild:
+        # Keep only risks that validate; score them ourselves if the model never got to
+        risks = []
+        for raw_risk in analysis_json.get("risks", []):
+            try:
+                risks.append(RiskItem(**raw_risk))
+            except (TypeError, ValidationError):
+                continue
+        analysis_json["risks"] = [risk.model_dump() for risk in risks]
+        analysis_json.setdefault("review_id", f"review-{uuid.uuid4()}")
+        analysis_json.setdefault("architecture_score", calculate_score(risks))
+        analysis_json.setdefault("tone", request.tone)
+        if "summary" not in analysis_json:
+            analysis_json["summary"] = (
+                f"Found {len(risks)} issues. The model response was cut short, "
+                "so this review may be incomplete."
+                if repaired
+                else summarize_risks(risks, request.tone)
+            )
+    return analysis_json
 
-    # 5. Log actual token usage
-    review_id = analysis_json.get("review_id", f"review-{uuid.uuid4()}")
-    log_token_usage(response["usage"], review_id)
 
+def build_bedrock_review(
+    analysis_json: dict, request: ReviewRequest, usage: dict
+) -> ReviewResponse:
+    """
+    Convert parsed Bedrock JSON into a ReviewResponse.
+
+    Shared by the buffered and streaming paths: attaches the original
+    description, drops topology connections to unknown services, and adds
+    analysis metadata.
+
+    Args:
+        analysis_json: Review JSON produced by the model
+        request: Originating ReviewRequest
+        usage: Bedrock token usage dict
+
+    Returns:
+        ReviewResponse with metadata populated
+    """
     # 6. Convert to ReviewResponse model
     review_response = ReviewResponse(**analysis_json)
 
@@ -188,219 +1074,176 @@ async def analyze_with_bedrock(request: ReviewRequest) -> ReviewResponse:
         "input_method": "text",
         "analysis_method": "bedrock_claude_3_5_haiku",
         "provider": "aws",
-        "token_usage": response["usage"],
-        "cost_usd": calculate_actual_cost(response["usage"]),
+        "token_usage": usage,
+        "prompt_cache_hit": bool(usage.get("cache_read_input_tokens")),
+        "cost_usd": calculate_actual_cost(usage),
+        "output_mode": settings.review_output_mode,
     }
 
-    logger.info(
-        "Bedrock analysis completed successfully",
-        extra={
-            "review_id": review_id,
-            "num_risks": len(review_response.risks),
-            "score": review_response.architecture_score,
-        }
-    )
-
     return review_response
 
 
-async def analyze_design_stub(request: ReviewRequest) -> ReviewResponse:
+async def stream_analysis(request: ReviewRequest) -> AsyncIterator[tuple[str, dict]]:
     """
-    Fallback: v0.1 AWS pattern matching (existing code).
+    Streaming variant of analyze_design for POST /review/stream.
+
+    Uses Bedrock's response-stream API and emits each risk as soon as its JSON
+    object is complete, then the summary and topology, then the full review.
+    Falls back to pattern matching if Bedrock fails before anything was sent.
 
     Args:
-        request: ReviewRequest with design_text, format, tone
+        request: ReviewRequest with design_text, format, tone, provider
 
-    Returns:
-        ReviewResponse with pattern-matched risks and fallback metadata
+    Yields:
+        (event, payload) tuples where event is "risk", "summary", "topology",
+        "review" or "error"
+
+    Raises:
+        InputTooLargeException: Before the first event, if the prompt doesn't fit
     """
-    design_lower = request.design_text.lower()
-    risks: list[RiskItem] = []
-
-    # Pattern 1: Single AZ deployment
-    if any(keyword in design_lower for keyword in ["single az", "one az", "1 az"]):
-        risks.append(
-            RiskItem(
-                id="REL-001",
-                title="Single Availability Zone Deployment",
-                severity="HIGH",
-                pillar="reliability",
-                impact="Service becomes unavailable during AZ-level failure (entire data center outage). "
-                "AWS AZ failures are rare but do occur (e.g., us-east-1a outage Dec 2021).",
-                likelihood="MEDIUM",
-                finding="Architecture deploys all resources to a single Availability Zone, "
-                "creating a single point of failure at the infrastructure level.",
-                remediation="Deploy resources across at least 2 Availability Zones within the same region. "
-                "Use Application Load Balancer or Network Load Balancer to distribute traffic. "
-                "Ensure RDS, EFS, and other stateful services are configured for Multi-AZ.",
-                references=[
-                    "https://docs.aws.amazon.com/wellarchitected/latest/reliability-pillar/availability.html",
-                    "https://aws.amazon.com/architecture/well-architected/",
-                ],
-            )
-        )
+    if settings.disable_bedrock:
+        logger.info("Bedrock disabled; streaming fallback analysis")
+        async for event in _stream_review(await analyze_design_stub(request)):
+            yield event
+        return
+
+    if text_circuit_open():
+        logger.info("Bedrock circuit open; streaming fallback analysis")
+        async for event in _stream_review(await circuit_open_fallback(request)):
+            yield event
+        return
+
+    if is_long_document(request.design_text, settings.long_document_token_threshold):
+        # Sections are reviewed concurrently; stream the merged review once done
+        async for event in _stream_review(await analyze_design(request)):
+            yield event
+        return
+
+    system_prompt, user_message, max_tokens, budget = fit_prompt_to_context(request, 4096)
+    estimated_input_tokens = count_prompt_tokens(system_prompt, user_message)["input_tokens"]
+    temperature = 0.7 if request.tone == "roast" else 0.3
 
-    # Pattern 2: No encryption
-    if any(keyword in design_lower for keyword in ["no encryption", "unencrypted", "without encryption"]):
-        risks.append(
-            RiskItem(
-                id="SEC-001",
-                title="Data Not Encrypted at Rest",
-                severity="CRITICAL",
-                pillar="security",
-                impact="Sensitive data exposed in case of unauthorized access to storage (disk theft, snapshot leak, etc.). "
-                "Compliance violations for HIPAA, PCI-DSS, GDPR.",
-                likelihood="HIGH",
-                finding="Architecture stores data without encryption at rest (S3, EBS, RDS, etc.).",
-                remediation="Enable encryption at rest for all storage services: "
-                "S3 (SSE-S3, SSE-KMS, or SSE-C), RDS (enable encryption at creation), "
-                "EBS (enable default encryption in account settings). "
-                "Use AWS KMS for centralized key management.",
-                references=[
-                    "https://docs.aws.amazon.com/wellarchitected/latest/security-pillar/data-protection.html",
-                    "https://docs.aws.amazon.com/AmazonS3/latest/userguide/default-bucket-encryption.html",
-                ],
-            )
+    parser = StreamingRiskParser()
+    expander = CompactReviewExpander() if settings.review_output_mode == "compact" else None
+    start = time.perf_counter()
+    time_to_first_token_ms = None
+    time_to_first_risk_ms = None
+    risks_sent = 0
+    usage: dict = {}
+    stream_metadata: dict = {}
+
+    # Explicit acquire/release rather than slot(): the generator may be resumed
+    # from a different task than the one that started it
+    await admission_controller.acquire("text")
+    try:
+        async for chunk in bedrock_client.generate_stream(
+            system_prompt=system_prompt,
+            user_message=user_message,
+            max_tokens=max_tokens,
+            temperature=temperature,
+        ):
+            if chunk["type"] == "done":
+                usage = chunk["usage"]
+                stream_metadata = chunk["metadata"]
+                continue
+
+            if time_to_first_token_ms is None:
+                time_to_first_token_ms = int((time.perf_counter() - start) * 1000)
+
+            for raw_risk in parser.feed(chunk["text"]):
+                if expander:
+                    raw_risk = expander.expand_risk(raw_risk)
+                try:
+                    risk = RiskItem(**raw_risk)
+                except ValidationError as e:
+                    logger.warning(f"Skipping invalid streamed risk: {e}")
+                    continue
+                if time_to_first_risk_ms is None:
+                    time_to_first_risk_ms = int((time.perf_counter() - start) * 1000)
+                risks_sent += 1
+                yield "risk", risk.model_dump(mode="json")
+
+        analysis_json, parse_outcome = parse_model_review(parser.buffer, request)
+        review = build_bedrock_review(analysis_json, request, usage)
+    except Exception as e:
+        if risks_sent:
+            logger.exception(f"Bedrock stream failed after {risks_sent} risks: {e}")
+            yield "error", {"detail": "Streaming analysis interrupted"}
+            return
+        logger.exception(
+            f"Bedrock stream failed, using fallback pattern matching: {e}",
+            extra={"error_type": type(e).__name__}
         )
+        async for event in _stream_review(await analyze_design_stub(request)):
+            yield event
+        return
+    finally:
+        admission_controller.release()
+
+    log_token_usage(usage, review.review_id)
+    drift = token_drift.record(estimated_input_tokens, usage, review.review_id)
+    review.metadata["token_budget"] = {**budget, "max_tokens": max_tokens, **drift}
+    review.metadata["streaming"] = True
+    review.metadata["parse_outcome"] = parse_outcome
+    review.metadata["bedrock_region"] = stream_metadata.get("region")
+    review.metadata["time_to_first_token_ms"] = time_to_first_token_ms
+    review.metadata["time_to_first_risk_ms"] = time_to_first_risk_ms
+    review.metadata["stream_total_ms"] = int((time.perf_counter() - start) * 1000)
+
+    async for event in _stream_review(review, include_risks=False):
+        yield event
+
+
+async def _stream_review(
+    review: ReviewResponse, include_risks: bool = True
+) -> AsyncIterator[tuple[str, dict]]:
+    """Emit an already-built review as stream events (risks, summary, topology, review)."""
+    if include_risks:
+        for risk in review.risks:
+            yield "risk", risk.model_dump(mode="json")
+    yield "summary", {"summary": review.summary, "architecture_score": review.architecture_score}
+    if review.topology:
+        yield "topology", review.topology.model_dump(mode="json")
+    yield "review", review.model_dump(mode="json")
+
+
+# Fallback keyword triggers: (rule code, risk ID, keywords), checked in order
+FALLBACK_PATTERNS = [
+    ("SINGLE_AZ", "REL-001", ["single az", "one az", "1 az"]),
+    ("UNENCRYPTED_AT_REST", "SEC-001", ["no encryption", "unencrypted", "without encryption"]),
+    ("NO_BACKUP", "REL-002", ["no backup", "no backups", "without backup"]),
+    ("PUBLIC_S3", "SEC-002", ["public s3", "s3 public", "publicly accessible s3"]),
+    ("NO_AUTOSCALING", "PERF-001", ["no auto-scaling", "no autoscaling", "fixed capacity"]),
+    ("OVERPROVISIONED", "COST-001", ["over-provisioned", "overprovisioned", "too large"]),
+]
 
-    # Pattern 3: No backups
-    if any(keyword in design_lower for keyword in ["no backup", "no backups", "without backup"]):
-        risks.append(
-            RiskItem(
-                id="REL-002",
-                title="No Backup Strategy Configured",
-                severity="HIGH",
-                pillar="reliability",
-                impact="Permanent data loss in case of accidental deletion, corruption, or ransomware attack. "
-                "No ability to restore to previous state (violates RTO/RPO requirements).",
-                likelihood="HIGH",
-                finding="Architecture does not implement automated backups for databases or critical data.",
-                remediation="Enable automated backups: RDS (automated backups with 7-35 day retention), "
-                "DynamoDB (Point-in-Time Recovery), EBS (snapshots via AWS Backup or Data Lifecycle Manager). "
-                "Define RPO (Recovery Point Objective) and RTO (Recovery Time Objective) and test recovery process.",
-                references=[
-                    "https://docs.aws.amazon.com/wellarchitected/latest/reliability-pillar/backup-and-recovery.html",
-                    "https://aws.amazon.com/backup/",
-                ],
-            )
-        )
 
-    # Pattern 4: Public S3 bucket
-    if any(keyword in design_lower for keyword in ["public s3", "s3 public", "publicly accessible s3"]):
-        risks.append(
-            RiskItem(
-                id="SEC-002",
-                title="S3 Bucket Publicly Accessible",
-                severity="CRITICAL",
-                pillar="security",
-                impact="Sensitive data exposed to the internet. Potential for data leaks, compliance violations, "
-                "and massive AWS bills if data is exfiltrated at scale.",
-                likelihood="CRITICAL",
-                finding="S3 bucket configured with public access (bucket policy or ACLs allow public read/write).",
-                remediation="Remove public access: Set 'Block Public Access' settings on the bucket. "
-                "Use IAM policies or S3 bucket policies with least-privilege access. "
-                "Enable S3 access logging and CloudTrail for audit trail.",
-                references=[
-                    "https://docs.aws.amazon.com/AmazonS3/latest/userguide/access-control-block-public-access.html",
-                    "https://docs.aws.amazon.com/wellarchitected/latest/security-pillar/sec_protect_data_at_rest.html",
-                ],
-            )
-        )
+async def analyze_design_stub(request: ReviewRequest) -> ReviewResponse:
+    """
+    Fallback: v0.1 AWS pattern matching (existing code).
 
-    # Pattern 5: No auto-scaling
-    if any(keyword in design_lower for keyword in ["no auto-scaling", "no autoscaling", "fixed capacity"]):
-        risks.append(
-            RiskItem(
-                id="PERF-001",
-                title="No Auto-Scaling Configured",
-                severity="MEDIUM",
-                pillar="performance_efficiency",
-                impact="Service degradation or outages during traffic spikes. "
-                "Over-provisioning during low traffic leads to wasted cost.",
-                likelihood="HIGH",
-                finding="Architecture uses fixed capacity (static EC2 instances) without auto-scaling.",
-                remediation="Implement Auto Scaling Groups (ASG) for EC2 instances. "
-                "Configure scaling policies based on CPU, memory, or custom CloudWatch metrics. "
-                "Set appropriate min/max/desired capacity. Consider predictive scaling for known patterns.",
-                references=[
-                    "https://docs.aws.amazon.com/autoscaling/ec2/userguide/what-is-amazon-ec2-auto-scaling.html",
-                    "https://docs.aws.amazon.com/wellarchitected/latest/performance-efficiency-pillar/selection.html",
-                ],
-            )
-        )
+    Args:
+        request: ReviewRequest with design_text, format, tone
 
-    # Pattern 6: Over-provisioned resources
-    if any(keyword in design_lower for keyword in ["over-provisioned", "overprovisioned", "too large"]):
-        risks.append(
-            RiskItem(
-                id="COST-001",
-                title="Over-Provisioned Resources",
-                severity="MEDIUM",
-                pillar="cost_optimization",
-                impact="Wasted spend on unused capacity. Could be 30-70% cost reduction opportunity.",
-                likelihood="HIGH",
-                finding="Architecture uses instance types or capacity larger than workload requirements.",
-                remediation="Right-size resources: Use AWS Compute Optimizer recommendations. "
-                "Start with smaller instance types and scale up based on metrics. "
-                "Consider Reserved Instances or Savings Plans for predictable workloads. "
-                "Use Spot Instances for fault-tolerant workloads.",
-                references=[
-                    "https://docs.aws.amazon.com/wellarchitected/latest/cost-optimization-pillar/cost-optimization-pillar.html",
-                    "https://aws.amazon.com/compute-optimizer/",
-                ],
-            )
-        )
+    Returns:
+        ReviewResponse with pattern-matched risks and fallback metadata
+    """
+    design_lower = request.design_text.lower()
+    risks = [
+        RiskItem(**build_risk(code, risk_id))
+        for code, risk_id, keywords in FALLBACK_PATTERNS
+        if any(keyword in design_lower for keyword in keywords)
+    ]
 
     # If no patterns detected, add a generic "needs review" item
     if not risks:
-        risks.append(
-            RiskItem(
-                id="GEN-001",
-                title="Architecture Requires Detailed Review",
-                severity="LOW",
-                pillar="operational_excellence",
-                impact="Potential issues not detected by automated pattern matching. "
-                "Manual review recommended for comprehensive assessment.",
-                finding="No specific anti-patterns detected in provided description. "
-                "However, architecture review is recommended to ensure Well-Architected alignment.",
-                remediation="Review AWS Well-Architected Framework pillars: Operational Excellence, Security, "
-                "Reliability, Performance Efficiency, Cost Optimization, and Sustainability. "
-                "Use AWS Well-Architected Tool for guided review.",
-                references=[
-                    "https://aws.amazon.com/architecture/well-architected/",
-                    "https://aws.amazon.com/well-architected-tool/",
-                ],
-            )
-        )
+        risks.append(RiskItem(**build_risk("NEEDS_REVIEW", "GEN-001")))
 
     # Calculate score
     score = calculate_score(risks)
 
     # Generate summary
-    num_risks = len(risks)
-    pillars_affected = len(set(risk.pillar for risk in risks))
-    critical_high = sum(1 for r in risks if r.severity in ["CRITICAL", "HIGH"])
-
-    if critical_high > 0:
-        summary = (
-            f"Found {num_risks} issue{'s' if num_risks != 1 else ''} across {pillars_affected} "
-            f"Well-Architected pillar{'s' if pillars_affected != 1 else ''}, including {critical_high} "
-            f"critical/high severity finding{'s' if critical_high != 1 else ''}. "
-            f"Primary concerns: {', '.join(r.title for r in risks[:3])}."
-        )
-    else:
-        summary = (
-            f"Found {num_risks} low/medium severity issue{'s' if num_risks != 1 else ''} "
-            f"across {pillars_affected} pillar{'s' if pillars_affected != 1 else ''}. "
-            f"Architecture is generally well-aligned with AWS best practices."
-        )
-
-    # Adjust tone for "roast" mode
-    if request.tone == "roast" and risks:
-        # Add some spice to the summary (keep it professional but direct)
-        summary = summary.replace("Found", "Oof, found").replace(
-            "Primary concerns:", "Let's talk about:"
-        )
+    summary = summarize_risks(risks, request.tone)
 
     # Generate review ID
     review_id = f"review-{uuid.uuid4()}"
@@ -425,8 +1268,122 @@ async def analyze_design_stub(request: ReviewRequest) -> ReviewResponse:
     return response
 
 
+def vision_token_report(processed_image: dict, system_prompt: str, usage: dict) -> dict:
+    """
+    Estimated vs billed input tokens of the vision call, for review metadata.
+
+    Args:
+        processed_image: validate_and_process_image output (estimated_vision_tokens,
+            optimized_dimensions, crop_box)
+        system_prompt: System prompt sent with the image
+        usage: Usage Bedrock reported ({} on a vision cache hit)
+
+    Returns:
+        dict with budget, estimated_image_tokens, estimated_input_tokens
+        (image plus prompt), actual_input_tokens (None when no call was made)
+        and trimmed (whether empty borders were cropped off)
+    """
+    image_tokens = processed_image["estimated_vision_tokens"]
+    estimated_input = image_tokens + count_prompt_tokens(system_prompt, "")["input_tokens"]
+    actual_input = usage.get("input_tokens") or None
+    if actual_input:
+        logger.info(
+            f"Vision tokens: estimated {estimated_input} input "
+            f"({image_tokens} image) vs {actual_input} billed"
+        )
+    return {
+        "budget": settings.vision_token_budget,
+        "estimated_image_tokens": image_tokens,
+        "estimated_input_tokens": estimated_input,
+        "actual_input_tokens": actual_input,
+        "trimmed": processed_image.get("crop_box") is not None,
+    }
+
+
+def image_rejection_message(result: dict) -> str:
+    """
+    User-facing explanation for an image the vision model says is not an architecture diagram.
+
+    Args:
+        result: Combined validation+extraction result (visual_description,
+            clever_observation, content_type)
+
+    Returns:
+        Error message for the 400 response
+    """
+    # Build intelligent, personalized error message using AI's visual description
+    visual_desc = result.get("visual_description", "")
+    clever_obs = result.get("clever_observation", "")
+    content_type = result.get("content_type", "other")
+
+    # Start with what Tesseric actually saw (make it feel alive!)
+    if visual_desc:
+        error_msg = f"I can see: {visual_desc}\n\n"
+    else:
+        error_msg = ""
+
+    # Add the clever observation if available
+    if clever_obs:
+        error_msg += f"{clever_obs}\n\n"
+
+    # Add helpful guidance based on content type
+    if content_type == "photo":
+        error_msg += (
+            "Tesseric analyzes cloud architecture diagrams, not photographs. "
+            "Please upload a technical diagram showing AWS services like EC2, RDS, S3, VPC, etc., "
+            "with their connections and configurations."
+        )
+    elif content_type == "screenshot":
+        error_msg += (
+            "Screenshots of applications aren't architecture diagrams. "
+            "Please upload a diagram showing your cloud infrastructure - the services, "
+            "network topology, and how everything connects."
+        )
+    elif content_type == "document":
+        error_msg += (
+            "This looks like a document or slide. Tesseric needs an architecture diagram with "
+            "cloud service icons and connections. If your document contains a diagram, "
+            "please crop and upload just that portion."
+        )
+    elif content_type == "meme":
+        error_msg += (
+            "While I appreciate the humor, Tesseric needs a serious cloud architecture diagram "
+            "to perform a Well-Architected review. Please upload a technical diagram."
+        )
+    elif content_type == "blank":
+        error_msg += (
+            "The image appears to be blank or empty. Please upload a valid architecture "
+            "diagram showing AWS services and their relationships."
+        )
+    else:
+        error_msg += (
+            "This doesn't appear to be a cloud architecture diagram. Tesseric analyzes diagrams "
+            "created with tools like draw.io, Lucidchart, or AWS Architecture Icons that show "
+            "services, connections, and infrastructure topology."
+        )
+
+    return error_msg
+
+
 async def analyze_design_from_image(
     file: UploadFile, tone: str, provider: str
+) -> ReviewResponse:
+    """
+    Image review under the admission gate's "image" lane.
+
+    One slot covers the vision call(s) and the follow-up text analysis, so an
+    image review never queues behind itself.
+
+    Raises:
+        AdmissionRejectedException: Bedrock admission queue is full
+        (plus everything _analyze_image raises)
+    """
+    async with admission_controller.slot("image"):
+        return await _analyze_image(file, tone, provider)
+
+
+async def _analyze_image(
+    file: UploadFile, tone: str, provider: str
 ) -> ReviewResponse:
     """
     Extract architecture from image, then analyze using existing pipeline.
@@ -434,7 +1391,8 @@ async def analyze_design_from_image(
     Steps:
     1. Validate and process image (resize, base64 encode)
     2. Validate image is an architecture diagram (not a cat photo!)
-    3. Extract architecture description using Bedrock vision
+    3. Extract architecture description using Bedrock vision (steps 2-3 are
+       replayed from the vision cache for a repeat or near-identical upload)
     4. Create ReviewRequest from extracted text
     5. Analyze through existing analyze_design() pipeline
     6. Add image metadata to response
@@ -447,10 +1405,12 @@ async def analyze_design_from_image(
     Returns:
         ReviewResponse with additional metadata:
             - input_method: "image"
-            - image_format: "png" | "jpeg" | "pdf"
+            - image_format: "png" | "jpeg" | "webp" | "pdf"
             - image_size_kb: original file size
             - extraction_model: vision model ID
-            - vision_cost_usd: cost of vision extraction
+            - vision_cost_usd: cost of vision extraction (0 on a cache hit)
+            - vision_cache: "exact" | "near" | None
+            - vision_token_estimate: budgeted image tokens vs input tokens billed
             - total_cost_usd: vision + analysis cost
 
     Raises:
@@ -472,79 +1432,46 @@ async def analyze_design_from_image(
 
     # Step 2 & 3 OPTIMIZED: Combined validation + extraction in single Bedrock call
     # This eliminates one API roundtrip, saving ~2-3 seconds (25-30% speedup)
-    logger.info("OPTIMIZED: Combined validation + extraction in single call")
+    # A re-upload (same or near-identical image) replays the cached result instead
+    vision_model_id = settings.bedrock_vision_model_id
     combined_result = None
-    try:
-        combined_result = await bedrock_client.extract_and_validate_architecture(
-            image_data=processed_image["image_data"],
-            image_format=processed_image["format"],
-        )
-    except Exception as e:
-        logger.warning(f"Combined validation+extraction skipped due to error: {e}")
-        # Fallback: assume valid if combined call fails (graceful degradation)
-        combined_result = {
-            "is_valid_diagram": True,
-            "confidence": "low",
-            "content_type": "unknown",
-            "architecture_description": "",
-            "services": [],
-            "visual_description": "validation unavailable",
-            "usage": {},
-        }
+    vision_cache_match = None
+    if settings.vision_cache_enabled:
+        cached = vision_cache.get(processed_image, vision_model_id)
+        if cached is not None:
+            combined_result, vision_cache_match = cached
+            logger.info(f"Vision cache hit ({vision_cache_match}); skipping the vision call")
+
+    # Only results Bedrock actually produced are worth caching
+    cacheable = False
+    vision_prompt = VISION_COMBINED_PROMPT
+    if combined_result is None:
+        logger.info("OPTIMIZED: Combined validation + extraction in single call")
+        try:
+            combined_result = await bedrock_client.extract_and_validate_architecture(
+                image_data=processed_image["image_data"],
+                image_format=processed_image["format"],
+                image_tokens=processed_image.get("estimated_vision_tokens"),
+            )
+            cacheable = "error" not in combined_result.get("metadata", {})
+        except Exception as e:
+            logger.warning(f"Combined validation+extraction skipped due to error: {e}")
+            # Fallback: assume valid if combined call fails (graceful degradation)
+            combined_result = {
+                "is_valid_diagram": True,
+                "confidence": "low",
+                "content_type": "unknown",
+                "architecture_description": "",
+                "services": [],
+                "visual_description": "validation unavailable",
+                "usage": {},
+            }
 
     # Check if diagram is valid
     if not combined_result.get("is_valid_diagram", False):
-        # Build intelligent, personalized error message using AI's visual description
-        visual_desc = combined_result.get("visual_description", "")
-        clever_obs = combined_result.get("clever_observation", "")
-        content_type = combined_result.get("content_type", "other")
-
-        # Start with what Tesseric actually saw (make it feel alive!)
-        if visual_desc:
-            error_msg = f"I can see: {visual_desc}\n\n"
-        else:
-            error_msg = ""
-
-        # Add the clever observation if available
-        if clever_obs:
-            error_msg += f"{clever_obs}\n\n"
-
-        # Add helpful guidance based on content type
-        if content_type == "photo":
-            error_msg += (
-                "Tesseric analyzes cloud architecture diagrams, not photographs. "
-                "Please upload a technical diagram showing AWS services like EC2, RDS, S3, VPC, etc., "
-                "with their connections and configurations."
-            )
-        elif content_type == "screenshot":
-            error_msg += (
-                "Screenshots of applications aren't architecture diagrams. "
-                "Please upload a diagram showing your cloud infrastructure - the services, "
-                "network topology, and how everything connects."
-            )
-        elif content_type == "document":
-            error_msg += (
-                "This looks like a document or slide. Tesseric needs an architecture diagram with "
-                "cloud service icons and connections. If your document contains a diagram, "
-                "please crop and upload just that portion."
-            )
-        elif content_type == "meme":
-            error_msg += (
-                "While I appreciate the humor, Tesseric needs a serious cloud architecture diagram "
-                "to perform a Well-Architected review. Please upload a technical diagram."
-            )
-        elif content_type == "blank":
-            error_msg += (
-                "The image appears to be blank or empty. Please upload a valid architecture "
-                "diagram showing AWS services and their relationships."
-            )
-        else:
-            error_msg += (
-                "This doesn't appear to be a cloud architecture diagram. Tesseric analyzes diagrams "
-                "created with tools like draw.io, Lucidchart, or AWS Architecture Icons that show "
-                "services, connections, and infrastructure topology."
-            )
-
+        if cacheable and settings.vision_cache_enabled:
+            vision_cache.set(processed_image, vision_model_id, combined_result)
+        error_msg = image_rejection_message(combined_result)
         logger.warning(f"Image validation failed: {error_msg}")
         raise ImageProcessingException(error_msg)
 
@@ -565,9 +1492,11 @@ async def analyze_design_from_image(
             vision_result = await bedrock_client.extract_architecture_from_image(
                 image_data=processed_image["image_data"],
                 image_format=processed_image["format"],
+                image_tokens=processed_image.get("estimated_vision_tokens"),
             )
             extracted_text = vision_result["content"]
             vision_usage = vision_result["usage"]
+            vision_prompt = VISION_SYSTEM_PROMPT
             vision_cost = calculate_vision_cost(vision_usage)
             logger.info("Fallback extraction successful")
         except Exception as e:
@@ -585,6 +1514,19 @@ async def analyze_design_from_image(
         vision_usage = combined_result.get("usage", {})
         vision_cost = calculate_vision_cost(vision_usage)
 
+    if cacheable and settings.vision_cache_enabled:
+        vision_cache.set(
+            processed_image,
+            vision_model_id,
+            {**combined_result, "architecture_description": extracted_text, "usage": vision_usage},
+        )
+
+    # A cache hit costs nothing; report what the original call cost as saved
+    vision_cost_saved = 0.0
+    if vision_cache_match:
+        vision_cost_saved, vision_cost = vision_cost, 0.0
+        vision_usage = {}
+
     logger.info(
         f"Vision extraction complete: {len(extracted_text)} chars, "
         f"{vision_usage.get('input_tokens', 0)} input tokens, "
@@ -619,6 +1561,7 @@ async def analyze_design_from_image(
     if processed_image.get("optimization_applied"):
         review.metadata["image_processed_size_kb"] = processed_image.get("processed_size_kb", 0)
         review.metadata["image_optimized_dimensions"] = processed_image.get("optimized_dimensions")
+        review.metadata["image_crop_box"] = processed_image.get("crop_box")
         review.metadata["image_compression_ratio"] = round(
             processed_image.get("processed_size_kb", 0) / max(processed_image["size_kb"], 1), 2
         )
@@ -628,6 +1571,13 @@ async def analyze_design_from_image(
     review.metadata["extraction_model"] = extraction_metadata.get("model_id", settings.bedrock_vision_model_id)
     review.metadata["vision_tokens"] = vision_usage
     review.metadata["vision_cost_usd"] = vision_cost
+    review.metadata["vision_cache"] = vision_cache_match
+    if vision_cache_match:
+        review.metadata["vision_cost_saved_usd"] = vision_cost_saved
+    if processed_image.get("estimated_vision_tokens") is not None:
+        review.metadata["vision_token_estimate"] = vision_token_report(
+            processed_image, vision_prompt, vision_usage
+        )
 
     # Add optimization indicator
     if extraction_metadata.get("optimization") == "combined_validation_extraction":
@@ -0,0 +1,225 @@
+"""
+Parsing helpers for Bedrock review JSON.
+
+Provides an incremental parser that pulls complete risk objects out of a
+review JSON document while it is still being streamed from Bedrock, and a
+tolerant parser that salvages fenced, prose-wrapped or truncated output
+instead of discarding a paid call.
+"""
+
+import json
+import logging
+import re
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# Parse outcomes, from best to worst
+PARSE_OUTCOMES = ("clean", "fenced", "extracted", "repaired", "failed")
+
+_FENCE_RE = re.compile(r"^\s*```[a-zA-Z]*\s*\n?|\n?\s*```\s*$")
+
+
+class StreamingRiskParser:
+    """
+    Incremental scanner for the top-level ``risks`` array of a review JSON.
+
+    Text is fed in arbitrary fragments. The scanner tracks string/escape state
+    and nesting depth, and every time an object inside ``risks`` closes it is
+    decoded and returned. Text before the opening brace (e.g. a markdown fence)
+    is ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string = None
+        self._in_risks = False
+        self._item_start = None
+        self.risks_complete = False
+
+    def feed(self, text: str) -> list[dict]:
+        """
+        Append a text fragment and return risk objects completed by it.
+
+        Args:
+            text: Next chunk of model output
+
+        Returns:
+            List of decoded risk dicts (may be empty)
+        """
+        self.buffer += text
+        completed = []
+        buf = self.buffer
+
+        for i in range(self._pos, len(buf)):
+            char = buf[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        # Last string at the top level: the key before a value
+                        self._last_string = buf[self._string_start + 1 : i]
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char in "{[":
+                self._depth += 1
+                if char == "[" and self._depth == 2 and self._last_string == "risks":
+                    self._in_risks = True
+                elif char == "{" and self._in_risks and self._depth == 3:
+                    self._item_start = i
+            elif char in "}]":
+                if char == "}" and self._in_risks and self._depth == 3 and self._item_start is not None:
+                    item = self._decode(buf[self._item_start : i + 1])
+                    if item is not None:
+                        completed.append(item)
+                    self._item_start = None
+                elif char == "]" and self._in_risks and self._depth == 2:
+                    self._in_risks = False
+                    self.risks_complete = True
+                self._depth = max(0, self._depth - 1)
+
+        self._pos = len(buf)
+        return completed
+
+    @staticmethod
+    def _decode(fragment: str) -> dict | None:
+        """Decode one risk object, skipping it if the model emitted invalid JSON."""
+        try:
+            return json.loads(fragment)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping undecodable streamed risk: {e}")
+            return None
+
+
+class ReviewParseError(ValueError):
+    """Raised when no usable review JSON can be recovered from model output."""
+
+
+class ReviewParseStats:
+    """Counts how each Bedrock response was parsed (and how many were salvaged)."""
+
+    def __init__(self):
+        self.outcomes: Counter[str] = Counter()
+        self.continuations = 0
+
+    def record(self, outcome: str):
+        self.outcomes[outcome] += 1
+
+    def stats(self) -> dict:
+        """Counters for the metrics endpoint."""
+        total = sum(self.outcomes.values())
+        salvaged = total - self.outcomes["clean"] - self.outcomes["failed"]
+        return {
+            **{outcome: self.outcomes[outcome] for outcome in PARSE_OUTCOMES},
+            "continuations": self.continuations,
+            "salvage_rate": round(salvaged / total, 4) if total else 0.0,
+        }
+
+
+def strip_fences(text: str) -> str:
+    """Remove a leading/trailing markdown code fence (```json ... ```)."""
+    return _FENCE_RE.sub("", text.strip())
+
+
+def _salvage_top_level(text: str) -> dict:
+    """
+    Decode the complete top-level ``"key": value`` pairs of a truncated object.
+
+    Stops at the first value that can't be decoded (the truncation point).
+    """
+    decoder = json.JSONDecoder()
+    salvaged = {}
+    pos = text.find("{")
+    if pos < 0:
+        return salvaged
+    pos += 1
+
+    while True:
+        while pos < len(text) and text[pos] in " \t\r\n,":
+            pos += 1
+        try:
+            key, pos = decoder.raw_decode(text, pos)
+            while pos < len(text) and text[pos] in " \t\r\n":
+                pos += 1
+            if not isinstance(key, str) or text[pos : pos + 1] != ":":
+                break
+            pos += 1
+            while pos < len(text) and text[pos] in " \t\r\n":
+                pos += 1
+            value, pos = decoder.raw_decode(text, pos)
+        except (json.JSONDecodeError, IndexError):
+            break
+        salvaged[key] = value
+    return salvaged
+
+
+def parse_review_json(text: str) -> tuple[dict, str]:
+    """
+    Parse model output into review JSON, tolerating common damage.
+
+    Tries in order: plain JSON; JSON inside a markdown fence; the outermost
+    object with surrounding prose; and finally repair of truncated output,
+    keeping every complete top-level field and every complete risk object.
+
+    Args:
+        text: Raw model output
+
+    Returns:
+        (review dict, outcome) where outcome is one of PARSE_OUTCOMES except "failed".
+        A "repaired" dict may lack fields the model never got to write.
+
+    Raises:
+        ReviewParseError: Nothing usable could be recovered
+    """
+    try:
+        return json.loads(text), "clean"
+    except json.JSONDecodeError:
+        pass
+
+    unfenced = strip_fences(text)
+    try:
+        return json.loads(unfenced), "fenced"
+    except json.JSONDecodeError:
+        pass
+
+    start = unfenced.find("{")
+    if start >= 0:
+        try:
+            parsed, _ = json.JSONDecoder().raw_decode(unfenced, start)
+            if isinstance(parsed, dict):
+                return parsed, "extracted"
+        except json.JSONDecodeError:
+            pass
+
+    # Truncated: keep complete fields plus complete risks from the partial array
+    salvaged = _salvage_top_level(unfenced)
+    if not isinstance(salvaged.get("risks"), list):
+        parser = StreamingRiskParser()
+        risks = parser.feed(unfenced)
+        if risks:
+            salvaged["risks"] = risks
+    if not salvaged.get("risks"):
+        raise ReviewParseError("No complete review fields or risks in model output")
+
+    logger.warning(
+        f"Repaired truncated review JSON: kept {len(salvaged['risks'])} risks, "
+        f"fields={sorted(salvaged)}"
+    )
+    return salvaged, "repaired"
+
+
+# Singleton instance
+review_parse_stats = ReviewParseStats()
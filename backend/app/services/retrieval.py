@@ -0,0 +1,209 @@
+"""
+Local retrieval over the Well-Architected context.
+
+Instead of inlining the whole context for every review, the context is split
+into chunks (one per pillar subsection, service practice and guideline
+block), indexed with hashed TF-IDF vectors in NumPy, and the chunks most
+similar to a design are selected within a token budget. Fully offline: no
+embedding model or network call.
+"""
+
+import logging
+import math
+import re
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.utils.token_counter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+HASH_FEATURES = 2**14
+EMBEDDING_DIM = 512
+
+# Short words that carry no signal for matching designs to guidance
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from in into is it its of on or our the to use with "
+    "this that these those we you your no not all any via per".split()
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+
+@dataclass(frozen=True)
+class ContextChunk:
+    """One retrievable piece of the Well-Architected context."""
+
+    id: str
+    title: str
+    section: str  # "## ..." heading the chunk sits under ("" if self-contained)
+    text: str
+    tokens: int
+    always_include: bool = False  # Framing text and severity rubric go in every prompt
+
+
+def chunk_context(context: str) -> list[ContextChunk]:
+    """
+    Split the Well-Architected context into retrievable chunks.
+
+    ``## Pillar`` sections are split at their ``**Heading**:`` blocks (core
+    principles, services, anti-patterns); ``### Service`` sections become one
+    chunk each. The preamble and the severity guidelines are always included.
+
+    Args:
+        context: Markdown context (AWS_WELL_ARCHITECTED_CONTEXT)
+
+    Returns:
+        Chunks in document order
+    """
+    chunks: list[ContextChunk] = []
+
+    def add(title: str, body: str, section: str = "", always: bool = False):
+        body = body.strip()
+        if body:
+            chunks.append(
+                ContextChunk(
+                    id=f"chunk-{len(chunks):02d}",
+                    title=title,
+                    section=section,
+                    text=body,
+                    tokens=estimate_tokens(f"{section}\n{body}"),
+                    always_include=always,
+                )
+            )
+
+    sections = re.split(r"^(?=## )", context.strip(), flags=re.MULTILINE)
+    for section in sections:
+        if not section.startswith("## "):
+            add("Preamble", section, always=True)
+            continue
+
+        heading, _, body = section.partition("\n")
+        pillar = heading[3:].strip()
+
+        if "Severity" in pillar:
+            add(pillar, section, always=True)
+        elif "###" in body:
+            for subsection in re.split(r"^(?=### )", body, flags=re.MULTILINE):
+                if subsection.startswith("### "):
+                    title = subsection.partition("\n")[0][4:].strip()
+                    add(f"{pillar} / {title}", subsection, section=heading)
+        else:
+            for block in re.split(r"^(?=\*\*[^*\n]+\*\*:)", body, flags=re.MULTILINE):
+                match = re.match(r"\*\*([^*\n]+)\*\*:", block)
+                title = match.group(1) if match else "Overview"
+                add(f"{pillar} / {title}", block, section=heading)
+
+    return chunks
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word unigrams plus bigrams (so "multi-az" and "single az" match)."""
+    words = [w for w in _TOKEN_RE.findall(text.lower()) if w not in STOP_WORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def hash_vector(terms: list[str]) -> np.ndarray:
+    """Sublinear term-frequency vector over hashed features (stable across processes)."""
+    vector = np.zeros(HASH_FEATURES, dtype=np.float32)
+    for term in terms:
+        vector[zlib.crc32(term.encode()) % HASH_FEATURES] += 1.0
+    np.log1p(vector, out=vector)
+    return vector
+
+
+def embed_text(text: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """
+    Dense unit-length embedding via signed feature hashing.
+
+    Unlike the TF-IDF index this needs no corpus statistics, so a chunk's
+    vector depends only on its own text and can be reused across incremental
+    knowledge-base builds.
+
+    Args:
+        text: Text to embed
+        dim: Embedding dimension
+
+    Returns:
+        float32 vector of length ``dim`` (zero vector for empty text)
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for term, count in Counter(tokenize(text)).items():
+        digest = zlib.crc32(term.encode())
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        vector[digest % dim] += sign * (1.0 + math.log(count))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class ContextRetriever:
+    """TF-IDF (hashed) index over context chunks with budgeted top-k selection."""
+
+    def __init__(self, chunks: list[ContextChunk]):
+        self.chunks = chunks
+        tf = np.stack([hash_vector(tokenize(f"{c.title}\n{c.text}")) for c in chunks])
+        document_frequency = (tf > 0).sum(axis=0)
+        self.idf = (np.log((1 + len(chunks)) / (1 + document_frequency)) + 1).astype(np.float32)
+        self.matrix = self._normalize(tf * self.idf)
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+    def scores(self, text: str) -> np.ndarray:
+        """Cosine similarity of ``text`` to every chunk."""
+        query = self._normalize(hash_vector(tokenize(text)) * self.idf)
+        return self.matrix @ query
+
+    def select(self, text: str, token_budget: int, top_k: int) -> list[ContextChunk]:
+        """
+        Pick the chunks most relevant to a design.
+
+        Always-included chunks are taken first; then the top-k scoring chunks
+        that fit the remaining budget. The result keeps document order so the
+        prompt reads like the original context.
+
+        Args:
+            text: Architecture description
+            token_budget: Maximum estimated tokens across selected chunks
+            top_k: Maximum number of retrieved (non-always) chunks
+
+        Returns:
+            Selected chunks in document order
+        """
+        selected = {i for i, c in enumerate(self.chunks) if c.always_include}
+        used = sum(self.chunks[i].tokens for i in selected)
+
+        scores = self.scores(text)
+        retrieved = 0
+        for i in np.argsort(-scores, kind="stable"):
+            if retrieved >= top_k or scores[i] <= 0:
+                break
+            chunk = self.chunks[i]
+            if i in selected or used + chunk.tokens > token_budget:
+                continue
+            selected.add(int(i))
+            used += chunk.tokens
+            retrieved += 1
+
+        return [self.chunks[i] for i in sorted(selected)]
+
+    def render(self, text: str, token_budget: int, top_k: int) -> str:
+        """Selected chunks as markdown (see format_chunks)."""
+        return format_chunks(self.select(text, token_budget, top_k))
+
+
+def format_chunks(chunks: list[ContextChunk]) -> str:
+    """Chunks as markdown, with each section heading written once."""
+    parts = []
+    current_section = None
+    for chunk in chunks:
+        if chunk.section and chunk.section != current_section:
+            parts.append(chunk.section)
+        current_section = chunk.section
+        parts.append(chunk.text)
+    return "\n\n".join(parts)
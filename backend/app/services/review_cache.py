@@ -0,0 +1,299 @@
+"""
+Content-addressed cache for Bedrock review results.
+
+Identical submissions (demo text, documented examples, re-clicked submits)
+are served from cache instead of paying for another Bedrock call.
+
+Two tiers:
+- Memory: bounded LRU with TTL (per process)
+- Disk (optional): SQLite file that survives restarts
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any
+
+from app.core.config import settings
+from app.models.response import ReviewResponse
+from app.services.knowledge_base import knowledge_base
+from app.services.prompts import PROMPT_VERSION
+
+logger = logging.getLogger(__name__)
+
+
+class LRUTTLCache:
+    """
+    Bounded in-memory LRU cache with per-entry time-to-live.
+
+    Not thread-safe; intended for use from the event loop.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Any | None:
+        """Return the cached value (refreshing its LRU position) or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any):
+        """Insert or replace a value, evicting the least recently used entry if full."""
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: str) -> Any | None:
+        """Remove and return a value (ignores expiry)."""
+        entry = self._entries.pop(key, None)
+        return entry[1] if entry else None
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def normalize_design_text(design_text: str) -> str:
+    """Collapse whitespace so cosmetic edits (trailing spaces, CRLF) hit the same entry."""
+    return re.sub(r"\s+", " ", design_text).strip()
+
+
+def review_cache_key(design_text: str, tone: str, model_id: str | None = None) -> str:
+    """
+    Build the content address for a review.
+
+    Args:
+        design_text: Architecture description
+        tone: "standard" or "roast"
+        model_id: Bedrock model ID (defaults to settings.bedrock_model_id)
+
+    Returns:
+        SHA-256 hex digest over normalized text, tone, model ID, prompt version
+        context mode (full vs retrieved), knowledge-base generation, output
+        mode (full vs compact), whether the review fans out per pillar, the
+        long-document sectioning settings, the model cascade models and
+        whether small reviews are micro-batched
+    """
+    material = json.dumps(
+        [
+            normalize_design_text(design_text),
+            tone,
+            model_id or settings.bedrock_model_id,
+            PROMPT_VERSION,
+            settings.context_retrieval_enabled,
+            knowledge_base.generation,
+            settings.review_output_mode,
+            settings.review_fanout_enabled,
+            settings.long_document_token_threshold,
+            settings.long_document_section_tokens,
+            settings.model_routing_enabled,
+            settings.bedrock_fast_model_id,
+            settings.bedrock_complex_model_id,
+            settings.review_batching_enabled,
+        ]
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def fresh_review_copy(review: ReviewResponse, **metadata: Any) -> ReviewResponse:
+    """
+    Copy a stored review for a new caller with its own review_id and created_at.
+
+    Args:
+        review: Stored review
+        **metadata: Extra metadata keys describing how the copy was served
+
+    Returns:
+        Deep copy with fresh identity
+    """
+    copy = review.model_copy(deep=True)
+    copy.review_id = f"review-{uuid.uuid4()}"
+    copy.created_at = datetime.now(timezone.utc)
+    copy.metadata = dict(copy.metadata or {})
+    copy.metadata.update(metadata)
+    return copy
+
+
+class _SQLiteTier:
+    """SQLite-backed persistent tier. All methods are blocking; call via a thread."""
+
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS reviews ("
+                "key TEXT PRIMARY KEY, payload TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str, ttl_seconds: float) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, stored_at FROM reviews WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        payload, stored_at = row
+        if stored_at + ttl_seconds <= time.time():
+            return None
+        return payload
+
+    def set(self, key: str, payload: str, ttl_seconds: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reviews (key, payload, stored_at) VALUES (?, ?, ?)",
+                (key, payload, time.time()),
+            )
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._prune(ttl_seconds)
+            self._conn.commit()
+
+    def _prune(self, ttl_seconds: float):
+        """Drop expired rows, then the oldest rows beyond max_entries (lock held)."""
+        self._conn.execute(
+            "DELETE FROM reviews WHERE stored_at <= ?", (time.time() - ttl_seconds,)
+        )
+        self._conn.execute(
+            "DELETE FROM reviews WHERE key NOT IN "
+            "(SELECT key FROM reviews ORDER BY stored_at DESC LIMIT ?)",
+            (self.max_entries,),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM reviews")
+            self._conn.commit()
+
+
+class ReviewCache:
+    """
+    Two-tier review result cache.
+
+    Only complete Bedrock reviews are stored (never pattern-matching
+    fallbacks, nor reviews repaired from truncated model output). Every hit
+    is returned as a fresh copy with a new review_id.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        disk_path: str | None = None,
+        disk_max_entries: int = 10_000,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self._memory = LRUTTLCache(max_entries, ttl_seconds)
+        self._disk = None
+        if disk_path:
+            try:
+                self._disk = _SQLiteTier(disk_path, disk_max_entries)
+                logger.info(f"Review cache disk tier enabled at {disk_path}")
+            except sqlite3.Error as e:
+                logger.error(f"Review cache disk tier unavailable ({disk_path}): {e}")
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    async def get(self, key: str) -> ReviewResponse | None:
+        """
+        Look up a review by content key.
+
+        Returns:
+            Fresh copy of the cached review, or None on miss
+        """
+        review = self._memory.get(key)
+        if review is not None:
+            self.memory_hits += 1
+            return fresh_review_copy(review, cache_hit=True, cache_tier="memory", cost_usd=0.0)
+
+        if self._disk is not None:
+            try:
+                payload = await asyncio.to_thread(self._disk.get, key, self.ttl_seconds)
+            except sqlite3.Error as e:
+                logger.warning(f"Review cache disk read failed: {e}")
+                payload = None
+            if payload is not None:
+                review = ReviewResponse.model_validate_json(payload)
+                self._memory.set(key, review)  # Promote to memory tier
+                self.disk_hits += 1
+                return fresh_review_copy(review, cache_hit=True, cache_tier="disk", cost_usd=0.0)
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, review: ReviewResponse):
+        """Store a review in both tiers."""
+        stored = review.model_copy(deep=True)
+        self._memory.set(key, stored)
+        self.stores += 1
+
+        if self._disk is not None:
+            try:
+                await asyncio.to_thread(
+                    self._disk.set, key, stored.model_dump_json(), self.ttl_seconds
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Review cache disk write failed: {e}")
+
+    async def clear(self):
+        self._memory.clear()
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.clear)
+
+    def stats(self) -> dict:
+        """Hit/miss counters for the metrics endpoint."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "enabled": settings.review_cache_enabled,
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self._memory.evictions,
+            "expirations": self._memory.expirations,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "disk_tier": self._disk is not None,
+        }
+
+
+# Singleton instance
+review_cache = ReviewCache(
+    max_entries=settings.review_cache_max_entries,
+    ttl_seconds=settings.review_cache_ttl_seconds,
+    disk_path=settings.review_cache_path,
+    disk_max_entries=settings.review_cache_disk_max_entries,
+)
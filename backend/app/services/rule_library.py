@@ -0,0 +1,496 @@
+"""
+Local library of Well-Architected risk rules.
+
+Each rule carries the long-form text of a RiskItem (title, impact,
+remediation, references), so the model only has to name a rule code, a
+severity and a short finding in compact output mode (REVIEW_OUTPUT_MODE=compact)
+and the server fills in the rest. The pattern-matching fallback builds its
+risks from the same rules.
+"""
+
+from dataclasses import dataclass
+
+PILLAR_PREFIXES = {
+    "operational_excellence": "OPS",
+    "security": "SEC",
+    "reliability": "REL",
+    "performance_efficiency": "PERF",
+    "cost_optimization": "COST",
+    "sustainability": "SUS",
+}
+
+# Model-authored risk that matches no rule: title, pillar and remediation come from the model
+CUSTOM_RULE_CODE = "CUSTOM"
+
+
+@dataclass(frozen=True)
+class RiskRule:
+    """Static text for one well-known anti-pattern."""
+
+    code: str
+    title: str
+    pillar: str
+    severity: str  # Default when the model omits one
+    impact: str
+    finding: str  # Default finding (pattern-matching fallback)
+    remediation: str
+    references: tuple[str, ...]
+    likelihood: str | None = None
+
+
+_WA = "https://docs.aws.amazon.com/wellarchitected/latest"
+
+RULES: dict[str, RiskRule] = {
+    rule.code: rule
+    for rule in [
+        # Reliability
+        RiskRule(
+            code="SINGLE_AZ",
+            title="Single Availability Zone Deployment",
+            pillar="reliability",
+            severity="HIGH",
+            impact="Service becomes unavailable during AZ-level failure (entire data center outage). "
+            "AWS AZ failures are rare but do occur (e.g., us-east-1a outage Dec 2021).",
+            likelihood="MEDIUM",
+            finding="Architecture deploys all resources to a single Availability Zone, "
+            "creating a single point of failure at the infrastructure level.",
+            remediation="Deploy resources across at least 2 Availability Zones within the same region. "
+            "Use Application Load Balancer or Network Load Balancer to distribute traffic. "
+            "Ensure RDS, EFS, and other stateful services are configured for Multi-AZ.",
+            references=(
+                f"{_WA}/reliability-pillar/availability.html",
+                "https://aws.amazon.com/architecture/well-architected/",
+            ),
+        ),
+        RiskRule(
+            code="NO_BACKUP",
+            title="No Backup Strategy Configured",
+            pillar="reliability",
+            severity="HIGH",
+            impact="Permanent data loss in case of accidental deletion, corruption, or ransomware attack. "
+            "No ability to restore to previous state (violates RTO/RPO requirements).",
+            likelihood="HIGH",
+            finding="Architecture does not implement automated backups for databases or critical data.",
+            remediation="Enable automated backups: RDS (automated backups with 7-35 day retention), "
+            "DynamoDB (Point-in-Time Recovery), EBS (snapshots via AWS Backup or Data Lifecycle Manager). "
+            "Define RPO (Recovery Point Objective) and RTO (Recovery Time Objective) and test recovery process.",
+            references=(
+                f"{_WA}/reliability-pillar/backup-and-recovery.html",
+                "https://aws.amazon.com/backup/",
+            ),
+        ),
+        RiskRule(
+            code="SINGLE_POINT_OF_FAILURE",
+            title="Single Point of Failure",
+            pillar="reliability",
+            severity="HIGH",
+            impact="Failure of one component (single NAT gateway, single-instance database, one server) "
+            "takes down the whole workload.",
+            finding="A critical component runs as a single instance without failover.",
+            remediation="Run redundant instances behind a load balancer, enable RDS Multi-AZ, "
+            "and deploy one NAT gateway per Availability Zone.",
+            references=(f"{_WA}/reliability-pillar/use-fault-isolation-to-protect-your-workload.html",),
+        ),
+        RiskRule(
+            code="NO_HEALTH_CHECKS",
+            title="Missing Health Checks",
+            pillar="reliability",
+            severity="MEDIUM",
+            impact="Unhealthy instances keep receiving traffic and are never replaced automatically.",
+            finding="Load balancer or Auto Scaling group does not use health checks.",
+            remediation="Configure ELB target group health checks and ELB health checks on Auto Scaling groups; "
+            "use Route 53 health checks for DNS failover.",
+            references=("https://docs.aws.amazon.com/elasticloadbalancing/latest/application/target-group-health-checks.html",),
+        ),
+        RiskRule(
+            code="NO_DR_PLAN",
+            title="No Disaster Recovery Plan",
+            pillar="reliability",
+            severity="HIGH",
+            impact="A regional outage or data corruption event has no tested recovery path; "
+            "recovery time is unbounded.",
+            finding="No disaster recovery strategy or tested recovery procedure is described.",
+            remediation="Define RPO/RTO targets and pick a DR strategy (backup and restore, pilot light, "
+            "warm standby or multi-site); use AWS Elastic Disaster Recovery or cross-region replication and test it.",
+            references=(f"{_WA}/reliability-pillar/plan-for-disaster-recovery-dr.html",),
+        ),
+        # Security
+        RiskRule(
+            code="UNENCRYPTED_AT_REST",
+            title="Data Not Encrypted at Rest",
+            pillar="security",
+            severity="CRITICAL",
+            impact="Sensitive data exposed in case of unauthorized access to storage (disk theft, snapshot leak, etc.). "
+            "Compliance violations for HIPAA, PCI-DSS, GDPR.",
+            likelihood="HIGH",
+            finding="Architecture stores data without encryption at rest (S3, EBS, RDS, etc.).",
+            remediation="Enable encryption at rest for all storage services: "
+            "S3 (SSE-S3, SSE-KMS, or SSE-C), RDS (enable encryption at creation), "
+            "EBS (enable default encryption in account settings). "
+            "Use AWS KMS for centralized key management.",
+            references=(
+                f"{_WA}/security-pillar/data-protection.html",
+                "https://docs.aws.amazon.com/AmazonS3/latest/userguide/default-bucket-encryption.html",
+            ),
+        ),
+        RiskRule(
+            code="PUBLIC_S3",
+            title="S3 Bucket Publicly Accessible",
+            pillar="security",
+            severity="CRITICAL",
+            impact="Sensitive data exposed to the internet. Potential for data leaks, compliance violations, "
+            "and massive AWS bills if data is exfiltrated at scale.",
+            likelihood="CRITICAL",
+            finding="S3 bucket configured with public access (bucket policy or ACLs allow public read/write).",
+            remediation="Remove public access: Set 'Block Public Access' settings on the bucket. "
+            "Use IAM policies or S3 bucket policies with least-privilege access. "
+            "Enable S3 access logging and CloudTrail for audit trail.",
+            references=(
+                "https://docs.aws.amazon.com/AmazonS3/latest/userguide/access-control-block-public-access.html",
+                f"{_WA}/security-pillar/sec_protect_data_at_rest.html",
+            ),
+        ),
+        RiskRule(
+            code="NO_TLS",
+            title="No Encryption in Transit",
+            pillar="security",
+            severity="HIGH",
+            impact="Credentials and data can be intercepted or modified on the network.",
+            finding="Traffic is served or passed between components over plain HTTP.",
+            remediation="Terminate TLS on ALB/CloudFront with ACM certificates, redirect HTTP to HTTPS, "
+            "and require TLS for database and service-to-service connections.",
+            references=(f"{_WA}/security-pillar/protecting-data-in-transit.html",),
+        ),
+        RiskRule(
+            code="HARDCODED_SECRETS",
+            title="Hardcoded Credentials or Secrets",
+            pillar="security",
+            severity="CRITICAL",
+            impact="Leaked code, images or environment dumps expose long-lived credentials.",
+            finding="Access keys, passwords or secrets are stored in code, config or environment variables.",
+            remediation="Use IAM roles instead of access keys and store secrets in AWS Secrets Manager "
+            "or SSM Parameter Store with rotation.",
+            references=(f"{_WA}/security-pillar/identity-management.html",),
+        ),
+        RiskRule(
+            code="OPEN_SECURITY_GROUP",
+            title="Overly Permissive Security Groups",
+            pillar="security",
+            severity="HIGH",
+            impact="Administrative and database ports reachable from the internet invite brute force "
+            "and exploitation.",
+            finding="Security groups allow 0.0.0.0/0 on non-HTTP/HTTPS ports.",
+            remediation="Restrict ingress to known sources and security groups, place databases in private "
+            "subnets, and use Systems Manager Session Manager instead of open SSH/RDP.",
+            references=(f"{_WA}/security-pillar/protecting-networks.html",),
+        ),
+        RiskRule(
+            code="OVERPRIVILEGED_IAM",
+            title="Overly Broad IAM Permissions",
+            pillar="security",
+            severity="HIGH",
+            impact="A compromised principal can act far beyond its purpose (blast radius of admin access).",
+            finding="Root account, IAM users or wildcard policies are used where scoped roles should be.",
+            remediation="Use IAM roles with least-privilege policies, enforce MFA, stop using the root account, "
+            "and review access with IAM Access Analyzer.",
+            references=(f"{_WA}/security-pillar/permissions-management.html",),
+        ),
+        RiskRule(
+            code="NO_AUDIT_LOGGING",
+            title="No Audit Logging or Threat Detection",
+            pillar="security",
+            severity="MEDIUM",
+            impact="Security incidents go unnoticed and cannot be investigated after the fact.",
+            finding="CloudTrail, VPC Flow Logs or GuardDuty are not enabled.",
+            remediation="Enable an organization CloudTrail, VPC Flow Logs, GuardDuty and Security Hub, "
+            "and alert on high-severity findings.",
+            references=(f"{_WA}/security-pillar/detection.html",),
+        ),
+        # Performance efficiency
+        RiskRule(
+            code="NO_AUTOSCALING",
+            title="No Auto-Scaling Configured",
+            pillar="performance_efficiency",
+            severity="MEDIUM",
+            impact="Service degradation or outages during traffic spikes. "
+            "Over-provisioning during low traffic leads to wasted cost.",
+            likelihood="HIGH",
+            finding="Architecture uses fixed capacity (static EC2 instances) without auto-scaling.",
+            remediation="Implement Auto Scaling Groups (ASG) for EC2 instances. "
+            "Configure scaling policies based on CPU, memory, or custom CloudWatch metrics. "
+            "Set appropriate min/max/desired capacity. Consider predictive scaling for known patterns.",
+            references=(
+                "https://docs.aws.amazon.com/autoscaling/ec2/userguide/what-is-amazon-ec2-auto-scaling.html",
+                f"{_WA}/performance-efficiency-pillar/selection.html",
+            ),
+        ),
+        RiskRule(
+            code="NO_CACHING",
+            title="No Caching Layer",
+            pillar="performance_efficiency",
+            severity="MEDIUM",
+            impact="Every request hits the database or origin, raising latency and load.",
+            finding="Reads are served directly from the database or origin without a cache or CDN.",
+            remediation="Add ElastiCache (Redis) or DAX in front of hot reads and serve static content "
+            "through CloudFront.",
+            references=(f"{_WA}/performance-efficiency-pillar/data-management.html",),
+        ),
+        RiskRule(
+            code="LAMBDA_COLD_START",
+            title="Lambda Cold Starts Not Addressed",
+            pillar="performance_efficiency",
+            severity="LOW",
+            impact="Latency-sensitive requests see multi-second delays after idle periods or scale-out.",
+            finding="Latency-sensitive Lambda functions run without cold start mitigation.",
+            remediation="Use provisioned concurrency or SnapStart for latency-sensitive functions, "
+            "and keep deployment packages and initialization small.",
+            references=("https://docs.aws.amazon.com/lambda/latest/dg/provisioned-concurrency.html",),
+        ),
+        # Cost optimization
+        RiskRule(
+            code="OVERPROVISIONED",
+            title="Over-Provisioned Resources",
+            pillar="cost_optimization",
+            severity="MEDIUM",
+            impact="Wasted spend on unused capacity. Could be 30-70% cost reduction opportunity.",
+            likelihood="HIGH",
+            finding="Architecture uses instance types or capacity larger than workload requirements.",
+            remediation="Right-size resources: Use AWS Compute Optimizer recommendations. "
+            "Start with smaller instance types and scale up based on metrics. "
+            "Consider Reserved Instances or Savings Plans for predictable workloads. "
+            "Use Spot Instances for fault-tolerant workloads.",
+            references=(
+                f"{_WA}/cost-optimization-pillar/cost-optimization-pillar.html",
+                "https://aws.amazon.com/compute-optimizer/",
+            ),
+        ),
+        RiskRule(
+            code="NO_COMMITMENT_DISCOUNTS",
+            title="No Savings Plans or Reserved Capacity",
+            pillar="cost_optimization",
+            severity="LOW",
+            impact="Steady-state usage is billed at on-demand rates, up to 72% more than committed pricing.",
+            finding="Predictable, always-on workloads run entirely on on-demand pricing.",
+            remediation="Cover baseline usage with Compute Savings Plans or Reserved Instances; "
+            "use Spot for interruptible work.",
+            references=(f"{_WA}/cost-optimization-pillar/select-the-best-pricing-model.html",),
+        ),
+        RiskRule(
+            code="NO_STORAGE_LIFECYCLE",
+            title="No Storage Lifecycle Policies",
+            pillar="cost_optimization",
+            severity="LOW",
+            impact="Old and rarely accessed data stays in the most expensive storage class indefinitely.",
+            finding="S3 data or snapshots are kept without lifecycle transitions or expiry.",
+            remediation="Add S3 lifecycle rules to Intelligent-Tiering/Glacier and expire stale snapshots "
+            "with Data Lifecycle Manager.",
+            references=("https://docs.aws.amazon.com/AmazonS3/latest/userguide/object-lifecycle-mgmt.html",),
+        ),
+        RiskRule(
+            code="NO_COST_MONITORING",
+            title="No Cost Monitoring or Budgets",
+            pillar="cost_optimization",
+            severity="LOW",
+            impact="Cost overruns are discovered on the invoice instead of when they start.",
+            finding="No budgets, cost alerts or cost allocation tags are configured.",
+            remediation="Create AWS Budgets with alerts, enable Cost Anomaly Detection, and tag resources "
+            "for cost allocation.",
+            references=(f"{_WA}/cost-optimization-pillar/expenditure-and-usage-awareness.html",),
+        ),
+        # Operational excellence
+        RiskRule(
+            code="NO_MONITORING",
+            title="No Monitoring or Alarms",
+            pillar="operational_excellence",
+            severity="HIGH",
+            impact="Failures and degradation are found by users rather than by the team.",
+            finding="No CloudWatch metrics, alarms or centralized logs are described.",
+            remediation="Publish CloudWatch metrics and logs, alarm on error rates and latency with SNS "
+            "notifications, and add X-Ray tracing for distributed calls.",
+            references=(f"{_WA}/operational-excellence-pillar/design-telemetry.html",),
+        ),
+        RiskRule(
+            code="MANUAL_DEPLOYMENT",
+            title="Manual Deployments and Infrastructure Changes",
+            pillar="operational_excellence",
+            severity="MEDIUM",
+            impact="Changes are slow, error-prone and hard to roll back or reproduce.",
+            finding="Infrastructure and releases are changed by hand rather than through code and pipelines.",
+            remediation="Define infrastructure with CloudFormation, CDK or Terraform and deploy through "
+            "a CI/CD pipeline with automated tests and rollback.",
+            references=(f"{_WA}/operational-excellence-pillar/mitigate-deployment-risks.html",),
+        ),
+        # Sustainability
+        RiskRule(
+            code="ALWAYS_ON_NONPROD",
+            title="Always-On Non-Production Environments",
+            pillar="sustainability",
+            severity="LOW",
+            impact="Idle dev/test capacity consumes energy and budget around the clock.",
+            finding="Development or test environments run 24/7.",
+            remediation="Schedule non-production environments to stop outside working hours "
+            "(Instance Scheduler) or make them ephemeral.",
+            references=(f"{_WA}/sustainability-pillar/alignment-to-demand.html",),
+        ),
+        RiskRule(
+            code="INEFFICIENT_INSTANCES",
+            title="Inefficient Instance Types",
+            pillar="sustainability",
+            severity="LOW",
+            impact="Older-generation or x86 instances use more energy per unit of work.",
+            finding="Workloads run on older-generation instances where Graviton would be compatible.",
+            remediation="Move compatible workloads to current-generation Graviton instances and managed "
+            "or serverless services.",
+            references=(f"{_WA}/sustainability-pillar/hardware-and-services.html",),
+        ),
+        RiskRule(
+            code="NEEDS_REVIEW",
+            title="Architecture Requires Detailed Review",
+            pillar="operational_excellence",
+            severity="LOW",
+            impact="Potential issues not detected by automated pattern matching. "
+            "Manual review recommended for comprehensive assessment.",
+            finding="No specific anti-patterns detected in provided description. "
+            "However, architecture review is recommended to ensure Well-Architected alignment.",
+            remediation="Review AWS Well-Architected Framework pillars: Operational Excellence, Security, "
+            "Reliability, Performance Efficiency, Cost Optimization, and Sustainability. "
+            "Use AWS Well-Architected Tool for guided review.",
+            references=(
+                "https://aws.amazon.com/architecture/well-architected/",
+                "https://aws.amazon.com/well-architected-tool/",
+            ),
+        ),
+    ]
+}
+
+
+def rule_catalog(pillars: tuple[str, ...] | None = None) -> str:
+    """
+    One line per rule (``CODE | pillar | title``) for the compact-mode prompt.
+
+    Args:
+        pillars: Only list rules of these pillars (a fan-out shard's); all when None
+    """
+    return "\n".join(
+        f"{rule.code} | {rule.pillar} | {rule.title}"
+        for rule in RULES.values()
+        if pillars is None or rule.pillar in pillars
+    )
+
+
+def build_risk(code: str, risk_id: str, **overrides) -> dict:
+    """
+    Full RiskItem fields for a library rule.
+
+    Args:
+        code: Rule code (key of RULES)
+        risk_id: ID to assign (e.g. "REL-001")
+        **overrides: Fields that replace the rule's defaults (severity, finding, ...)
+
+    Returns:
+        Dict ready for RiskItem(**...)
+
+    Raises:
+        KeyError: Unknown rule code
+    """
+    rule = RULES[code]
+    risk = {
+        "id": risk_id,
+        "title": rule.title,
+        "severity": rule.severity,
+        "pillar": rule.pillar,
+        "impact": rule.impact,
+        "likelihood": rule.likelihood,
+        "finding": rule.finding,
+        "remediation": rule.remediation,
+        "references": list(rule.references),
+    }
+    risk.update({key: value for key, value in overrides.items() if value})
+    return risk
+
+
+class CompactReviewExpander:
+    """
+    Expands compact risks (rule code + severity + short finding) into RiskItem dicts.
+
+    IDs are numbered per pillar in the order risks arrive, so expanding the
+    streamed risks one by one and re-expanding the final JSON with a fresh
+    expander yields the same IDs.
+    """
+
+    def __init__(self):
+        self._counters: dict[str, int] = {}
+
+    def _next_id(self, pillar: str) -> str:
+        prefix = PILLAR_PREFIXES.get(pillar, "GEN")
+        self._counters[prefix] = self._counters.get(prefix, 0) + 1
+        return f"{prefix}-{self._counters[prefix]:03d}"
+
+    def expand_risk(self, compact: dict) -> dict:
+        """
+        Expand one compact risk.
+
+        Known codes take title, pillar, impact, remediation and references from
+        the library; unknown codes (or CUSTOM, or a full-schema risk) keep
+        whatever the model wrote.
+
+        Args:
+            compact: {"code", "severity", "finding", and for CUSTOM "title", "pillar", "remediation"}
+
+        Returns:
+            RiskItem field dict
+        """
+        code = str(compact.get("code", CUSTOM_RULE_CODE)).upper()
+        severity = str(compact["severity"]).upper() if compact.get("severity") else None
+        if code in RULES:
+            rule = RULES[code]
+            return build_risk(
+                code,
+                self._next_id(rule.pillar),
+                severity=severity,
+                finding=compact.get("finding"),
+            )
+
+        pillar = compact.get("pillar") or "operational_excellence"
+        return {
+            "id": self._next_id(pillar),
+            "title": compact.get("title") or "Additional Finding",
+            "severity": severity or "MEDIUM",
+            "pillar": pillar,
+            "impact": compact.get("impact") or compact.get("finding") or "",
+            "finding": compact.get("finding") or "",
+            "likelihood": compact.get("likelihood"),
+            "remediation": compact.get("remediation") or "",
+            "references": compact.get("references") or [],
+        }
+
+    def expand_review(self, compact: dict) -> dict:
+        """
+        Expand a compact review JSON into the full review shape.
+
+        ``review_id`` and ``architecture_score`` are left to the caller;
+        topology connections given as ``[source, target, relationship]``
+        arrays become connection objects.
+
+        Args:
+            compact: Parsed compact model output
+
+        Returns:
+            Review dict with full risks, summary, tone and topology
+        """
+        review = {key: value for key, value in compact.items() if key not in ("risks", "topology")}
+        review["risks"] = [self.expand_risk(risk) for risk in compact.get("risks", []) if isinstance(risk, dict)]
+
+        topology = compact.get("topology")
+        if isinstance(topology, dict):
+            connections = []
+            for connection in topology.get("connections", []):
+                if isinstance(connection, list) and len(connection) >= 3:
+                    connection = {
+                        "source_service": connection[0],
+                        "target_service": connection[1],
+                        "relationship_type": connection[2],
+                    }
+                connections.append(connection)
+            review["topology"] = {**topology, "connections": connections}
+        return review
@@ -0,0 +1,161 @@
+"""
+Cache for vision extraction results.
+
+Every image review starts with a vision-model call (validation plus
+architecture extraction), the most expensive call we make. Users often
+re-upload the same diagram, or a re-exported copy with slightly different
+bytes, so results are cached two ways:
+- Exact: SHA-256 of the processed bytes sent to Bedrock (plus the vision model)
+- Near: perceptual dHash within a Hamming distance threshold, for images of
+  the same aspect ratio
+
+Rejections (photos, memes, screenshots) are cached too, so repeat junk
+uploads are refused without calling Bedrock.
+
+Entries live in this worker's memory only (bounded LRU with TTL).
+"""
+
+import hashlib
+import logging
+
+from app.core.config import settings
+from app.services.review_cache import LRUTTLCache
+
+logger = logging.getLogger(__name__)
+
+EXACT = "exact"
+NEAR = "near"
+
+# Near matches must have (almost) the same shape: a dHash says nothing about
+# aspect ratio, since every image is squashed to the same grid first
+ASPECT_RATIO_TOLERANCE = 0.02
+
+
+def vision_cache_key(sha256: str, model_id: str) -> str:
+    """Content address of one processed image for one vision model."""
+    return hashlib.sha256(f"{model_id}\n{sha256}".encode("utf-8")).hexdigest()
+
+
+def _aspect_ratio(processed_image: dict) -> float | None:
+    dimensions = processed_image.get("optimized_dimensions") or processed_image.get("dimensions")
+    if not dimensions or not dimensions[1]:
+        return None
+    return dimensions[0] / dimensions[1]
+
+
+class VisionCache:
+    """Exact and perceptual-hash cache of vision extraction results."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, hamming_threshold: int):
+        self.hamming_threshold = hamming_threshold
+        self._entries = LRUTTLCache(max_entries, ttl_seconds)
+        # key -> (model_id, dhash as int, aspect ratio) for the near-match scan
+        self._hashes: dict[str, tuple[str, int, float]] = {}
+
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.rejections_served = 0
+
+    def get(self, processed_image: dict, model_id: str) -> tuple[dict, str] | None:
+        """
+        Look up the vision result for a processed image.
+
+        Args:
+            processed_image: validate_and_process_image output (sha256, dhash, dimensions)
+            model_id: Vision model the result must come from
+
+        Returns:
+            (result, "exact" | "near"), or None on a miss. result is the
+            cached extraction dict (is_valid_diagram, architecture_description,
+            usage of the original call, ...)
+        """
+        result = self._entries.get(vision_cache_key(processed_image["sha256"], model_id))
+        match = EXACT
+        if result is None:
+            result = self._near_match(processed_image, model_id)
+            match = NEAR
+        if result is None:
+            self.misses += 1
+            return None
+
+        if match == EXACT:
+            self.exact_hits += 1
+        else:
+            self.near_hits += 1
+        if not result.get("is_valid_diagram", False):
+            self.rejections_served += 1
+        return result, match
+
+    def _near_match(self, processed_image: dict, model_id: str) -> dict | None:
+        if processed_image.get("dhash") is None or self.hamming_threshold < 0:
+            return None
+        dhash = int(processed_image["dhash"], 16)
+        aspect = _aspect_ratio(processed_image)
+
+        best_key, best_distance = None, self.hamming_threshold + 1
+        for key, (entry_model, entry_hash, entry_aspect) in list(self._hashes.items()):
+            if entry_model != model_id:
+                continue
+            if aspect is None or abs(entry_aspect - aspect) > ASPECT_RATIO_TOLERANCE * entry_aspect:
+                continue
+            distance = (dhash ^ entry_hash).bit_count()
+            if distance < best_distance:
+                best_key, best_distance = key, distance
+
+        if best_key is None:
+            return None
+        result = self._entries.get(best_key)
+        if result is None:
+            del self._hashes[best_key]  # Expired or evicted since it was indexed
+            return self._near_match(processed_image, model_id)
+        logger.info(f"Vision cache near match at Hamming distance {best_distance}")
+        return result
+
+    def set(self, processed_image: dict, model_id: str, result: dict):
+        """
+        Store the vision result (accepted or rejected) for a processed image.
+
+        Args:
+            processed_image: validate_and_process_image output
+            model_id: Vision model that produced the result
+            result: Extraction dict to replay on later hits
+        """
+        key = vision_cache_key(processed_image["sha256"], model_id)
+        self._entries.set(key, result)
+        self.stores += 1
+
+        aspect = _aspect_ratio(processed_image)
+        if processed_image.get("dhash") is not None and aspect is not None:
+            self._hashes[key] = (model_id, int(processed_image["dhash"], 16), aspect)
+        if len(self._hashes) > 2 * self._entries.max_entries:
+            # Drop index entries whose results were evicted or expired
+            self._hashes = {k: v for k, v in self._hashes.items() if self._entries.get(k) is not None}
+
+    def clear(self):
+        self._entries.clear()
+        self._hashes.clear()
+
+    def stats(self) -> dict:
+        """Counters for the metrics endpoint."""
+        lookups = self.exact_hits + self.near_hits + self.misses
+        return {
+            "enabled": settings.vision_cache_enabled,
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.exact_hits + self.near_hits) / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "rejections_served": self.rejections_served,
+            "hamming_threshold": self.hamming_threshold,
+        }
+
+
+# Singleton instance
+vision_cache = VisionCache(
+    max_entries=settings.vision_cache_max_entries,
+    ttl_seconds=settings.vision_cache_ttl_seconds,
+    hamming_threshold=settings.vision_cache_hamming_threshold,
+)
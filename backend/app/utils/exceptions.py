@@ -41,6 +41,31 @@ class BedrockServiceException(BedrockException):
     pass
 
 
+class BedrockCircuitOpenException(BedrockException):
+    """Raised without calling Bedrock while its circuit breaker is open."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after  # Seconds until the breaker probes again
+
+
+class AdmissionRejectedException(Exception):
+    """Raised when the Bedrock admission queue is full or a queued request waited too long."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after  # Seconds, for the Retry-After header
+
+
+class InputTooLargeException(Exception):
+    """Raised before calling Bedrock when a prompt can't fit the model's context window."""
+
+    def __init__(self, message: str, input_tokens: int, max_input_tokens: int):
+        super().__init__(message)
+        self.input_tokens = input_tokens  # Estimated prompt tokens
+        self.max_input_tokens = max_input_tokens  # Context window minus the output reserve
+
+
 class ImageProcessingException(Exception):
     """Base exception for image processing errors."""
 
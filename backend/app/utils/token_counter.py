@@ -2,144 +2,375 @@
 Token estimation and cost tracking for Bedrock API calls.
 
 Provides utilities for:
-- Estimating token count before API call
+- Counting tokens locally before API call
+- Fitting requests into the context window (truncate_to_tokens)
 - Calculating cost estimates
+- Tracking estimate-vs-actual drift
 - Logging actual token usage
 - Calculating actual cost from API response
 """
 
 import logging
+import math
+import re
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
+# Claude 3.5 Haiku pricing (USD per million tokens)
+INPUT_COST_PER_MTOK = 1.0
+OUTPUT_COST_PER_MTOK = 5.0
+# Prompt caching: writes cost 25% more than base input, reads cost 10% of it
+CACHE_WRITE_COST_PER_MTOK = INPUT_COST_PER_MTOK * 1.25
+CACHE_READ_COST_PER_MTOK = INPUT_COST_PER_MTOK * 0.1
+# Claude vision: an image costs about width * height / 750 input tokens
+VISION_PIXELS_PER_TOKEN = 750
+
+
+# Local token counter. Claude's tokenizer isn't available offline, so text is
+# split the way BPE tokenizers pre-tokenize it (words with their leading space,
+# digit groups of up to three, punctuation runs, whitespace runs) and each piece
+# is priced. Estimates are compared with the input_tokens Bedrock reports for
+# every review (token_drift) and the running ratio corrects pre-flight budgets.
+_TOKEN_PIECES = re.compile(
+    r"(?P<word> ?[A-Za-z]+)|(?P<number> ?\d{1,3})|(?P<space>\s+)|(?P<other>[^\sA-Za-z\d]+)"
+)
+WORD_CHARS_PER_TOKEN = 6  # Common words are one token; long or rare ones split
+PUNCTUATION_CHARS_PER_TOKEN = 2
+WHITESPACE_CHARS_PER_TOKEN = 8
+
+
+def _piece_tokens(match: re.Match) -> int:
+    piece = match.group()
+    kind = match.lastgroup
+    if kind == "word":
+        return math.ceil(len(piece.lstrip()) / WORD_CHARS_PER_TOKEN)
+    if kind == "number":
+        return 1
+    if kind == "space":
+        return math.ceil(len(piece) / WHITESPACE_CHARS_PER_TOKEN)
+    non_ascii = sum(1 for char in piece if ord(char) > 127)
+    return non_ascii + math.ceil((len(piece) - non_ascii) / PUNCTUATION_CHARS_PER_TOKEN)
+
 
 def estimate_tokens(text: str) -> int:
     """
-    Rough estimation of token count based on character length.
+    Count tokens locally with a BPE-style pre-tokenizer.
 
-    Uses heuristic: ~4 characters per token (Claude tokenization average).
+    Words (with their leading space) cost one token per ~6 letters, digit
+    groups of up to three one token, punctuation one per ~2 characters,
+    non-ASCII characters one each and whitespace runs one per ~8 characters.
+    Much closer to Bedrock's count than characters / 4 on JSON, code and
+    markdown-heavy text; see token_drift for the measured error.
 
     Args:
-        text: Input text to estimate
+        text: Input text to count
 
     Returns:
         Estimated token count
     """
-    return len(text) // 4
+    return sum(_piece_tokens(match) for match in _TOKEN_PIECES.finditer(text))
+
+
+@lru_cache(maxsize=64)
+def _static_prompt_tokens(system_prompt: str) -> int:
+    # System prompts are cached per (tone, mode) in prompts.py and returned as
+    # the same string object, so this lookup is a hash hit after the first call
+    return estimate_tokens(system_prompt)
+
+
+def count_prompt_tokens(system_prompt: str, user_message: str) -> dict:
+    """
+    Count the input tokens of a Bedrock text call.
+
+    Args:
+        system_prompt: System prompt as sent (counted once per distinct prompt)
+        user_message: User message as sent
+
+    Returns:
+        dict with system_prompt_tokens, user_message_tokens and input_tokens
+    """
+    system_tokens = _static_prompt_tokens(system_prompt)
+    user_tokens = estimate_tokens(user_message)
+    return {
+        "system_prompt_tokens": system_tokens,
+        "user_message_tokens": user_tokens,
+        "input_tokens": system_tokens + user_tokens,
+    }
 
 
-def estimate_request_cost(design_text: str) -> dict:
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut text to at most ``max_tokens`` (by estimate_tokens) at a piece boundary.
+
+    Args:
+        text: Text to shorten
+        max_tokens: Token limit for the returned text
+
+    Returns:
+        The longest prefix of text within the limit (text itself if it fits)
+    """
+    total = 0
+    for match in _TOKEN_PIECES.finditer(text):
+        total += _piece_tokens(match)
+        if total > max_tokens:
+            return text[: match.start()].rstrip()
+    return text
+
+
+def estimate_request_cost(system_prompt: str, user_message: str, output_tokens: int = 700) -> dict:
     """
     Estimate cost before making Bedrock call.
 
-    Token breakdown:
-    - System prompt: ~800 tokens
-    - AWS Well-Architected context: ~6,000 tokens (comprehensive coverage)
-    - JSON schema: ~300 tokens
-    - User input: variable (estimated from design_text)
-    - Output estimate: ~700 tokens (typical response with 3-5 risks)
+    Input tokens are counted from the prompt that will actually be sent
+    (system prompt with its Well-Architected context and schema, plus the user
+    message with any retrieved guidance and the design).
 
     Pricing (Claude 3.5 Haiku):
     - Input: $1.00 per million tokens ($0.001 per 1K)
     - Output: $5.00 per million tokens ($0.005 per 1K)
 
     Args:
-        design_text: User's architecture description
+        system_prompt: System prompt as sent
+        user_message: User message as sent
+        output_tokens: Expected output tokens (typical response with 3-5 risks)
 
     Returns:
         dict with keys:
+            - system_prompt_tokens (int): System prompt tokens
+            - user_message_tokens (int): User message tokens
             - input_tokens (int): Estimated input tokens
             - output_tokens_estimate (int): Estimated output tokens
             - input_cost (float): Estimated input cost in USD
             - output_cost_estimate (float): Estimated output cost in USD
             - total_cost_estimate (float): Total estimated cost in USD
     """
-    # Token estimates
-    system_prompt_tokens = 800
-    aws_context_tokens = 6000  # Comprehensive AWS Well-Architected content
-    json_schema_tokens = 300
-    user_input_tokens = estimate_tokens(design_text)
-    total_input_tokens = (
-        system_prompt_tokens + aws_context_tokens + json_schema_tokens + user_input_tokens
-    )
-
-    estimated_output_tokens = 700  # Typical response with 3-5 risks
+    counts = count_prompt_tokens(system_prompt, user_message)
 
-    # Pricing (per 1K tokens)
-    input_cost_per_1k = 0.001  # $1/MTok
-    output_cost_per_1k = 0.005  # $5/MTok
-
-    # Calculate costs
-    input_cost = (total_input_tokens / 1000) * input_cost_per_1k
-    output_cost = (estimated_output_tokens / 1000) * output_cost_per_1k
+    input_cost = (counts["input_tokens"] / 1_000_000) * INPUT_COST_PER_MTOK
+    output_cost = (output_tokens / 1_000_000) * OUTPUT_COST_PER_MTOK
 
     return {
-        "input_tokens": total_input_tokens,
-        "output_tokens_estimate": estimated_output_tokens,
+        **counts,
+        "output_tokens_estimate": output_tokens,
         "input_cost": input_cost,
         "output_cost_estimate": output_cost,
         "total_cost_estimate": input_cost + output_cost,
     }
 
 
+class TokenDriftTracker:
+    """
+    Estimated vs. Bedrock-reported input tokens, per call.
+
+    Keeps an exponentially weighted ratio of actual to estimated tokens so
+    pre-flight budgets can correct for the local counter's bias.
+    """
+
+    def __init__(self, smoothing: float = 0.1, min_ratio: float = 0.5, max_ratio: float = 2.0):
+        self.smoothing = smoothing
+        self.min_ratio = min_ratio
+        self.max_ratio = max_ratio
+        self.ratio = 1.0
+        self.calls = 0
+        self.abs_drift_pct_total = 0.0
+        self.last_drift_pct: float | None = None
+
+    def record(self, estimated: int, usage: dict, review_id: str | None = None) -> dict:
+        """
+        Compare an estimate with the input tokens Bedrock billed and log the drift.
+
+        Args:
+            estimated: Input tokens counted locally before the call
+            usage: Usage dict from the Bedrock response (cached prefix tokens
+                are part of the prompt, so they count too)
+            review_id: Review ID for the log line
+
+        Returns:
+            dict with estimated_input_tokens, actual_input_tokens, drift_tokens
+            and drift_pct (empty if Bedrock reported no input tokens)
+        """
+        actual = (
+            (usage.get("input_tokens") or 0)
+            + (usage.get("cache_read_input_tokens") or 0)
+            + (usage.get("cache_creation_input_tokens") or 0)
+        )
+        if not actual or not estimated:
+            return {}
+
+        drift_pct = round((estimated - actual) / actual * 100, 2)
+        self.calls += 1
+        self.abs_drift_pct_total += abs(drift_pct)
+        self.last_drift_pct = drift_pct
+        ratio = actual / estimated
+        self.ratio = min(
+            self.max_ratio,
+            max(self.min_ratio, self.ratio + self.smoothing * (ratio - self.ratio)),
+        )
+
+        drift = {
+            "estimated_input_tokens": estimated,
+            "actual_input_tokens": actual,
+            "drift_tokens": estimated - actual,
+            "drift_pct": drift_pct,
+        }
+        logger.info(
+            f"Token estimate drift {drift_pct:+.1f}% ({estimated} estimated, {actual} actual)",
+            extra={"review_id": review_id, **drift},
+        )
+        return drift
+
+    def calibrate(self, tokens: int) -> int:
+        """Correct a local estimate by the observed actual/estimated ratio."""
+        return math.ceil(round(tokens * self.ratio, 6))
+
+    def stats(self) -> dict:
+        """Drift counters for the metrics endpoint."""
+        return {
+            "calls": self.calls,
+            "mean_abs_drift_pct": round(self.abs_drift_pct_total / self.calls, 2) if self.calls else None,
+            "last_drift_pct": self.last_drift_pct,
+            "calibration_ratio": round(self.ratio, 4),
+        }
+
+
+# Singleton instance
+token_drift = TokenDriftTracker()
+
+
+def calculate_text_cost_breakdown(
+    usage: dict,
+    input_cost_per_mtok: float = INPUT_COST_PER_MTOK,
+    output_cost_per_mtok: float = OUTPUT_COST_PER_MTOK,
+) -> dict:
+    """
+    Price a text-model usage dict, including prompt-cache tokens.
+
+    Bedrock reports cached prefix tokens separately from ``input_tokens``
+    (which only counts the uncached remainder), so each bucket gets its own
+    rate.
+
+    Args:
+        usage: Usage dict from Bedrock response
+        input_cost_per_mtok: Base input price (defaults to Claude 3.5 Haiku);
+            cache write/read rates are derived from it
+        output_cost_per_mtok: Output price
+
+    Returns:
+        dict with input_cost, cache_write_cost, cache_read_cost, output_cost,
+        total_cost and cache_savings (vs. paying full input price), all in USD
+    """
+    input_tokens = usage.get("input_tokens", 0)
+    output_tokens = usage.get("output_tokens", 0)
+    cache_write_tokens = usage.get("cache_creation_input_tokens", 0) or 0
+    cache_read_tokens = usage.get("cache_read_input_tokens", 0) or 0
+
+    cache_write_rate = CACHE_WRITE_COST_PER_MTOK * input_cost_per_mtok / INPUT_COST_PER_MTOK
+    cache_read_rate = CACHE_READ_COST_PER_MTOK * input_cost_per_mtok / INPUT_COST_PER_MTOK
+
+    input_cost = (input_tokens / 1_000_000) * input_cost_per_mtok
+    cache_write_cost = (cache_write_tokens / 1_000_000) * cache_write_rate
+    cache_read_cost = (cache_read_tokens / 1_000_000) * cache_read_rate
+    output_cost = (output_tokens / 1_000_000) * output_cost_per_mtok
+
+    uncached_equivalent = (
+        (cache_write_tokens + cache_read_tokens) / 1_000_000
+    ) * input_cost_per_mtok
+
+    return {
+        "input_cost": input_cost,
+        "cache_write_cost": cache_write_cost,
+        "cache_read_cost": cache_read_cost,
+        "output_cost": output_cost,
+        "total_cost": input_cost + cache_write_cost + cache_read_cost + output_cost,
+        "cache_savings": uncached_equivalent - cache_write_cost - cache_read_cost,
+    }
+
+
 def log_token_usage(usage: dict, review_id: str):
     """
     Log actual token usage from Bedrock response.
 
     Pricing (Claude 3.5 Haiku):
     - Input: $1.00 per million tokens
+    - Cache write: $1.25 per million tokens
+    - Cache read: $0.10 per million tokens
     - Output: $5.00 per million tokens
 
     Args:
         usage: Usage dict from Bedrock response with keys:
             - input_tokens (int)
             - output_tokens (int)
+            - cache_read_input_tokens (int, optional)
+            - cache_creation_input_tokens (int, optional)
         review_id: Review ID for tracking
     """
-    input_tokens = usage.get("input_tokens", 0)
-    output_tokens = usage.get("output_tokens", 0)
-
-    # Calculate costs
-    input_cost = (input_tokens / 1_000_000) * 1.0
-    output_cost = (output_tokens / 1_000_000) * 5.0
-    total_cost = input_cost + output_cost
+    costs = calculate_text_cost_breakdown(usage)
 
     logger.info(
         "Token usage recorded",
         extra={
             "review_id": review_id,
-            "input_tokens": input_tokens,
-            "output_tokens": output_tokens,
-            "input_cost_usd": round(input_cost, 6),
-            "output_cost_usd": round(output_cost, 6),
-            "total_cost_usd": round(total_cost, 6),
+            "input_tokens": usage.get("input_tokens", 0),
+            "output_tokens": usage.get("output_tokens", 0),
+            "cache_read_input_tokens": usage.get("cache_read_input_tokens", 0),
+            "cache_creation_input_tokens": usage.get("cache_creation_input_tokens", 0),
+            "input_cost_usd": round(
+                costs["input_cost"] + costs["cache_write_cost"] + costs["cache_read_cost"], 6
+            ),
+            "output_cost_usd": round(costs["output_cost"], 6),
+            "total_cost_usd": round(costs["total_cost"], 6),
+            "cache_savings_usd": round(costs["cache_savings"], 6),
         },
     )
 
 
-def calculate_actual_cost(usage: dict) -> float:
+def merge_usage(first: dict, second: dict) -> dict:
+    """
+    Sum two Bedrock usage dicts (e.g. a response and its continuation).
+
+    Args:
+        first: Usage dict from the first call
+        second: Usage dict from the follow-up call
+
+    Returns:
+        New dict with every numeric key summed
+    """
+    merged = dict(first)
+    for key, value in second.items():
+        if isinstance(value, (int, float)):
+            merged[key] = (merged.get(key) or 0) + value
+    return merged
+
+
+def calculate_actual_cost(
+    usage: dict,
+    input_cost_per_mtok: float = INPUT_COST_PER_MTOK,
+    output_cost_per_mtok: float = OUTPUT_COST_PER_MTOK,
+) -> float:
     """
     Calculate actual cost from Bedrock response usage.
 
-    Pricing (Claude 3.5 Haiku):
+    Pricing (Claude 3.5 Haiku, unless other rates are passed for a routed model):
     - Input: $1.00 per million tokens
+    - Cache write: $1.25 per million tokens
+    - Cache read: $0.10 per million tokens
     - Output: $5.00 per million tokens
 
     Args:
         usage: Usage dict from Bedrock response with keys:
             - input_tokens (int)
             - output_tokens (int)
+            - cache_read_input_tokens (int, optional)
+            - cache_creation_input_tokens (int, optional)
+        input_cost_per_mtok: Base input price per million tokens
+        output_cost_per_mtok: Output price per million tokens
 
     Returns:
         Total cost in USD (rounded to 6 decimal places)
     """
-    input_tokens = usage.get("input_tokens", 0)
-    output_tokens = usage.get("output_tokens", 0)
-
-    input_cost = (input_tokens / 1_000_000) * 1.0
-    output_cost = (output_tokens / 1_000_000) * 5.0
-
-    return round(input_cost + output_cost, 6)
+    breakdown = calculate_text_cost_breakdown(usage, input_cost_per_mtok, output_cost_per_mtok)
+    return round(breakdown["total_cost"], 6)
 
 
 def calculate_vision_cost(usage: dict) -> float:
@@ -167,3 +398,20 @@ def calculate_vision_cost(usage: dict) -> float:
     output_cost = (output_tokens / 1000) * settings.vision_output_cost_per_1k
 
     return round(input_cost + output_cost, 6)
+
+
+def estimate_vision_tokens(width: int, height: int) -> int:
+    """
+    Estimate the input tokens of an image sent to a Claude vision model.
+
+    Claude bills images at about width * height / 750 tokens (after its own
+    downscaling of images over ~1568px, which prepare_for_vision avoids).
+
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+
+    Returns:
+        Estimated image tokens
+    """
+    return math.ceil(width * height / VISION_PIXELS_PER_TOKEN)
@@ -0,0 +1,95 @@
+"""
+Compare full-context vs retrieved-context prompts over docs/test-architectures.md.
+
+Offline (default): estimated input tokens per test architecture for both modes.
+With --live: also calls Bedrock (or the fake, via BEDROCK_ENDPOINT_URL) in both
+modes and reports latency and billed input tokens.
+
+Usage:
+    python scripts/benchmark_context_retrieval.py [--live] [--tone standard]
+"""
+import argparse
+import asyncio
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.services.bedrock import bedrock_client
+from app.services.prompts import build_analysis_prompt
+from app.utils.token_counter import estimate_tokens
+
+TEST_ARCHITECTURES = Path(__file__).parent.parent.parent / "docs" / "test-architectures.md"
+
+
+def load_test_architectures(path: Path) -> list[tuple[str, str]]:
+    """Return (title, design_text) for each "## Test N: ..." section's first code block."""
+    cases = []
+    for section in re.split(r"^(?=## Test )", path.read_text(), flags=re.MULTILINE):
+        match = re.match(r"## (Test [^\n]+)\n.*?```\n(.*?)```", section, flags=re.DOTALL)
+        if match:
+            cases.append((match.group(1).strip(), match.group(2).strip()))
+    return cases
+
+
+def build_prompt(design_text: str, tone: str, retrieval: bool) -> tuple[str, str]:
+    settings.context_retrieval_enabled = retrieval
+    return build_analysis_prompt(design_text, tone)
+
+
+async def run_live(system_prompt: str, user_message: str) -> tuple[float, int]:
+    start = time.perf_counter()
+    response = await bedrock_client.generate(system_prompt, user_message)
+    return time.perf_counter() - start, response["usage"].get("input_tokens", 0)
+
+
+async def main(live: bool, tone: str):
+    cases = load_test_architectures(TEST_ARCHITECTURES)
+    original = settings.context_retrieval_enabled
+    print(
+        f"{len(cases)} test architectures, retrieval budget "
+        f"{settings.context_retrieval_token_budget} tokens, top_k {settings.context_retrieval_top_k}\n"
+    )
+
+    header = f"{'Test':<50} {'full est':>9} {'retr est':>9} {'saved':>7}"
+    if live:
+        header += f" {'full s':>7} {'retr s':>7} {'full in':>8} {'retr in':>8}"
+    print(header)
+    print("-" * len(header))
+
+    totals = {"full": 0, "retrieved": 0}
+    try:
+        for title, design_text in cases:
+            prompts = {
+                "full": build_prompt(design_text, tone, retrieval=False),
+                "retrieved": build_prompt(design_text, tone, retrieval=True),
+            }
+            estimates = {mode: estimate_tokens(s + u) for mode, (s, u) in prompts.items()}
+            for mode in totals:
+                totals[mode] += estimates[mode]
+
+            saved = 1 - estimates["retrieved"] / estimates["full"]
+            row = f"{title[:50]:<50} {estimates['full']:>9} {estimates['retrieved']:>9} {saved:>7.0%}"
+            if live:
+                full_s, full_in = await run_live(*prompts["full"])
+                retr_s, retr_in = await run_live(*prompts["retrieved"])
+                row += f" {full_s:>7.2f} {retr_s:>7.2f} {full_in:>8} {retr_in:>8}"
+            print(row)
+    finally:
+        settings.context_retrieval_enabled = original
+
+    saved = 1 - totals["retrieved"] / totals["full"]
+    print(f"\nTotal estimated input tokens: full {totals['full']}, retrieved {totals['retrieved']} ({saved:.0%} saved)")
+    print("Note: with prompt caching the full-context system prompt is billed at ~10% after the first call.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", action="store_true", help="Call Bedrock in both modes")
+    parser.add_argument("--tone", default="standard", choices=["standard", "roast"])
+    args = parser.parse_args()
+    asyncio.run(main(args.live, args.tone))
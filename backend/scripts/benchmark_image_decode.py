@@ -0,0 +1,125 @@
+"""
+Decode time and peak memory of image preparation on large inputs.
+
+Compares the previous pipeline (Image.open + thumbnail on the full image)
+with decode_for_size (header probe, JPEG draft decoding, reduce() before the
+final LANCZOS resample). Each run happens in a fresh interpreter so its peak
+RSS is its own (VmHWM, which unlike ru_maxrss is not inherited across exec
+from this parent); the table shows peak RSS above the interpreter's
+baseline after imports. Linux only.
+
+Usage:
+    python scripts/benchmark_image_decode.py [--runs 3]
+"""
+import argparse
+import io
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.image_processing import MAX_DIMENSION, decode_for_size
+from app.utils.exceptions import ImageTooLargeException
+
+INPUTS = [
+    ("6000x4000 JPEG", (6000, 4000), "JPEG"),
+    ("6000x4000 PNG", (6000, 4000), "PNG"),
+    ("8000x5000 JPEG", (8000, 5000), "JPEG"),
+]
+
+
+def make_input(size: tuple[int, int], format: str) -> bytes:
+    """Diagram-like image: white canvas, grid of outlined boxes joined by lines."""
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    step = size[0] // 12
+    for x in range(step // 2, size[0] - step, step):
+        for y in range(step // 2, size[1] - step, step):
+            draw.rectangle((x, y, x + step // 2, y + step // 3), outline="black", width=6, fill=(255, 153, 0))
+            draw.line((x + step // 2, y + step // 6, x + step, y + step // 6), fill="black", width=4)
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **({"quality": 90} if format == "JPEG" else {}))
+    return buffer.getvalue()
+
+
+def make_bomb() -> bytes:
+    """Tiny PNG whose header claims 30000 x 30000 pixels."""
+    buffer = io.BytesIO()
+    Image.new("1", (30000, 30000)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def previous_pipeline(data: bytes) -> Image.Image:
+    image = Image.open(io.BytesIO(data))
+    image.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.Resampling.LANCZOS)
+    return image.convert("RGB")
+
+
+def peak_rss_kb() -> int:
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1])
+    return 0
+
+
+def worker(mode: str, path: str):
+    """Run one pipeline on one file and print elapsed seconds and peak RSS (KB)."""
+    data = Path(path).read_bytes()
+    baseline_kb = peak_rss_kb()
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        if mode == "previous":
+            previous_pipeline(data)
+        else:
+            decode_for_size(data, MAX_DIMENSION)[0].convert("RGB")
+    except ImageTooLargeException:
+        outcome = "refused"
+    except Exception as e:
+        outcome = type(e).__name__
+    elapsed = time.perf_counter() - start
+    peak_kb = peak_rss_kb()
+    print(json.dumps({"seconds": elapsed, "rss_mb": (peak_kb - baseline_kb) / 1024, "outcome": outcome}))
+
+
+def run(mode: str, path: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, "--worker", mode, path], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(runs: int):
+    cases = [(label, make_input(size, format)) for label, size, format in INPUTS]
+    cases.append(("30000x30000 PNG (bomb)", make_bomb()))
+
+    print(f"{'Input':<24} {'MB':>5} {'pipeline':<10} {'decode ms':>10} {'peak RSS MB':>12} {'result':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, data in cases:
+            path = Path(tmp) / "input"
+            path.write_bytes(data)
+            for mode in ("previous", "fast"):
+                results = [run(mode, str(path)) for _ in range(runs)]
+                best = min(results, key=lambda r: r["seconds"])
+                print(
+                    f"{label:<24} {len(data) / 1024 / 1024:>5.1f} {mode:<10} "
+                    f"{best['seconds'] * 1000:>10.0f} {max(r['rss_mb'] for r in results):>12.1f} "
+                    f"{best['outcome']:>8}"
+                )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--worker":
+        worker(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    main(args.runs)
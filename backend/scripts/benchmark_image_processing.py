@@ -0,0 +1,108 @@
+"""
+Event-loop lag while image uploads are decoded and re-encoded concurrently.
+
+Generates synthetic diagrams close to the upload limit and processes them all
+at once, first inline on the event loop (the old behaviour), then through the
+image process pool. A ticker coroutine measures how late the loop wakes it up.
+
+Usage:
+    python scripts/benchmark_image_processing.py [--uploads 10] [--size-mb 5]
+"""
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.services.image_processing import ImageProcessPool, process_image_bytes
+
+TICK_SECONDS = 0.005
+
+
+def make_diagram(size_mb: float) -> bytes:
+    """PNG of roughly size_mb: noisy background (incompressible) with boxes and arrows on top."""
+    side = int((size_mb * 1024 * 1024 / 3) ** 0.5)
+    image = Image.frombytes("RGB", (side, side), os.urandom(side * side * 3))
+    draw = ImageDraw.Draw(image)
+    for i in range(0, side - 200, 300):
+        draw.rectangle((i, i, i + 200, i + 120), outline="black", width=6, fill="white")
+        draw.line((i + 200, i + 60, i + 300, i + 360), fill="black", width=6)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+async def measure_lag(work) -> tuple[float, list[float]]:
+    """Run ``work()`` while ticking; return (wall seconds, per-tick lag in ms)."""
+    lags: list[float] = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            expected = time.perf_counter() + TICK_SECONDS
+            await asyncio.sleep(TICK_SECONDS)
+            lags.append(max(0.0, time.perf_counter() - expected) * 1000)
+
+    tick_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick_task
+    return elapsed, lags
+
+
+def report(label: str, elapsed: float, lags: list[float]):
+    p95 = statistics.quantiles(lags, n=20)[-1] if len(lags) >= 20 else max(lags, default=0.0)
+    print(
+        f"{label:<28} {elapsed:>8.2f} {len(lags):>7} "
+        f"{statistics.median(lags) if lags else 0:>9.1f} {p95:>9.1f} {max(lags, default=0):>9.1f}"
+    )
+
+
+async def main(uploads: int, size_mb: float):
+    images = [make_diagram(size_mb) for _ in range(uploads)]
+    print(
+        f"{uploads} uploads of {len(images[0]) / 1024 / 1024:.1f} MB, "
+        f"{settings.image_process_workers} workers, "
+        f"{settings.image_max_concurrent_decodes} concurrent decodes\n"
+    )
+    print(f"{'Mode':<28} {'wall s':>8} {'ticks':>7} {'p50 lag':>9} {'p95 lag':>9} {'max lag':>9}")
+
+    async def inline_handler(data: bytes):
+        await asyncio.sleep(0)
+        return process_image_bytes(data)  # What validate_and_process_image used to do
+
+    async def inline():
+        await asyncio.gather(*[inline_handler(data) for data in images])
+
+    report("inline on event loop", *await measure_lag(inline))
+
+    pool = ImageProcessPool(settings.image_process_workers, settings.image_max_concurrent_decodes)
+    await pool.run(process_image_bytes, images[0])  # Start the workers outside the measurement
+
+    async def pooled():
+        await asyncio.gather(*[pool.run(process_image_bytes, data) for data in images])
+
+    try:
+        report("process pool", *await measure_lag(pooled))
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=10)
+    parser.add_argument("--size-mb", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.uploads, args.size_mb))
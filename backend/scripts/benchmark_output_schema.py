@@ -0,0 +1,112 @@
+"""
+Compare the full review schema against compact output mode.
+
+Offline (default): for each design in docs/test-architectures.md, takes the
+risks the rule-based fallback finds and estimates the output tokens the model
+would write for them in each schema (full RiskItems + IDs + score vs rule
+codes + short findings).
+
+With --live: runs real reviews in both modes (Bedrock, or the fake via
+BEDROCK_ENDPOINT_URL) and reports billed output tokens and wall-clock time.
+
+Usage:
+    python scripts/benchmark_output_schema.py [--live]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.models.request import ReviewRequest
+from app.services.rag import FALLBACK_PATTERNS, analyze_design_stub, analyze_with_bedrock
+from app.utils.token_counter import estimate_tokens
+
+sys.path.insert(0, str(Path(__file__).parent))
+from benchmark_context_retrieval import TEST_ARCHITECTURES, load_test_architectures
+
+CODES_BY_ID = {risk_id: code for code, risk_id, _ in FALLBACK_PATTERNS}
+
+
+def schema_outputs(review) -> tuple[str, str]:
+    """The JSON a model would write for ``review`` in the full and compact schemas."""
+    risks = [risk.model_dump(exclude_none=True) for risk in review.risks]
+    full = {
+        "review_id": review.review_id,
+        "architecture_score": review.architecture_score,
+        "risks": risks,
+        "summary": review.summary,
+        "tone": review.tone,
+    }
+    compact = {
+        "risks": [
+            {
+                "code": CODES_BY_ID.get(risk["id"], "NEEDS_REVIEW"),
+                "severity": risk["severity"],
+                # Compact findings are capped at one short sentence
+                "finding": " ".join(risk["finding"].split()[:25]),
+            }
+            for risk in risks
+        ],
+        "summary": review.summary,
+        "tone": review.tone,
+    }
+    return json.dumps(full, indent=2), json.dumps(compact, indent=2)
+
+
+async def run_live(design_text: str, mode: str) -> tuple[float, int]:
+    settings.review_output_mode = mode
+    start = time.perf_counter()
+    review = await analyze_with_bedrock(ReviewRequest(design_text=design_text))
+    return time.perf_counter() - start, review.metadata["token_usage"].get("output_tokens", 0)
+
+
+async def main(live: bool):
+    cases = load_test_architectures(TEST_ARCHITECTURES)
+    original = settings.review_output_mode
+
+    header = f"{'Test':<50} {'risks':>5} {'full out':>9} {'compact':>8} {'saved':>6}"
+    if live:
+        header += f" {'full s':>7} {'cmp s':>7} {'full tok':>9} {'cmp tok':>8}"
+    print(header)
+    print("-" * len(header))
+
+    totals = {"full": 0, "compact": 0, "full_s": 0.0, "compact_s": 0.0}
+    try:
+        for title, design_text in cases:
+            review = await analyze_design_stub(ReviewRequest(design_text=design_text))
+            full, compact = schema_outputs(review)
+            full_tokens, compact_tokens = estimate_tokens(full), estimate_tokens(compact)
+            totals["full"] += full_tokens
+            totals["compact"] += compact_tokens
+
+            row = (
+                f"{title[:50]:<50} {len(review.risks):>5} {full_tokens:>9} {compact_tokens:>8} "
+                f"{1 - compact_tokens / full_tokens:>6.0%}"
+            )
+            if live:
+                full_s, full_out = await run_live(design_text, "full")
+                compact_s, compact_out = await run_live(design_text, "compact")
+                totals["full_s"] += full_s
+                totals["compact_s"] += compact_s
+                row += f" {full_s:>7.2f} {compact_s:>7.2f} {full_out:>9} {compact_out:>8}"
+            print(row)
+    finally:
+        settings.review_output_mode = original
+
+    saved = 1 - totals["compact"] / totals["full"]
+    print(f"\nEstimated output tokens: full {totals['full']}, compact {totals['compact']} ({saved:.0%} saved)")
+    if live:
+        print(f"Wall clock: full {totals['full_s']:.1f}s, compact {totals['compact_s']:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", action="store_true", help="Run real reviews in both modes")
+    args = parser.parse_args()
+    asyncio.run(main(args.live))
@@ -0,0 +1,53 @@
+"""
+Build or incrementally update the knowledge-base index from markdown docs.
+
+Only chunks whose content changed are re-embedded. Point the backend at the
+output with KNOWLEDGE_BASE_INDEX_DIR; running workers pick up the new index
+on their next review without a restart.
+
+Usage:
+    python scripts/ingest_knowledge_base.py DOCS_DIR [--index-dir data/knowledge-base]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.services.knowledge_base import ingest_knowledge_base
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("docs_dir", help="Directory of markdown files (walked recursively)")
+    parser.add_argument(
+        "--index-dir",
+        default=settings.knowledge_base_index_dir or "data/knowledge-base",
+        help="Index output directory (default: KNOWLEDGE_BASE_INDEX_DIR or data/knowledge-base)",
+    )
+    parser.add_argument("--max-tokens", type=int, default=400, help="Target tokens per chunk")
+    args = parser.parse_args()
+
+    if not Path(args.docs_dir).is_dir():
+        sys.exit(f"Not a directory: {args.docs_dir}")
+
+    start = time.perf_counter()
+    summary = ingest_knowledge_base(args.docs_dir, args.index_dir, args.max_tokens)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{summary['files']} files -> {summary['chunks']} chunks "
+        f"({summary['embedded']} embedded, {summary['reused']} reused, {summary['removed']} removed) "
+        f"in {elapsed:.2f}s"
+    )
+    if summary["changed"]:
+        print(f"Wrote generation {summary['generation']} to {args.index_dir}")
+    else:
+        print(f"No changes; generation {summary['generation']} is current")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,3 +5,9 @@ Test configuration for the backend test suite.
 import os
 
 os.environ.setdefault("DISABLE_BEDROCK", "1")
+# Result caching would hide Bedrock calls from tests; cache tests opt back in
+os.environ.setdefault("REVIEW_CACHE_ENABLED", "0")
+os.environ.setdefault("VISION_CACHE_ENABLED", "0")
+# Fake Bedrock calls shouldn't wait on the real account quota
+os.environ.setdefault("BEDROCK_REQUESTS_PER_MINUTE", "100000")
+os.environ.setdefault("BEDROCK_TOKENS_PER_MINUTE", "100000000")
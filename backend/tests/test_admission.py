@@ -0,0 +1,178 @@
+"""
+Tests for the Bedrock admission controller (gate, lanes, fairness, 503s).
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.services import rag
+from app.services.admission import AdmissionController, parse_priorities, set_admission_client
+from app.utils.exceptions import AdmissionRejectedException
+
+
+def make_controller(**overrides) -> AdmissionController:
+    options = dict(
+        max_concurrency=1,
+        max_queue_depth=10,
+        queue_timeout_seconds=5.0,
+        lane_priorities={"text": 0, "image": 1},
+    )
+    options.update(overrides)
+    return AdmissionController(**options)
+
+
+async def queue_request(controller, order, name, lane="text", client="c1"):
+    set_admission_client(client)
+    async with controller.slot(lane):
+        order.append(name)
+
+
+def test_parse_priorities():
+    assert parse_priorities("text=0, image=1,bad,x=y") == {"text": 0, "image": 1}
+    assert parse_priorities(None) == {}
+
+
+@pytest.mark.asyncio
+async def test_text_lane_served_before_image():
+    controller = make_controller()
+    order = []
+    await controller.acquire("text")  # Occupy the only slot
+
+    tasks = [
+        asyncio.create_task(queue_request(controller, order, "image-1", lane="image")),
+        asyncio.create_task(queue_request(controller, order, "image-2", lane="image")),
+        asyncio.create_task(queue_request(controller, order, "text-1", lane="text")),
+    ]
+    await asyncio.sleep(0)
+    assert controller.queued == 3
+
+    controller.release()
+    await asyncio.gather(*tasks)
+
+    assert order == ["text-1", "image-1", "image-2"]
+    assert controller.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_round_robin_between_clients():
+    controller = make_controller()
+    order = []
+    await controller.acquire("text")
+
+    tasks = [
+        asyncio.create_task(queue_request(controller, order, f"a{i}", client="a")) for i in range(3)
+    ] + [asyncio.create_task(queue_request(controller, order, "b0", client="b"))]
+    await asyncio.sleep(0)
+
+    controller.release()
+    await asyncio.gather(*tasks)
+
+    # b isn't stuck behind a's whole burst
+    assert order == ["a0", "b0", "a1", "a2"]
+
+
+@pytest.mark.asyncio
+async def test_api_key_priority_overrides_lane():
+    controller = make_controller(client_priorities={"vip": -1})
+    order = []
+    await controller.acquire("text")
+
+    async def vip_request():
+        set_admission_client("10.0.0.9", api_key="vip")
+        async with controller.slot("image"):
+            order.append("vip-image")
+
+    tasks = [
+        asyncio.create_task(queue_request(controller, order, "text")),
+        asyncio.create_task(vip_request()),
+    ]
+    await asyncio.sleep(0)
+    controller.release()
+    await asyncio.gather(*tasks)
+
+    assert order == ["vip-image", "text"]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_with_retry_after_from_drain_rate():
+    controller = make_controller(max_queue_depth=1)
+    # Observed drain: 11 completions over 5s = 2/s
+    controller._completions.extend(i * 0.5 for i in range(11))
+
+    await controller.acquire("text")
+    waiter = asyncio.create_task(controller.acquire("text"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejectedException) as excinfo:
+        await controller.acquire("text")
+
+    assert excinfo.value.retry_after == 1  # (1 queued + 1) / 2 per second
+    assert controller.rejected_full == 1
+
+    controller.release()
+    await waiter
+    controller.release()
+    assert controller.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_wait_timeout_rejects_and_leaves_queue_clean():
+    controller = make_controller(queue_timeout_seconds=0.05)
+    await controller.acquire("text")
+
+    with pytest.raises(AdmissionRejectedException):
+        await controller.acquire("text")
+
+    assert controller.queued == 0
+    assert controller.rejected_timeout == 1
+    controller.release()
+    assert controller.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_slot_is_reentrant():
+    controller = make_controller()
+    async with controller.slot("image"):
+        async with controller.slot("text"):  # Would deadlock if not re-entrant
+            assert controller.in_flight == 1
+    assert controller.in_flight == 0
+
+
+def test_review_returns_503_with_retry_after(monkeypatch):
+    """A rejected review surfaces as 503 instead of a pattern-matching fallback."""
+
+    async def reject(request, cache_key):
+        raise AdmissionRejectedException("Review queue is full", retry_after=7)
+
+    monkeypatch.setattr(settings, "disable_bedrock", False)
+    monkeypatch.setattr(rag, "_analyze_and_cache", reject)
+    monkeypatch.setattr(app.state.limiter, "enabled", False)
+
+    response = TestClient(app).post(
+        "/review",
+        json={"design_text": "Single AZ deployment with EC2 instances behind an ALB. No backups."},
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+
+
+def test_stream_returns_503_before_any_event(monkeypatch):
+    async def reject(lane="text"):
+        raise AdmissionRejectedException("Review queue is full", retry_after=3)
+
+    monkeypatch.setattr(settings, "disable_bedrock", False)
+    monkeypatch.setattr(rag.admission_controller, "acquire", reject)
+    monkeypatch.setattr(app.state.limiter, "enabled", False)
+
+    response = TestClient(app).post(
+        "/review/stream",
+        json={"design_text": "Single AZ deployment with EC2 instances behind an ALB. No backups."},
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
@@ -0,0 +1,128 @@
+"""
+Concurrency benchmark for the non-blocking Bedrock transport.
+
+Replaces the boto3 client with a fake whose invoke_model blocks for a fixed
+latency, then fires N concurrent /review calls. With InvokeModel running on the
+dedicated executor, wall-clock time should track max(latency), not sum(latency).
+"""
+
+import asyncio
+import io
+import json
+import time
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.main import app
+from app.services.bedrock import bedrock_client
+
+LATENCY_SECONDS = 0.3
+CONCURRENT_REVIEWS = 5
+
+DESIGN_TEXT = (
+    "Single AZ deployment with EC2 instances behind an ALB. "
+    "RDS MySQL database in the same AZ. No backups configured."
+)
+
+
+def build_analysis_body() -> bytes:
+    """Minimal valid Bedrock response body wrapping a review JSON."""
+    review = {
+        "review_id": "review-bench",
+        "architecture_score": 85,
+        "risks": [
+            {
+                "id": "REL-001",
+                "title": "Single Availability Zone Deployment",
+                "severity": "HIGH",
+                "pillar": "reliability",
+                "impact": "Outage during AZ failure",
+                "likelihood": "MEDIUM",
+                "finding": "All resources in one AZ",
+                "remediation": "Deploy across multiple AZs",
+                "references": [],
+            }
+        ],
+        "summary": "One high severity reliability finding.",
+        "tone": "standard",
+    }
+    return json.dumps(
+        {
+            "content": [{"type": "text", "text": json.dumps(review)}],
+            "usage": {"input_tokens": 100, "output_tokens": 50},
+            "stop_reason": "end_turn",
+        }
+    ).encode()
+
+
+class SlowFakeBedrockRuntime:
+    """Stands in for the boto3 bedrock-runtime client with blocking latency."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    def invoke_model(self, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)  # Blocking, like a real boto3 call
+        return {"body": io.BytesIO(build_analysis_body())}
+
+
+@pytest.fixture
+def slow_bedrock(monkeypatch):
+    fake = SlowFakeBedrockRuntime(LATENCY_SECONDS)
+    monkeypatch.setattr(bedrock_client, "client", fake)
+    monkeypatch.setattr(settings, "disable_bedrock", False)
+    monkeypatch.setattr(app.state.limiter, "enabled", False)
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reviews_finish_in_max_latency(slow_bedrock):
+    """N concurrent reviews complete in ~max(latency) rather than sum(latency)."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        start = time.perf_counter()
+        responses = await asyncio.gather(
+            *[
+                # Distinct designs so single-flight coalescing doesn't merge them
+                client.post("/review", json={"design_text": f"{DESIGN_TEXT} Variant {i}."})
+                for i in range(CONCURRENT_REVIEWS)
+            ]
+        )
+        elapsed = time.perf_counter() - start
+
+    assert all(r.status_code == 200 for r in responses)
+    assert all(
+        r.json()["metadata"]["analysis_method"] != "pattern_matching_fallback" for r in responses
+    )
+    assert slow_bedrock.calls == CONCURRENT_REVIEWS
+
+    print(
+        f"\n{CONCURRENT_REVIEWS} concurrent reviews: {elapsed:.2f}s "
+        f"(max latency {LATENCY_SECONDS:.2f}s, sum {LATENCY_SECONDS * CONCURRENT_REVIEWS:.2f}s)"
+    )
+    assert elapsed < LATENCY_SECONDS * 2
+
+
+@pytest.mark.asyncio
+async def test_health_not_blocked_by_inflight_review(slow_bedrock):
+    """Health checks answer immediately while a Bedrock call is in flight."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        review_task = asyncio.create_task(
+            client.post("/review", json={"design_text": DESIGN_TEXT, "tone": "standard"})
+        )
+        await asyncio.sleep(0.05)  # Let the review reach the executor
+
+        start = time.perf_counter()
+        health = await client.get("/health")
+        health_elapsed = time.perf_counter() - start
+
+        review = await review_task
+
+    assert health.status_code == 200
+    assert review.status_code == 200
+    assert health_elapsed < LATENCY_SECONDS / 2
@@ -0,0 +1,145 @@
+"""
+Tests for the client-side Bedrock rate governor.
+"""
+
+import asyncio
+import io
+import json
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.services import bedrock as bedrock_module
+from app.services.bedrock import bedrock_client
+from app.services.bedrock_governor import BedrockRateGovernor, TokenBucket
+
+
+def throttling_error() -> ClientError:
+    return ClientError(
+        {"Error": {"Code": "ThrottlingException", "Message": "Too many requests"}},
+        "InvokeModel",
+    )
+
+
+def make_governor(**overrides) -> BedrockRateGovernor:
+    options = dict(
+        requests_per_minute=10_000,
+        tokens_per_minute=10_000_000,
+        max_concurrency=8,
+        backoff_base_seconds=0.001,
+        backoff_max_seconds=0.01,
+    )
+    options.update(overrides)
+    return BedrockRateGovernor(**options)
+
+
+def test_aimd_window_shrinks_on_throttle_and_grows_on_success():
+    governor = make_governor()
+    governor.in_flight = 1
+    governor.release("throttled")
+    assert governor.concurrency_limit == 4
+
+    for _ in range(20):
+        governor.in_flight = 1
+        governor.release("success")
+    assert 4 < governor.concurrency_limit <= 8
+
+
+def test_window_never_drops_below_floor():
+    governor = make_governor(min_concurrency=2)
+    for _ in range(10):
+        governor.in_flight = 1
+        governor.release("throttled")
+    assert governor.concurrency_limit == 2
+
+
+def test_backoff_is_jittered_and_capped():
+    governor = make_governor(backoff_base_seconds=1.0, backoff_max_seconds=4.0)
+    delays = [governor.backoff_delay(6) for _ in range(200)]
+    assert all(0 <= d <= 4.0 for d in delays)
+    assert len({round(d, 3) for d in delays}) > 50  # Not synchronized
+
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(per_minute=60)  # 1 token per second
+    bucket.consume(60)
+    assert bucket.wait_time(2) == pytest.approx(2, abs=0.05)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_window_bounds_in_flight_calls():
+    governor = make_governor(max_concurrency=2)
+    peak = 0
+
+    async def work():
+        nonlocal peak
+        peak = max(peak, governor.in_flight)
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    results = await asyncio.gather(*[governor.call(work, estimated_tokens=10) for _ in range(6)])
+
+    assert results == ["ok"] * 6
+    assert peak == 2
+    assert governor.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_call_retries_throttling_then_succeeds():
+    governor = make_governor()
+    attempts = 0
+
+    async def flaky():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise throttling_error()
+        return "ok"
+
+    assert await governor.call(flaky, estimated_tokens=10) == "ok"
+    assert governor.retries == 2
+    assert governor.throttles == 2
+
+
+@pytest.mark.asyncio
+async def test_non_throttling_errors_are_not_retried():
+    governor = make_governor()
+    attempts = 0
+
+    async def broken():
+        nonlocal attempts
+        attempts += 1
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        await governor.call(broken, estimated_tokens=10)
+    assert attempts == 1
+    assert governor.in_flight == 0
+
+
+class ThrottleOnceRuntime:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke_model(self, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            raise throttling_error()
+        body = {
+            "content": [{"type": "text", "text": "{}"}],
+            "usage": {"input_tokens": 10, "output_tokens": 5},
+            "stop_reason": "end_turn",
+        }
+        return {"body": io.BytesIO(json.dumps(body).encode())}
+
+
+@pytest.mark.asyncio
+async def test_bedrock_client_retries_through_governor(monkeypatch):
+    runtime = ThrottleOnceRuntime()
+    monkeypatch.setattr(bedrock_client, "client", runtime)
+    monkeypatch.setattr(bedrock_module, "bedrock_governor", make_governor())
+
+    response = await bedrock_client.generate("system", "user")
+
+    assert runtime.calls == 2
+    assert response["content"] == "{}"
@@ -0,0 +1,222 @@
+"""
+Tests for latency-aware Bedrock endpoint routing, failover and hedging.
+"""
+
+import asyncio
+import io
+import json
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.core.config import settings
+from app.services import bedrock as bedrock_module
+from app.services.bedrock import bedrock_client
+from app.services.bedrock_governor import BedrockRateGovernor
+from app.services.bedrock_routing import EndpointRouter, is_failover_error, parse_endpoints
+
+
+def client_error(code: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}}, "InvokeModel")
+
+
+def make_router(spec: str = "us-east-2=model-a,us-west-2=model-b") -> EndpointRouter:
+    return EndpointRouter(parse_endpoints(spec, "us-east-2", "default-model"))
+
+
+def test_parse_endpoints():
+    assert [e.name for e in parse_endpoints(None, "us-east-2", "m")] == ["us-east-2/m"]
+    endpoints = parse_endpoints("us-east-2=a, us-west-2", "us-east-2", "m")
+    assert [(e.region, e.model_id) for e in endpoints] == [("us-east-2", "a"), ("us-west-2", "m")]
+
+
+def test_failover_error_classification():
+    assert is_failover_error(client_error("ThrottlingException"))
+    assert is_failover_error(client_error("ServiceUnavailableException"))
+    assert not is_failover_error(client_error("ValidationException"))
+    assert not is_failover_error(ValueError("bad json"))
+
+
+def test_ordering_prefers_fast_healthy_endpoints():
+    router = make_router("r1=a,r2=b,r3=c")
+    r1, r2, r3 = router.endpoints
+
+    # Unmeasured: configured order
+    assert router.ordered() == [r1, r2, r3]
+
+    for _ in range(5):
+        r1.record(0.9, ok=True)
+        r2.record(0.1, ok=True)
+    r3.record(0.0, ok=False)  # Cooldown
+
+    assert router.ordered() == [r2, r1, r3]
+
+
+@pytest.mark.asyncio
+async def test_fails_over_on_regional_error(monkeypatch):
+    monkeypatch.setattr(settings, "bedrock_hedging_enabled", False)
+    router = make_router()
+    calls = []
+
+    async def invoke(endpoint, max_retries):
+        calls.append((endpoint.region, max_retries))
+        if endpoint.region == "us-east-2":
+            raise client_error("ThrottlingException")
+        return "ok"
+
+    result, endpoint, hedged = await router.call(invoke)
+
+    assert (result, endpoint.region, hedged) == ("ok", "us-west-2", False)
+    # First endpoint hands over immediately; the last one keeps its retries
+    assert calls == [("us-east-2", 0), ("us-west-2", None)]
+    assert router.failovers == 1
+    assert router.endpoints[0].in_cooldown
+    assert router.ordered()[0].region == "us-west-2"
+
+
+@pytest.mark.asyncio
+async def test_validation_error_does_not_fail_over(monkeypatch):
+    monkeypatch.setattr(settings, "bedrock_hedging_enabled", False)
+    router = make_router()
+    calls = []
+
+    async def invoke(endpoint, max_retries):
+        calls.append(endpoint.region)
+        raise client_error("ValidationException")
+
+    with pytest.raises(ClientError):
+        await router.call(invoke)
+    assert calls == ["us-east-2"]
+
+
+@pytest.mark.asyncio
+async def test_hedge_fires_after_delay_and_fastest_wins(monkeypatch):
+    monkeypatch.setattr(settings, "bedrock_hedging_enabled", True)
+    monkeypatch.setattr(settings, "bedrock_hedge_delay_seconds", 0.05)
+    router = make_router()
+    cancelled = []
+
+    async def invoke(endpoint, max_retries):
+        if endpoint.region == "us-east-2":
+            try:
+                await asyncio.sleep(5)  # Brownout: primary hangs
+            except asyncio.CancelledError:
+                cancelled.append(endpoint.region)
+                raise
+            return "slow"
+        return "fast"
+
+    result, endpoint, hedged = await asyncio.wait_for(router.call(invoke), timeout=2)
+    await asyncio.sleep(0)
+
+    assert (result, endpoint.region, hedged) == ("fast", "us-west-2", True)
+    assert cancelled == ["us-east-2"]
+    assert router.hedged_requests == 1
+    assert router.endpoints[1].hedges_won == 1
+    assert router.endpoints[0].failures == 0  # Losing a race isn't an endpoint failure
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_when_primary_answers_in_time(monkeypatch):
+    monkeypatch.setattr(settings, "bedrock_hedging_enabled", True)
+    monkeypatch.setattr(settings, "bedrock_hedge_delay_seconds", 1.0)
+    router = make_router()
+    regions = []
+
+    async def invoke(endpoint, max_retries):
+        regions.append(endpoint.region)
+        return "ok"
+
+    _, endpoint, hedged = await router.call(invoke)
+    assert (endpoint.region, hedged) == ("us-east-2", False)
+    assert regions == ["us-east-2"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_cancels_the_primary_before_the_hedge(monkeypatch):
+    monkeypatch.setattr(settings, "bedrock_hedging_enabled", True)
+    monkeypatch.setattr(settings, "bedrock_hedge_delay_seconds", 1.0)
+    router = make_router()
+    cancelled = []
+
+    async def invoke(endpoint, max_retries):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(endpoint.region)
+            raise
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(router.call(invoke), timeout=0.05)  # Deadline before the hedge fires
+    await asyncio.sleep(0)
+
+    assert cancelled == ["us-east-2"]
+    assert router.hedged_requests == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_hedge_fails_over_past_both_endpoints(monkeypatch):
+    monkeypatch.setattr(settings, "bedrock_hedging_enabled", True)
+    monkeypatch.setattr(settings, "bedrock_hedge_delay_seconds", 0.02)
+    router = make_router("us-east-2=model-a,us-west-2=model-b,eu-west-1=model-c")
+    calls = []
+
+    async def invoke(endpoint, max_retries):
+        calls.append(endpoint.region)
+        if endpoint.region == "eu-west-1":
+            return "ok"
+        await asyncio.sleep(0.05)
+        raise client_error("ThrottlingException")
+
+    result, endpoint, hedged = await asyncio.wait_for(router.call(invoke), timeout=2)
+
+    assert (result, endpoint.region, hedged) == ("ok", "eu-west-1", False)
+    assert calls == ["us-east-2", "us-west-2", "eu-west-1"]  # The failed backup isn't retried
+    assert router.failovers == 1
+
+
+class RegionalFakeRuntime:
+    """bedrock-runtime stand-in that either throttles or returns a tiny review."""
+
+    def __init__(self, throttle: bool):
+        self.throttle = throttle
+        self.model_ids = []
+
+    def invoke_model(self, **kwargs):
+        self.model_ids.append(kwargs["modelId"])
+        if self.throttle:
+            raise client_error("ThrottlingException")
+        body = {
+            "content": [{"type": "text", "text": "{}"}],
+            "usage": {"input_tokens": 10, "output_tokens": 5},
+            "stop_reason": "end_turn",
+        }
+        return {"body": io.BytesIO(json.dumps(body).encode())}
+
+
+@pytest.mark.asyncio
+async def test_generate_fails_over_to_secondary_region(monkeypatch):
+    monkeypatch.setattr(settings, "bedrock_hedging_enabled", False)
+    monkeypatch.setattr(
+        bedrock_module,
+        "bedrock_governor",
+        BedrockRateGovernor(100000, 100000000, max_concurrency=4, backoff_base_seconds=0.001),
+    )
+    primary = RegionalFakeRuntime(throttle=True)
+    secondary = RegionalFakeRuntime(throttle=False)
+    monkeypatch.setattr(bedrock_client, "client", primary)
+    monkeypatch.setattr(bedrock_client, "_regional_clients", {"us-west-2": secondary})
+    monkeypatch.setattr(
+        bedrock_client,
+        "text_router",
+        EndpointRouter(
+            parse_endpoints(f"{bedrock_client.region}=model-a,us-west-2=model-b", "x", "y")
+        ),
+    )
+
+    response = await bedrock_client.generate("system", "user")
+
+    assert response["metadata"]["region"] == "us-west-2"
+    assert response["metadata"]["model_id"] == "model-b"
+    assert primary.model_ids == ["model-a"]  # No in-place retries before failover
+    assert secondary.model_ids == ["model-b"]
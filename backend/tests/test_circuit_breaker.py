@@ -0,0 +1,125 @@
+"""
+Tests for the Bedrock circuit breaker.
+"""
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.core.config import settings
+from app.models.request import ReviewRequest
+from app.services.bedrock import bedrock_client
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from app.services.rag import analyze_design
+
+DESIGN_TEXT = "Single AZ deployment with EC2 instances behind an ALB. No backups configured."
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_breaker(clock=None, **overrides) -> CircuitBreaker:
+    options = dict(
+        window=10,
+        min_calls=4,
+        failure_rate_threshold=0.5,
+        slow_call_seconds=5.0,
+        slow_call_rate_threshold=0.75,
+        open_seconds=30.0,
+        half_open_max_calls=2,
+    )
+    options.update(overrides)
+    return CircuitBreaker("text", clock=clock or FakeClock(), **options)
+
+
+def test_opens_on_failure_rate_then_recovers_through_half_open():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for ok in (True, False, True):
+        breaker.record(0.5, ok=ok)
+    assert breaker.state == CLOSED  # Below min_calls
+
+    breaker.record(0.5, ok=False)  # 2 of 4 failed
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.stats()["rejected"] == 1
+
+    clock.now = 31.0
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() and breaker.allow()
+    assert not breaker.allow()  # Only two probes at a time
+
+    breaker.record(0.5, ok=True)
+    breaker.record(0.5, ok=True)
+    assert breaker.state == CLOSED
+    assert [t["to"] for t in breaker.stats()["transitions"]] == [OPEN, HALF_OPEN, CLOSED]
+
+
+def test_failed_probe_reopens():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record(0.5, ok=False)
+    clock.now = 31.0
+
+    assert breaker.allow()
+    breaker.record(0.5, ok=False)
+
+    assert breaker.state == OPEN
+    assert breaker.retry_after_seconds() == 31
+
+
+def test_opens_on_slow_calls():
+    breaker = make_breaker()
+    for latency in (6.0, 7.0, 1.0, 9.0):
+        breaker.record(latency, ok=True)
+
+    assert breaker.state == OPEN
+
+
+class OutageRuntime:
+    def __init__(self, code: str = "ServiceUnavailableException"):
+        self.code = code
+        self.calls = 0
+
+    def invoke_model(self, **kwargs):
+        self.calls += 1
+        raise ClientError({"Error": {"Code": self.code, "Message": "down"}}, "InvokeModel")
+
+
+@pytest.fixture
+def outage(monkeypatch):
+    monkeypatch.setattr(settings, "disable_bedrock", False)
+    monkeypatch.setattr(bedrock_client, "text_breaker", make_breaker())
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_skips_bedrock(monkeypatch, outage):
+    runtime = OutageRuntime()
+    monkeypatch.setattr(bedrock_client, "client", runtime)
+
+    for _ in range(4):
+        review = await analyze_design(ReviewRequest(design_text=DESIGN_TEXT))
+        assert review.metadata["analysis_method"] == "pattern_matching_fallback"
+    assert runtime.calls == 4
+    assert bedrock_client.text_breaker.state == OPEN
+
+    review = await analyze_design(ReviewRequest(design_text=DESIGN_TEXT))
+
+    assert runtime.calls == 4
+    assert review.metadata["circuit_breaker"] == OPEN
+    assert [risk.id for risk in review.risks] == ["REL-001", "REL-002"]
+
+
+@pytest.mark.asyncio
+async def test_request_errors_do_not_trip(monkeypatch, outage):
+    monkeypatch.setattr(bedrock_client, "client", OutageRuntime(code="ValidationException"))
+
+    for _ in range(6):
+        await analyze_design(ReviewRequest(design_text=DESIGN_TEXT))
+
+    assert bedrock_client.text_breaker.state == CLOSED
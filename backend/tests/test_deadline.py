@@ -0,0 +1,175 @@
+"""
+Tests for latency-budgeted reviews with provisional rule-based answers.
+"""
+
+import asyncio
+import io
+import json
+import time
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.main import app
+from app.models.request import ReviewRequest
+from app.services import rag
+from app.services.bedrock import bedrock_client
+from app.services.pending_reviews import COMPLETE, FAILED, PENDING, PendingReviewStore
+from app.services.rag import analyze_design_with_deadline
+
+DESIGN_TEXT = "Single AZ deployment with EC2 instances behind an ALB. No backups configured."
+
+
+class SlowRuntime:
+    def __init__(self, latency: float, fail: bool = False):
+        self.latency = latency
+        self.fail = fail
+
+    def invoke_model(self, **kwargs):
+        time.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError("bedrock down")
+        review = {
+            "review_id": "review-model",
+            "architecture_score": 85,
+            "risks": [],
+            "summary": "AI review.",
+            "tone": "standard",
+        }
+        body = {
+            "content": [{"type": "text", "text": json.dumps(review)}],
+            "usage": {"input_tokens": 100, "output_tokens": 50},
+            "stop_reason": "end_turn",
+        }
+        return {"body": io.BytesIO(json.dumps(body).encode())}
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = PendingReviewStore(max_entries=10, ttl_seconds=60)
+    monkeypatch.setattr(settings, "disable_bedrock", False)
+    monkeypatch.setattr(rag, "pending_reviews", store)
+    return store
+
+
+@pytest.mark.asyncio
+async def test_budget_expiry_returns_provisional_then_final(monkeypatch, store):
+    monkeypatch.setattr(bedrock_client, "client", SlowRuntime(latency=0.4))
+    completed = []
+
+    async def on_complete(review):
+        completed.append(review)
+
+    start = time.perf_counter()
+    review = await analyze_design_with_deadline(
+        ReviewRequest(design_text=DESIGN_TEXT, latency_budget_ms=100), on_complete=on_complete
+    )
+
+    assert time.perf_counter() - start < 0.3
+    assert review.metadata["provisional"] is True
+    assert review.metadata["final_review_url"] == f"/review/{review.review_id}"
+    assert [risk.id for risk in review.risks] == ["REL-001", "REL-002"]
+    assert store.get(review.review_id)[0] == PENDING
+
+    await asyncio.sleep(0.6)
+
+    status, final = store.get(review.review_id)
+    assert status == COMPLETE
+    assert final.review_id == review.review_id
+    assert final.summary == "AI review."
+    assert final.metadata["replaced_provisional"] is True
+    assert completed and completed[0].summary == "AI review."
+    assert store.stats()["completed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_late_fallback_is_failed_not_final(monkeypatch, store):
+    monkeypatch.setattr(bedrock_client, "client", SlowRuntime(latency=0.3, fail=True))
+    completed = []
+
+    async def on_complete(review):
+        completed.append(review)
+
+    review = await analyze_design_with_deadline(
+        ReviewRequest(design_text=DESIGN_TEXT, latency_budget_ms=100), on_complete=on_complete
+    )
+    for _ in range(50):
+        await asyncio.sleep(0.1)
+        if store.get(review.review_id)[0] != PENDING:
+            break
+
+    status, final = store.get(review.review_id)
+    assert status == FAILED
+    assert final.review_id == review.review_id
+    assert final.metadata["provisional"] is True  # Still the provisional review
+    assert final.metadata["error"] == "fallback"
+    assert completed and completed[0].metadata["final_status"] == FAILED
+    assert store.stats() == {"entries": 1, "provisional_served": 1, "completed": 0, "failed": 1}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_cancels_the_analysis(monkeypatch, store):
+    started = asyncio.Event()
+    analysis_cancelled = asyncio.Event()
+
+    async def slow_analysis(request):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            analysis_cancelled.set()
+            raise
+
+    monkeypatch.setattr(rag, "analyze_design", slow_analysis)
+    caller = asyncio.create_task(
+        analyze_design_with_deadline(ReviewRequest(design_text=DESIGN_TEXT, latency_budget_ms=5000))
+    )
+    await started.wait()
+    caller.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+    await asyncio.wait_for(analysis_cancelled.wait(), timeout=1)
+    assert store.stats()["provisional_served"] == 0
+
+
+@pytest.mark.asyncio
+async def test_review_within_budget_is_final(monkeypatch, store):
+    monkeypatch.setattr(bedrock_client, "client", SlowRuntime(latency=0.0))
+
+    review = await analyze_design_with_deadline(
+        ReviewRequest(design_text=DESIGN_TEXT, latency_budget_ms=2000)
+    )
+
+    assert review.summary == "AI review."
+    assert "provisional" not in review.metadata
+    assert store.stats()["provisional_served"] == 0
+
+
+@pytest.mark.asyncio
+async def test_poll_final_review(monkeypatch, store):
+    monkeypatch.setattr(bedrock_client, "client", SlowRuntime(latency=0.5))
+    monkeypatch.setattr("app.api.review.pending_reviews", store)
+    app.state.limiter.enabled = False
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/review", json={"design_text": DESIGN_TEXT, "latency_budget_ms": 100})
+            assert response.status_code == 200
+            review_id = response.json()["review_id"]
+            assert response.json()["metadata"]["provisional"] is True
+
+            pending = await client.get(f"/review/{review_id}")
+            assert pending.status_code == 202
+            assert pending.headers["Retry-After"] == "1"
+
+            await asyncio.sleep(0.7)
+            final = await client.get(f"/review/{review_id}")
+            assert final.status_code == 200
+            assert final.json()["summary"] == "AI review."
+            assert final.json()["review_id"] == review_id
+
+            assert (await client.get("/review/review-unknown")).status_code == 404
+    finally:
+        app.state.limiter.enabled = True
@@ -0,0 +1,136 @@
+"""
+Tests for the local Bedrock stand-in, driven through the real boto3 client.
+
+The fake runs under uvicorn on a free port; BedrockClient's boto3 clients are
+rebuilt against it via settings.bedrock_endpoint_url, so the full HTTP, SigV4,
+error-parsing and event-stream paths are exercised without AWS.
+"""
+
+import asyncio
+import json
+import socket
+import threading
+import time
+from pathlib import Path
+
+import pytest
+import uvicorn
+
+from app.core.config import settings
+from app.devtools.fake_bedrock import FakeBedrockConfig, FixtureStore, create_fake_bedrock_app
+from app.models.request import ReviewRequest
+from app.services import bedrock as bedrock_module
+from app.services.bedrock import BedrockClient, bedrock_client
+from app.services.bedrock_governor import BedrockRateGovernor
+from app.services.rag import analyze_design
+from app.utils.exceptions import BedrockThrottlingException
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "bedrock"
+
+DESIGN_TEXT = (
+    "Single AZ deployment with EC2 instances behind an ALB. "
+    "RDS MySQL database in the same AZ. No backups configured."
+)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def fake_server():
+    fake_app = create_fake_bedrock_app(FakeBedrockConfig(seed=7), FIXTURES_DIR)
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(fake_app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not server.started and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    yield fake_app, f"http://127.0.0.1:{port}"
+
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+@pytest.fixture
+def fake_bedrock(fake_server, monkeypatch):
+    """Point bedrock_client at the fake and reset its fault settings."""
+    fake_app, url = fake_server
+    fake_app.state.config = FakeBedrockConfig(seed=7)
+    monkeypatch.setattr(settings, "bedrock_endpoint_url", url)
+    monkeypatch.setattr(settings, "aws_access_key_id", "fake")
+    monkeypatch.setattr(settings, "aws_secret_access_key", "fake")
+    monkeypatch.setattr(settings, "disable_bedrock", False)
+    monkeypatch.setattr(bedrock_client, "client", BedrockClient._create_client(bedrock_client.region))
+    monkeypatch.setattr(bedrock_client, "_regional_clients", {})
+    monkeypatch.setattr(
+        bedrock_module,
+        "bedrock_governor",
+        BedrockRateGovernor(100000, 100000000, max_concurrency=16, max_retries=1, backoff_base_seconds=0.001),
+    )
+    return fake_app
+
+
+def test_fixture_matching():
+    store = FixtureStore(FIXTURES_DIR)
+    assert store.find("anthropic.claude-3-5-haiku", DESIGN_TEXT)["name"] == "single_az"
+    assert store.find("anthropic.claude-3-5-sonnet", DESIGN_TEXT) is store.default
+    assert store.find("anthropic.claude-3-5-haiku", "Serverless API") is store.default
+
+
+@pytest.mark.asyncio
+async def test_review_end_to_end_against_fake(fake_bedrock):
+    review = await analyze_design(ReviewRequest(design_text=DESIGN_TEXT))
+
+    assert review.metadata["analysis_method"] != "pattern_matching_fallback"
+    assert [risk.id for risk in review.risks] == ["REL-001", "REL-002"]
+    assert review.metadata["token_usage"]["input_tokens"] == 1850
+
+
+@pytest.mark.asyncio
+async def test_throttling_maps_to_exception(fake_bedrock):
+    fake_bedrock.state.config.throttle_rate = 1.0
+
+    with pytest.raises(BedrockThrottlingException):
+        await bedrock_client.generate("system", DESIGN_TEXT)
+    assert fake_bedrock.state.stats["throttled"] >= 2  # First attempt + one governor retry
+
+
+@pytest.mark.asyncio
+async def test_malformed_output_is_truncated(fake_bedrock):
+    fake_bedrock.state.config.malformed_rate = 1.0
+
+    response = await bedrock_client.generate("system", DESIGN_TEXT)
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(response["content"])
+
+
+@pytest.mark.asyncio
+async def test_streaming_contract(fake_bedrock):
+    fake_bedrock.state.config.stream_chunk_chars = 20
+
+    text = ""
+    done = None
+    async for event in bedrock_client.generate_stream("system", DESIGN_TEXT):
+        if event["type"] == "text":
+            text += event["text"]
+        else:
+            done = event
+
+    assert '"REL-002"' in text
+    assert done["usage"]["output_tokens"] == 420
+
+
+@pytest.mark.asyncio
+async def test_latency_injection_is_concurrent(fake_bedrock):
+    fake_bedrock.state.config.latency_ms = 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*[bedrock_client.generate("system", f"{DESIGN_TEXT} {i}") for i in range(4)])
+    elapsed = time.perf_counter() - start
+
+    assert 0.2 <= elapsed < 0.6
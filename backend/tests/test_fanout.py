@@ -0,0 +1,201 @@
+"""
+Tests for pillar-sharded (fan-out) analysis.
+"""
+
+import io
+import json
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.core.config import settings
+from app.models.request import ReviewRequest
+from app.models.response import RiskItem
+from app.services.bedrock import bedrock_client
+from app.services.prompts import build_shard_system_prompt
+from app.services.rag import analyze_with_bedrock, merge_risks, parse_fanout_groups
+
+DESIGN_TEXT = "Single AZ deployment with EC2 instances behind an ALB. RDS MySQL. No auto scaling."
+
+
+def risk(pillar: str, title: str, finding: str, severity: str = "MEDIUM") -> dict:
+    return {
+        "id": "X-001",
+        "title": title,
+        "severity": severity,
+        "pillar": pillar,
+        "impact": "Impact",
+        "finding": finding,
+        "remediation": "Fix it",
+        "references": [],
+    }
+
+
+SHARD_OUTPUT = {
+    "security": {
+        "risks": [risk("security", "Unencrypted RDS", "RDS storage is not encrypted", "HIGH")],
+        "topology": {
+            "services": ["ALB", "EC2", "RDS"],
+            "connections": [
+                {"source_service": "ALB", "target_service": "EC2", "relationship_type": "routes_to"}
+            ],
+            "architecture_pattern": "3-tier",
+        },
+    },
+    "reliability": {"risks": [risk("reliability", "Single AZ", "All instances run in one AZ", "HIGH")]},
+    "performance efficiency": {
+        "risks": [
+            risk("performance_efficiency", "No Auto Scaling", "EC2 fleet has no auto scaling group"),
+            risk("cost_optimization", "No auto scaling", "EC2 fleet has no auto scaling group.", "LOW"),
+        ]
+    },
+    "operational excellence": {"risks": []},
+}
+
+
+class ShardRuntime:
+    """Answers each shard by the pillar named in its system prompt."""
+
+    def __init__(self, delay: float = 0.0, fail: str | None = None, outputs: dict = SHARD_OUTPUT):
+        self.outputs = outputs
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def invoke_model(self, **kwargs):
+        self.calls += 1
+        system = json.loads(kwargs["body"])["system"][0]["text"]
+        shard = next(name for name in self.outputs if f"specializing in the {name}" in system)
+        time.sleep(self.delay)
+        if shard == self.fail:
+            raise ClientError({"Error": {"Code": "ValidationException", "Message": "bad"}}, "InvokeModel")
+        body = {
+            "content": [{"type": "text", "text": json.dumps(self.outputs[shard])}],
+            "usage": {"input_tokens": 1000, "output_tokens": 200},
+            "stop_reason": "end_turn",
+        }
+        return {"body": io.BytesIO(json.dumps(body).encode())}
+
+
+COMPACT_SHARD_OUTPUT = {
+    "security": {
+        "risks": [
+            {"code": "UNENCRYPTED_AT_REST", "severity": "HIGH", "finding": "RDS storage is not encrypted."},
+            {"code": "SINGLE_AZ", "severity": "HIGH", "finding": "Everything runs in one AZ."},  # Not its pillar
+        ],
+        "topology": {
+            "services": ["ALB", "EC2", "RDS"],
+            "connections": [["ALB", "EC2", "routes_to"]],
+            "architecture_pattern": "3-tier",
+        },
+    },
+    "reliability": {"risks": [{"code": "SINGLE_AZ", "severity": "HIGH", "finding": "All instances run in one AZ."}]},
+    "performance efficiency": {"risks": []},
+    "operational excellence": {"risks": []},
+}
+
+
+@pytest.fixture
+def fanout(monkeypatch):
+    monkeypatch.setattr(settings, "review_fanout_enabled", True)
+
+
+def test_parse_fanout_groups():
+    assert parse_fanout_groups("security; reliability ;cost_optimization,sustainability;") == [
+        ("security",),
+        ("reliability",),
+        ("cost_optimization", "sustainability"),
+    ]
+
+
+def test_shard_prompt_is_trimmed():
+    prompt = build_shard_system_prompt("standard", ("security",), False)
+
+    assert "## Security Pillar" in prompt
+    assert "## Reliability Pillar" not in prompt
+    assert "Architecture Topology Extraction" not in prompt
+    assert "Architecture Topology Extraction" in build_shard_system_prompt("standard", ("security",), True)
+
+
+def test_compact_shard_prompt_lists_only_its_pillars():
+    prompt = build_shard_system_prompt("standard", ("security",), False, compact=True)
+    with_topology = build_shard_system_prompt("standard", ("reliability",), True, compact=True)
+
+    assert "UNENCRYPTED_AT_REST | security" in prompt
+    assert "SINGLE_AZ" not in prompt
+    assert "Identify 0-5 risks" in prompt
+    assert "3-10" not in prompt
+    assert '"summary"' not in prompt
+    assert '"topology"' not in prompt
+    assert '"topology"' in with_topology
+    assert "SINGLE_AZ | reliability" in with_topology
+
+
+@pytest.mark.asyncio
+async def test_compact_fanout_drops_off_pillar_risks(monkeypatch, fanout):
+    monkeypatch.setattr(settings, "review_output_mode", "compact")
+    monkeypatch.setattr(bedrock_client, "client", ShardRuntime(outputs=COMPACT_SHARD_OUTPUT))
+
+    review = await analyze_with_bedrock(ReviewRequest(design_text=DESIGN_TEXT))
+
+    assert [(r.id, r.title) for r in review.risks] == [
+        ("SEC-001", "Data Not Encrypted at Rest"),
+        ("REL-001", "Single Availability Zone Deployment"),
+    ]
+    shards = review.metadata["fanout"]["shards"]
+    assert [shard["off_pillar_dropped"] for shard in shards] == [1, 0, 0, 0]
+    assert review.metadata["fanout"]["duplicates_removed"] == 0
+    assert review.topology.services == ["ALB", "EC2", "RDS"]
+
+
+def test_merge_keeps_more_severe_duplicate_and_renumbers():
+    first = [RiskItem(**risk("reliability", "No backups", "RDS has no automated backups", "MEDIUM"))]
+    second = [
+        RiskItem(**risk("reliability", "No backups", "RDS has no automated backups.", "HIGH")),
+        RiskItem(**risk("reliability", "Single AZ", "One AZ only")),
+    ]
+
+    merged, removed = merge_risks([first, second], threshold=0.8)
+
+    assert removed == 1
+    assert [(r.id, r.title, r.severity) for r in merged] == [
+        ("REL-001", "No backups", "HIGH"),
+        ("REL-002", "Single AZ", "MEDIUM"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_fanout_review_merges_shards(monkeypatch, fanout):
+    runtime = ShardRuntime(delay=0.2)
+    monkeypatch.setattr(bedrock_client, "client", runtime)
+
+    start = time.perf_counter()
+    review = await analyze_with_bedrock(ReviewRequest(design_text=DESIGN_TEXT))
+    elapsed = time.perf_counter() - start
+
+    assert runtime.calls == 4
+    assert elapsed < 0.6  # Shards run concurrently (4 x 0.2s serially)
+    assert [r.id for r in review.risks] == ["SEC-001", "REL-001", "PERF-001"]
+    assert review.architecture_score == 100 - 15 - 15 - 8
+    assert review.topology.services == ["ALB", "EC2", "RDS"]
+
+    fanout_meta = review.metadata["fanout"]
+    assert fanout_meta["duplicates_removed"] == 1
+    assert [shard["pillars"] for shard in fanout_meta["shards"]][2] == [
+        "performance_efficiency",
+        "cost_optimization",
+    ]
+    assert all(shard["latency_ms"] >= 200 for shard in fanout_meta["shards"])
+    assert review.metadata["token_usage"]["input_tokens"] == 4000
+
+
+@pytest.mark.asyncio
+async def test_failed_shard_reported(monkeypatch, fanout):
+    monkeypatch.setattr(bedrock_client, "client", ShardRuntime(fail="reliability"))
+
+    review = await analyze_with_bedrock(ReviewRequest(design_text=DESIGN_TEXT))
+
+    assert review.metadata["fanout"]["failed_shards"] == 1
+    assert {"pillars": ["reliability"], "error": "BedrockValidationException"} in review.metadata["fanout"]["shards"]
+    assert "REL-001" not in [r.id for r in review.risks]
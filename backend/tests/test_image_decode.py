@@ -0,0 +1,148 @@
+"""
+Tests for header-only probing, reduced-resolution decoding, border trimming
+and token-budgeted sizing of uploaded images.
+"""
+
+import io
+
+import pytest
+from PIL import Image, ImageDraw, JpegImagePlugin
+
+from app.core.config import settings
+from app.services.image_processing import (
+    MAX_DIMENSION,
+    content_box,
+    decode_for_size,
+    encode_smallest,
+    fitted_size,
+    process_image_bytes,
+    vision_target_size,
+)
+from app.utils.exceptions import ImageTooLargeException
+from app.utils.token_counter import estimate_vision_tokens
+
+
+def encoded(image: Image.Image, format: str) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=format)
+    return buffer.getvalue()
+
+
+def diagram(size: tuple[int, int], mode: str = "RGB") -> Image.Image:
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((size[0] // 4, size[1] // 4, size[0] // 2, size[1] // 2), outline="black", width=20)
+    return image.convert(mode) if mode == "P" else image
+
+
+def test_fitted_size_keeps_aspect_ratio_and_never_upscales():
+    assert fitted_size(6000, 4000, 1024) == (1024, 683)
+    assert fitted_size(500, 3000, 1024) == (171, 1024)
+    assert fitted_size(800, 600, 1024) == (800, 600)
+
+
+def test_pixel_bomb_refused_from_the_header(monkeypatch):
+    # 1-bit PNG of 50 MP: a few KB on disk, far more once decoded
+    bomb = encoded(Image.new("1", (10000, 5000)), "PNG")
+    assert len(bomb) < 100_000
+
+    decoded = []
+    monkeypatch.setattr(Image.Image, "load", lambda self: decoded.append(self.size))
+
+    with pytest.raises(ImageTooLargeException, match="50.0 MP"):
+        decode_for_size(bomb, MAX_DIMENSION)
+    assert decoded == []
+
+
+def test_pixel_limit_is_configurable(monkeypatch):
+    data = encoded(diagram((2000, 1000)), "PNG")
+    monkeypatch.setattr(settings, "image_max_pixels", 1_000_000)
+
+    with pytest.raises(ImageTooLargeException):
+        process_image_bytes(data)
+
+
+def test_large_jpeg_decoded_at_reduced_scale(monkeypatch):
+    data = encoded(diagram((6000, 4000)), "JPEG")
+    drafted_sizes = []
+    draft = JpegImagePlugin.JpegImageFile.draft
+
+    def recording_draft(self, mode, size):
+        result = draft(self, mode, size)
+        drafted_sizes.append(self.size)
+        return result
+
+    monkeypatch.setattr(JpegImagePlugin.JpegImageFile, "draft", recording_draft)
+
+    result, original = decode_for_size(data, MAX_DIMENSION)
+
+    assert original == (6000, 4000)
+    assert result.size == (1024, 683)
+    assert drafted_sizes == [(1500, 1000)]  # libjpeg decoded at 1/4 scale, not 24 MP
+
+
+def test_png_and_palette_images_resized_to_target():
+    rgb, original = decode_for_size(encoded(diagram((3000, 2000)), "PNG"), MAX_DIMENSION)
+    palette, _ = decode_for_size(encoded(diagram((3000, 2000), mode="P"), "PNG"), MAX_DIMENSION)
+
+    assert original == (3000, 2000)
+    assert rgb.size == palette.size == (1024, 683)
+    assert palette.mode == "RGB"  # Converted before resampling
+
+
+def test_vision_target_size_fits_the_token_budget():
+    assert vision_target_size(6000, 4000, 1200, 1568) == (1161, 774)
+    assert estimate_vision_tokens(1161, 774) <= 1200
+    assert vision_target_size(8000, 1000, 1200, 1568) == (1568, 196)  # Long edge capped
+    assert vision_target_size(640, 480, 1200, 1568) == (640, 480)  # Never upscaled
+
+
+@pytest.mark.parametrize("size", [(2000, 2000), (1600, 1200), (1920, 1080), (6000, 4000), (4000, 1000)])
+def test_default_budget_never_sends_fewer_pixels_than_the_old_1024px_fit(size):
+    width, height = vision_target_size(*size, settings.vision_token_budget, settings.vision_max_dimension)
+    old_width, old_height = fitted_size(*size, 1024)
+
+    assert width >= old_width and height >= old_height
+
+
+def test_content_box_needs_a_uniform_border():
+    framed = diagram((1200, 800))
+    edge_to_edge = Image.new("RGB", (1200, 800), "white")
+    ImageDraw.Draw(edge_to_edge).rectangle((0, 0, 600, 400), fill="black")
+
+    assert content_box(framed) == (300, 200, 601, 401)
+    assert content_box(edge_to_edge) is None
+    assert content_box(Image.new("RGB", (100, 100), "white")) is None
+
+
+@pytest.mark.parametrize("format", ["JPEG", "PNG"])
+def test_margins_trimmed_and_content_sized_to_budget(format, monkeypatch):
+    monkeypatch.setattr(settings, "vision_token_budget", 1200)
+    result = process_image_bytes(encoded(diagram((6000, 4000)), format))
+
+    left, top, right, bottom = result["crop_box"]
+    # Content is (1500, 1000)-(3000, 2000); a little padding is kept around it
+    assert 1400 <= left < 1500 and 900 <= top < 1000
+    assert 3000 < right <= 3100 and 2000 < bottom <= 2100
+    assert result["dimensions"] == (6000, 4000)
+    assert result["estimated_vision_tokens"] <= 1200
+    # The whole budget goes to the content: more pixels per diagram pixel than the full frame would get
+    assert result["optimized_dimensions"][0] / (right - left) > 1161 / 6000
+
+
+def test_trimming_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "vision_token_budget", 1200)
+    monkeypatch.setattr(settings, "image_trim_borders", False)
+    result = process_image_bytes(encoded(diagram((6000, 4000)), "PNG"))
+
+    assert result["crop_box"] is None
+    assert result["optimized_dimensions"] == (1161, 774)
+
+
+def test_smallest_encoding_wins_with_a_lossless_preference():
+    flat = diagram((1000, 700))
+    noisy = Image.effect_noise((600, 400), 64).convert("RGB")
+
+    assert encode_smallest(flat, ["png", "webp", "jpeg"])[0] == "png"
+    assert encode_smallest(noisy, ["png", "jpeg"])[0] == "jpeg"
+    assert encode_smallest(noisy, ["png"])[0] == "png"
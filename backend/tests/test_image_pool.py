@@ -0,0 +1,92 @@
+"""
+Tests for the image processing pool (decode/resize/re-encode off the event loop).
+"""
+
+import asyncio
+import io
+import threading
+import time
+
+import pytest
+from fastapi import UploadFile
+from PIL import Image
+from starlette.datastructures import Headers
+
+from app.services import image_processing
+from app.services.image_processing import ImageProcessPool, validate_and_process_image
+from app.utils.exceptions import ImageCorruptedException
+
+
+def upload(data: bytes, content_type: str = "image/png") -> UploadFile:
+    return UploadFile(
+        filename="diagram.png", file=io.BytesIO(data), size=len(data), headers=Headers({"content-type": content_type})
+    )
+
+
+def png_bytes(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGBA", (width, height), (30, 120, 200, 255)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def process_pool(monkeypatch):
+    pool = ImageProcessPool(workers=1, max_concurrent=2)
+    monkeypatch.setattr(image_processing, "image_pool", pool)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_image_processed_in_worker_process(process_pool):
+    processed = await validate_and_process_image(upload(png_bytes(2048, 1536)))
+
+    assert processed["format"] == "png"  # Small payloads stay lossless
+    assert processed["dimensions"] == (2048, 1536)
+    assert processed["optimized_dimensions"] == (1183, 887)  # Default 1400-token budget
+    assert process_pool.stats()["processed"] == 1
+
+    with pytest.raises(ImageCorruptedException):
+        await validate_and_process_image(upload(b"\x89PNG\r\n\x1a\n not really a png"))
+    assert process_pool.stats()["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_decodes_are_capped():
+    pool = ImageProcessPool(workers=0, max_concurrent=2)
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+
+    def decode(index: int) -> int:
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        time.sleep(0.05)
+        with lock:
+            running["now"] -= 1
+        return index
+
+    results = await asyncio.gather(*[pool.run(decode, i) for i in range(5)])
+
+    assert results == [0, 1, 2, 3, 4]
+    assert running["peak"] == 2
+    stats = pool.stats()
+    assert stats["peak_in_flight"] == 2
+    assert stats["peak_waiting"] == 3
+    assert stats["in_flight"] == 0 and stats["waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    pool = ImageProcessPool(workers=0, max_concurrent=1)
+    first = asyncio.create_task(pool.run(time.sleep, 0.05))
+    await asyncio.sleep(0)
+    waiting = asyncio.create_task(pool.run(time.sleep, 0))
+    await asyncio.sleep(0)
+    waiting.cancel()
+
+    await first
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert await pool.run(len, "ok") == 2
+    assert pool.stats()["in_flight"] == 0
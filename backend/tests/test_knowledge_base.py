@@ -0,0 +1,110 @@
+"""
+Tests for knowledge-base ingestion and the memory-mapped index.
+"""
+
+import numpy as np
+
+from app.services import prompts
+from app.services.knowledge_base import KnowledgeBase, chunk_markdown, ingest_knowledge_base
+
+LAMBDA_DOC = """# Lambda
+
+## Concurrency
+
+Set reserved concurrency on Lambda functions so one function cannot exhaust the account limit.
+
+## Cold starts
+
+Use provisioned concurrency for latency-sensitive Lambda functions.
+"""
+
+S3_DOC = """# S3
+
+## Public access
+
+Enable S3 Block Public Access on every bucket.
+
+```bash
+# Not a heading
+aws s3api put-public-access-block --bucket example
+```
+"""
+
+
+def write_docs(docs_dir, **files):
+    docs_dir.mkdir(exist_ok=True)
+    for name, text in files.items():
+        (docs_dir / f"{name}.md").write_text(text)
+
+
+def test_chunk_markdown_breadcrumbs_and_fences():
+    chunks = chunk_markdown(S3_DOC, "s3.md")
+
+    assert [chunk["heading"] for chunk in chunks] == ["S3 > Public access"]
+    assert chunks[0]["text"].startswith("S3 > Public access\n\n")
+    assert "# Not a heading" in chunks[0]["text"]
+
+
+def test_long_sections_are_split():
+    text = "# Big\n\n" + "\n\n".join(f"Paragraph {i} " + "word " * 60 for i in range(10))
+
+    chunks = chunk_markdown(text, "big.md", max_tokens=200)
+
+    assert len(chunks) > 1
+    assert all(chunk["text"].startswith("Big\n\n") for chunk in chunks)
+
+
+def test_incremental_ingestion(tmp_path):
+    docs, index = tmp_path / "docs", tmp_path / "index"
+    write_docs(docs, lambda_=LAMBDA_DOC, s3=S3_DOC)
+
+    first = ingest_knowledge_base(docs, index)
+    assert first["embedded"] == first["chunks"] == 3
+
+    unchanged = ingest_knowledge_base(docs, index)
+    assert unchanged["changed"] is False
+    assert unchanged["embedded"] == 0
+
+    (docs / "s3.md").write_text(S3_DOC.replace("every bucket", "every bucket and account"))
+    updated = ingest_knowledge_base(docs, index)
+    assert updated["changed"] is True
+    assert updated["embedded"] == 1
+    assert updated["reused"] == 2
+    assert updated["removed"] == 1
+    # Only the current generation's files remain
+    assert len(list(index.glob("vectors-*.npy"))) == 1
+
+
+def test_search_uses_mmap_and_reloads(tmp_path):
+    docs, index = tmp_path / "docs", tmp_path / "index"
+    write_docs(docs, lambda_=LAMBDA_DOC)
+    ingest_knowledge_base(docs, index)
+    kb = KnowledgeBase(str(index))
+
+    results = kb.search("Lambda functions without reserved concurrency", token_budget=500, top_k=1)
+    assert results[0]["heading"] == "Lambda > Concurrency"
+    assert isinstance(kb._vectors, np.memmap)
+
+    write_docs(docs, s3=S3_DOC)
+    ingest_knowledge_base(docs, index)
+    results = kb.search("public S3 bucket", token_budget=500, top_k=1)
+    assert results[0]["source"] == "s3.md"
+    assert kb.stats()["reloads"] == 2
+
+
+def test_missing_index_is_inert(tmp_path):
+    kb = KnowledgeBase(str(tmp_path / "absent"))
+    assert kb.search("anything", token_budget=500, top_k=3) == []
+    assert KnowledgeBase(None).generation is None
+
+
+def test_prompt_includes_passages(tmp_path, monkeypatch):
+    docs, index = tmp_path / "docs", tmp_path / "index"
+    write_docs(docs, lambda_=LAMBDA_DOC)
+    ingest_knowledge_base(docs, index)
+    monkeypatch.setattr(prompts, "knowledge_base", KnowledgeBase(str(index)))
+
+    _, user = prompts.build_analysis_prompt("API Gateway calls Lambda with no reserved concurrency", "standard")
+
+    assert "Relevant AWS documentation excerpts" in user
+    assert "[lambda_.md]" in user
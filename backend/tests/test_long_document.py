@@ -0,0 +1,206 @@
+"""
+Tests for long-document (map-reduce) analysis.
+"""
+
+import io
+import json
+import threading
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.models.request import ReviewRequest
+from app.models.response import RiskItem
+from app.services.bedrock import bedrock_client
+from app.services.long_document import merge_topologies, split_sections
+from app.services.rag import analyze_with_bedrock, merge_risks
+from app.utils.token_counter import estimate_tokens
+
+FILLER = "The team documents operational runbooks, ownership and on-call rotations for this tier. " * 12
+
+
+def section(heading: str, body: str) -> str:
+    return f"## {heading}\n\n{body}\n\n{FILLER}\n"
+
+
+DOCUMENT = (
+    "# Payments Platform Design\n\n"
+    + section("Web tier", "An ALB routes traffic to EC2 instances in a single AZ.")
+    + section("Data tier", "EC2 writes orders to RDS MySQL in the same single AZ.")
+    + section("Storage", "Invoices are stored in S3 with public read access.")
+    + section("Batch", "A nightly Lambda reads invoices from S3.")
+)
+
+
+def risk(pillar: str, title: str, finding: str, severity: str = "MEDIUM") -> dict:
+    return {
+        "id": "X-001",
+        "title": title,
+        "severity": severity,
+        "pillar": pillar,
+        "impact": "Impact",
+        "finding": finding,
+        "remediation": "Fix it",
+        "references": [],
+    }
+
+
+SECTION_OUTPUT = {
+    "Web tier": {
+        "risks": [risk("reliability", "Single AZ EC2 fleet", "Instances behind the ALB run in one AZ", "HIGH")],
+        "topology": {
+            "services": ["ALB", "EC2"],
+            "connections": [{"source_service": "ALB", "target_service": "EC2", "relationship_type": "routes_to"}],
+            "architecture_pattern": "3-tier",
+        },
+    },
+    "Data tier": {
+        "risks": [
+            risk("reliability", "EC2 fleet in a single AZ", "The application servers share one zone", "CRITICAL"),
+            risk("reliability", "RDS without Multi-AZ", "Orders database has no standby"),
+        ],
+        "topology": {
+            "services": ["EC2", "RDS"],
+            "connections": [
+                {"source_service": "EC2", "target_service": "RDS", "relationship_type": "writes_to"}
+            ],
+            "architecture_pattern": "3-tier",
+        },
+    },
+    "Storage": {
+        "risks": [risk("security", "Public S3 bucket", "Invoices bucket allows public read", "HIGH")],
+        "topology": {"services": ["S3"], "connections": [], "architecture_pattern": "serverless"},
+    },
+    "Batch": {
+        "risks": [],
+        "topology": {
+            "services": ["Lambda", "s3"],
+            "connections": [
+                {"source_service": "Lambda", "target_service": "S3", "relationship_type": "reads_from"}
+            ],
+        },
+    },
+}
+
+WHOLE_REVIEW = {
+    "review_id": "review-model",
+    "architecture_score": 85,
+    "risks": [],
+    "summary": "Whole document reviewed at once.",
+    "tone": "standard",
+}
+
+
+class SectionRuntime:
+    """Answers each section by its heading (else with a whole review) and tracks peak concurrency."""
+
+    def __init__(self, delay: float = 0.1):
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def invoke_model(self, **kwargs):
+        message = json.loads(kwargs["body"])["messages"][0]["content"]
+        heading = next((name for name in SECTION_OUTPUT if f'> {name}"' in message), None)
+        output = SECTION_OUTPUT.get(heading, WHOLE_REVIEW)
+        with self.lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        body = {
+            "content": [{"type": "text", "text": json.dumps(output)}],
+            "usage": {"input_tokens": 500, "output_tokens": 100},
+            "stop_reason": "end_turn",
+        }
+        return {"body": io.BytesIO(json.dumps(body).encode())}
+
+
+@pytest.fixture
+def long_document(monkeypatch):
+    monkeypatch.setattr(settings, "long_document_token_threshold", 500)
+    monkeypatch.setattr(settings, "long_document_section_tokens", 400)
+    monkeypatch.setattr(settings, "long_document_max_concurrency", 2)
+
+
+def test_split_sections_keeps_headings_and_budget():
+    sections = split_sections(DOCUMENT, max_tokens=400)
+
+    assert [s["heading"] for s in sections] == [
+        "Payments Platform Design > Web tier",
+        "Payments Platform Design > Data tier",
+        "Payments Platform Design > Storage",
+        "Payments Platform Design > Batch",
+    ]
+    assert all(len(s["text"]) // 4 <= 400 for s in sections)
+
+
+def test_split_sections_packs_small_sections_and_splits_walls_of_text():
+    small = "# A\n\nALB.\n\n# B\n\nEC2.\n\n# C\n\nRDS."
+    assert len(split_sections(small, max_tokens=400)) == 1
+
+    wall = "word " * 2000  # No headings, no paragraph breaks
+    sections = split_sections(wall, max_tokens=400)
+    assert len(sections) in (5, 6)
+    assert all(estimate_tokens(s["text"]) <= 400 for s in sections)
+    assert sum(len(s["text"].split()) for s in sections) == 2000
+
+
+def test_merge_topologies_unions_services_and_connections():
+    topology = merge_topologies([SECTION_OUTPUT[name]["topology"] for name in SECTION_OUTPUT] + [None])
+
+    assert topology["services"] == ["ALB", "EC2", "RDS", "S3", "Lambda"]
+    assert len(topology["connections"]) == 3
+    assert topology["architecture_pattern"] == "3-tier"
+
+
+def test_merge_by_service_and_pillar():
+    first = [RiskItem(**risk("reliability", "Single AZ EC2 fleet", "Instances run in one AZ"))]
+    second = [
+        RiskItem(**risk("reliability", "EC2 fleet in a single AZ", "Servers share a zone", "HIGH")),
+        RiskItem(**risk("reliability", "RDS without Multi-AZ", "No standby")),
+    ]
+
+    _, removed_by_text = merge_risks([first, second], threshold=0.8)
+    merged, removed = merge_risks([first, second], threshold=0.8, services=["EC2", "RDS"], service_threshold=0.5)
+
+    assert removed_by_text == 0
+    assert removed == 1
+    assert [(r.id, r.title, r.severity) for r in merged] == [
+        ("REL-001", "EC2 fleet in a single AZ", "HIGH"),
+        ("REL-002", "RDS without Multi-AZ", "MEDIUM"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_long_document_map_reduce(monkeypatch, long_document):
+    runtime = SectionRuntime()
+    monkeypatch.setattr(bedrock_client, "client", runtime)
+
+    review = await analyze_with_bedrock(ReviewRequest(design_text=DOCUMENT))
+
+    assert runtime.calls == 4
+    assert runtime.peak == 2
+    assert [r.id for r in review.risks] == ["REL-001", "REL-002", "SEC-001"]
+    assert review.risks[0].severity == "CRITICAL"
+    assert review.topology.services == ["ALB", "EC2", "RDS", "S3", "Lambda"]
+    assert review.metadata["long_document"]["duplicates_removed"] == 1
+    assert len(review.metadata["long_document"]["sections"]) == 4
+    assert review.metadata["token_usage"]["input_tokens"] == 2000
+
+
+@pytest.mark.asyncio
+async def test_short_document_uses_single_call(monkeypatch, long_document):
+    monkeypatch.setattr(settings, "long_document_token_threshold", 100000)
+    runtime = SectionRuntime(delay=0)
+    monkeypatch.setattr(bedrock_client, "client", runtime)
+
+    review = await analyze_with_bedrock(ReviewRequest(design_text=DOCUMENT))
+
+    assert runtime.calls == 1
+    assert "long_document" not in review.metadata
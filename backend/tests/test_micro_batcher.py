@@ -0,0 +1,141 @@
+"""
+Tests for micro-batching small text reviews into one Bedrock call.
+"""
+
+import asyncio
+import io
+import json
+import re
+
+import pytest
+
+from app.core.config import settings
+from app.models.request import ReviewRequest
+from app.services import rag
+from app.services.bedrock import bedrock_client
+from app.services.micro_batcher import MicroBatcher
+from app.services.rag import analyze_batch, analyze_with_bedrock
+
+DESIGNS = [
+    "Single AZ deployment with EC2 instances behind an ALB. No backups configured.",
+    "Lambda functions behind API Gateway writing to DynamoDB. No encryption at rest.",
+    "Public S3 bucket serving a static website through CloudFront with default settings.",
+]
+
+
+def review_for(number: int) -> dict:
+    return {
+        "design": number,
+        "review_id": "review-same",
+        "architecture_score": 1,
+        "risks": [
+            {
+                "id": "REL-001",
+                "title": f"Risk in design {number}",
+                "severity": "HIGH",
+                "pillar": "reliability",
+                "impact": "Impact",
+                "finding": "Finding",
+                "remediation": "Fix it",
+                "references": [],
+            }
+        ],
+        "summary": f"Reviewed design {number}.",
+        "tone": "standard",
+    }
+
+
+class BatchRuntime:
+    """Answers batch prompts with one review per design (optionally dropping some)."""
+
+    def __init__(self, drop: set[int] = frozenset(), garbage: bool = False):
+        self.drop = drop
+        self.garbage = garbage
+        self.batch_sizes = []
+        self.single_calls = 0
+
+    def invoke_model(self, **kwargs):
+        message = json.loads(kwargs["body"])["messages"][0]["content"]
+        numbers = [int(n) for n in re.findall(r'<design number="(\d+)">', message)]
+        if numbers:
+            self.batch_sizes.append(len(numbers))
+            output = {"reviews": [review_for(n) for n in numbers if n not in self.drop]}
+            text = "not json at all" if self.garbage else json.dumps(output)
+            usage = {"input_tokens": 9000, "output_tokens": 3000}
+        else:
+            self.single_calls += 1
+            review = review_for(0)
+            review["summary"] = "Individual review."
+            text = json.dumps(review)
+            usage = {"input_tokens": 7000, "output_tokens": 1000}
+        body = {"content": [{"type": "text", "text": text}], "usage": usage, "stop_reason": "end_turn"}
+        return {"body": io.BytesIO(json.dumps(body).encode())}
+
+
+@pytest.fixture
+def batching(monkeypatch):
+    monkeypatch.setattr(settings, "review_batching_enabled", True)
+    batcher = MicroBatcher(analyze_batch, window_seconds=0.05, max_batch_size=4)
+    monkeypatch.setattr(rag, "review_batcher", batcher)
+    return batcher
+
+
+async def review_all(designs):
+    return await asyncio.gather(*[analyze_with_bedrock(ReviewRequest(design_text=d)) for d in designs])
+
+
+@pytest.mark.asyncio
+async def test_concurrent_small_reviews_share_one_call(monkeypatch, batching):
+    runtime = BatchRuntime()
+    monkeypatch.setattr(bedrock_client, "client", runtime)
+
+    reviews = await review_all(DESIGNS)
+
+    assert runtime.batch_sizes == [3]
+    assert [r.summary for r in reviews] == ["Reviewed design 1.", "Reviewed design 2.", "Reviewed design 3."]
+    assert len({r.review_id for r in reviews}) == 3
+    assert reviews[0].architecture_score == 85  # Scored server-side
+    assert reviews[0].metadata["batch"] == {
+        "size": 3,
+        "position": 1,
+        "batch_tokens": 12000,
+        "amortized_tokens": 4000,
+    }
+    assert reviews[0].metadata["token_usage"] == {"input_tokens": 3000, "output_tokens": 1000}
+    assert batching.stats()["amortized_tokens_per_review"] == 4000
+
+
+@pytest.mark.asyncio
+async def test_missing_review_falls_back_to_individual_call(monkeypatch, batching):
+    runtime = BatchRuntime(drop={2})
+    monkeypatch.setattr(bedrock_client, "client", runtime)
+
+    reviews = await review_all(DESIGNS)
+
+    assert runtime.single_calls == 1
+    assert reviews[1].summary == "Individual review."
+    assert reviews[1].metadata["batch"]["fallback"] is True
+    assert reviews[2].summary == "Reviewed design 3."
+    assert batching.stats()["fallback_items"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unparseable_batch_falls_back(monkeypatch, batching):
+    runtime = BatchRuntime(garbage=True)
+    monkeypatch.setattr(bedrock_client, "client", runtime)
+
+    reviews = await review_all(DESIGNS)
+
+    assert runtime.single_calls == 3
+    assert all(r.summary == "Individual review." for r in reviews)
+
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_without_waiting(monkeypatch, batching):
+    runtime = BatchRuntime()
+    monkeypatch.setattr(bedrock_client, "client", runtime)
+
+    await review_all(DESIGNS + DESIGNS[:2])
+
+    assert sorted(runtime.batch_sizes) == [4]
+    assert runtime.single_calls == 1  # The fifth review had the window to itself
@@ -0,0 +1,96 @@
+"""
+Tests for complexity-based model routing (model cascade).
+"""
+
+import io
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.models.request import ReviewRequest
+from app.services.bedrock import bedrock_client
+from app.services.model_router import COMPLEX, FAST, STANDARD, route_review, score_complexity
+from app.services.rag import analyze_with_bedrock
+
+SIMPLE_DESIGN = "A single EC2 instance serving a static website. No backups configured."
+COMPLEX_DESIGN = (
+    "Multi-region active-active microservices on EKS behind CloudFront and API Gateway. "
+    "Services publish events to Kinesis and SQS (event-driven), Lambda consumers write to "
+    "DynamoDB global tables and Aurora with read replicas. Transit Gateway connects the VPCs "
+    "to on-premises over Direct Connect; failover is handled by Route 53 health checks. "
+    "ElastiCache fronts Aurora, and S3 stores exports replicated cross-region."
+)
+
+
+class ModelRuntime:
+    def __init__(self):
+        self.calls = []
+
+    def invoke_model(self, **kwargs):
+        self.calls.append((kwargs["modelId"], json.loads(kwargs["body"])["max_tokens"]))
+        review = {
+            "review_id": "review-model",
+            "architecture_score": 85,
+            "risks": [],
+            "summary": "Routed review.",
+            "tone": "standard",
+        }
+        body = {
+            "content": [{"type": "text", "text": json.dumps(review)}],
+            "usage": {"input_tokens": 1_000_000, "output_tokens": 0},
+            "stop_reason": "end_turn",
+        }
+        return {"body": io.BytesIO(json.dumps(body).encode())}
+
+
+@pytest.fixture
+def routing(monkeypatch):
+    monkeypatch.setattr(settings, "model_routing_enabled", True)
+    monkeypatch.setattr(settings, "bedrock_fast_model_id", "fast-model")
+    monkeypatch.setattr(settings, "bedrock_complex_model_id", "complex-model")
+
+
+def test_complexity_counts_services_and_hints():
+    simple = score_complexity(SIMPLE_DESIGN)
+    complex_ = score_complexity(COMPLEX_DESIGN)
+
+    assert simple["services"] == 1
+    assert simple["topology_hints"] == 0
+    assert complex_["services"] >= 10
+    assert complex_["topology_hints"] >= 6
+    assert complex_["score"] > simple["score"]
+
+
+def test_routes(routing):
+    assert route_review(SIMPLE_DESIGN).name == FAST
+    assert route_review(COMPLEX_DESIGN).name == COMPLEX
+    assert route_review("An ALB in front of EC2 and RDS, S3 for assets, CloudWatch alarms.").name == STANDARD
+
+
+def test_routing_disabled_uses_default_model():
+    route = route_review(SIMPLE_DESIGN)
+
+    assert route.name == STANDARD
+    assert route.model_id == settings.bedrock_model_id
+    assert route.max_tokens == 4096
+
+
+@pytest.mark.asyncio
+async def test_route_recorded_in_metadata(monkeypatch, routing):
+    runtime = ModelRuntime()
+    monkeypatch.setattr(bedrock_client, "client", runtime)
+
+    simple = await analyze_with_bedrock(ReviewRequest(design_text=SIMPLE_DESIGN))
+    complex_ = await analyze_with_bedrock(ReviewRequest(design_text=COMPLEX_DESIGN))
+
+    assert runtime.calls == [
+        ("fast-model", settings.model_routing_fast_max_tokens),
+        ("complex-model", settings.model_routing_complex_max_tokens),
+    ]
+    assert simple.metadata["route"]["name"] == FAST
+    assert simple.metadata["model_id"] == "fast-model"
+    assert simple.metadata["cost_usd"] == settings.bedrock_fast_model_input_cost_per_mtok
+    assert complex_.metadata["route"]["name"] == COMPLEX
+    assert complex_.metadata["cost_usd"] == settings.bedrock_complex_model_input_cost_per_mtok
+    assert "bedrock_latency_ms" in complex_.metadata["route"]
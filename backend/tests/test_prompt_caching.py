@@ -0,0 +1,77 @@
+"""
+Tests for Bedrock prompt caching of the static system prompt.
+"""
+
+import io
+import json
+
+import pytest
+
+from app.services.bedrock import bedrock_client
+from app.services.prompts import build_analysis_prompt, build_system_prompt
+from app.utils.token_counter import calculate_actual_cost, calculate_text_cost_breakdown
+
+
+def test_system_prompt_is_identical_per_tone():
+    """The cacheable prefix must be byte-identical across designs of the same tone."""
+    first, _ = build_analysis_prompt("Design A " * 10, "standard")
+    second, _ = build_analysis_prompt("Design B " * 10, "standard")
+    roast, _ = build_analysis_prompt("Design A " * 10, "roast")
+
+    assert first is second is build_system_prompt("standard")
+    assert roast != first
+
+
+def test_cached_tokens_priced_separately():
+    usage = {
+        "input_tokens": 200,
+        "output_tokens": 1000,
+        "cache_read_input_tokens": 7000,
+        "cache_creation_input_tokens": 0,
+    }
+    costs = calculate_text_cost_breakdown(usage)
+
+    assert costs["cache_read_cost"] == pytest.approx(7000 / 1_000_000 * 0.1)
+    assert costs["cache_savings"] == pytest.approx(7000 / 1_000_000 * 0.9)
+    assert calculate_actual_cost(usage) == round(
+        (200 * 1.0 + 7000 * 0.1 + 1000 * 5.0) / 1_000_000, 6
+    )
+
+
+def test_cache_write_costs_more_than_plain_input():
+    write = calculate_actual_cost({"input_tokens": 0, "cache_creation_input_tokens": 7000})
+    plain = calculate_actual_cost({"input_tokens": 7000})
+    assert write > plain
+
+
+def test_legacy_usage_without_cache_fields():
+    assert calculate_actual_cost({"input_tokens": 1000, "output_tokens": 1000}) == 0.006
+
+
+class RecordingRuntime:
+    def __init__(self):
+        self.bodies = []
+
+    def invoke_model(self, **kwargs):
+        self.bodies.append(json.loads(kwargs["body"]))
+        body = {
+            "content": [{"type": "text", "text": "{}"}],
+            "usage": {"input_tokens": 50, "output_tokens": 5, "cache_read_input_tokens": 7000},
+            "stop_reason": "end_turn",
+        }
+        return {"body": io.BytesIO(json.dumps(body).encode())}
+
+
+@pytest.mark.asyncio
+async def test_generate_marks_system_prompt_cacheable(monkeypatch):
+    runtime = RecordingRuntime()
+    monkeypatch.setattr(bedrock_client, "client", runtime)
+
+    system_prompt, user_message = build_analysis_prompt("Single AZ EC2 behind ALB " * 3, "standard")
+    response = await bedrock_client.generate(system_prompt, user_message)
+
+    system = runtime.bodies[0]["system"]
+    assert system == [
+        {"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}
+    ]
+    assert response["usage"]["cache_read_input_tokens"] == 7000
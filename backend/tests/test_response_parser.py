@@ -0,0 +1,119 @@
+"""
+Tests for tolerant review JSON parsing and max_tokens continuation.
+"""
+
+import io
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.models.request import ReviewRequest
+from app.services.bedrock import bedrock_client
+from app.services.rag import analyze_with_bedrock
+from app.services.response_parser import ReviewParseError, parse_review_json, review_parse_stats
+
+RISK = {
+    "id": "REL-001",
+    "title": "Single AZ",
+    "severity": "HIGH",
+    "pillar": "reliability",
+    "impact": "Outage",
+    "finding": "One AZ",
+    "remediation": "Use two AZs",
+    "references": [],
+}
+
+REVIEW = {
+    "review_id": "review-parse",
+    "architecture_score": 70,
+    "risks": [RISK, {**RISK, "id": "SEC-001", "pillar": "security"}],
+    "summary": "Two findings.",
+    "tone": "standard",
+}
+
+DESIGN_TEXT = "Single AZ deployment with EC2 instances behind an ALB. No backups configured."
+
+
+def test_clean_json():
+    assert parse_review_json(json.dumps(REVIEW)) == (REVIEW, "clean")
+
+
+def test_markdown_fence_stripped():
+    text = "```json\n" + json.dumps(REVIEW) + "\n```"
+    assert parse_review_json(text) == (REVIEW, "fenced")
+
+
+def test_outermost_object_extracted_from_prose():
+    text = "Here is the review:\n" + json.dumps(REVIEW) + "\nLet me know if you need more."
+    assert parse_review_json(text) == (REVIEW, "extracted")
+
+
+def test_truncated_risks_array_keeps_complete_items():
+    text = json.dumps(REVIEW)
+    truncated = text[: text.index('"SEC-001"') + 20]
+
+    parsed, outcome = parse_review_json(truncated)
+
+    assert outcome == "repaired"
+    assert [risk["id"] for risk in parsed["risks"]] == ["REL-001"]
+    assert parsed["architecture_score"] == 70
+    assert "summary" not in parsed  # Never written; caller fills it in
+
+
+def test_unrecoverable_output_raises():
+    with pytest.raises(ReviewParseError):
+        parse_review_json("I cannot help with that.")
+
+
+class ContinuationRuntime:
+    """Returns the review in two halves, the first stopping at max_tokens."""
+
+    def __init__(self):
+        self.bodies = []
+        text = json.dumps(REVIEW)
+        self.parts = [text[:150], text[150:]]
+
+    def invoke_model(self, **kwargs):
+        self.bodies.append(json.loads(kwargs["body"]))
+        part = self.parts[len(self.bodies) - 1]
+        body = {
+            "content": [{"type": "text", "text": part}],
+            "usage": {"input_tokens": 100, "output_tokens": 40},
+            "stop_reason": "max_tokens" if len(self.bodies) == 1 else "end_turn",
+        }
+        return {"body": io.BytesIO(json.dumps(body).encode())}
+
+
+@pytest.mark.asyncio
+async def test_max_tokens_triggers_continuation(monkeypatch):
+    runtime = ContinuationRuntime()
+    monkeypatch.setattr(bedrock_client, "client", runtime)
+    monkeypatch.setattr(settings, "bedrock_max_continuations", 1)
+    continuations_before = review_parse_stats.continuations
+
+    review = await analyze_with_bedrock(ReviewRequest(design_text=DESIGN_TEXT))
+
+    assert [risk.id for risk in review.risks] == ["REL-001", "SEC-001"]
+    assert review.metadata["continuations"] == 1
+    assert review.metadata["parse_outcome"] == "clean"
+    assert review.metadata["token_usage"]["output_tokens"] == 80
+    # Second call continues from the first half via assistant prefill
+    assert runtime.bodies[1]["messages"][-1] == {"role": "assistant", "content": runtime.parts[0].rstrip()}
+    assert review_parse_stats.continuations == continuations_before + 1
+
+
+@pytest.mark.asyncio
+async def test_truncation_without_continuation_is_salvaged(monkeypatch):
+    runtime = ContinuationRuntime()
+    cut = json.dumps(REVIEW).index('"SEC-001"')
+    runtime.parts = [json.dumps(REVIEW)[:cut]]
+    monkeypatch.setattr(bedrock_client, "client", runtime)
+    monkeypatch.setattr(settings, "bedrock_max_continuations", 0)
+
+    review = await analyze_with_bedrock(ReviewRequest(design_text=DESIGN_TEXT))
+
+    assert review.metadata["parse_outcome"] == "repaired"
+    assert [risk.id for risk in review.risks] == ["REL-001"]
+    assert review.architecture_score == 70
+    assert "incomplete" in review.summary
@@ -0,0 +1,58 @@
+"""
+Tests for retrieval-based Well-Architected context selection.
+"""
+
+from app.core.config import settings
+from app.services.prompts import (
+    AWS_WELL_ARCHITECTED_CONTEXT,
+    build_analysis_prompt,
+    context_retriever,
+)
+from app.services.retrieval import chunk_context
+from app.services.review_cache import review_cache_key
+
+SERVERLESS_DESIGN = (
+    "API Gateway invokes Lambda functions that write orders to a DynamoDB table. "
+    "Lambda has no reserved concurrency and DynamoDB uses provisioned capacity without auto scaling."
+)
+
+
+def test_chunks_cover_context():
+    chunks = chunk_context(AWS_WELL_ARCHITECTED_CONTEXT)
+
+    assert len(chunks) > 10
+    assert len({chunk.id for chunk in chunks}) == len(chunks)
+    always = [chunk.title for chunk in chunks if chunk.always_include]
+    assert "Preamble" in always
+    assert any("Severity" in title for title in always)
+
+
+def test_relevant_chunks_selected():
+    selected = context_retriever.select(SERVERLESS_DESIGN, token_budget=1500, top_k=4)
+    titles = " ".join(chunk.title for chunk in selected if not chunk.always_include)
+
+    assert "Lambda" in titles
+    assert "DynamoDB" in titles
+
+
+def test_selection_respects_budget_and_order():
+    for budget in (300, 800, 1500):
+        selected = context_retriever.select(SERVERLESS_DESIGN, token_budget=budget, top_k=20)
+        always_tokens = sum(c.tokens for c in context_retriever.chunks if c.always_include)
+        assert sum(chunk.tokens for chunk in selected) <= max(budget, always_tokens)
+        assert [chunk.id for chunk in selected] == sorted(chunk.id for chunk in selected)
+
+
+def test_prompt_with_retrieval(monkeypatch):
+    full_system, full_user = build_analysis_prompt(SERVERLESS_DESIGN, "standard")
+    full_key = review_cache_key(SERVERLESS_DESIGN, "standard")
+
+    monkeypatch.setattr(settings, "context_retrieval_enabled", True)
+    system, user = build_analysis_prompt(SERVERLESS_DESIGN, "standard")
+
+    assert AWS_WELL_ARCHITECTED_CONTEXT not in system
+    assert AWS_WELL_ARCHITECTED_CONTEXT in full_system
+    assert user.startswith("Relevant AWS Well-Architected guidance")
+    assert len(system) + len(user) < len(full_system) + len(full_user)
+    # Reviews built from different context must not share cache entries
+    assert review_cache_key(SERVERLESS_DESIGN, "standard") != full_key
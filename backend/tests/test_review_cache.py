@@ -0,0 +1,171 @@
+"""
+Tests for the content-addressed review result cache.
+"""
+
+import io
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.models.request import ReviewRequest
+from app.services import rag
+from app.services.bedrock import bedrock_client
+from app.services.rag import analyze_design, analyze_design_stub
+from app.services.review_cache import (
+    LRUTTLCache,
+    ReviewCache,
+    review_cache_key,
+)
+
+DESIGN_TEXT = "Single AZ deployment with EC2 instances behind an ALB. No backups configured."
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUTTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.evictions == 1
+
+
+def test_ttl_expiry(monkeypatch):
+    cache = LRUTTLCache(max_entries=10, ttl_seconds=5)
+    cache.set("a", 1)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+
+    assert cache.get("a") is None
+    assert cache.expirations == 1
+
+
+def test_key_normalizes_whitespace_and_separates_tone():
+    assert review_cache_key("EC2  behind\r\nALB ", "standard") == review_cache_key(
+        "EC2 behind ALB", "standard"
+    )
+    assert review_cache_key("EC2 behind ALB", "standard") != review_cache_key(
+        "EC2 behind ALB", "roast"
+    )
+    assert review_cache_key("EC2 behind ALB", "standard", "model-a") != review_cache_key(
+        "EC2 behind ALB", "standard", "model-b"
+    )
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "reviews.db")
+    review = await analyze_design_stub(ReviewRequest(design_text=DESIGN_TEXT))
+
+    first = ReviewCache(max_entries=4, ttl_seconds=60, disk_path=path)
+    await first.set("key", review)
+
+    restarted = ReviewCache(max_entries=4, ttl_seconds=60, disk_path=path)
+    hit = await restarted.get("key")
+
+    assert hit is not None
+    assert hit.metadata["cache_tier"] == "disk"
+    assert hit.review_id != review.review_id
+    assert [r.id for r in hit.risks] == [r.id for r in review.risks]
+    assert restarted.stats()["disk_hits"] == 1
+
+
+class CountingRuntime:
+    def __init__(self, truncate: bool = False):
+        self.calls = 0
+        self.truncate = truncate
+
+    def invoke_model(self, **kwargs):
+        self.calls += 1
+        review = {
+            "review_id": "review-model",
+            "architecture_score": 85,
+            "risks": [
+                {
+                    "id": "REL-001",
+                    "title": "Single AZ",
+                    "severity": "HIGH",
+                    "pillar": "reliability",
+                    "impact": "Outage",
+                    "finding": "One AZ",
+                    "remediation": "Use two AZs",
+                }
+            ],
+            "summary": "One finding.",
+            "tone": "standard",
+        }
+        body = {
+            # A truncated response is cut off mid-summary
+            "content": [{"type": "text", "text": json.dumps(review)[:-30] if self.truncate else json.dumps(review)}],
+            "usage": {"input_tokens": 100, "output_tokens": 50},
+            "stop_reason": "max_tokens" if self.truncate else "end_turn",
+        }
+        return {"body": io.BytesIO(json.dumps(body).encode())}
+
+
+@pytest.fixture
+def cached_pipeline(monkeypatch):
+    runtime = CountingRuntime()
+    cache = ReviewCache(max_entries=8, ttl_seconds=60)
+    monkeypatch.setattr(bedrock_client, "client", runtime)
+    monkeypatch.setattr(settings, "disable_bedrock", False)
+    monkeypatch.setattr(settings, "review_cache_enabled", True)
+    monkeypatch.setattr(rag, "review_cache", cache)
+    return runtime, cache
+
+
+@pytest.mark.asyncio
+async def test_repeat_review_served_from_cache(cached_pipeline):
+    runtime, cache = cached_pipeline
+
+    first = await analyze_design(ReviewRequest(design_text=DESIGN_TEXT))
+    second = await analyze_design(ReviewRequest(design_text=DESIGN_TEXT + "   "))
+
+    assert runtime.calls == 1
+    assert second.review_id != first.review_id
+    assert second.created_at >= first.created_at
+    assert second.metadata["cache_hit"] is True
+    assert second.metadata["cost_usd"] == 0.0
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fallback_reviews_are_not_cached(cached_pipeline, monkeypatch):
+    runtime, cache = cached_pipeline
+
+    def broken(**kwargs):
+        raise RuntimeError("bedrock down")
+
+    monkeypatch.setattr(runtime, "invoke_model", broken)
+    review = await analyze_design(ReviewRequest(design_text=DESIGN_TEXT))
+
+    assert review.metadata["analysis_method"] == "pattern_matching_fallback"
+    assert cache.stats()["stores"] == 0
+
+
+@pytest.mark.asyncio
+async def test_repaired_reviews_are_not_cached(cached_pipeline):
+    runtime, cache = cached_pipeline
+    runtime.truncate = True
+
+    first = await analyze_design(ReviewRequest(design_text=DESIGN_TEXT))
+    calls_for_first = runtime.calls
+    second = await analyze_design(ReviewRequest(design_text=DESIGN_TEXT))
+
+    assert first.metadata["parse_outcome"] == "repaired"
+    assert runtime.calls == 2 * calls_for_first  # The repeat went to Bedrock again
+    assert "cache_hit" not in second.metadata
+    assert cache.stats()["stores"] == 0
+
+
+def test_runtime_metrics_exposes_cache_counters():
+    response = TestClient(app).get("/api/metrics/runtime")
+    assert response.status_code == 200
+    assert {"memory_hits", "disk_hits", "misses", "hit_rate"} <= set(response.json()["review_cache"])
@@ -0,0 +1,133 @@
+"""
+Tests for the streaming review endpoint and incremental risk parser.
+"""
+
+import json
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.services.bedrock import bedrock_client
+from app.services.bedrock_routing import EndpointRouter, parse_endpoints
+from app.services.response_parser import StreamingRiskParser
+
+client = TestClient(app)
+
+REVIEW_JSON = {
+    "review_id": "review-stream",
+    "architecture_score": 60,
+    "risks": [
+        {
+            "id": "REL-001",
+            "title": "Single AZ {not a brace issue}",
+            "severity": "HIGH",
+            "pillar": "reliability",
+            "impact": "Outage during \"AZ\" failure",
+            "finding": "All resources in one AZ",
+            "remediation": "Deploy across multiple AZs",
+            "references": ["https://aws.amazon.com/"],
+        },
+        {
+            "id": "SEC-001",
+            "title": "No encryption",
+            "severity": "CRITICAL",
+            "pillar": "security",
+            "impact": "Data exposure",
+            "finding": "RDS is unencrypted",
+            "remediation": "Enable KMS encryption",
+            "references": [],
+        },
+    ],
+    "summary": "Two findings.",
+    "tone": "standard",
+    "topology": {"services": ["EC2", "RDS"], "connections": [], "architecture_pattern": "custom"},
+}
+
+
+def parse_sse(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for frame in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_parser_emits_risks_as_objects_complete():
+    """Risks are emitted one by one even when fed a few characters at a time."""
+    text = "```json\n" + json.dumps(REVIEW_JSON)
+    parser = StreamingRiskParser()
+
+    emitted = []
+    for i in range(0, len(text), 7):
+        emitted.extend(parser.feed(text[i : i + 7]))
+
+    assert [risk["id"] for risk in emitted] == ["REL-001", "SEC-001"]
+    assert emitted[0]["impact"] == 'Outage during "AZ" failure'
+    assert parser.risks_complete
+
+
+def test_parser_ignores_nested_arrays_outside_risks():
+    parser = StreamingRiskParser()
+    assert parser.feed('{"topology": {"connections": [{"a": 1}]}, "risks": [') == []
+    assert parser.feed('{"id": "X"}') == [{"id": "X"}]
+
+
+def test_stream_endpoint_fallback_event_order():
+    """With Bedrock disabled the stub review is streamed in the same event order."""
+    response = client.post(
+        "/review/stream",
+        json={"design_text": "Single AZ deployment with EC2 instances behind an ALB. No backups."},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = parse_sse(response.text)
+    names = [name for name, _ in events]
+    assert names[-1] == "review"
+    assert names[-2] == "summary"
+    assert set(names[:-2]) == {"risk"}
+    assert events[-1][1]["metadata"]["analysis_method"] == "pattern_matching_fallback"
+
+
+class FakeStreamingRuntime:
+    """Stands in for bedrock-runtime, emitting the review JSON in small deltas."""
+
+    def invoke_model_with_response_stream(self, **kwargs):
+        text = json.dumps(REVIEW_JSON)
+        events = [{"type": "message_start", "message": {"usage": {"input_tokens": 120}}}]
+        for i in range(0, len(text), 16):
+            events.append(
+                {"type": "content_block_delta", "delta": {"type": "text_delta", "text": text[i : i + 16]}}
+            )
+        events.append(
+            {"type": "message_delta", "delta": {"stop_reason": "end_turn"}, "usage": {"output_tokens": 80}}
+        )
+        events.append({"type": "message_stop"})
+        return {"body": ({"chunk": {"bytes": json.dumps(e).encode()}} for e in events)}
+
+
+def test_stream_endpoint_with_bedrock_stream(monkeypatch):
+    monkeypatch.setattr(bedrock_client, "client", FakeStreamingRuntime())
+    monkeypatch.setattr(settings, "disable_bedrock", False)
+    monkeypatch.setattr(app.state.limiter, "enabled", False)
+    router = EndpointRouter(parse_endpoints(None, bedrock_client.region, settings.bedrock_model_id))
+    router.endpoints[0].record(0.0, ok=False)  # Earlier failure streak
+    monkeypatch.setattr(bedrock_client, "text_router", router)
+
+    response = client.post(
+        "/review/stream",
+        json={"design_text": "Single AZ deployment with EC2 instances behind an ALB. No backups."},
+    )
+    events = parse_sse(response.text)
+
+    assert [name for name, _ in events] == ["risk", "risk", "summary", "topology", "review"]
+    review = events[-1][1]
+    assert review["metadata"]["streaming"] is True
+    assert review["metadata"]["token_usage"]["input_tokens"] == 120
+    assert review["metadata"]["token_usage"]["output_tokens"] == 80
+    assert review["metadata"]["time_to_first_token_ms"] is not None
+    assert review["metadata"]["time_to_first_risk_ms"] >= review["metadata"]["time_to_first_token_ms"]
+    # A successful stream counts toward endpoint health like any other call
+    assert router.endpoints[0].requests == 2
+    assert router.endpoints[0].consecutive_failures == 0
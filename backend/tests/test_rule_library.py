@@ -0,0 +1,123 @@
+"""
+Tests for the rule library and compact output mode expansion.
+"""
+
+import io
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.models.request import ReviewRequest
+from app.models.response import RiskItem
+from app.services.bedrock import bedrock_client
+from app.services.prompts import build_analysis_prompt
+from app.services.rag import analyze_design_stub, analyze_with_bedrock
+from app.services.rule_library import RULES, CompactReviewExpander, build_risk
+
+COMPACT_REVIEW = {
+    "risks": [
+        {"code": "SINGLE_AZ", "severity": "high", "finding": "ALB, EC2 and RDS all sit in us-east-1a."},
+        {"code": "NO_BACKUP", "severity": "CRITICAL", "finding": "RDS has automated backups disabled."},
+        {
+            "code": "CUSTOM",
+            "severity": "LOW",
+            "finding": "Logs kept forever in CloudWatch.",
+            "title": "Unbounded Log Retention",
+            "pillar": "cost_optimization",
+            "remediation": "Set a CloudWatch Logs retention period.",
+        },
+    ],
+    "summary": "Single-AZ with no backups.",
+    "tone": "standard",
+    "topology": {
+        "services": ["ALB", "EC2", "RDS"],
+        "connections": [["ALB", "EC2", "routes_to"], ["EC2", "RDS", "reads_from"]],
+        "architecture_pattern": "3-tier",
+    },
+}
+
+DESIGN_TEXT = "Single AZ deployment with EC2 instances behind an ALB. RDS MySQL. No backups configured."
+
+
+def test_every_rule_builds_a_valid_risk():
+    for code in RULES:
+        RiskItem(**build_risk(code, "GEN-001"))
+
+
+def test_expand_review_numbers_ids_per_pillar():
+    review = CompactReviewExpander().expand_review(COMPACT_REVIEW)
+
+    assert [risk["id"] for risk in review["risks"]] == ["REL-001", "REL-002", "COST-001"]
+    single_az = review["risks"][0]
+    assert single_az["severity"] == "HIGH"
+    assert single_az["finding"] == "ALB, EC2 and RDS all sit in us-east-1a."
+    assert single_az["remediation"] == RULES["SINGLE_AZ"].remediation
+    assert single_az["references"]
+    assert review["risks"][2]["title"] == "Unbounded Log Retention"
+    assert review["topology"]["connections"][0] == {
+        "source_service": "ALB",
+        "target_service": "EC2",
+        "relationship_type": "routes_to",
+    }
+
+
+@pytest.mark.asyncio
+async def test_fallback_uses_library_text():
+    review = await analyze_design_stub(ReviewRequest(design_text=DESIGN_TEXT))
+
+    assert [risk.id for risk in review.risks] == ["REL-001", "REL-002"]
+    assert review.risks[0].remediation == RULES["SINGLE_AZ"].remediation
+
+
+class CompactRuntime:
+    def __init__(self, review: dict = COMPACT_REVIEW):
+        self.bodies = []
+        self.review = review
+
+    def invoke_model(self, **kwargs):
+        self.bodies.append(json.loads(kwargs["body"]))
+        body = {
+            "content": [{"type": "text", "text": json.dumps(self.review)}],
+            "usage": {"input_tokens": 100, "output_tokens": 120},
+            "stop_reason": "end_turn",
+        }
+        return {"body": io.BytesIO(json.dumps(body).encode())}
+
+
+@pytest.mark.asyncio
+async def test_compact_mode_review(monkeypatch):
+    runtime = CompactRuntime()
+    monkeypatch.setattr(bedrock_client, "client", runtime)
+    monkeypatch.setattr(settings, "review_output_mode", "compact")
+
+    review = await analyze_with_bedrock(ReviewRequest(design_text=DESIGN_TEXT))
+
+    assert "RULE_CODE" in runtime.bodies[0]["system"][0]["text"]
+    assert [risk.id for risk in review.risks] == ["REL-001", "REL-002", "COST-001"]
+    assert review.architecture_score == 100 - 15 - 25 - 3
+    assert review.review_id.startswith("review-")
+    assert review.metadata["output_mode"] == "compact"
+    assert len(review.topology.connections) == 2
+
+
+@pytest.mark.asyncio
+async def test_compact_review_without_summary_is_not_called_truncated(monkeypatch):
+    complete_without_summary = {key: value for key, value in COMPACT_REVIEW.items() if key != "summary"}
+    monkeypatch.setattr(bedrock_client, "client", CompactRuntime(complete_without_summary))
+    monkeypatch.setattr(settings, "review_output_mode", "compact")
+
+    review = await analyze_with_bedrock(ReviewRequest(design_text=DESIGN_TEXT))
+
+    assert review.metadata["parse_outcome"] != "repaired"
+    assert review.summary.startswith("Found 3 issues")
+    assert "cut short" not in review.summary
+
+
+def test_compact_prompt_is_smaller(monkeypatch):
+    full_system, _ = build_analysis_prompt(DESIGN_TEXT, "standard")
+    monkeypatch.setattr(settings, "review_output_mode", "compact")
+    compact_system, _ = build_analysis_prompt(DESIGN_TEXT, "standard")
+
+    assert "SINGLE_AZ | reliability" in compact_system
+    assert len(compact_system) < len(full_system)
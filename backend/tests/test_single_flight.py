@@ -0,0 +1,110 @@
+"""
+Tests for single-flight coalescing of identical in-flight reviews.
+"""
+
+import asyncio
+import io
+import json
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.models.request import ReviewRequest
+from app.services import rag
+from app.services.bedrock import bedrock_client
+from app.services.rag import SingleFlight, analyze_design
+
+DESIGN_TEXT = "Single AZ deployment with EC2 instances behind an ALB. No backups configured."
+
+
+class SlowRuntime:
+    def __init__(self, latency: float = 0.2):
+        self.latency = latency
+        self.calls = 0
+
+    def invoke_model(self, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        review = {
+            "review_id": "review-model",
+            "architecture_score": 85,
+            "risks": [],
+            "summary": "Looks fine.",
+            "tone": "standard",
+        }
+        body = {
+            "content": [{"type": "text", "text": json.dumps(review)}],
+            "usage": {"input_tokens": 100, "output_tokens": 50},
+            "stop_reason": "end_turn",
+        }
+        return {"body": io.BytesIO(json.dumps(body).encode())}
+
+
+@pytest.fixture
+def flight(monkeypatch):
+    runtime = SlowRuntime()
+    flight = SingleFlight()
+    monkeypatch.setattr(bedrock_client, "client", runtime)
+    monkeypatch.setattr(settings, "disable_bedrock", False)
+    monkeypatch.setattr(rag, "single_flight", flight)
+    return runtime, flight
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_reviews_share_one_call(flight):
+    runtime, single_flight = flight
+
+    reviews = await asyncio.gather(
+        *[analyze_design(ReviewRequest(design_text=DESIGN_TEXT)) for _ in range(5)]
+    )
+
+    assert runtime.calls == 1
+    assert len({r.review_id for r in reviews}) == 5
+    assert sum(1 for r in reviews if r.metadata.get("coalesced")) == 4
+    assert single_flight.stats()["coalesced_calls"] == 4
+    assert single_flight.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_different_designs_are_not_coalesced(flight):
+    runtime, single_flight = flight
+
+    await asyncio.gather(
+        analyze_design(ReviewRequest(design_text=DESIGN_TEXT)),
+        analyze_design(ReviewRequest(design_text=DESIGN_TEXT + " Also uses S3.")),
+    )
+
+    assert runtime.calls == 2
+    assert single_flight.stats()["coalesced_calls"] == 0
+
+
+@pytest.mark.asyncio
+async def test_leader_cancellation_does_not_cancel_followers():
+    single_flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    leader = asyncio.create_task(single_flight.do("k", work))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(single_flight.do("k", work))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == ("done", True)
+
+
+@pytest.mark.asyncio
+async def test_failure_propagates_to_all_waiters():
+    single_flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        single_flight.do("k", failing), single_flight.do("k", failing), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
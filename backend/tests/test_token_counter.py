@@ -0,0 +1,156 @@
+"""
+Tests for local token counting, pre-flight context budgets and drift tracking.
+"""
+
+import io
+import json
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.main import app
+from app.models.request import ReviewRequest
+from app.services.bedrock import bedrock_client
+from app.services.prompts import build_analysis_prompt, build_system_prompt
+from app.services.rag import analyze_design, analyze_with_bedrock
+from app.utils.exceptions import InputTooLargeException
+from app.utils.token_counter import (
+    TokenDriftTracker,
+    count_prompt_tokens,
+    estimate_request_cost,
+    estimate_tokens,
+    token_drift,
+    truncate_to_tokens,
+)
+
+DESIGN_TEXT = "Single AZ deployment with EC2 instances behind an ALB. No backups configured. " * 20
+
+
+class BudgetRuntime:
+    def __init__(self, input_tokens: int = 1000):
+        self.input_tokens = input_tokens
+        self.bodies = []
+
+    def invoke_model(self, **kwargs):
+        self.bodies.append(json.loads(kwargs["body"]))
+        review = {
+            "review_id": "review-budget",
+            "architecture_score": 80,
+            "risks": [],
+            "summary": "Budgeted review.",
+            "tone": "standard",
+        }
+        body = {
+            "content": [{"type": "text", "text": json.dumps(review)}],
+            "usage": {"input_tokens": self.input_tokens, "output_tokens": 50},
+            "stop_reason": "end_turn",
+        }
+        return {"body": io.BytesIO(json.dumps(body).encode())}
+
+
+@pytest.fixture
+def runtime(monkeypatch):
+    runtime = BudgetRuntime()
+    monkeypatch.setattr(settings, "disable_bedrock", False)
+    monkeypatch.setattr(bedrock_client, "client", runtime)
+    # Earlier tests report made-up usage; start from an uncalibrated counter
+    monkeypatch.setattr(token_drift, "ratio", 1.0)
+    return runtime
+
+
+def context_window_for(design_tokens: int) -> int:
+    """Window that fits the prompt scaffolding plus ``design_tokens`` of design and the output reserve."""
+    system_prompt, user_message = build_analysis_prompt("", "standard")
+    scaffolding = count_prompt_tokens(system_prompt, user_message)["input_tokens"]
+    return scaffolding + design_tokens + settings.bedrock_min_output_tokens
+
+
+def test_punctuation_heavy_text_costs_more_than_prose():
+    prose = "the load balancer sends traffic to the web tier in two zones"
+    json_text = '{"a":[1,2],"b":{"c":"d"},"e":[{"f":3}]}' + " " * (len(prose) - 38)
+    assert estimate_tokens(prose) == 14  # 12 words, "balancer" and "traffic" split
+    assert estimate_tokens(json_text) > estimate_tokens(prose)
+    assert estimate_tokens("") == 0
+
+
+def test_prompt_count_uses_the_real_system_prompt():
+    system_prompt = build_system_prompt("roast")
+    counts = count_prompt_tokens(system_prompt, "EC2 behind an ALB")
+
+    assert counts["system_prompt_tokens"] == estimate_tokens(system_prompt)
+    assert counts["input_tokens"] == counts["system_prompt_tokens"] + counts["user_message_tokens"]
+    assert estimate_request_cost(system_prompt, "EC2 behind an ALB")["input_tokens"] == counts["input_tokens"]
+
+
+def test_truncate_to_tokens_keeps_a_prefix_within_the_limit():
+    truncated = truncate_to_tokens(DESIGN_TEXT, 50)
+
+    assert DESIGN_TEXT.startswith(truncated)
+    assert 45 <= estimate_tokens(truncated) <= 50
+    assert truncate_to_tokens("EC2 behind an ALB", 50) == "EC2 behind an ALB"
+
+
+def test_drift_tracker_calibrates_towards_reported_usage():
+    tracker = TokenDriftTracker(smoothing=0.5)
+    drift = tracker.record(1000, {"input_tokens": 200, "cache_read_input_tokens": 1000})
+
+    assert drift == {
+        "estimated_input_tokens": 1000,
+        "actual_input_tokens": 1200,
+        "drift_tokens": -200,
+        "drift_pct": -16.67,
+    }
+    assert tracker.ratio == pytest.approx(1.1)
+    assert tracker.calibrate(100) == 110
+    assert tracker.record(1000, {}) == {}  # Nothing reported, nothing learned
+    assert tracker.stats()["calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_max_tokens_capped_by_remaining_context(monkeypatch, runtime):
+    design_tokens = estimate_tokens(DESIGN_TEXT)
+    window = context_window_for(design_tokens) + 500
+    monkeypatch.setattr(settings, "bedrock_context_window_tokens", window)
+
+    review = await analyze_with_bedrock(ReviewRequest(design_text=DESIGN_TEXT), allow_batching=False)
+
+    budget = review.metadata["token_budget"]
+    assert budget["truncated_design_tokens"] == 0
+    assert runtime.bodies[0]["max_tokens"] == window - budget["budgeted_input_tokens"]
+    assert runtime.bodies[0]["max_tokens"] < 4096
+    assert budget["actual_input_tokens"] == 1000
+    assert budget["drift_tokens"] == budget["estimated_input_tokens"] - 1000
+
+
+@pytest.mark.asyncio
+async def test_oversized_design_truncated_before_the_call(monkeypatch, runtime):
+    monkeypatch.setattr(settings, "bedrock_context_window_tokens", context_window_for(100))
+
+    review = await analyze_with_bedrock(ReviewRequest(design_text=DESIGN_TEXT), allow_batching=False)
+
+    sent = runtime.bodies[0]["messages"][0]["content"]
+    sent_text = sent if isinstance(sent, str) else "".join(block["text"] for block in sent)
+    assert DESIGN_TEXT.strip() not in sent_text
+    assert review.metadata["token_budget"]["truncated_design_tokens"] > 0
+    assert runtime.bodies[0]["max_tokens"] >= settings.bedrock_min_output_tokens
+
+
+@pytest.mark.asyncio
+async def test_oversized_design_rejected_without_calling_bedrock(monkeypatch, runtime):
+    monkeypatch.setattr(settings, "bedrock_context_window_tokens", context_window_for(100))
+    monkeypatch.setattr(settings, "oversized_input_policy", "reject")
+
+    with pytest.raises(InputTooLargeException):
+        await analyze_design(ReviewRequest(design_text=DESIGN_TEXT))
+
+    app.state.limiter.enabled = False
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/review", json={"design_text": DESIGN_TEXT})
+    finally:
+        app.state.limiter.enabled = True
+
+    assert response.status_code == 413
+    assert runtime.bodies == []
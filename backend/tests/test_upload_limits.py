@@ -0,0 +1,141 @@
+"""
+Tests for chunked upload reading, magic-byte type checks and the upload size middleware.
+"""
+
+import io
+from typing import Annotated
+
+import httpx
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from starlette.datastructures import Headers
+
+from app.main import app
+from app.middleware.upload_limit import UploadSizeLimitMiddleware
+from app.services.image_processing import UPLOAD_CHUNK_BYTES, read_upload, sniff_content_type
+from app.utils.exceptions import (
+    ImageCorruptedException,
+    ImageTooLargeException,
+    UnsupportedImageFormatException,
+)
+
+PNG_HEADER = b"\x89PNG\r\n\x1a\n" + b"\x00" * 24
+
+
+class CountingFile(io.BytesIO):
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def upload(data: bytes, content_type: str = "image/png", size: int | None = None) -> tuple[UploadFile, CountingFile]:
+    file = CountingFile(data)
+    return UploadFile(filename="upload", file=file, size=size, headers=Headers({"content-type": content_type})), file
+
+
+def test_sniff_content_type():
+    assert sniff_content_type(PNG_HEADER) == "image/png"
+    assert sniff_content_type(b"\xff\xd8\xff\xe0\x00\x10JFIF") == "image/jpeg"
+    assert sniff_content_type(b"RIFF\x10\x00\x00\x00WEBPVP8 ") == "image/webp"
+    assert sniff_content_type(b"%PDF-1.7\n") == "application/pdf"
+    assert sniff_content_type(b"<html><body>not an image") is None
+
+
+@pytest.mark.asyncio
+async def test_known_oversized_upload_rejected_without_reading():
+    file, raw = upload(PNG_HEADER * 1000, size=10_000_000)
+
+    with pytest.raises(ImageTooLargeException):
+        await read_upload(file, max_bytes=1_000_000)
+    assert raw.bytes_read == 0
+
+
+@pytest.mark.asyncio
+async def test_streamed_oversized_upload_stops_at_the_limit():
+    limit = 3 * UPLOAD_CHUNK_BYTES
+    file, raw = upload(PNG_HEADER + b"\x00" * (10 * UPLOAD_CHUNK_BYTES))
+
+    with pytest.raises(ImageTooLargeException):
+        await read_upload(file, max_bytes=limit)
+    assert raw.bytes_read <= limit + UPLOAD_CHUNK_BYTES
+
+
+@pytest.mark.asyncio
+async def test_type_checked_by_magic_bytes_on_the_first_chunk():
+    disguised, raw = upload(b"MZ\x90\x00" + b"\x00" * (4 * UPLOAD_CHUNK_BYTES), content_type="image/png")
+    with pytest.raises(UnsupportedImageFormatException):
+        await read_upload(disguised, max_bytes=10 * UPLOAD_CHUNK_BYTES)
+    assert raw.bytes_read == UPLOAD_CHUNK_BYTES
+
+    mislabelled, _ = upload(PNG_HEADER, content_type="application/octet-stream")
+    data, content_type = await read_upload(mislabelled, max_bytes=1024)
+    assert (data, content_type) == (PNG_HEADER, "image/png")
+
+    empty, _ = upload(b"")
+    with pytest.raises(ImageCorruptedException):
+        await read_upload(empty, max_bytes=1024)
+
+
+def limited_app(max_bytes: int) -> tuple[UploadSizeLimitMiddleware, list]:
+    inner = FastAPI()
+    handled = []
+
+    @inner.post("/upload")
+    async def receive_upload(file: Annotated[UploadFile, File()]):
+        handled.append(file.size)
+        return {"size": file.size}
+
+    return UploadSizeLimitMiddleware(inner, max_bytes=max_bytes), handled
+
+
+@pytest.mark.asyncio
+async def test_middleware_rejects_by_content_length_and_while_streaming():
+    middleware, handled = limited_app(max_bytes=64 * 1024)
+    transport = httpx.ASGITransport(app=middleware)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        small = await client.post("/upload", files={"file": ("d.png", PNG_HEADER, "image/png")})
+        declared = await client.post("/upload", files={"file": ("d.png", b"\x00" * 200_000, "image/png")})
+
+        sent = []
+
+        async def chunked_body():
+            boundary = b"--limit\r\n"
+            yield boundary + b'Content-Disposition: form-data; name="file"; filename="d.png"\r\n\r\n'
+            for _ in range(50):
+                sent.append(16 * 1024)
+                yield b"\x00" * 16 * 1024
+            yield b"\r\n--limit--\r\n"
+
+        streamed = await client.post(
+            "/upload",
+            content=chunked_body(),
+            headers={"content-type": "multipart/form-data; boundary=limit"},
+        )
+
+    assert small.status_code == 200
+    assert declared.status_code == 413
+    assert streamed.status_code == 413
+    assert "exceeds maximum" in streamed.json()["detail"]
+    assert handled == [len(PNG_HEADER)]
+    assert sum(sent) < 50 * 16 * 1024  # Cut off mid-stream, not after the whole body
+
+
+@pytest.mark.asyncio
+async def test_review_endpoint_rejects_disguised_upload():
+    app.state.limiter.enabled = False
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post(
+                "/review", files={"file": ("diagram.png", b"<svg>not really a png</svg>", "image/png")}
+            )
+    finally:
+        app.state.limiter.enabled = True
+
+    assert response.status_code == 400
+    assert "not supported" in response.json()["detail"]
@@ -0,0 +1,163 @@
+"""
+Tests for the vision result cache (exact and perceptual-hash matches).
+"""
+
+import io
+
+import pytest
+from fastapi import UploadFile
+from PIL import Image, ImageDraw
+from starlette.datastructures import Headers
+
+from app.core.config import settings
+from app.services.bedrock import bedrock_client, vision_request_tokens
+from app.services.image_processing import ImageProcessPool
+from app.services.rag import analyze_design_from_image
+from app.services.vision_cache import EXACT, NEAR, VisionCache
+from app.utils.exceptions import ImageProcessingException
+
+DESCRIPTION = (
+    "An Application Load Balancer in a public subnet routes traffic to two EC2 instances "
+    "in one Availability Zone, which read and write an RDS MySQL database without backups."
+)
+
+
+def diagram(boxes: list[tuple[int, int]], size=(1600, 1000), format="PNG", quality=95) -> bytes:
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    scale_x, scale_y = size[0] / 1600, size[1] / 1000
+    previous = None
+    for x, y in boxes:
+        box = (x * scale_x, y * scale_y, (x + 260) * scale_x, (y + 160) * scale_y)
+        draw.rectangle(box, outline="black", width=8, fill=(255, 153, 0))
+        if previous:
+            draw.line((previous[2], previous[3], box[0], box[1]), fill="black", width=8)
+        previous = box
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **({"quality": quality} if format == "JPEG" else {}))
+    return buffer.getvalue()
+
+
+THREE_TIER = [(100, 400), (600, 150), (600, 650), (1150, 400)]
+PIPELINE = [(100, 100), (500, 100), (900, 100), (1300, 100), (1300, 700), (100, 700)]
+
+
+def upload(data: bytes, content_type: str = "image/png") -> UploadFile:
+    return UploadFile(
+        filename="diagram", file=io.BytesIO(data), size=len(data), headers=Headers({"content-type": content_type})
+    )
+
+
+class FakeVision:
+    def __init__(self, valid: bool = True):
+        self.valid = valid
+        self.calls = 0
+        self.image_tokens = []
+
+    async def __call__(self, image_data: str, image_format: str, image_tokens: int | None = None) -> dict:
+        self.calls += 1
+        self.image_tokens.append(image_tokens)
+        return {
+            "is_valid_diagram": self.valid,
+            "confidence": "high",
+            "content_type": "architecture_diagram" if self.valid else "meme",
+            "architecture_description": DESCRIPTION if self.valid else "",
+            "services": ["ALB", "EC2", "RDS"] if self.valid else [],
+            "visual_description": "a diagram" if self.valid else "a cat wearing sunglasses",
+            "usage": {"input_tokens": 1500, "output_tokens": 300},
+            "metadata": {"model_id": settings.bedrock_vision_model_id},
+        }
+
+
+@pytest.fixture
+def vision(monkeypatch):
+    fake = FakeVision()
+    cache = VisionCache(max_entries=10, ttl_seconds=60, hamming_threshold=settings.vision_cache_hamming_threshold)
+    monkeypatch.setattr(settings, "vision_cache_enabled", True)
+    monkeypatch.setattr("app.services.rag.vision_cache", cache)
+    monkeypatch.setattr("app.services.image_processing.image_pool", ImageProcessPool(workers=0, max_concurrent=2))
+    monkeypatch.setattr(bedrock_client, "extract_and_validate_architecture", fake)
+    return fake, cache
+
+
+@pytest.mark.asyncio
+async def test_repeat_and_re_exported_uploads_skip_the_vision_call(vision):
+    fake, cache = vision
+
+    first = await analyze_design_from_image(upload(diagram(THREE_TIER)), "standard", "aws")
+    again = await analyze_design_from_image(upload(diagram(THREE_TIER)), "standard", "aws")
+    re_exported = await analyze_design_from_image(
+        upload(diagram(THREE_TIER, size=(1400, 875), format="JPEG", quality=70), "image/jpeg"), "standard", "aws"
+    )
+
+    assert fake.calls == 1
+    assert first.metadata["vision_cache"] is None
+    assert first.metadata["vision_cost_usd"] > 0
+    assert again.metadata["vision_cache"] == EXACT
+    assert again.metadata["vision_cost_usd"] == 0.0
+    assert again.metadata["vision_cost_saved_usd"] == first.metadata["vision_cost_usd"]
+    assert re_exported.metadata["vision_cache"] == NEAR
+    assert first.metadata["vision_token_estimate"]["actual_input_tokens"] == 1500
+    assert first.metadata["vision_token_estimate"]["estimated_image_tokens"] <= settings.vision_token_budget
+    assert first.metadata["vision_token_estimate"]["trimmed"] is True
+    # The rate governor reserves what this image costs, not a fixed guess
+    assert fake.image_tokens == [first.metadata["vision_token_estimate"]["estimated_image_tokens"]]
+    assert again.metadata["vision_token_estimate"]["actual_input_tokens"] is None  # No call made
+    assert cache.stats()["exact_hits"] == 1 and cache.stats()["near_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_different_diagram_or_shape_is_a_miss(vision):
+    fake, _ = vision
+
+    await analyze_design_from_image(upload(diagram(THREE_TIER)), "standard", "aws")
+    await analyze_design_from_image(upload(diagram(PIPELINE)), "standard", "aws")
+    await analyze_design_from_image(upload(diagram(THREE_TIER, size=(1000, 1000))), "standard", "aws")
+
+    assert fake.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_rejections_are_cached(vision):
+    fake, cache = vision
+    fake.valid = False
+
+    for _ in range(2):
+        with pytest.raises(ImageProcessingException, match="cat wearing sunglasses"):
+            await analyze_design_from_image(upload(diagram(PIPELINE)), "standard", "aws")
+
+    assert fake.calls == 1
+    assert cache.stats()["rejections_served"] == 1
+
+
+@pytest.mark.asyncio
+async def test_degraded_vision_results_are_not_cached(vision, monkeypatch):
+    fake, cache = vision
+
+    async def unavailable(image_data: str, image_format: str, image_tokens: int | None = None) -> dict:
+        fake.calls += 1
+        raise RuntimeError("vision model unavailable")
+
+    monkeypatch.setattr(bedrock_client, "extract_and_validate_architecture", unavailable)
+    monkeypatch.setattr(bedrock_client, "extract_architecture_from_image", unavailable)
+
+    for _ in range(2):
+        with pytest.raises(ImageProcessingException):
+            await analyze_design_from_image(upload(diagram(THREE_TIER)), "standard", "aws")
+
+    assert fake.calls == 4  # Both calls, both times
+    assert cache.stats()["stores"] == 0
+
+
+def test_vision_reservation_scales_with_the_image(monkeypatch):
+    monkeypatch.setattr(settings, "vision_token_budget", 2000)
+    body = {
+        "max_tokens": 2048,
+        "system": "Describe the diagram.",
+        "messages": [{"role": "user", "content": [{"type": "image"}, {"type": "text", "text": "Go."}]}],
+    }
+
+    small, default = vision_request_tokens(body, 300), vision_request_tokens(body)
+
+    assert default - small == 2000 - 300
+    assert 300 + 2048 < small < 300 + 2048 + 20  # Plus the few prompt tokens